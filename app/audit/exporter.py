@@ -1,30 +1,80 @@
 from __future__ import annotations
 
+import base64
 import csv
+import hashlib
+import hmac
 import io
 import json
+import os
+import zlib
 from datetime import datetime, timezone
-from typing import Any, Dict, Iterable, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from app.audit.models import AuditRecord
 from app.audit.redact import redact_obj
 
+CSV_COLUMNS = [
+    "ts",
+    "tenant",
+    "request_id",
+    "incident_id",
+    "decision",
+    "mode",
+    "headers_json",
+    "payload_json",
+]
+MANIFEST_PREFIX = "#manifest "
+_CHUNK = 500
 
-def make_bundle(tenant: str, records: Iterable[AuditRecord]) -> Dict[str, Any]:
-    rows: List[Dict[str, Any]] = []
+
+def _canonical_json(data: Any) -> str:
+    return json.dumps(data, separators=(",", ":"), sort_keys=True, ensure_ascii=False)
+
+
+def encode_cursor(ts: str, request_id: str) -> str:
+    raw = json.dumps([ts, request_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Inverse of :func:`encode_cursor`; raises ``ValueError`` on a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        ts, request_id = json.loads(raw)
+    except Exception as exc:
+        raise ValueError("invalid cursor") from exc
+    return str(ts), str(request_id)
+
+
+def _row(tenant: str, record: AuditRecord) -> Dict[str, Any]:
+    return {
+        "ts": record.ts,
+        "tenant": tenant,
+        "request_id": record.request_id,
+        "incident_id": record.incident_id,
+        "decision": record.decision,
+        "mode": record.mode,
+        "headers": redact_obj(record.headers),
+        "payload": redact_obj(record.payload),
+    }
+
+
+def iter_rows(
+    tenant: str, records: Iterable[AuditRecord], *, chunk: int = _CHUNK
+) -> Iterator[Dict[str, Any]]:
+    """Redacted export rows, pulled and redacted ``chunk`` records at a time."""
+    batch: List[AuditRecord] = []
     for record in records:
-        rows.append(
-            {
-                "ts": record.ts,
-                "tenant": tenant,
-                "request_id": record.request_id,
-                "incident_id": record.incident_id,
-                "decision": record.decision,
-                "mode": record.mode,
-                "headers": redact_obj(record.headers),
-                "payload": redact_obj(record.payload),
-            }
-        )
+        batch.append(record)
+        if len(batch) >= chunk:
+            yield from (_row(tenant, r) for r in batch)
+            batch = []
+    yield from (_row(tenant, r) for r in batch)
+
+
+def make_bundle(tenant: str, records: Iterable[AuditRecord]) -> Dict[str, Any]:
+    rows = list(iter_rows(tenant, records))
     return {
         "tenant": tenant,
         "generated_at": datetime.now(timezone.utc).isoformat(),
@@ -33,32 +83,173 @@ def make_bundle(tenant: str, records: Iterable[AuditRecord]) -> Dict[str, Any]:
     }
 
 
-def bundle_to_csv(bundle: Dict[str, Any]) -> str:
+def _csv_line(values: List[Any]) -> str:
     buffer = io.StringIO()
-    writer = csv.writer(buffer)
-    writer.writerow(
-        [
-            "ts",
-            "tenant",
-            "request_id",
-            "incident_id",
-            "decision",
-            "mode",
-            "headers_json",
-            "payload_json",
-        ]
-    )
-    for record in bundle.get("records", []):
-        writer.writerow(
-            [
-                record.get("ts", ""),
-                record.get("tenant", ""),
-                record.get("request_id", ""),
-                record.get("incident_id", "") or "",
-                record.get("decision", ""),
-                record.get("mode", ""),
-                json.dumps(record.get("headers", {}), ensure_ascii=False),
-                json.dumps(record.get("payload", {}), ensure_ascii=False),
-            ]
-        )
+    csv.writer(buffer).writerow(values)
     return buffer.getvalue()
+
+
+def _csv_values(record: Dict[str, Any]) -> List[Any]:
+    return [
+        record.get("ts", ""),
+        record.get("tenant", ""),
+        record.get("request_id", ""),
+        record.get("incident_id", "") or "",
+        record.get("decision", ""),
+        record.get("mode", ""),
+        json.dumps(record.get("headers", {}), ensure_ascii=False),
+        json.dumps(record.get("payload", {}), ensure_ascii=False),
+    ]
+
+
+def bundle_to_csv(bundle: Dict[str, Any]) -> str:
+    lines = [_csv_line(CSV_COLUMNS)]
+    lines.extend(_csv_line(_csv_values(record)) for record in bundle.get("records", []))
+    return "".join(lines)
+
+
+def _signing_secret() -> str:
+    return os.getenv("AUDIT_EXPORT_SIGNING_SECRET", "")
+
+
+def sign_manifest(manifest: Dict[str, Any], secret: Optional[str] = None) -> Optional[str]:
+    """HMAC-SHA256 over the canonical manifest without its ``signature`` field."""
+    key = _signing_secret() if secret is None else secret
+    if not key:
+        return None
+    body = {k: v for k, v in manifest.items() if k != "signature"}
+    message = _canonical_json(body).encode("utf-8")
+    return hmac.new(key.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+
+def verify_manifest(
+    manifest: Dict[str, Any],
+    *,
+    count: int,
+    sha256: str,
+    secret: Optional[str] = None,
+) -> bool:
+    """Check a received manifest against the records actually read (and its signature)."""
+    if manifest.get("count") != count or manifest.get("sha256") != sha256:
+        return False
+    if secret:
+        expected = sign_manifest(manifest, secret)
+        return hmac.compare_digest(str(manifest.get("signature") or ""), expected or "")
+    return True
+
+
+class ExportStream:
+    """
+    Encodes export rows as ``ndjson``, ``json`` or ``csv`` while they are read.
+
+    Each record carries a resume ``cursor``. The manifest written last holds
+    whether the store capped the read (``truncated``; continue from
+    ``cursor``), the record count, the SHA-256 of the canonical record lines (one
+    sort-keyed JSON object per line, identical to the NDJSON body) and an
+    HMAC signature when ``AUDIT_EXPORT_SIGNING_SECRET`` is set:
+
+    - ``ndjson``: one record per line, then ``{"manifest": {...}}``;
+    - ``json``: the bundle schema with a trailing ``"manifest"`` key;
+    - ``csv``: the bundle CSV, then one ``#manifest {...}`` comment line.
+
+    With ``gzip=True`` the bytes are gzip-compressed, flushed every chunk.
+    """
+
+    def __init__(
+        self,
+        tenant: str,
+        records: Iterable[AuditRecord],
+        *,
+        fmt: str = "ndjson",
+        after: Optional[str] = None,
+        gzip: bool = False,
+        chunk: int = _CHUNK,
+    ) -> None:
+        if fmt not in ("ndjson", "json", "csv"):
+            raise ValueError(f"unsupported format: {fmt}")
+        self.tenant = tenant
+        self.records = records
+        self.fmt = fmt
+        self.after = after
+        self.chunk = max(1, int(chunk))
+        self.generated_at = datetime.now(timezone.utc).isoformat()
+        self.count = 0
+        self.cursor: Optional[str] = after
+        self._digest = hashlib.sha256()
+        self._gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
+
+    @property
+    def media_type(self) -> str:
+        if self._gzip is not None:
+            return "application/gzip"
+        return {
+            "ndjson": "application/x-ndjson",
+            "json": "application/json",
+            "csv": "text/csv; charset=utf-8",
+        }[self.fmt]
+
+    @property
+    def filename(self) -> str:
+        return f"bundle.{self.fmt}" + (".gz" if self._gzip is not None else "")
+
+    def manifest(self) -> Dict[str, Any]:
+        manifest: Dict[str, Any] = {
+            "tenant": self.tenant,
+            "generated_at": self.generated_at,
+            "after": self.after,
+            "cursor": self.cursor,
+            "count": self.count,
+            "sha256": self._digest.hexdigest(),
+            "truncated": bool(getattr(self.records, "truncated", False)),
+        }
+        manifest["signature"] = sign_manifest(manifest)
+        return manifest
+
+    def _head(self) -> str:
+        if self.fmt == "json":
+            head = {"tenant": self.tenant, "generated_at": self.generated_at}
+            return json.dumps(head, ensure_ascii=False)[:-1] + ',"records":['
+        if self.fmt == "csv":
+            return _csv_line(CSV_COLUMNS)
+        return ""
+
+    def _record(self, row: Dict[str, Any]) -> str:
+        self.cursor = encode_cursor(row["ts"], row["request_id"])
+        row["cursor"] = self.cursor
+        line = _canonical_json(row)
+        self._digest.update(line.encode("utf-8"))
+        self._digest.update(b"\n")
+        self.count += 1
+        if self.fmt == "ndjson":
+            return line + "\n"
+        if self.fmt == "json":
+            return ("," if self.count > 1 else "") + line
+        return _csv_line(_csv_values(row))
+
+    def _tail(self) -> str:
+        manifest = self.manifest()
+        if self.fmt == "json":
+            return f'],"count":{self.count},"manifest":{_canonical_json(manifest)}}}'
+        if self.fmt == "csv":
+            return MANIFEST_PREFIX + _canonical_json(manifest) + "\n"
+        return _canonical_json({"manifest": manifest}) + "\n"
+
+    def _encode(self, text: str, *, last: bool = False) -> bytes:
+        data = text.encode("utf-8")
+        if self._gzip is None:
+            return data
+        out = self._gzip.compress(data)
+        return out + self._gzip.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+    def __iter__(self) -> Iterator[bytes]:
+        head = self._head()
+        if head:
+            yield self._encode(head)
+        parts: List[str] = []
+        for row in iter_rows(self.tenant, self.records, chunk=self.chunk):
+            parts.append(self._record(row))
+            if len(parts) >= self.chunk:
+                yield self._encode("".join(parts))
+                parts = []
+        parts.append(self._tail())
+        yield self._encode("".join(parts), last=True)
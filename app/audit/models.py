@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 
 @dataclass(frozen=True)
@@ -28,3 +28,55 @@ class AuditStore:
         limit: int = 10_000,
     ) -> List[AuditRecord]:
         raise NotImplementedError
+
+    def iter_records(
+        self,
+        tenant: str,
+        start_iso: Optional[str] = None,
+        end_iso: Optional[str] = None,
+        incident_id: Optional[str] = None,
+        after: Optional[Tuple[str, str]] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[AuditRecord]:
+        """
+        Records ordered by ``(ts, request_id)``, strictly after ``after``.
+
+        Stores backed by a database should override this with keyset pages so
+        exports run in constant memory; the default sorts one :meth:`query`
+        capped at ``limit`` (10 000 when unset), starting no earlier than the
+        cursor's timestamp. The returned :class:`CappedRecords` reports
+        whether the cap was hit.
+        """
+        if after is not None:
+            start_iso = after[0] if start_iso is None else max(start_iso, after[0])
+        cap = limit if limit is not None else 10_000
+        rows = self.query(
+            tenant=tenant,
+            start_iso=start_iso,
+            end_iso=end_iso,
+            incident_id=incident_id,
+            limit=cap,
+        )
+        return CappedRecords(rows, truncated=len(rows) >= cap, after=after)
+
+
+class CappedRecords(Iterator[AuditRecord]):
+    """Sorted records of one capped query, strictly after ``after``.
+
+    ``truncated`` is true when the query returned as many rows as its cap,
+    so more records may follow; resume from the last record's cursor.
+    """
+
+    def __init__(
+        self,
+        rows: List[AuditRecord],
+        *,
+        truncated: bool = False,
+        after: Optional[Tuple[str, str]] = None,
+    ) -> None:
+        self.truncated = truncated
+        ordered = sorted(rows, key=lambda r: (r.ts, r.request_id))
+        self._rows = iter([r for r in ordered if after is None or (r.ts, r.request_id) > after])
+
+    def __next__(self) -> AuditRecord:
+        return next(self._rows)
@@ -1,13 +1,134 @@
 from __future__ import annotations
 
 import hashlib
+import os
 import re
-from typing import Dict, Tuple
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Pattern, Tuple
 
 from app.config import get_settings
 
-_EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
-_PHONE_RE = re.compile(r"(?:\+?\d{1,3}[\s\-\.]?)?(?:\(?\d{3}\)?[\s\-\.]?)\d{3}[\s\-\.]?\d{4}")
+_EMAIL = r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}"
+_PHONE = r"(?:\+?\d{1,3}[\s\-\.]?)?(?:\(?\d{3}\)?[\s\-\.]?)\d{3}[\s\-\.]?\d{4}"
+_EMAIL_RE = re.compile(_EMAIL)
+_PHONE_RE = re.compile(_PHONE)
+
+# One scanner per enabled-family combination; emails win ties at a position.
+_SCANNERS: Dict[Tuple[bool, bool], Optional[Pattern[str]]] = {
+    (True, True): re.compile(f"(?P<email>{_EMAIL})|(?P<phone>{_PHONE})"),
+    (True, False): re.compile(f"(?P<email>{_EMAIL})"),
+    (False, True): re.compile(f"(?P<phone>{_PHONE})"),
+    (False, False): None,
+}
+_TOKENS = {"email": ("pii:email", "[EMAIL:{}]"), "phone": ("pii:phone", "[PHONE:{}]")}
+
+_SETTINGS_ENV = ("PII_SALT", "PII_HASH_ALGO", "PII_EMAIL_HASH_ENABLED", "PII_PHONE_HASH_ENABLED")
+
+
+class _DigestCache:
+    """Bounded LRU of salted digests keyed by normalized value."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max(0, int(max_entries))
+        self._data: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            digest = self._data.get(key)
+            if digest is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return digest
+
+    def put(self, key: str, digest: str) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = digest
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+@dataclass(frozen=True)
+class PiiSettings:
+    salt: str
+    algo: str
+    email: bool
+    phone: bool
+    fingerprint: Tuple[object, ...]
+    digests: _DigestCache = field(compare=False, repr=False)
+
+
+def _fingerprint() -> Tuple[object, ...]:
+    try:
+        env_file: object = os.stat(".env").st_mtime_ns
+    except OSError:
+        env_file = None
+    return tuple(os.environ.get(k) for k in _SETTINGS_ENV) + (env_file,)
+
+
+def _cache_max() -> int:
+    try:
+        return int(os.getenv("PII_HASH_CACHE_MAX", "8192"))
+    except ValueError:
+        return 8192
+
+
+_PINNED: Optional[PiiSettings] = None
+_PIN_LOCK = threading.Lock()
+
+
+def pinned_settings() -> PiiSettings:
+    """
+    Settings snapshot used for hashing, rebuilt only when a ``PII_*`` env var
+    or ``.env`` changes. Digests are cached per snapshot and carried over
+    while the salt and algorithm stay the same.
+    """
+    global _PINNED
+    fp = _fingerprint()
+    snap = _PINNED
+    if snap is not None and snap.fingerprint == fp:
+        return snap
+    with _PIN_LOCK:
+        snap = _PINNED
+        if snap is not None and snap.fingerprint == fp:
+            return snap
+        s = get_settings()
+        salt, algo = s.PII_SALT, s.PII_HASH_ALGO
+        same_key = snap is not None and (snap.salt, snap.algo) == (salt, algo)
+        fresh = PiiSettings(
+            salt=salt,
+            algo=algo,
+            email=bool(s.PII_EMAIL_HASH_ENABLED),
+            phone=bool(s.PII_PHONE_HASH_ENABLED),
+            fingerprint=fp,
+            digests=snap.digests if snap is not None and same_key else _DigestCache(_cache_max()),
+        )
+        _PINNED = fresh
+        return fresh
+
+
+def refresh_settings() -> PiiSettings:
+    """Drop the pinned snapshot (and its cached digests) and rebuild it."""
+    global _PINNED
+    with _PIN_LOCK:
+        _PINNED = None
+    return pinned_settings()
 
 
 def _salted_hash(value: str, salt: str, algo: str) -> str:
@@ -20,44 +141,50 @@ def _salted_hash(value: str, salt: str, algo: str) -> str:
     return h.hexdigest()
 
 
+def _digest(value: str, s: PiiSettings) -> str:
+    key = value.strip().lower()
+    digest = s.digests.get(key)
+    if digest is None:
+        digest = _salted_hash(key, s.salt, s.algo)
+        s.digests.put(key, digest)
+    return digest
+
+
 def hash_email(email: str) -> str:
-    s = get_settings()
-    return _salted_hash(email, s.PII_SALT, s.PII_HASH_ALGO)
+    return _digest(email, pinned_settings())
 
 
 def hash_phone(phone: str) -> str:
-    s = get_settings()
-    return _salted_hash(phone, s.PII_SALT, s.PII_HASH_ALGO)
+    return _digest(phone, pinned_settings())
 
 
 def redact_and_hash(text: str) -> Tuple[str, Dict[str, int]]:
     """
     Replace emails/phones with hashed tokens. Returns (sanitized_text, counters).
     Counters include families like 'pii:email' and 'pii:phone'.
+
+    Both families are found in one scan of the input and the output is joined
+    once. Where an email and a phone start at the same position the email wins.
     """
     if not text:
         return text, {}
 
-    s = get_settings()
+    s = pinned_settings()
+    scanner = _SCANNERS[(s.email, s.phone)]
+    if scanner is None:
+        return text, {}
+
     counters: Dict[str, int] = {}
-    out = text
-
-    if s.PII_EMAIL_HASH_ENABLED:
-        emails = list(_EMAIL_RE.finditer(out))
-        if emails:
-            counters["pii:email"] = counters.get("pii:email", 0) + len(emails)
-            for m in reversed(emails):
-                token = f"[EMAIL:{hash_email(m.group(0))[:12]}]"
-                start, end = m.span()
-                out = out[:start] + token + out[end:]
-
-    if s.PII_PHONE_HASH_ENABLED:
-        phones = list(_PHONE_RE.finditer(out))
-        if phones:
-            counters["pii:phone"] = counters.get("pii:phone", 0) + len(phones)
-            for m in reversed(phones):
-                token = f"[PHONE:{hash_phone(m.group(0))[:12]}]"
-                start, end = m.span()
-                out = out[:start] + token + out[end:]
-
-    return out, counters
+    parts: List[str] = []
+    last = 0
+    for m in scanner.finditer(text):
+        family, template = _TOKENS[m.lastgroup or "email"]
+        start, end = m.span()
+        parts.append(text[last:start])
+        parts.append(template.format(_digest(m.group(0), s)[:12]))
+        last = end
+        counters[family] = counters.get(family, 0) + 1
+    if not parts:
+        return text, counters
+    parts.append(text[last:])
+    return "".join(parts), counters
@@ -152,6 +152,16 @@ try:
     AUDIT_RECENT_LIMIT = int(os.getenv("AUDIT_RECENT_LIMIT", "500"))
 except ValueError:
     AUDIT_RECENT_LIMIT = 500
+# AUDIT_BACKEND=segments: time-bucketed segment files under AUDIT_SEGMENT_DIR.
+AUDIT_SEGMENT_DIR = os.getenv("AUDIT_SEGMENT_DIR", "var/audit").strip() or "var/audit"
+try:
+    AUDIT_SEGMENT_SECONDS = float(os.getenv("AUDIT_SEGMENT_SECONDS", "3600"))
+except ValueError:
+    AUDIT_SEGMENT_SECONDS = 3600.0
+try:
+    AUDIT_FSYNC_EVERY = int(os.getenv("AUDIT_FSYNC_EVERY", "64"))
+except ValueError:
+    AUDIT_FSYNC_EVERY = 64
 # --- Admin UI auth / RBAC ---
 ADMIN_AUTH_MODE = os.getenv("ADMIN_AUTH_MODE", "cookie")  # "disabled" | "cookie" | "oidc"
 ADMIN_RBAC_DEFAULT_ROLE = os.getenv("ADMIN_RBAC_DEFAULT_ROLE", "viewer")
@@ -172,6 +182,8 @@ SERVICE_TOKEN_USE_REDIS = os.getenv("SERVICE_TOKEN_USE_REDIS", "").lower() in (
     "on",
 )
 SERVICE_TOKEN_REDIS_PREFIX = os.getenv("SERVICE_TOKEN_REDIS_PREFIX", "guardrail:svc_tokens")
+SERVICE_TOKEN_CACHE_MAX = int(os.getenv("SERVICE_TOKEN_CACHE_MAX", "4096"))
+SERVICE_TOKEN_REVOCATION_SYNC_MS = int(os.getenv("SERVICE_TOKEN_REVOCATION_SYNC_MS", "1000"))
 
 
 # OIDC configuration for admin UI/API session auth
@@ -200,3 +212,6 @@ OIDC_DEFAULT_ROLE = (os.getenv("OIDC_DEFAULT_ROLE", "viewer") or "").strip() or
 OIDC_EMAIL_CLAIM = (os.getenv("OIDC_EMAIL_CLAIM", "email") or "").strip()
 OIDC_NAME_CLAIM = (os.getenv("OIDC_NAME_CLAIM", "name") or "").strip()
 OIDC_LOGOUT_URL = (os.getenv("OIDC_LOGOUT_URL", "") or "").strip()
+OIDC_CACHE_TTL_S = float(os.getenv("OIDC_CACHE_TTL_S", "3600"))
+OIDC_CACHE_MAX_STALE_S = float(os.getenv("OIDC_CACHE_MAX_STALE_S", "86400"))
+OIDC_JWKS_REFETCH_MIN_S = float(os.getenv("OIDC_JWKS_REFETCH_MIN_S", "30"))
@@ -1,14 +1,22 @@
-"""Redis-backed idempotency store with ownership tokens and replay bump."""
+"""Redis-backed idempotency store with ownership tokens and replay bump.
+
+Stored responses live in a hash (``status``, ``headers``, raw ``body`` bytes,
+``content_type``, ``stored_at``, ``replay_count``, ``body_sha256``). Leader
+completion is published on ``<ns>:<tenant>:done`` so waiting followers wake
+as soon as the value lands instead of polling.
+"""
 
 from __future__ import annotations
 
+import asyncio
 import base64
 import json
 import secrets
 import time
-from typing import Any, List, Mapping, Optional, Tuple, cast
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple, cast
 
 from redis.asyncio import Redis
+from redis.exceptions import ResponseError
 
 from app.idempotency.store import (
     IdempotencyResult,
@@ -23,7 +31,8 @@ def _ns(ns: str, *parts: str) -> str:
     return ":".join((ns, *parts))
 
 
-# Lua: conditional lock release by owner; set state to "released" with TTL.
+# Lua: conditional lock release by owner; set state to "released" with TTL and
+# notify followers on the completion channel (ARGV[3]) with the key (ARGV[4]).
 _RELEASE_LUA = """
 local lock_key = KEYS[1]
 local state_key = KEYS[2]
@@ -41,40 +50,45 @@ if decoded and decoded.owner == owner then
   else
     redis.call('SET', state_key, 'released')
   end
+  redis.call('PUBLISH', ARGV[3], ARGV[4])
   return 1
 end
 return 0
 """
 
 
-# Lua: increment replay_count; preserve TTL.
-# ARGV[1] = touch ttl seconds or "-1" to preserve PTTL
+# Lua: increment replay_count on an existing value hash. HINCRBY keeps the TTL.
 _BUMP_REPLAY_LUA = """
-local value_key = KEYS[1]
-local touch_ex = tonumber(ARGV[1])  -- -1 => preserve PTTL
-local v = redis.call('GET', value_key)
-if not v then
-  return nil
-end
-local obj = cjson.decode(v)
-if not obj then
+if redis.call('EXISTS', KEYS[1]) == 0 then
   return nil
 end
-obj.replay_count = (obj.replay_count or 0) + 1
-local new_v = cjson.encode(obj)
-
-local pttl = redis.call('PTTL', value_key)
-if touch_ex and touch_ex >= 0 then
-  redis.call('SET', value_key, new_v, 'EX', touch_ex)
-elseif pttl and pttl > 0 then
-  redis.call('SET', value_key, new_v, 'PX', pttl)
-else
-  redis.call('SET', value_key, new_v)
-end
-
-return obj.replay_count
+return redis.call('HINCRBY', KEYS[1], 'replay_count', 1)
 """
 
+_VALUE_FIELDS = (b"replay_count", b"stored_at", b"content_type", b"body_sha256")
+
+
+def _text(raw: Any) -> Optional[str]:
+    if raw is None:
+        return None
+    if isinstance(raw, (bytes, bytearray)):
+        return raw.decode("utf-8", "replace")
+    return str(raw)
+
+
+def _decode_legacy(raw: Any) -> StoredResponse:
+    """Decode a pre-hash JSON/base64 value still alive from an older release."""
+    data = json.loads(raw)
+    return StoredResponse(
+        status=int(data["status"]),
+        headers={k.lower(): v for k, v in data.get("headers", {}).items()},
+        body=base64.b64decode(data["body_b64"]),
+        content_type=data.get("content_type"),
+        stored_at=float(data.get("stored_at", 0.0)),
+        replay_count=int(data.get("replay_count", 0)),
+        body_sha256=str(data.get("body_sha256", "")),
+    )
+
 
 class RedisIdemStore(IdemStore):
     """Redis-based idempotency store leveraging ownership for single-flight."""
@@ -92,6 +106,14 @@ class RedisIdemStore(IdemStore):
         self.tenant = tenant
         self.recent_limit = recent_limit
         self.release_state_ttl = int(release_state_ttl)
+        self._waiters: Dict[str, Set[asyncio.Event]] = {}
+        self._listener: Optional[asyncio.Task[None]] = None
+        self._listener_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribed: Optional[asyncio.Event] = None
+
+    @property
+    def done_channel(self) -> str:
+        return _ns(self.ns, self.tenant, "done")
 
     def _k(self, key: str, suffix: str) -> str:
         return _ns(self.ns, self.tenant, key, suffix)
@@ -130,38 +152,45 @@ class RedisIdemStore(IdemStore):
         return False, None
 
     async def get(self, key: str) -> Optional[StoredResponse]:
-        raw = await self.r.get(self._k(key, "value"))
-        if not raw:
+        value_key = self._k(key, "value")
+        try:
+            data = await self.r.hgetall(value_key)
+        except ResponseError:
+            raw = await self.r.get(value_key)
+            return _decode_legacy(raw) if raw else None
+        if not data:
             return None
-        data = json.loads(raw)
-        body = base64.b64decode(data["body_b64"])
-        headers: Mapping[str, str] = {k.lower(): v for k, v in data.get("headers", {}).items()}
+        headers: Mapping[str, str] = json.loads(data.get(b"headers") or b"{}")
         return StoredResponse(
-            status=int(data["status"]),
+            status=int(data[b"status"]),
             headers=headers,
-            body=body,
-            content_type=data.get("content_type"),
-            stored_at=float(data.get("stored_at", 0.0)),
-            replay_count=int(data.get("replay_count", 0)),
-            body_sha256=str(data.get("body_sha256", "")),
+            body=bytes(data.get(b"body") or b""),
+            content_type=_text(data.get(b"content_type")) or None,
+            stored_at=float(data.get(b"stored_at") or 0.0),
+            replay_count=int(data.get(b"replay_count") or 0),
+            body_sha256=_text(data.get(b"body_sha256")) or "",
         )
 
     async def put(self, key: str, resp: StoredResponse, ttl_s: int) -> None:
         # Persist ALL headers (lower-cased) so custom/security headers replay.
         norm_headers = {k.lower(): v for k, v in resp.headers.items()}
-        value = {
+        value_key = self._k(key, "value")
+        mapping: Mapping[str | bytes, bytes | str | int | float] = {
             "status": int(resp.status),
-            "headers": norm_headers,
-            "body_b64": base64.b64encode(resp.body).decode("ascii"),
-            "content_type": resp.content_type,
+            "headers": json.dumps(norm_headers),
+            "body": resp.body,
+            "content_type": resp.content_type or "",
             "stored_at": float(resp.stored_at or time.time()),
             "replay_count": int(resp.replay_count),
             "body_sha256": resp.body_sha256,
         }
         pipe = self.r.pipeline()
-        pipe.set(self._k(key, "value"), json.dumps(value), ex=ttl_s)
+        pipe.delete(value_key)
+        pipe.hset(value_key, mapping=mapping)
+        pipe.expire(value_key, ttl_s)
         pipe.set(self._k(key, "state"), "stored", ex=ttl_s)
         pipe.delete(self._k(key, "lock"))
+        pipe.publish(self.done_channel, key)
         await pipe.execute()
 
     async def release(self, key: str, owner: Optional[str] = None) -> bool:
@@ -175,14 +204,85 @@ class RedisIdemStore(IdemStore):
             res = await self.r.delete(lock_key)
             if res:
                 await self.r.set(state_key, "released", ex=self.release_state_ttl)
+                await self.r.publish(self.done_channel, key)
             return bool(res)
         try:
             ttl = str(self.release_state_ttl)
-            res = await self._eval(_RELEASE_LUA, 2, lock_key, state_key, owner, ttl)
+            res = await self._eval(
+                _RELEASE_LUA, 2, lock_key, state_key, owner, ttl, self.done_channel, key
+            )
         except Exception:
             return False
         return bool(res)
 
+    async def wait_released(self, key: str, timeout: float) -> bool:
+        """
+        Block until the leader for ``key`` stores a value or releases the lock.
+        Returns True when signalled (or already settled), False on timeout.
+        All followers share one pub/sub subscription per store and event loop.
+        """
+        event = asyncio.Event()
+        self._waiters.setdefault(key, set()).add(event)
+        try:
+            await asyncio.wait_for(self._wait_released(key, event), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            waiters = self._waiters.get(key)
+            if waiters is not None:
+                waiters.discard(event)
+                if not waiters:
+                    self._waiters.pop(key, None)
+
+    async def _wait_released(self, key: str, event: asyncio.Event) -> None:
+        await self._ensure_listener()
+        # The leader may have finished before our subscription was live.
+        if not await self.r.exists(self._k(key, "lock")):
+            return
+        await event.wait()
+
+    async def _ensure_listener(self) -> None:
+        loop = asyncio.get_running_loop()
+        task = self._listener
+        if task is None or task.done() or self._listener_loop is not loop:
+            self._subscribed = asyncio.Event()
+            self._listener_loop = loop
+            self._listener = loop.create_task(self._listen(self._subscribed))
+        assert self._subscribed is not None
+        await self._subscribed.wait()
+
+    async def _listen(self, ready: asyncio.Event) -> None:
+        pubsub = self.r.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(self.done_channel)
+            ready.set()
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                key = _text(message.get("data")) or ""
+                for event in tuple(self._waiters.get(key, ())):
+                    event.set()
+        finally:
+            # Unblock waiters; they fall back to their own timeout.
+            ready.set()
+            try:
+                # redis>=5 renamed close() to aclose(); the stubs only know close().
+                aclose = getattr(pubsub, "aclose", None)
+                await (aclose() if aclose is not None else pubsub.close())
+            except Exception:
+                pass
+
+    async def close(self) -> None:
+        """Stop the completion listener (if running)."""
+        task, self._listener = self._listener, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
     async def meta(self, key: str) -> Mapping[str, Any]:
         state = await self.r.get(self._k(key, "state"))
         lock_raw = await self.r.get(self._k(key, "lock"))
@@ -232,7 +332,7 @@ class RedisIdemStore(IdemStore):
         """Atomically increment replay_count preserving TTL."""
         value_key = self._k(key, "value")
         try:
-            new_count = await self._eval(_BUMP_REPLAY_LUA, 1, value_key, str(-1))
+            new_count = await self._eval(_BUMP_REPLAY_LUA, 1, value_key)
         except Exception:
             return None
         if new_count is None:
@@ -270,7 +370,8 @@ class RedisIdemStore(IdemStore):
         pipe.pttl(state_key)
         pipe.get(lock_key)
         pipe.pttl(lock_key)
-        pipe.get(value_key)
+        pipe.hmget(value_key, list(_VALUE_FIELDS))
+        pipe.hstrlen(value_key, "body")
         pipe.pttl(value_key)
         pipe.zscore(first_zkey, key)
         (
@@ -278,10 +379,16 @@ class RedisIdemStore(IdemStore):
             state_pttl,
             raw_lock,
             lock_pttl,
-            raw_value,
+            raw_fields,
+            body_len,
             value_pttl,
             first_seen_score,
-        ) = await pipe.execute()
+        ) = await pipe.execute(raise_on_error=False)
+        if isinstance(raw_fields, Exception):
+            raw_fields, body_len = None, 0
+        raw_value = dict(zip(_VALUE_FIELDS, raw_fields)) if raw_fields else {}
+        if raw_value.get(b"stored_at") is None:
+            raw_value = {}
 
         now = time.time()
         expires_candidates: List[float] = []
@@ -327,19 +434,11 @@ class RedisIdemStore(IdemStore):
         size_bytes = 0
         content_type: Optional[str] = None
         if raw_value:
-            try:
-                value_obj = json.loads(raw_value)
-            except Exception:
-                value_obj = {}
-            replay_count = int(value_obj.get("replay_count") or 0)
-            stored_at = float(value_obj.get("stored_at") or 0.0)
-            content_type = value_obj.get("content_type")
-            payload_fp = value_obj.get("body_sha256") or payload_fp
-            try:
-                body_b64 = value_obj.get("body_b64") or ""
-                size_bytes = len(base64.b64decode(body_b64))
-            except Exception:
-                size_bytes = 0
+            replay_count = int(raw_value.get(b"replay_count") or 0)
+            stored_at = float(raw_value.get(b"stored_at") or 0.0)
+            content_type = _text(raw_value.get(b"content_type")) or None
+            payload_fp = _text(raw_value.get(b"body_sha256")) or payload_fp
+            size_bytes = int(body_len or 0)
             value_exp = _ttl_to_expiry(value_pttl)
             if value_exp:
                 expires_candidates.append(value_exp)
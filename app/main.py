@@ -10,7 +10,7 @@ import pkgutil
 import time
 from contextlib import asynccontextmanager, suppress
 from pathlib import Path
-from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
 
 from fastapi import FastAPI, Header, HTTPException, Query, Request
 from fastapi.responses import JSONResponse
@@ -73,6 +73,9 @@ from app.services.license import initialize_license_from_env
 from app.services.redis_runtime import runtime_warmup
 from app.telemetry.tracing import TracingMiddleware
 
+if TYPE_CHECKING:
+    from app.services.purge_engine import PurgeEngine
+
 RequestHandler = Callable[[StarletteRequest], Awaitable[StarletteResponse]]
 
 log = logging.getLogger(__name__)
@@ -121,15 +124,34 @@ def _parse_int_env(name: str, default: int) -> int:
 _PRUNE_INTERVAL_SECONDS = _parse_int_env("DECISIONS_PRUNE_INTERVAL_SECONDS", 3600)
 
 
+def _decisions_purge_engine() -> PurgeEngine:
+    from app.services.purge_engine import InMemoryCursorStore, engine_from_settings
+    from app.services.purge_targets import DecisionsSQL
+    from app.services.retention import Resource
+
+    return engine_from_settings({Resource.DECISIONS.value: DecisionsSQL()}, InMemoryCursorStore())
+
+
 async def _prune_loop() -> None:
     interval = max(_PRUNE_INTERVAL_SECONDS, 1)
+    engine: Optional[PurgeEngine] = None
     while True:
         try:
             from app.services import decisions as decisions_store
+            from app.services.purge_engine import PurgeJob
+            from app.services.retention import Resource
         except Exception as exc:
             _log.debug("import decisions store failed: %s", exc)
         else:
-            _best_effort("prune decisions", lambda: decisions_store.prune())
+            try:
+                if engine is None:
+                    engine = _decisions_purge_engine()
+                cutoff = decisions_store.prune_cutoff().timestamp()
+                # Range deletes under the RETENTION_PURGE_* row budget and
+                # latency backpressure, each chunk in a worker thread.
+                await engine.drain(PurgeJob("*", Resource.DECISIONS.value, cutoff))
+            except Exception as exc:
+                _log.debug("prune decisions failed: %s", exc)
         try:
             await asyncio.sleep(interval)
         except Exception:
@@ -150,54 +172,67 @@ def _start_prune_task(app: FastAPI) -> None:
     _best_effort("start prune loop", _start)
 
 
-_RATE_HEADERS = ("X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset")
-_QUOTA_HEADERS = (
-    "X-Quota-Day",
-    "X-Quota-Hour",
-    "X-Quota-Min",
-    "X-Quota-Remaining",
-    "X-Quota-Reset",
+def _start_purge_task(app: FastAPI) -> None:
+    """
+    Start the continuous retention purge worker once, if RETENTION_WORKER_ENABLED.
+    """
+    if getattr(app.state, "purge_task", None):
+        return
+    try:
+        from app import settings as _settings
+        from app.workers import purge_worker
+    except Exception as exc:
+        _log.debug("import purge worker failed: %s", exc)
+        return
+    if not _settings.RETENTION_WORKER_ENABLED:
+        return
+
+    def _start() -> None:
+        app.state.purge_task = asyncio.create_task(purge_worker.run_forever())
+
+    _best_effort("start purge worker", _start)
+
+
+_QUOTA_DEFAULTS = (
+    ("X-Quota-Day", "0"),
+    ("X-Quota-Hour", "0"),
+    ("X-Quota-Min", "0"),
+    ("X-Quota-Remaining", "0"),
+    ("X-Quota-Reset", "60"),
 )
 
 
 def _safe_headers_copy(src_headers) -> dict[str, str]:
     out: dict[str, str] = {}
+    rid: Optional[str] = None
     try:
         for k, v in src_headers.raw:
-            out.setdefault(k.decode("latin-1"), v.decode("latin-1"))
+            key = k.decode("latin-1")
+            if key.lower() == "x-request-id":
+                if rid is None:
+                    rid = v.decode("latin-1")
+                continue
+            out.setdefault(key, v.decode("latin-1"))
     except Exception as exc:
         _log.debug("copy raw headers failed: %s", exc)
         try:
             for k, v in src_headers.items():
+                if k.lower() == "x-request-id":
+                    if rid is None:
+                        rid = v
+                    continue
                 out.setdefault(k, v)
         except Exception as inner_exc:
             _log.debug("copy mapped headers failed: %s", inner_exc)
-    rid: Optional[str] = None
-    for key in list(out.keys()):
-        if key.lower() == "x-request-id":
-            rid = out[key]
-            if key != "X-Request-ID":
-                out.pop(key)
     rid = rid or get_request_id()
     if rid:
         out["X-Request-ID"] = rid
-    now = int(time.time())
-    defaults = {
-        "X-RateLimit-Limit": "60",
-        "X-RateLimit-Remaining": "3600",
-        "X-RateLimit-Reset": str(now + 60),
-    }
-    quota_defaults = {
-        "X-Quota-Day": "0",
-        "X-Quota-Hour": "0",
-        "X-Quota-Min": "0",
-        "X-Quota-Remaining": "0",
-        "X-Quota-Reset": "60",
-    }
-    for k in _RATE_HEADERS:
-        out.setdefault(k, defaults[k])
-    for k in _QUOTA_HEADERS:
-        out.setdefault(k, quota_defaults[k])
+    out.setdefault("X-RateLimit-Limit", "60")
+    out.setdefault("X-RateLimit-Remaining", "3600")
+    if "X-RateLimit-Reset" not in out:
+        out["X-RateLimit-Reset"] = str(int(time.time()) + 60)
+    for k, v in _QUOTA_DEFAULTS:
+        out.setdefault(k, v)
     return out
 
 
@@ -257,40 +292,6 @@ class _NormalizeUnauthorizedMiddleware(BaseHTTPMiddleware):
         return JSONResponse(payload, status_code=401, headers=headers)
 
 
-class _CompatHeadersMiddleware(BaseHTTPMiddleware):
-    async def dispatch(
-        self, request: StarletteRequest, call_next: RequestHandler
-    ) -> StarletteResponse:
-        resp: StarletteResponse = await call_next(request)
-        if not resp.headers.get("X-Content-Type-Options"):
-            resp.headers["X-Content-Type-Options"] = "nosniff"
-        if not resp.headers.get("X-Frame-Options"):
-            resp.headers["X-Frame-Options"] = "DENY"
-        rp_env = os.getenv("SEC_HEADERS_REFERRER_POLICY")
-        if not resp.headers.get("Referrer-Policy"):
-            resp.headers["Referrer-Policy"] = rp_env if rp_env else "no-referrer"
-        pp = os.getenv("SEC_HEADERS_PERMISSIONS_POLICY")
-        if pp:
-            resp.headers["Permissions-Policy"] = pp
-        path = request.url.path
-        if path.startswith("/guardrail") and not path.startswith("/v1/"):
-            resp.headers.setdefault("Deprecation", "true")
-        if _truthy(os.getenv("CORS_ENABLED", "0")):
-            origin = request.headers.get("origin") or request.headers.get("Origin")
-            if origin:
-                allowed = [
-                    o.strip()
-                    for o in (os.getenv("CORS_ALLOW_ORIGINS") or "").split(",")
-                    if o.strip()
-                ]
-                if "*" in allowed or origin in allowed:
-                    resp.headers["Access-Control-Allow-Origin"] = origin
-                    vary = resp.headers.get("Vary", "")
-                    if "Origin" not in [v.strip() for v in vary.split(",") if v]:
-                        resp.headers["Vary"] = f"{vary}, Origin" if vary else "Origin"
-        return resp
-
-
 def _include_all_route_modules(app: FastAPI) -> int:
     """Recursively include APIRouter objects under app.routes.
 
@@ -597,6 +598,12 @@ async def lifespan(app: FastAPI):
         _log.debug("import load_bindings failed: %s", exc)
     else:
         _best_effort("load bindings", lambda: load_bindings())
+    try:
+        from app.services import policy_loader as _policy_loader
+    except Exception as exc:
+        _log.debug("import policy loader failed: %s", exc)
+    else:
+        _best_effort("build policy resolution index", _policy_loader.build_index)
 
     # Initialize decisions store and start prune loop (duplicate-safe)
     try:
@@ -607,6 +614,13 @@ async def lifespan(app: FastAPI):
         _best_effort("ensure decisions store ready", lambda: decisions_store.ensure_ready())
 
     _start_prune_task(app)
+    _start_purge_task(app)
+    try:
+        from app.services import threat_feed as _threat_feed
+    except Exception as exc:
+        _log.debug("import threat feed failed: %s", exc)
+    else:
+        _best_effort("start threat feed refresher", lambda: _threat_feed.start_refresher())
 
     try:
         from app.services import webhooks as _wh_mod
@@ -636,16 +650,45 @@ async def lifespan(app: FastAPI):
                 _log.debug("import webhooks module for shutdown failed: %s", exc)
             else:
                 _best_effort("webhooks module shutdown", lambda: _wh_mod.shutdown())
-        # Stop prune loop gracefully if running
         try:
-            task = getattr(app.state, "prune_task", None)
-            if task:
-                task.cancel()
-                with suppress(asyncio.CancelledError):
-                    await task
-                app.state.prune_task = None
+            from app.services import shadow_policy as _shadow_mod
         except Exception as exc:
-            _log.debug("prune loop shutdown failed: %s", exc)
+            _log.debug("import shadow policy for shutdown failed: %s", exc)
+        else:
+            _best_effort("shadow policy shutdown", lambda: _shadow_mod.shutdown())
+        try:
+            from app.services import policy_watcher as _policy_watcher
+        except Exception as exc:
+            _log.debug("import policy watcher for shutdown failed: %s", exc)
+        else:
+            _best_effort("policy watcher shutdown", lambda: _policy_watcher.shutdown())
+        try:
+            from app.services import threat_feed as _threat_feed
+        except Exception as exc:
+            _log.debug("import threat feed for shutdown failed: %s", exc)
+        else:
+            _best_effort("threat feed refresher shutdown", lambda: _threat_feed.shutdown())
+        # Stop prune loop and purge worker gracefully if running
+        for attr in ("prune_task", "purge_task"):
+            try:
+                task = getattr(app.state, attr, None)
+                if task:
+                    task.cancel()
+                    with suppress(asyncio.CancelledError):
+                        await task
+                    setattr(app.state, attr, None)
+            except Exception as exc:
+                _log.debug("%s shutdown failed: %s", attr, exc)
+        # Seal open audit/adjudication segments so restarts skip index rebuilds.
+        try:
+            from app.observability import segment_log as _segment_log
+        except Exception as exc:
+            _log.debug("import segment log for shutdown failed: %s", exc)
+        else:
+            try:
+                await asyncio.to_thread(_segment_log.close_all)
+            except Exception as exc:
+                _log.debug("segment log shutdown failed: %s", exc)
         # Clean shutdown for tracer/exporter if present.
         try:
             from opentelemetry import trace as _trace
@@ -688,6 +731,12 @@ def create_app() -> FastAPI:
     app.mount("/static", StaticFiles(directory="app/static"), name="static")
     app.mount("/student/static", StaticFiles(directory="app/static/student"), name="student-static")
     initialize_license_from_env(settings.settings.guardrail_license_key)
+    try:
+        from app.services import policy_loader as _policy_loader
+    except Exception as exc:
+        _log.debug("import policy loader failed: %s", exc)
+    else:
+        _best_effort("build policy resolution index", _policy_loader.build_index)
     # Install mode header middleware before any other add_middleware/routers.
     install_mode_header(app)
 
@@ -899,17 +948,6 @@ def create_app() -> FastAPI:
         except Exception as exc:
             _log.debug("install compression middleware failed: %s", exc)
 
-    try:
-        from starlette.middleware.gzip import GZipMiddleware as _StarletteGZip
-    except Exception as exc:
-        _log.debug("configure gzip middleware failed: %s", exc)
-    else:
-        if _truthy(os.getenv("COMPRESSION_ENABLED", "0")):
-            app.add_middleware(
-                _StarletteGZip,
-                minimum_size=_parse_int_env("COMPRESSION_MIN_SIZE_BYTES", 0),
-            )
-
     # Final egress stage: normalize timing for sensitive responses
     app.add_middleware(EgressTimingMiddleware)
     app.add_middleware(QuotaMiddleware)
@@ -1116,21 +1154,13 @@ def create_app() -> FastAPI:
     async def _internal_exc_handler(request: Request, exc: Exception):
         return _json_error("Internal Server Error", 500, base_headers=request.headers)
 
-    app.add_middleware(_CompatHeadersMiddleware)
-
     from app.middleware.egress_guard import EgressGuardMiddleware
+    from app.middleware.header_finalize import install_header_finalize
     from app.middleware.json_logging import install_json_logging
 
     app.add_middleware(EgressGuardMiddleware)
-    try:
-        from app.middleware.decision_headers import DecisionHeaderMiddleware
-    except Exception as exc:
-        _log.debug("import DecisionHeaderMiddleware failed: %s", exc)
-    else:
-        _best_effort(
-            "add DecisionHeaderMiddleware",
-            lambda: app.add_middleware(DecisionHeaderMiddleware),
-        )
+    # Security, compat, CORS and decision headers in one raw-header pass.
+    install_header_finalize(app)
     install_json_logging(app)
     app.add_middleware(
         UnicodeNormalizeGuard,
@@ -1190,6 +1220,14 @@ def create_app() -> FastAPI:
     if getattr(app.state, "exports_loaded_exports", False):
         _remove_legacy_decisions_ndjson(app)
 
+    # Last: wraps every layer registered above for Server-Timing / stage histograms.
+    try:
+        from app.observability.stage_timing import install_stage_timing
+    except Exception as exc:
+        _log.debug("import stage timing failed: %s", exc)
+    else:
+        _best_effort("install stage timing", lambda: install_stage_timing(app))
+
     return app
 
 
@@ -1204,29 +1242,18 @@ async def _start_prune() -> None:
 
 # ---- Existing PR includes preserved below ----
 
-sec_headers_mod = __import__(
-    "app.middleware.security_headers", fromlist=["install_security_headers"]
-)
-sec_headers_mod.install_security_headers(app)
-
 security_mod = __import__("app.middleware.security", fromlist=["install_security"])
 security_mod.install_security(app)
 
 admin_router = __import__("app.admin.router", fromlist=["router"]).router
 app.include_router(admin_router)
 
-nosniff_mod = __import__("app.middleware.nosniff", fromlist=["install_nosniff"])
-nosniff_mod.install_nosniff(app)
-
 cors_mod = __import__("app.middleware.cors", fromlist=["install_cors"])
 cors_mod.install_cors(app)
 
 cors_fb_mod = __import__("app.middleware.cors_fallback", fromlist=["install_cors_fallback"])
 cors_fb_mod.install_cors_fallback(app)
 
-csp_mod = __import__("app.middleware.csp", fromlist=["install_csp"])
-csp_mod.install_csp(app)
-
 if getattr(app.state, "exports_loaded_exports", False):
     _remove_legacy_decisions_ndjson(app)
 
@@ -12,6 +12,46 @@ REQ_LATENCY = Histogram(
     labelnames=("path", "method"),
 )
 
+STAGE_LATENCY = Histogram(
+    "guardrail_stage_seconds",
+    "Self time per request stage (middleware layer or guardrail pipeline step)",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+    labelnames=("stage",),
+)
+
+
+class _RecentLatency:
+    """Exponentially weighted mean of request latency, for in-process backpressure.
+
+    Reads as ``0`` once no request has finished for ``idle_s`` seconds, so an
+    idle process is never reported as slow on the strength of old samples.
+    """
+
+    __slots__ = ("alpha", "idle_s", "updated", "value")
+
+    def __init__(self, alpha: float = 0.1, idle_s: float = 10.0) -> None:
+        self.alpha = alpha
+        self.idle_s = idle_s
+        self.value = 0.0
+        self.updated = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.value += self.alpha * (seconds - self.value)
+        self.updated = time.monotonic()
+
+    def read(self) -> float:
+        if time.monotonic() - self.updated > self.idle_s:
+            return 0.0
+        return self.value
+
+
+RECENT_REQUEST_LATENCY = _RecentLatency()
+
+
+def recent_request_seconds() -> float:
+    """Smoothed latency of recently finished requests (``0`` when idle)."""
+    return RECENT_REQUEST_LATENCY.read()
+
 
 @contextmanager
 def observe(path: str, method: str):
@@ -21,3 +61,4 @@ def observe(path: str, method: str):
     finally:
         duration = time.perf_counter() - start
         REQ_LATENCY.labels(path=path, method=method).observe(duration)
+        RECENT_REQUEST_LATENCY.observe(duration)
@@ -1,17 +1,52 @@
 from __future__ import annotations
 
-import gzip
-import io
+import asyncio
+import importlib
 import os
-from typing import Awaitable, Callable
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Tuple, cast
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response, StreamingResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.middleware.env import get_bool
 
 
+def _optional(name: str) -> Any:
+    try:
+        return importlib.import_module(name)
+    except Exception:  # pragma: no cover - depends on installed extras
+        return None
+
+
+_zstd = _optional("zstandard")
+_brotli = _optional("brotli")
+
+# Server preference when the client weighs several codings equally.
+_PREFERENCE: Tuple[str, ...] = ("zstd", "br", "gzip")
+
+# Level per codec and content class: streams favour latency, text favours ratio.
+_LEVELS: Dict[str, Dict[str, int]] = {
+    "gzip": {"stream": 1, "text": 6, "other": 4},
+    "br": {"stream": 3, "text": 5, "other": 4},
+    "zstd": {"stream": 1, "text": 6, "other": 3},
+}
+
+_TEXT_TYPES = ("text/", "application/json", "application/xml", "application/javascript")
+_STREAM_TYPES = ("text/event-stream", "application/x-ndjson", "application/jsonl")
+_SKIP_TYPES = (
+    "image/",
+    "video/",
+    "audio/",
+    "font/woff",
+    "application/zip",
+    "application/gzip",
+    "application/x-gzip",
+    "application/zstd",
+    "application/x-brotli",
+)
+_SKIP_EXCEPT = ("image/svg+xml",)
+
+
 def _parse_min_size() -> int:
     raw = (os.getenv("COMPRESSION_MIN_SIZE_BYTES") or "").strip()
     try:
@@ -21,93 +56,252 @@ def _parse_min_size() -> int:
         return 0
 
 
-def _wants_gzip(request: Request) -> bool:
-    ae = (request.headers.get("accept-encoding") or "").lower()
-    return "gzip" in ae
-
-
-def _is_streaming_response(resp: Response) -> bool:
-    # Only treat *true* streaming responses as streaming.
-    # Many non-streaming responses also expose a body_iterator; don't use that.
-    return isinstance(resp, StreamingResponse)
-
-
-def _is_sse(resp: Response) -> bool:
-    ctype = (resp.headers.get("content-type") or "").lower()
-    return "text/event-stream" in ctype
-
-
-def _add_vary_accept_encoding(headers: dict[str, str]) -> None:
-    existing = headers.get("Vary")
-    if not existing:
-        headers["Vary"] = "Accept-Encoding"
-        return
-    # Append if not already present (case-insensitive)
-    tokens = [t.strip().lower() for t in existing.split(",")]
-    if "accept-encoding" not in tokens:
-        headers["Vary"] = f"{existing}, Accept-Encoding"
-
-
-class GZipMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app) -> None:
-        super().__init__(app)
-        self._enabled = get_bool("COMPRESSION_ENABLED")
-        self._min_size = _parse_min_size()
-
-    async def dispatch(
-        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
-    ) -> Response:
-        # Fast-path: off or client doesn't accept gzip -> do nothing.
-        if not self._enabled or not _wants_gzip(request):
-            return await call_next(request)
-
-        resp = await call_next(request)
-
-        # Never compress these cases.
-        if (
-            resp.status_code in (204, 304)  # no-body statuses
-            or resp.headers.get("content-encoding")  # already encoded (e.g., upstream)
-            or _is_streaming_response(resp)  # true streaming bodies
-            or _is_sse(resp)  # explicit SSE content-type
-        ):
-            return resp
-
-        # Try to read the in-memory body. If it's not there, skip (don't buffer).
-        body: bytes = b""
-        try:
-            maybe = getattr(resp, "body", None)
-            if isinstance(maybe, (bytes, bytearray)):
-                body = bytes(maybe)
-        except Exception:
-            body = b""
-
-        # If we couldn't get a concrete body (or it's too small), skip compression.
-        if not body or len(body) < self._min_size:
-            return resp
-
-        # Compress the body.
-        buf = io.BytesIO()
-        with gzip.GzipFile(fileobj=buf, mode="wb") as gz:
-            gz.write(body)
-        gz_body = buf.getvalue()
-
-        # Prepare headers for the compressed response.
-        headers: dict[str, str] = dict(resp.headers)
-        # Remove any length; Starlette will set it from the new body.
-        for k in ("content-length", "Content-Length"):
-            headers.pop(k, None)
-        headers["Content-Encoding"] = "gzip"
-        _add_vary_accept_encoding(headers)
-
-        return Response(
-            content=gz_body,
-            status_code=resp.status_code,
-            headers=headers,
-            media_type=resp.media_type,
-            background=resp.background,
+def _parse_thread_min() -> int:
+    raw = (os.getenv("COMPRESSION_THREAD_MIN_BYTES") or "").strip()
+    try:
+        return max(0, int(raw)) if raw else 256 * 1024
+    except Exception:
+        return 256 * 1024
+
+
+def available_codecs() -> Tuple[str, ...]:
+    out = []
+    for name in _PREFERENCE:
+        if name == "zstd" and _zstd is None:
+            continue
+        if name == "br" and _brotli is None:
+            continue
+        out.append(name)
+    return tuple(out)
+
+
+def negotiate(accept_encoding: str, available: Optional[Tuple[str, ...]] = None) -> Optional[str]:
+    """
+    Pick a content coding from an ``Accept-Encoding`` value.
+
+    Highest q-value wins; ties go to the server preference (zstd, br, gzip).
+    ``q=0`` refuses a coding and ``*`` covers codings not listed.
+    """
+    codecs = available if available is not None else available_codecs()
+    weights: Dict[str, float] = {}
+    star: Optional[float] = None
+    for part in (accept_encoding or "").lower().split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip()
+        if not token:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if token == "x-gzip":
+            token = "gzip"
+        if token == "*":
+            star = q
+        else:
+            weights[token] = max(q, weights.get(token, 0.0))
+    best: Optional[str] = None
+    best_q = 0.0
+    for name in codecs:
+        q = weights.get(name, star if star is not None else 0.0)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def content_class(content_type: str) -> Optional[str]:
+    """``stream`` / ``text`` / ``other``, or ``None`` for already-compressed media."""
+    ctype = (content_type or "").lower()
+    if any(ctype.startswith(t) for t in _STREAM_TYPES):
+        return "stream"
+    if ctype.startswith(_SKIP_TYPES) and not ctype.startswith(_SKIP_EXCEPT):
+        return None
+    if any(ctype.startswith(t) for t in _TEXT_TYPES) or ctype.endswith(("+json", "+xml")):
+        return "text"
+    return "other"
+
+
+class _Encoder:
+    """Incremental encoder: ``compress`` buffers, ``flush`` emits a decodable prefix."""
+
+    def __init__(self, codec: str, level: int) -> None:
+        self.codec = codec
+        self._obj: Any
+        if codec == "gzip":
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+        elif codec == "br":
+            self._obj = _brotli.Compressor(quality=level)
+        else:
+            self._obj = _zstd.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        if self.codec == "br":
+            return cast(bytes, self._obj.process(data))
+        return cast(bytes, self._obj.compress(data))
+
+    def flush(self) -> bytes:
+        if self.codec == "gzip":
+            return cast(bytes, self._obj.flush(zlib.Z_SYNC_FLUSH))
+        if self.codec == "br":
+            return cast(bytes, self._obj.flush())
+        return cast(bytes, self._obj.flush(_zstd.COMPRESSOBJ_FLUSH_BLOCK))
+
+    def finish(self) -> bytes:
+        if self.codec == "br":
+            return cast(bytes, self._obj.finish())
+        return cast(bytes, self._obj.flush())
+
+    def chunk(self, data: bytes, last: bool) -> bytes:
+        out = self.compress(data)
+        return out + (self.finish() if last else self.flush())
+
+
+def _header(headers: List[Tuple[bytes, bytes]], key: bytes) -> str:
+    for k, v in headers:
+        if k.lower() == key:
+            return v.decode("latin-1")
+    return ""
+
+
+def _without(headers: List[Tuple[bytes, bytes]], *keys: bytes) -> List[Tuple[bytes, bytes]]:
+    return [(k, v) for k, v in headers if k.lower() not in keys]
+
+
+def _add_vary_accept_encoding(headers: List[Tuple[bytes, bytes]]) -> None:
+    for i, (k, v) in enumerate(headers):
+        if k.lower() == b"vary":
+            tokens = [t.strip().lower() for t in v.split(b",")]
+            if b"accept-encoding" not in tokens and b"*" not in tokens:
+                headers[i] = (k, v + b", Accept-Encoding")
+            return
+    headers.append((b"vary", b"Accept-Encoding"))
+
+
+class CompressionMiddleware:
+    """
+    Pure-ASGI response compression (zstd / br / gzip).
+
+    - Coding is negotiated from ``Accept-Encoding`` q-values.
+    - Buffered bodies below ``COMPRESSION_MIN_SIZE_BYTES`` pass through; bodies
+      of ``COMPRESSION_THREAD_MIN_BYTES`` or more are compressed in a thread.
+    - Streaming bodies (including SSE) are compressed incrementally and each
+      ASGI body message is flushed, so every event reaches the client whole.
+      ``COMPRESSION_STREAMING=0`` leaves SSE / NDJSON streams uncompressed.
+    - Level is picked per codec and content class (see ``_LEVELS``).
+    - Settings are read per request.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not get_bool("COMPRESSION_ENABLED"):
+            await self.app(scope, receive, send)
+            return
+        accept = ""
+        for k, v in scope.get("headers") or []:
+            if k == b"accept-encoding":
+                accept = v.decode("latin-1")
+                break
+        codec = negotiate(accept) if accept else None
+        if codec is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _Responder(
+            send,
+            codec,
+            _parse_min_size(),
+            _parse_thread_min(),
+            streams=get_bool("COMPRESSION_STREAMING", True),
         )
+        await self.app(scope, receive, responder.send)
+
+
+class _Responder:
+    def __init__(
+        self, send: Send, codec: str, min_size: int, thread_min: int, *, streams: bool = True
+    ) -> None:
+        self._send = send
+        self.codec = codec
+        self.min_size = min_size
+        self.thread_min = thread_min
+        self.streams = streams
+        self._start: Optional[Message] = None
+        self._encoder: Optional[_Encoder] = None
+        self._level = 0
+        self._passthrough = False
+
+    async def _run(self, fn: Callable[[], bytes], size: int) -> bytes:
+        if size >= self.thread_min:
+            return await asyncio.to_thread(fn)
+        return fn()
+
+    async def send(self, message: Message) -> None:
+        mtype = message["type"]
+        if mtype == "http.response.start":
+            headers = list(message.get("headers") or [])
+            status = int(message.get("status", 200))
+            cls = content_class(_header(headers, b"content-type"))
+            if (
+                status < 200
+                or status in (204, 304)
+                or _header(headers, b"content-encoding")
+                or cls is None
+                or (cls == "stream" and not self.streams)
+            ):
+                self._passthrough = True
+                await self._send(message)
+                return
+            self._level = _LEVELS[self.codec][cls]
+            self._start = message
+            return
+        if mtype != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        start = self._start
+        body = bytes(message.get("body", b""))
+        more = bool(message.get("more_body", False))
+        if start is not None:
+            self._start = None
+            headers = list(start.get("headers") or [])
+            if not more and len(body) < max(1, self.min_size):
+                # Small (or empty) buffered body: not worth the coding overhead.
+                self._passthrough = True
+                await self._send(start)
+                await self._send(message)
+                return
+            headers = _without(headers, b"content-length", b"content-encoding")
+            headers.append((b"content-encoding", self.codec.encode("ascii")))
+            _add_vary_accept_encoding(headers)
+            encoder = _Encoder(self.codec, self._level)
+            if not more:
+                payload = await self._run(lambda: encoder.chunk(body, True), len(body))
+                headers.append((b"content-length", str(len(payload)).encode("ascii")))
+                await self._send({**start, "headers": headers})
+                await self._send({"type": "http.response.body", "body": payload})
+                return
+            self._encoder = encoder
+            await self._send({**start, "headers": headers})
+
+        encoder_ = self._encoder
+        if encoder_ is None:
+            await self._send(message)
+            return
+        if not body and more:
+            return
+        payload = await self._run(lambda: encoder_.chunk(body, not more), len(body))
+        await self._send({"type": "http.response.body", "body": payload, "more_body": more})
+
+
+# Back-compat name: the gzip-only middleware this replaces.
+GZipMiddleware = CompressionMiddleware
 
 
 def install_compression(app) -> None:
     if get_bool("COMPRESSION_ENABLED"):
-        app.add_middleware(GZipMiddleware)
+        app.add_middleware(CompressionMiddleware)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Mapping, Optional
+from typing import Any, Mapping, Optional, Tuple
 
 from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
 from starlette.requests import Request
@@ -29,6 +29,45 @@ def _coerce_str(value: Any) -> Optional[str]:
     return stringified or None
 
 
+def decision_header_values(
+    state: Any, fallback_mode: Optional[str]
+) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """Return ``(outcome, mode, incident_id)`` and count the decision outcome.
+
+    Shared by :class:`DecisionHeaderMiddleware` and the ASGI header finaliser so
+    both surface the same values from ``request.state``.
+    """
+    decision = _extract_decision(state)
+
+    outcome: Optional[str] = None
+    mode: Optional[str] = None
+    incident_id: Optional[str] = None
+
+    if decision:
+        outcome = _coerce_str(decision.get("outcome") or decision.get("decision"))
+        mode = _coerce_str(decision.get("mode"))
+        incident_id = _coerce_str(
+            decision.get("incident_id") or decision.get("incident") or decision.get("request_id")
+        )
+
+    if not mode:
+        mode = fallback_mode
+
+    try:
+        if outcome:
+            from app.observability import metrics_decisions as _md
+
+            _md.inc(
+                outcome,
+                tenant=getattr(state, "tenant", None),
+                bot=getattr(state, "bot", None),
+            )
+    except Exception:
+        pass
+
+    return outcome, mode, incident_id
+
+
 class DecisionHeaderMiddleware(BaseHTTPMiddleware):
     """Add headers that surface guardrail decision metadata if present."""
 
@@ -39,35 +78,9 @@ class DecisionHeaderMiddleware(BaseHTTPMiddleware):
         fallback_mode = current_guardrail_mode()
 
         response = await call_next(request)
-        decision = _extract_decision(getattr(request, "state", None))
-
-        outcome: Optional[str] = None
-        mode: Optional[str] = None
-        incident_id: Optional[str] = None
-
-        if decision:
-            outcome = _coerce_str(decision.get("outcome") or decision.get("decision"))
-            mode = _coerce_str(decision.get("mode"))
-            incident_id = _coerce_str(
-                decision.get("incident_id")
-                or decision.get("incident")
-                or decision.get("request_id")
-            )
-
-        if not mode:
-            mode = fallback_mode
-
-        try:
-            if outcome:
-                from app.observability import metrics_decisions as _md
-
-                _md.inc(
-                    outcome,
-                    tenant=getattr(request.state, "tenant", None),
-                    bot=getattr(request.state, "bot", None),
-                )
-        except Exception:
-            pass
+        outcome, mode, incident_id = decision_header_values(
+            getattr(request, "state", None), fallback_mode
+        )
 
         if outcome and "X-Guardrail-Decision" not in response.headers:
             response.headers["X-Guardrail-Decision"] = outcome
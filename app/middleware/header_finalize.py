@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import FrozenSet, List, Optional, Tuple
+
+from fastapi import FastAPI
+from starlette.datastructures import State
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.middleware.decision_headers import decision_header_values
+from app.middleware.env import get_bool
+from app.middleware.guardrail_mode import current_guardrail_mode
+from app.services.config_store import add_config_listener
+
+RawHeader = Tuple[bytes, bytes]
+
+_DEFAULT_CSP = "default-src 'none'; frame-ancestors 'none'; base-uri 'none'"
+
+_ACAO = b"access-control-allow-origin"
+_VARY = b"vary"
+_DEPRECATION = b"deprecation"
+_DECISION = b"x-guardrail-decision"
+_MODE = b"x-guardrail-mode"
+_INCIDENT = b"x-guardrail-incident-id"
+
+
+def _flag(name: str) -> bool:
+    """Security-header flags default ON unless explicitly disabled."""
+    raw = os.getenv(name)
+    return True if raw is None else get_bool(name)
+
+
+def _enc(value: str) -> bytes:
+    return value.encode("latin-1")
+
+
+@dataclass(frozen=True)
+class HeaderPlan:
+    """Precomputed response-header block for one config version.
+
+    ``defaults`` are only added when the response does not already carry the
+    header; ``overrides`` always replace any existing value.
+    """
+
+    version: int
+    defaults: Tuple[RawHeader, ...]
+    overrides: Tuple[RawHeader, ...]
+    cors_enabled: bool
+    cors_any: bool
+    cors_origins: FrozenSet[bytes]
+
+
+def build_header_plan(version: int = 0) -> HeaderPlan:
+    """Read the header env vars once and return the resulting plan."""
+    defaults: List[RawHeader] = []
+    overrides: List[RawHeader] = []
+
+    if _flag("SEC_HEADERS_NOSNIFF_ENABLED"):
+        defaults.append((b"x-content-type-options", b"nosniff"))
+    if _flag("SEC_HEADERS_XFO_ENABLED"):
+        defaults.append((b"x-frame-options", b"DENY"))
+    referrer = os.getenv("SEC_HEADERS_REFERRER_POLICY") or "no-referrer"
+    defaults.append((b"referrer-policy", _enc(referrer.strip())))
+    if get_bool("CSP_ENABLED"):
+        csp = (os.getenv("CSP_VALUE") or _DEFAULT_CSP).strip()
+        defaults.append((b"content-security-policy", _enc(csp)))
+
+    permissions = (os.getenv("SEC_HEADERS_PERMISSIONS_POLICY") or "").strip()
+    if permissions:
+        overrides.append((b"permissions-policy", _enc(permissions)))
+
+    origins = frozenset(
+        _enc(o.strip()) for o in (os.getenv("CORS_ALLOW_ORIGINS") or "").split(",") if o.strip()
+    )
+    return HeaderPlan(
+        version=version,
+        defaults=tuple(defaults),
+        overrides=tuple(overrides),
+        cors_enabled=get_bool("CORS_ENABLED"),
+        cors_any=b"*" in origins,
+        cors_origins=origins,
+    )
+
+
+_plan_lock = threading.Lock()
+_plan: Optional[HeaderPlan] = None
+_plan_version = 0
+
+
+def get_header_plan() -> HeaderPlan:
+    """Return the cached plan, building it on first use."""
+    plan = _plan
+    if plan is not None:
+        return plan
+    with _plan_lock:
+        if _plan is None:
+            return _refresh_locked()
+        return _plan
+
+
+def refresh_header_plan() -> HeaderPlan:
+    """Rebuild the plan from the current environment (new config version)."""
+    with _plan_lock:
+        return _refresh_locked()
+
+
+def _refresh_locked() -> HeaderPlan:
+    global _plan, _plan_version
+    _plan_version += 1
+    _plan = build_header_plan(_plan_version)
+    return _plan
+
+
+def _request_origin(scope: Scope) -> Optional[bytes]:
+    headers: List[RawHeader] = scope.get("headers") or []
+    for name, value in headers:
+        if name.lower() == b"origin":
+            return value
+    return None
+
+
+def finalize_headers(
+    headers: List[RawHeader],
+    plan: HeaderPlan,
+    *,
+    path: str = "",
+    origin: Optional[bytes] = None,
+    decision: Tuple[Optional[str], Optional[str], Optional[str]] = (None, None, None),
+) -> List[RawHeader]:
+    """Apply ``plan`` to a raw ASGI header list in a single pass."""
+    allow_origin = (
+        origin
+        if origin and plan.cors_enabled and (plan.cors_any or origin in plan.cors_origins)
+        else None
+    )
+    replace = {name for name, _ in plan.overrides}
+    if allow_origin is not None:
+        replace.add(_ACAO)
+
+    present = set()
+    vary_idx = -1
+    out: List[RawHeader] = []
+    for name, value in headers:
+        low = name.lower()
+        if low in replace:
+            continue
+        if low == _VARY and vary_idx < 0:
+            vary_idx = len(out)
+        present.add(low)
+        out.append((name, value))
+
+    for name, value in plan.defaults:
+        if name not in present:
+            out.append((name, value))
+    out.extend(plan.overrides)
+
+    if path.startswith("/guardrail") and _DEPRECATION not in present:
+        out.append((_DEPRECATION, b"true"))
+
+    outcome, mode, incident_id = decision
+    if outcome and _DECISION not in present:
+        out.append((_DECISION, _enc(outcome)))
+    if mode and _MODE not in present:
+        out.append((_MODE, _enc(mode)))
+    if incident_id and _INCIDENT not in present:
+        out.append((_INCIDENT, _enc(incident_id)))
+
+    if allow_origin is not None:
+        out.append((_ACAO, allow_origin))
+        if vary_idx < 0:
+            out.append((_VARY, b"Origin"))
+        else:
+            name, vary = out[vary_idx]
+            if b"origin" not in [v.strip().lower() for v in vary.split(b",") if v]:
+                out[vary_idx] = (name, vary + b", Origin" if vary else b"Origin")
+    return out
+
+
+class HeaderFinalizeMiddleware:
+    """Pure-ASGI stage that appends security, compat, CORS and decision headers.
+
+    The static header block and the CORS origin set come from the cached
+    :class:`HeaderPlan`, so the per-response work is one walk over the raw
+    header list with no environment lookups.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        plan = get_header_plan()
+        fallback_mode = current_guardrail_mode()
+        origin = _request_origin(scope) if plan.cors_enabled else None
+        path = scope.get("path", "")
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                state = State(scope.get("state") or {})
+                message["headers"] = finalize_headers(
+                    list(message.get("headers") or ()),
+                    plan,
+                    path=path,
+                    origin=origin,
+                    decision=decision_header_values(state, fallback_mode),
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def install_header_finalize(app: FastAPI) -> None:
+    """Snapshot the current env into a fresh plan and wire the middleware.
+
+    The plan is rebuilt on every admin config change so the cached header
+    block never outlives the config version it was built from.
+    """
+    refresh_header_plan()
+    add_config_listener(refresh_header_plan)
+    app.add_middleware(HeaderFinalizeMiddleware)
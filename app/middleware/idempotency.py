@@ -1,4 +1,4 @@
-"""Idempotency middleware with optional header, owner tokens, and follower backoff."""
+"""Idempotency middleware with optional header, owner tokens, and follower wake-up."""
 
 from __future__ import annotations
 
@@ -6,9 +6,18 @@ import asyncio
 import hashlib
 import json
 import os
-import random
 import time
-from typing import Any, Callable, Iterable, Mapping, MutableMapping, Optional, Protocol, Tuple
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Protocol,
+    Tuple,
+)
 
 from starlette.types import Scope, Send
 
@@ -33,6 +42,12 @@ IDEMP_BACKOFF_STEPS = metric_counter(
     "Backoff steps taken by followers",
 )
 
+IDEMP_FOLLOWER_WAKEUPS = metric_counter(
+    "guardrail_idemp_follower_wakeups_total",
+    "Follower wake-ups by source (local, store, recheck)",
+    labels=("source",),
+)
+
 
 def _env_methods() -> Tuple[str, ...]:
     raw = os.environ.get("IDEMP_METHODS")
@@ -55,6 +70,14 @@ def _env_max_body() -> int:
         return 256 * 1024
 
 
+def _env_wait_recheck_s() -> float:
+    """Safety-net re-check interval for followers (lost signal, expired lock)."""
+    try:
+        return max(int(os.environ.get("IDEMP_WAIT_RECHECK_MS", "1000")), 10) / 1000.0
+    except Exception:
+        return 1.0
+
+
 def _env_touch_on_replay() -> bool:
     return os.environ.get("IDEMP_TOUCH_ON_REPLAY", "0").strip().lower() in {
         "1",
@@ -82,6 +105,15 @@ class IdemStoreProto(Protocol):
     async def touch(self, key: str, ttl_s: int) -> None: ...
 
 
+class _DoneEvent:
+    __slots__ = ("loop", "event", "waiters")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self.event = asyncio.Event()
+        self.waiters = 0
+
+
 class IdempotencyMiddleware:
     def __init__(
         self,
@@ -112,6 +144,28 @@ class IdempotencyMiddleware:
         self.strict_fail_closed = (
             bool(strict_fail_closed) if strict_fail_closed is not None else None
         )
+        self.wait_recheck_s = _env_wait_recheck_s()
+        # Same-worker followers park on these; the leader sets them when done.
+        self._done_events: Dict[str, _DoneEvent] = {}
+
+    def _done_event(self, key: str) -> _DoneEvent:
+        loop = asyncio.get_running_loop()
+        entry = self._done_events.get(key)
+        if entry is None or entry.loop is not loop:
+            entry = _DoneEvent(loop)
+            self._done_events[key] = entry
+        entry.waiters += 1
+        return entry
+
+    def _drop_done_event(self, key: str, entry: _DoneEvent) -> None:
+        entry.waiters -= 1
+        if entry.waiters <= 0 and self._done_events.get(key) is entry:
+            del self._done_events[key]
+
+    def _signal_done(self, key: str) -> None:
+        entry = self._done_events.pop(key, None)
+        if entry is not None:
+            entry.event.set()
 
     async def __call__(self, scope: Scope, receive: Any, send: Any) -> None:
         # Not a managed method? Just pass through (streaming preserved).
@@ -302,6 +356,7 @@ class IdempotencyMiddleware:
                 await self.store.release(key, owner=owner)
             except Exception:
                 IDEMP_ERRORS.labels(phase="release").inc()
+            self._signal_done(key)
             await self._send_500(send)
             return
 
@@ -317,6 +372,7 @@ class IdempotencyMiddleware:
                 await self.store.release(key, owner=owner)
             except Exception:
                 IDEMP_ERRORS.labels(phase="release").inc()
+            self._signal_done(key)
             await self._send_fresh(send, status, resp_headers, resp_body)
             return
 
@@ -341,41 +397,90 @@ class IdempotencyMiddleware:
                 await self.store.release(key, owner=owner)
             except Exception:
                 IDEMP_ERRORS.labels(phase="release").inc()
+            self._signal_done(key)
 
         await self._send_fresh(send, status, resp_headers, resp_body)
 
     async def _wait_for_release_or_value(self, key: str, timeout: float) -> str:
         """
-        Poll with backoff + jitter until either a value appears OR the lock
-        disappears / state changes. Returns "value", "released", or "timeout".
+        Wait until either a value appears OR the lock disappears / state
+        changes. Returns "value", "released", or "timeout".
+
+        Followers sleep on the in-process done event (same-worker leader) and,
+        when the store supports it, the store's completion signal (leader on
+        another worker). ``wait_recheck_s`` bounds each sleep so a lost signal
+        or an expired lock is still noticed.
         """
         deadline = time.time() + timeout
-        delay = 0.01
+        wait_released = getattr(self.store, "wait_released", None)
+        local = self._done_event(key)
         steps = 0
-        while time.time() < deadline:
-            try:
-                if await self.store.get(key):
-                    IDEMP_BACKOFF_STEPS.inc()
-                    return "value"
-            except Exception:
-                IDEMP_ERRORS.labels(phase="get").inc()
-            try:
-                meta = await self.store.meta(key)
-                if not meta.get("lock") or meta.get("state") != "in_progress":
-                    IDEMP_BACKOFF_STEPS.inc()
-                    return "released"
-            except Exception:
-                IDEMP_ERRORS.labels(phase="meta").inc()
+        try:
+            while True:
+                try:
+                    if await self.store.get(key):
+                        IDEMP_BACKOFF_STEPS.inc()
+                        return "value"
+                except Exception:
+                    IDEMP_ERRORS.labels(phase="get").inc()
+                try:
+                    meta = await self.store.meta(key)
+                    if not meta.get("lock") or meta.get("state") != "in_progress":
+                        IDEMP_BACKOFF_STEPS.inc()
+                        return "released"
+                except Exception:
+                    IDEMP_ERRORS.labels(phase="meta").inc()
 
-            jitter = random.random() * min(delay, 0.05)
-            await asyncio.sleep(delay + jitter)
-            delay = min(delay * 2.0, 0.2)
-            steps += 1
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                source = await self._await_done(
+                    key, local.event, wait_released, min(remaining, self.wait_recheck_s)
+                )
+                IDEMP_FOLLOWER_WAKEUPS.labels(source=source).inc()
+                if local.event.is_set():
+                    # Leader finished; a new leader may take over, so re-park.
+                    self._drop_done_event(key, local)
+                    local = self._done_event(key)
+                steps += 1
+        finally:
+            self._drop_done_event(key, local)
 
         if steps:
             IDEMP_BACKOFF_STEPS.inc()
         return "timeout"
 
+    async def _await_done(
+        self,
+        key: str,
+        local: asyncio.Event,
+        wait_released: Optional[Callable[[str, float], Any]],
+        timeout: float,
+    ) -> str:
+        """Sleep until a completion signal or ``timeout``; return the wake source."""
+        if local.is_set():
+            return "local"
+        waiters: Dict[asyncio.Task[Any], str] = {
+            asyncio.ensure_future(local.wait()): "local",
+        }
+        if wait_released is not None:
+            waiters[asyncio.ensure_future(wait_released(key, timeout))] = "store"
+        try:
+            done, _ = await asyncio.wait(
+                waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            for task in waiters:
+                if not task.done():
+                    task.cancel()
+        for task in done:
+            try:
+                if task.result() is not False:
+                    return waiters[task]
+            except Exception:
+                IDEMP_ERRORS.labels(phase="wait").inc()
+        return "recheck"
+
     async def _send_error(self, send: Send, status: int, detail: str) -> None:
         payload = json.dumps({"code": "bad_request", "detail": detail}).encode("utf-8")
         headers = [
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import json
 import time
-from typing import Any, Awaitable, Callable, Dict, List, Tuple
+from typing import Any, Awaitable, Callable, Dict, List
 
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
@@ -12,7 +12,7 @@ from app.observability.metrics import probing_ingress_report
 from app.risk.probing import (
     collect_strings,
     count_leakage_hints,
-    jaccard_similarity,
+    near_duplicate_index,
     rate_store,
 )
 from app.risk.session_risk import session_risk_store
@@ -21,48 +21,6 @@ _HDR_TENANT = "X-Guardrail-Tenant"
 _HDR_BOT = "X-Guardrail-Bot"
 _HDR_SESSION = "X-Guardrail-Session"
 
-# --- TTL cache for last_text (per tenant/bot/session) -----------------------
-_LAST_TEXT_TTL = 15 * 60  # seconds
-_LAST_TEXT_MAX = 50_000
-# key -> (ts, text)
-_LAST_TEXT: Dict[str, Tuple[float, str]] = {}
-
-
-def _lt_key(tenant: str, bot: str, sess: str) -> str:
-    return f"{tenant}|{bot}|{sess}"
-
-
-def _lt_set(tenant: str, bot: str, sess: str, text: str) -> None:
-    now = time.time()
-    _LAST_TEXT[_lt_key(tenant, bot, sess)] = (now, text)
-    # light GC
-    if len(_LAST_TEXT) > _LAST_TEXT_MAX:
-        cutoff = now - _LAST_TEXT_TTL
-        to_del = [k for k, (ts, _) in _LAST_TEXT.items() if ts < cutoff]
-        for k in to_del:
-            _LAST_TEXT.pop(k, None)
-        if len(_LAST_TEXT) > _LAST_TEXT_MAX:
-            # drop oldest ~5%
-            items = sorted(_LAST_TEXT.items(), key=lambda kv: kv[1][0])
-            cut = max(1, len(items) // 20)
-            for k, _ in items[:cut]:
-                _LAST_TEXT.pop(k, None)
-
-
-def _lt_get(tenant: str, bot: str, sess: str) -> str:
-    now = time.time()
-    ts_text = _LAST_TEXT.get(_lt_key(tenant, bot, sess))
-    if not ts_text:
-        return ""
-    ts, text = ts_text
-    if now - ts > _LAST_TEXT_TTL:
-        _LAST_TEXT.pop(_lt_key(tenant, bot, sess), None)
-        return ""
-    return text
-
-
-# ---------------------------------------------------------------------------
-
 
 def _labels(request: Request) -> tuple[str, str, str]:
     headers = request.headers
@@ -81,14 +39,15 @@ class IngressProbingMiddleware(BaseHTTPMiddleware):
     Detect probing via:
       - Rolling rate per session (hits within short window).
       - Leakage hint phrases.
-      - High similarity to prior text (near-duplicate probing).
+      - High similarity to any of the session's recent prompts (near-duplicate
+        probing), via MinHash signatures; prompt text itself is not retained.
     Emits Prometheus metrics and bumps session risk; does not mutate payloads.
     """
 
     # Defaults; can be overridden by config in a later PR
     rate_window_secs = 30.0
     max_reqs_per_window = 20
-    sim_threshold = 0.8  # Jaccard on char 3-grams
+    sim_threshold = 0.8  # estimated Jaccard on char 3-grams
     min_text_len_for_sim = 24
 
     async def dispatch(
@@ -122,22 +81,23 @@ class IngressProbingMiddleware(BaseHTTPMiddleware):
                     texts = collect_strings(data)
                     leakage_hits = count_leakage_hints(texts)
 
-        last_text = _lt_get(tenant, bot, sess)
-        if texts and last_text:
-            for text in texts:
-                if (
-                    len(text) >= self.min_text_len_for_sim
-                    and len(last_text) >= self.min_text_len_for_sim
-                ):
-                    if jaccard_similarity(text, last_text) >= self.sim_threshold:
-                        similarity_hits += 1
-                        break
-
         if texts:
+            index = near_duplicate_index()
+            key = f"{tenant}|{bot}|{sess}"
+            first_sig = None
             for text in texts:
-                if len(text) >= self.min_text_len_for_sim:
-                    _lt_set(tenant, bot, sess, text)
+                if len(text) < self.min_text_len_for_sim:
+                    continue
+                sig = index.signature(text)
+                if first_sig is None:
+                    first_sig = sig
+                if index.best_match(key, sig, now) >= self.sim_threshold:
+                    similarity_hits = 1
                     break
+            # Store only after every field was checked, so a request never
+            # matches its own earlier fields.
+            if first_sig is not None:
+                index.add(key, first_sig, now)
 
         delta = 0.0
         if rate_exceeded:
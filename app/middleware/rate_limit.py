@@ -245,7 +245,7 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             limiter_bot = f"anon_{hashed}"
             limiter_tenant = "public"
 
-        allowed, retry_after_s, remaining = limiter.allow(
+        allowed, retry_after_s, remaining = await limiter.allow_async(
             limiter_tenant,
             limiter_bot,
             cost=1.0,
@@ -8,8 +8,9 @@ from collections import deque
 from collections.abc import Iterable as IterableABC
 from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
-from typing import Any, Deque, Dict, Iterator, List, Literal, Optional, Sequence, Tuple, Union
+from typing import Any, Deque, Dict, Iterator, List, Literal, Optional, Sequence, Set, Tuple, Union
 
+from app.observability.segment_log import SegmentLog, open_log
 from app.security.rbac import ScopeParam
 from app.utils.cursor import CursorError
 
@@ -72,6 +73,70 @@ class AdjudicationRecord:
 _CAP = _coerce_cap(os.getenv("ADJUDICATION_LOG_CAP"))
 _BUFFER: Deque[AdjudicationRecord] = deque(maxlen=_CAP)
 _LOCK = threading.RLock()
+_APPENDS = 0
+
+# Optional durable copy: segment files under ADJUDICATION_LOG_DIR. The ring above
+# stays the query cache and is refilled from the newest segments on first use.
+_SEGMENT_DIR = os.getenv("ADJUDICATION_LOG_DIR", "").strip()
+_SEGMENTS: Optional[SegmentLog] = None
+_SEGMENTS_READY = False
+
+
+def _record_from_dict(data: Dict[str, Any]) -> Optional[AdjudicationRecord]:
+    try:
+        record = AdjudicationRecord(
+            ts=str(data["ts"]),
+            request_id=str(data.get("request_id", "")),
+            tenant=str(data.get("tenant", "")),
+            bot=str(data.get("bot", "")),
+            provider=str(data.get("provider", "")),
+            decision=str(data.get("decision", "")),
+            rule_hits=list(data.get("rule_hits") or []),
+            score=data.get("score"),
+            latency_ms=int(data.get("latency_ms") or 0),
+            policy_version=data.get("policy_version"),
+            rules_path=data.get("rules_path"),
+            sampled=bool(data.get("sampled", False)),
+            prompt_sha256=data.get("prompt_sha256"),
+            rule_id=data.get("rule_id"),
+        )
+    except Exception:
+        return None
+    if data.get("mitigation_forced") is not None:
+        setattr(record, "mitigation_forced", data["mitigation_forced"])
+    return record
+
+
+def _segments() -> Optional[SegmentLog]:
+    global _SEGMENTS, _SEGMENTS_READY
+    if _SEGMENTS_READY:
+        return _SEGMENTS
+    with _LOCK:
+        if _SEGMENTS_READY:
+            return _SEGMENTS
+        _SEGMENTS_READY = True
+        if not _SEGMENT_DIR:
+            return None
+        try:
+            seg_log = open_log(
+                _SEGMENT_DIR,
+                segment_seconds=float(os.getenv("ADJUDICATION_SEGMENT_SECONDS", "3600") or 3600),
+                fsync_every=int(os.getenv("ADJUDICATION_FSYNC_EVERY", "64") or 64),
+            )
+            for data in seg_log.tail(_CAP):
+                record = _record_from_dict(data)
+                if record is not None:
+                    _BUFFER.append(record)
+        except Exception:
+            return None
+        _SEGMENTS = seg_log
+        return _SEGMENTS
+
+
+def _snapshot() -> List[AdjudicationRecord]:
+    _segments()
+    with _LOCK:
+        return list(_BUFFER)
 
 
 def _ts_sort_key(record: AdjudicationRecord) -> datetime:
@@ -173,18 +238,27 @@ def _matches(
 def append(record: AdjudicationRecord) -> None:
     """Best-effort append; never raises."""
 
+    global _APPENDS
+    seg_log = _segments()
     try:
         with _LOCK:
             _BUFFER.append(record)
+            _APPENDS += 1
     except Exception:
         return
+    if seg_log is not None:
+        try:
+            data = record.to_dict()
+            data["ts_ms"] = _record_ts_ms(record)
+            seg_log.append(data)
+        except Exception:
+            return
 
 
 def iter_all() -> Iterator[Dict[str, Any]]:
     """Yield snapshots of all buffered adjudication records as dictionaries."""
 
-    with _LOCK:
-        snapshot: Sequence[AdjudicationRecord] = list(_BUFFER)
+    snapshot: Sequence[AdjudicationRecord] = _snapshot()
 
     for record in snapshot:
         try:
@@ -201,28 +275,60 @@ def delete_where(
     bot: Optional[str],
     before_ts_ms: Optional[int],
 ) -> int:
-    """Remove matching adjudication records from the in-memory buffer."""
+    """Remove matching adjudication records from the buffer and the segment log."""
+
+    return delete_before(before_ts_ms, tenant=tenant, bot=bot)
+
+
+def delete_before(
+    before_ts_ms: Optional[int],
+    *,
+    tenant: Optional[str],
+    bot: Optional[str],
+    limit: Optional[int] = None,
+) -> int:
+    """Remove up to ``limit`` of the oldest matching records; returns how many.
+
+    The kept list is computed from a snapshot without holding the lock; the
+    swap then only re-adds records appended meanwhile. With a segment log the
+    count is the number of durable records removed (whole segments are dropped
+    where possible), otherwise the number removed from the buffer.
+    """
 
     cutoff = int(before_ts_ms) if before_ts_ms is not None else None
-    removed = 0
+    budget = None if limit is None else max(int(limit), 0)
+    if budget == 0:
+        return 0
+    seg_log = _segments()
     with _LOCK:
-        keep: List[AdjudicationRecord] = []
-        for record in list(_BUFFER):
-            ts_ms = _record_ts_ms(record)
-            if tenant and record.tenant != tenant:
-                keep.append(record)
-                continue
-            if bot and record.bot != bot:
-                keep.append(record)
-                continue
-            if cutoff is not None and ts_ms >= cutoff:
-                keep.append(record)
-                continue
-            removed += 1
-        if removed:
+        snapshot = list(_BUFFER)
+        seen = _APPENDS
+    ordered = sorted(enumerate(snapshot), key=lambda item: (_ts_sort_key(item[1]), item[0]))
+    doomed: Set[int] = set()
+    for idx, record in ordered:
+        if budget is not None and len(doomed) >= budget:
+            break
+        if tenant and record.tenant != tenant:
+            continue
+        if bot and record.bot != bot:
+            continue
+        if cutoff is not None and _record_ts_ms(record) >= cutoff:
+            continue
+        doomed.add(idx)
+    if doomed:
+        keep = [record for idx, record in enumerate(snapshot) if idx not in doomed]
+        with _LOCK:
+            fresh = _APPENDS - seen
+            added = list(_BUFFER)[-fresh:] if fresh else []
             _BUFFER.clear()
-            for record in keep:
-                _BUFFER.append(record)
+            _BUFFER.extend(keep)
+            _BUFFER.extend(added)
+    removed = len(doomed)
+    if seg_log is not None:
+        try:
+            removed = seg_log.delete_where(before_ms=cutoff, tenant=tenant, bot=bot, limit=budget)
+        except Exception:
+            pass
     return removed
 
 
@@ -239,8 +345,7 @@ def clear() -> None:
 def _snapshot_records_desc() -> List[AdjudicationRecord]:
     """Return a newest->oldest snapshot of buffered adjudications."""
 
-    with _LOCK:
-        snapshot: Sequence[AdjudicationRecord] = list(_BUFFER)
+    snapshot: Sequence[AdjudicationRecord] = _snapshot()
 
     ordered = sorted(
         enumerate(snapshot),
@@ -263,8 +368,7 @@ def _iter_filtered(
     mitigation_forced: Optional[str] = None,
     sort: str = "ts_desc",
 ) -> Iterator[AdjudicationRecord]:
-    with _LOCK:
-        snapshot: Sequence[AdjudicationRecord] = list(_BUFFER)
+    snapshot: Sequence[AdjudicationRecord] = _snapshot()
 
     reverse = sort != "ts_asc"
     tenant_filter = _normalize_scope_values(tenant)
@@ -396,8 +500,7 @@ def _iter_filtered_with_index(
     mitigation_forced: Optional[str] = None,
     sort: str = "ts_desc",
 ) -> Iterator[Tuple[int, AdjudicationRecord]]:
-    with _LOCK:
-        snapshot: Sequence[AdjudicationRecord] = list(_BUFFER)
+    snapshot: Sequence[AdjudicationRecord] = _snapshot()
 
     reverse = sort != "ts_asc"
     tenant_filter = _normalize_scope_values(tenant)
@@ -611,6 +714,7 @@ def stream(
 __all__ = [
     "AdjudicationRecord",
     "append",
+    "delete_before",
     "delete_where",
     "clear",
     "iter_all",
@@ -8,6 +8,7 @@ import time
 from typing import Any, Dict, Iterable, List, Optional
 
 from app import config
+from app.observability.segment_log import SegmentLog, open_log
 
 _log = logging.getLogger("admin_audit")
 
@@ -28,6 +29,8 @@ def _storage_mode() -> str:
         return "redis"
     if backend == "memory":
         return "memory"
+    if backend == "segments":
+        return "segments"
     if backend == "file" or getattr(config, "AUDIT_LOG_FILE", ""):
         return "file"
     return "memory"
@@ -61,6 +64,29 @@ def _iter_file_lines() -> List[str]:
         return []
 
 
+def _segment_log() -> SegmentLog | None:
+    directory = getattr(config, "AUDIT_SEGMENT_DIR", "") or "var/audit"
+    try:
+        return open_log(
+            directory,
+            segment_seconds=getattr(config, "AUDIT_SEGMENT_SECONDS", 3600.0),
+            fsync_every=getattr(config, "AUDIT_FSYNC_EVERY", 64),
+        )
+    except Exception as exc:
+        _log.debug("audit segment log unavailable: %s", exc)
+        return None
+
+
+def _persist_segment(evt: Dict[str, Any]) -> None:
+    seg_log = _segment_log()
+    if seg_log is None:
+        return
+    try:
+        seg_log.append(evt)
+    except Exception:
+        pass
+
+
 def _redis_client() -> Any | None:
     global _REDIS_CLIENT, _REDIS_URL
     url = os.getenv("REDIS_URL", "").strip() or "redis://localhost:6379/0"
@@ -130,6 +156,8 @@ def record(
         _persist_file_line(line)
     elif mode == "redis":
         _persist_redis_line(line)
+    elif mode == "segments":
+        _persist_segment(evt)
     return evt
 
 
@@ -174,6 +202,11 @@ def recent(limit: int = 50) -> List[Dict[str, Any]]:
         items = _recent_from_redis(cap)
         if items:
             return items
+    elif mode == "segments":
+        seg_log = _segment_log()
+        items = seg_log.tail(cap) if seg_log is not None else []
+        if items:
+            return items
     with _LOG_LOCK:
         return list(_RING[-cap:])
 
@@ -234,6 +267,14 @@ def iter_events(
                     if _match(obj):
                         yielded_any = True
                         yield obj
+        elif mode == "segments":
+            seg_log = _segment_log()
+            if seg_log is not None:
+                # Only segments whose index covers the window and tenant/bot are read.
+                for obj in seg_log.scan(since=since, until=until, tenant=tenant, bot=bot):
+                    if _match(obj):
+                        yielded_any = True
+                        yield obj
     except Exception:
         pass
 
@@ -324,6 +365,13 @@ def delete_where(
                 pipe.execute()
             except Exception:
                 pass
+    elif mode == "segments":
+        seg_log = _segment_log()
+        if seg_log is not None:
+            try:
+                deleted = seg_log.delete_where(before_ms=cutoff, tenant=tenant, bot=bot)
+            except Exception as exc:
+                _log.debug("audit segment purge failed: %s", exc)
     else:
         with _LOG_LOCK:
             kept_ring: List[Dict[str, Any]] = []
@@ -351,5 +399,6 @@ __all__ = [
     "_RING",
     "_RING_MAX",
     "_redis_client",
+    "_segment_log",
     "_storage_mode",
 ]
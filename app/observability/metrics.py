@@ -3,10 +3,12 @@ from __future__ import annotations
 import logging
 import os
 from dataclasses import dataclass
-from typing import Any, Callable, Optional, Set, Tuple
+from typing import Any, Callable, Dict, Optional, Set, Tuple, Union
 
 from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram
 
+from app.observability import metrics_facade
+
 _CARD_MAX_RAW = (
     os.getenv("METRICS_LABEL_CARD_MAX") or os.getenv("METRICS_LABEL_CARDINALITY_MAX") or "1000"
 )
@@ -22,6 +24,8 @@ _METRICS_LABEL_OVERFLOW = os.getenv("METRICS_LABEL_OVERFLOW", "__overflow__")
 _seen_tenants: Set[str] = set()
 _seen_bots: Set[str] = set()
 _seen_pairs: Set[Tuple[str, str]] = set()
+# (tenant, bot) as passed in -> guarded labels; bounded like the sets above.
+_guarded_pairs: Dict[Tuple[str, str], Tuple[str, str]] = {}
 
 _log = logging.getLogger(__name__)
 
@@ -51,6 +55,16 @@ def _safe_label(val: str, cache: Set[str]) -> str:
 
 
 def _limit_tenant_bot_labels(tenant: str, bot: str) -> Tuple[str, str]:
+    guarded = _guarded_pairs.get((tenant, bot))
+    if guarded is not None:
+        return guarded
+    guarded = _guard_tenant_bot_labels(tenant, bot)
+    if len(_guarded_pairs) < 2 * _METRICS_LABEL_PAIR_CARD_MAX:
+        _guarded_pairs[(tenant, bot)] = guarded
+    return guarded
+
+
+def _guard_tenant_bot_labels(tenant: str, bot: str) -> Tuple[str, str]:
     tenant_l = _safe_label(str(tenant), _seen_tenants)
     bot_l = _safe_label(str(bot), _seen_bots)
     if _METRICS_LABEL_OVERFLOW in {tenant_l, bot_l}:
@@ -97,6 +111,19 @@ def _get_or_create_counter(
         return Counter(name, doc, labelnames=labelnames)
 
 
+def _get_or_create_buffered_counter(
+    name: str,
+    doc: str,
+    labelnames: Tuple[str, ...] = (),
+) -> Union[metrics_facade.BufferedCounter, Counter]:
+    """Counter for per-request paths: cached children, lock-free increments."""
+    try:
+        return metrics_facade.counter(name, doc, labelnames)
+    except ValueError:
+        # A native collector already owns the name; keep exporting through it.
+        return _get_or_create_counter(name, doc, labelnames)
+
+
 # --- Idempotency middleware metrics --------------------------------------------
 
 idempotency_seen = _get_or_create_counter(
@@ -170,20 +197,20 @@ ingress_header_limit_blocked = _get_or_create_counter(
     ("tenant", "bot", "reason"),
 )
 
-_trace_guard_violation_total = _get_or_create_counter(
+_trace_guard_violation_total = _get_or_create_buffered_counter(
     "guardrail_trace_guard_violation_total",
     "Ingress trace/request-id headers normalized or dropped",
     ("kind",),
 )
 
 
-ingress_reqid_generated = _get_or_create_counter(
+ingress_reqid_generated = _get_or_create_buffered_counter(
     "guardrail_ingress_trace_request_id_generated_total",
     "Request IDs generated by ingress trace guard.",
     ("tenant", "bot"),
 )
 
-ingress_invalid_traceparent = _get_or_create_counter(
+ingress_invalid_traceparent = _get_or_create_buffered_counter(
     "guardrail_ingress_trace_invalid_traceparent_total",
     "Malformed or invalid traceparent headers seen on ingress.",
     ("tenant", "bot"),
@@ -215,17 +242,17 @@ def ingress_path_violation_report(*, reason: str) -> None:
     _best_effort("ingress path violation", _do)
 
 
-_metadata_headers_changed_total = _get_or_create_counter(
+_metadata_headers_changed_total = _get_or_create_buffered_counter(
     "guardrail_metadata_headers_changed_total",
     "Headers sanitized/normalized at ingress",
     ("tenant", "bot"),
 )
-_metadata_filenames_sanitized_total = _get_or_create_counter(
+_metadata_filenames_sanitized_total = _get_or_create_buffered_counter(
     "guardrail_metadata_filenames_sanitized_total",
     "Filenames sanitized in headers or JSON",
     ("tenant", "bot"),
 )
-_metadata_truncated_total = _get_or_create_counter(
+_metadata_truncated_total = _get_or_create_buffered_counter(
     "guardrail_metadata_truncated_total",
     "Values truncated due to length limits",
     ("tenant", "bot"),
@@ -312,7 +339,7 @@ def metadata_ingress_report(
 # --- Tokenizer-aware scan metrics -------------------------------------------
 
 
-_token_scan_hits_total = _get_or_create_counter(
+_token_scan_hits_total = _get_or_create_buffered_counter(
     "guardrail_token_scan_hits_total",
     "Tokenizer-aware matches for configured terms",
     ("tenant", "bot", "term"),
@@ -336,27 +363,27 @@ def token_scan_report(
 
 # --- Emoji ZWJ / TAG metrics ---------------------------------------------------
 
-_emoji_fields_total = _get_or_create_counter(
+_emoji_fields_total = _get_or_create_buffered_counter(
     "guardrail_emoji_fields_total",
     "JSON string fields inspected for emoji ZWJ/TAG patterns",
     ("tenant", "bot"),
 )
-_emoji_tag_sequences_total = _get_or_create_counter(
+_emoji_tag_sequences_total = _get_or_create_buffered_counter(
     "guardrail_emoji_tag_sequences_total",
     "Emoji TAG sequences observed (with optional CANCEL TAG)",
     ("tenant", "bot"),
 )
-_emoji_zwj_total = _get_or_create_counter(
+_emoji_zwj_total = _get_or_create_buffered_counter(
     "guardrail_emoji_zwj_total",
     "Zero-width joiners observed in JSON strings",
     ("tenant", "bot"),
 )
-_emoji_controls_total = _get_or_create_counter(
+_emoji_controls_total = _get_or_create_buffered_counter(
     "guardrail_emoji_controls_total",
     "Emoji-related control code points observed (ZWJ/ZWNJ/ZWSP/VS16/KEYCAP/TAG)",
     ("tenant", "bot"),
 )
-_emoji_hidden_text_bytes_total = _get_or_create_counter(
+_emoji_hidden_text_bytes_total = _get_or_create_buffered_counter(
     "guardrail_emoji_hidden_text_bytes_total",
     "Bytes of ASCII revealed from TAG sequences",
     ("tenant", "bot"),
@@ -390,27 +417,27 @@ def emoji_zwj_ingress_report(
     _best_effort("inc emoji zwj ingress metrics", _do)
 
 
-_unicode_strings_sanitized_total = _get_or_create_counter(
+_unicode_strings_sanitized_total = _get_or_create_buffered_counter(
     "guardrail_unicode_strings_sanitized_total",
     "Count of strings sanitized in ingress pipeline",
     ("tenant", "bot"),
 )
-_unicode_zero_width_removed_total = _get_or_create_counter(
+_unicode_zero_width_removed_total = _get_or_create_buffered_counter(
     "guardrail_unicode_zero_width_removed_total",
     "Total zero-width/formatting codepoints removed at ingress",
     ("tenant", "bot"),
 )
-_unicode_bidi_controls_removed_total = _get_or_create_counter(
+_unicode_bidi_controls_removed_total = _get_or_create_buffered_counter(
     "guardrail_unicode_bidi_controls_removed_total",
     "Total bidi control codepoints removed at ingress",
     ("tenant", "bot"),
 )
-_unicode_confusables_mapped_total = _get_or_create_counter(
+_unicode_confusables_mapped_total = _get_or_create_buffered_counter(
     "guardrail_unicode_confusables_mapped_total",
     "Total basic confusable characters mapped to ASCII at ingress",
     ("tenant", "bot"),
 )
-_unicode_mixed_script_inputs_total = _get_or_create_counter(
+_unicode_mixed_script_inputs_total = _get_or_create_buffered_counter(
     "guardrail_unicode_mixed_script_inputs_total",
     "Number of payloads exhibiting mixed Latin/Cyrillic/Greek scripts",
     ("tenant", "bot"),
@@ -474,17 +501,17 @@ def inc_sanitizer_confusable_detected(anomaly_type: str, count: int = 1) -> None
 # --- Decode ingress metrics --------------------------------------------------
 
 
-_decode_base64_total = _get_or_create_counter(
+_decode_base64_total = _get_or_create_buffered_counter(
     "guardrail_decode_base64_total",
     "Count of strings decoded from base64 at ingress",
     ("tenant", "bot"),
 )
-_decode_hex_total = _get_or_create_counter(
+_decode_hex_total = _get_or_create_buffered_counter(
     "guardrail_decode_hex_total",
     "Count of strings decoded from hex at ingress",
     ("tenant", "bot"),
 )
-_decode_url_total = _get_or_create_counter(
+_decode_url_total = _get_or_create_buffered_counter(
     "guardrail_decode_url_total",
     "Count of strings decoded from url-encoding at ingress",
     ("tenant", "bot"),
@@ -514,32 +541,32 @@ def decode_ingress_report(
 
 # --- Archive ingress metrics -------------------------------------------------
 
-_arch_candidates_total = _get_or_create_counter(
+_arch_candidates_total = _get_or_create_buffered_counter(
     "guardrail_archive_candidates_total",
     "JSON (filename,base64) pairs considered for archive peeking",
     ("tenant", "bot"),
 )
-_arch_detected_total = _get_or_create_counter(
+_arch_detected_total = _get_or_create_buffered_counter(
     "guardrail_archives_detected_total",
     "Valid archives detected and inspected",
     ("tenant", "bot"),
 )
-_arch_filenames_total = _get_or_create_counter(
+_arch_filenames_total = _get_or_create_buffered_counter(
     "guardrail_archive_filenames_total",
     "Total filenames listed from inspected archives",
     ("tenant", "bot"),
 )
-_arch_text_samples_total = _get_or_create_counter(
+_arch_text_samples_total = _get_or_create_buffered_counter(
     "guardrail_archive_text_samples_total",
     "Total text samples extracted from inspected archives",
     ("tenant", "bot"),
 )
-_arch_nested_blocked_total = _get_or_create_counter(
+_arch_nested_blocked_total = _get_or_create_buffered_counter(
     "guardrail_archive_nested_blocked_total",
     "Nested archives blocked by limits",
     ("tenant", "bot"),
 )
-_arch_errors_total = _get_or_create_counter(
+_arch_errors_total = _get_or_create_buffered_counter(
     "guardrail_archive_errors_total",
     "Errors encountered while peeking archives",
     ("tenant", "bot"),
@@ -579,27 +606,27 @@ def archive_ingress_report(
 # --- Markup ingress metrics --------------------------------------------------
 
 
-_markup_fields_with_markup_total = _get_or_create_counter(
+_markup_fields_with_markup_total = _get_or_create_buffered_counter(
     "guardrail_markup_fields_with_markup_total",
     "JSON string fields that appeared to contain markup (HTML/SVG) at ingress",
     ("tenant", "bot"),
 )
-_markup_scripts_removed_total = _get_or_create_counter(
+_markup_scripts_removed_total = _get_or_create_buffered_counter(
     "guardrail_markup_scripts_removed_total",
     "Count of script blocks removed during markup stripping",
     ("tenant", "bot"),
 )
-_markup_styles_removed_total = _get_or_create_counter(
+_markup_styles_removed_total = _get_or_create_buffered_counter(
     "guardrail_markup_styles_removed_total",
     "Count of style blocks removed during markup stripping",
     ("tenant", "bot"),
 )
-_markup_foreign_removed_total = _get_or_create_counter(
+_markup_foreign_removed_total = _get_or_create_buffered_counter(
     "guardrail_markup_foreign_removed_total",
     "Count of foreignObject blocks removed during markup stripping",
     ("tenant", "bot"),
 )
-_markup_tags_removed_total = _get_or_create_counter(
+_markup_tags_removed_total = _get_or_create_buffered_counter(
     "guardrail_markup_tags_removed_total",
     "Increment when residual tags were stripped (coarse indicator)",
     ("tenant", "bot"),
@@ -789,7 +816,7 @@ def _get_or_create_gauge(
 
 # --- Probing / leakage heuristics --------------------------------------------
 
-_probe_rate_exceeded_total = _get_or_create_counter(
+_probe_rate_exceeded_total = _get_or_create_buffered_counter(
     "guardrail_probe_rate_exceeded_total",
     "Requests where the per-session rate window was exceeded",
     ("tenant", "bot"),
@@ -799,12 +826,12 @@ _probe_rate_hits = _get_or_create_gauge(
     "Requests counted in the current rolling window (best-effort)",
     ("tenant", "bot"),
 )
-_probe_leakage_hits_total = _get_or_create_counter(
+_probe_leakage_hits_total = _get_or_create_buffered_counter(
     "guardrail_probe_leakage_hits_total",
     "Count of leakage-hint matches observed in incoming JSON strings",
     ("tenant", "bot"),
 )
-_probe_similarity_hits_total = _get_or_create_counter(
+_probe_similarity_hits_total = _get_or_create_buffered_counter(
     "guardrail_probe_similarity_hits_total",
     "Near-duplicate similarity hits across consecutive requests",
     ("tenant", "bot"),
@@ -825,7 +852,7 @@ def probing_ingress_report(
     def _do() -> None:
         if rate_exceeded:
             _probe_rate_exceeded_total.labels(tenant=tenant_l, bot=bot_l).inc(rate_exceeded)
-        _probe_rate_hits.labels(tenant=tenant_l, bot=bot_l).set(rate_hits)
+        metrics_facade.bound(_probe_rate_hits, tenant_l, bot_l).set(rate_hits)
         if leakage_hits:
             _probe_leakage_hits_total.labels(tenant=tenant_l, bot=bot_l).inc(leakage_hits)
         if similarity_hits:
@@ -853,6 +880,33 @@ webhook_dlq_depth = _get_or_create_gauge(
     "Number of items currently in the webhook DLQ.",
 )
 
+# --- Webhook per-destination delivery (async engine) -------------------------
+
+webhook_destination_latency_seconds = _get_or_create_histogram(
+    "guardrail_webhook_destination_latency_seconds",
+    "Webhook HTTP attempt latency by destination host.",
+    labelnames=("host",),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0),
+)
+
+webhook_destination_deliveries_total = _get_or_create_counter(
+    "guardrail_webhook_destination_deliveries_total",
+    "Webhook delivery outcomes by destination host.",
+    labelnames=("host", "outcome"),
+)
+
+webhook_destination_inflight = _get_or_create_gauge(
+    "guardrail_webhook_destination_inflight",
+    "Webhook requests currently in flight by destination host.",
+    labelnames=("host",),
+)
+
+webhook_destination_queued = _get_or_create_gauge(
+    "guardrail_webhook_destination_queued",
+    "Webhook events waiting (ready or scheduled for retry) by destination host.",
+    labelnames=("host",),
+)
+
 
 # --- Session risk metrics ----------------------------------------------------
 
@@ -861,7 +915,7 @@ _session_risk_score = _get_or_create_gauge(
     "Current risk score for a session",
     ("tenant", "bot"),
 )
-_session_risk_delta_total = _get_or_create_counter(
+_session_risk_delta_total = _get_or_create_buffered_counter(
     "guardrail_session_risk_delta_total",
     "Cumulative risk increments observed",
     ("tenant", "bot"),
@@ -880,7 +934,7 @@ def session_risk_report(
     t, b = _limit_tenant_bot_labels(tenant, bot)
     if delta:
         _session_risk_delta_total.labels(tenant=t, bot=b).inc(delta)
-    _session_risk_score.labels(tenant=t, bot=b).set(score)
+    metrics_facade.bound(_session_risk_score, t, b).set(score)
 
 
 # ---- Verifier provider metrics (existing set) --------------------------------
@@ -1035,11 +1089,10 @@ def inc_mitigation_override(mode: str) -> None:
 
 # ---- Verifier router rank metric (Hybrid-12) ---------------------------------
 
-VERIFIER_ROUTER_RANK_TOTAL = _get_or_create_counter(
+VERIFIER_ROUTER_RANK_TOTAL = _get_or_create_buffered_counter(
     "verifier_router_rank_total",
     "Count of provider rank computations by tenant and bot.",
     ("tenant", "bot"),
-    registry=REGISTRY,
 )
 
 
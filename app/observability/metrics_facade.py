@@ -0,0 +1,294 @@
+"""Low-overhead metric primitives for per-request instrumentation.
+
+``prometheus_client`` takes a lock and resolves label values on every
+``labels(...).inc()``, which costs several microseconds per event and adds
+up across the few dozen families a guardrail request touches. This module
+provides the pieces the hot report functions are built on:
+
+* :class:`BufferedCounter` - a counter collector whose label children are
+  created once and cached per label tuple. Increments land in a per-thread
+  cell without locking; cells are summed only when the family is collected.
+* :func:`bound` - the same child cache for native Prometheus gauges and
+  histograms.
+* A hard per-family series cap (``METRICS_FAMILY_SERIES_MAX``). Label
+  tuples past the cap are folded into one overflow series instead of
+  growing the family without bound.
+* :func:`render` - ``/metrics`` exposition that reuses the rendered text of
+  families that have not changed since the previous scrape.
+
+Buffered counters expose the same samples as a native counter, including
+the per-series ``_created`` sample. Per-thread cells are invisible to
+``prometheus_client``'s multiprocess collector, so with
+``PROMETHEUS_MULTIPROC_DIR`` set :func:`counter` hands out native counters
+instead.
+"""
+
+from __future__ import annotations
+
+import operator
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    generate_latest,
+    metrics as _prom_metrics,
+)
+from prometheus_client.core import CounterMetricFamily
+from prometheus_client.metrics_core import Metric
+from prometheus_client.registry import Collector
+
+_OVERFLOW = os.getenv("METRICS_LABEL_OVERFLOW", "__overflow__")
+
+
+def _series_max() -> int:
+    try:
+        return max(1, int(os.getenv("METRICS_FAMILY_SERIES_MAX", "10000")))
+    except ValueError:
+        return 10000
+
+
+class _Fixed:
+    """Registry stand-in that yields an already collected list of families."""
+
+    def __init__(self, metrics: Iterable[Metric]) -> None:
+        self._metrics = list(metrics)
+
+    def collect(self) -> List[Metric]:
+        return self._metrics
+
+
+def _multiprocess() -> bool:
+    return bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+
+class _CounterChild:
+    __slots__ = ("_cells", "_family", "created")
+
+    def __init__(self, family: "BufferedCounter") -> None:
+        # thread ident -> [running total]; each cell is only written by its thread.
+        self._cells: Dict[int, List[float]] = {}
+        self._family = family
+        self.created = time.time()
+
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only be incremented by non-negative amounts.")
+        ident = threading.get_ident()
+        cell = self._cells.get(ident)
+        if cell is None:
+            cell = self._cells[ident] = [0.0]
+        cell[0] += amount
+        # Set after the increment: a concurrent render that already cleared
+        # the flag re-renders on the next scrape instead of missing this event.
+        self._family._dirty = True
+
+    def get(self) -> float:
+        return float(sum(cell[0] for cell in list(self._cells.values())))
+
+
+class BufferedCounter(Collector):
+    """Counter collector with cached children and lock-free increments.
+
+    Mirrors the subset of ``prometheus_client.Counter`` used by report
+    functions: ``labels(*values)`` / ``labels(**values)`` returning a child
+    with ``inc()``, plus ``inc()`` on unlabelled families.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        *,
+        registry: Optional[CollectorRegistry] = REGISTRY,
+        max_series: Optional[int] = None,
+    ) -> None:
+        self._name = name[: -len("_total")] if name.endswith("_total") else name
+        self._documentation = documentation
+        self._labelnames: Tuple[str, ...] = tuple(labelnames)
+        self._by_name = operator.itemgetter(*self._labelnames) if self._labelnames else None
+        self._max_series = max_series or _series_max()
+        self._children: Dict[Tuple[str, ...], _CounterChild] = {}
+        self._lock = threading.Lock()
+        self._dirty = True
+        self._rendered = b""
+        if not self._labelnames:
+            self._children[()] = _CounterChild(self)
+        if registry is not None:
+            registry.register(self)
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def labels(self, *labelvalues: Any, **labelkwargs: Any) -> _CounterChild:
+        if labelkwargs:
+            if self._by_name is None or len(labelkwargs) != len(self._labelnames):
+                raise ValueError(f"incorrect label names for {self._name}")
+            try:
+                picked = self._by_name(labelkwargs)
+            except KeyError as exc:
+                raise ValueError(f"missing label {exc} for {self._name}") from None
+            labelvalues = picked if len(self._labelnames) > 1 else (picked,)
+        child = self._children.get(labelvalues)
+        if child is None:
+            child = self._new_child(tuple(str(value) for value in labelvalues))
+        return child
+
+    def _new_child(self, key: Tuple[str, ...]) -> _CounterChild:
+        if len(key) != len(self._labelnames):
+            raise ValueError(f"incorrect label count for {self._name}")
+        with self._lock:
+            child = self._children.get(key)
+            if child is not None:
+                return child
+            if len(self._children) >= self._max_series:
+                key = (_OVERFLOW,) * len(key)
+                child = self._children.get(key)
+                if child is not None:
+                    return child
+            child = _CounterChild(self)
+            self._children[key] = child
+            return child
+
+    def inc(self, amount: float = 1.0) -> None:
+        if self._labelnames:
+            raise ValueError(f"{self._name} has labels; use labels(...).inc()")
+        self._children[()].inc(amount)
+
+    def series(self) -> int:
+        return len(self._children)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._children = {} if self._labelnames else {(): _CounterChild(self)}
+            self._dirty = True
+
+    def describe(self) -> List[Metric]:
+        return [CounterMetricFamily(self._name, self._documentation, labels=self._labelnames)]
+
+    def collect(self) -> List[Metric]:
+        family = CounterMetricFamily(self._name, self._documentation, labels=self._labelnames)
+        # Honour disable_created_metrics() / PROMETHEUS_DISABLE_CREATED_SERIES.
+        use_created = getattr(_prom_metrics, "_use_created", True)
+        for key, child in list(self._children.items()):
+            created = child.created if use_created else None
+            family.add_metric(list(key), child.get(), created=created)
+        return [family]
+
+    def exposition(self) -> bytes:
+        """Rendered text for this family, re-rendered only after a change."""
+        if self._dirty:
+            self._dirty = False
+            self._rendered = generate_latest(_Fixed(self.collect()))  # type: ignore[arg-type]
+        return self._rendered
+
+
+_counters: Dict[str, Union[BufferedCounter, Counter]] = {}
+_counters_lock = threading.Lock()
+
+
+def counter(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    *,
+    registry: Optional[CollectorRegistry] = REGISTRY,
+) -> Union[BufferedCounter, Counter]:
+    """Get or create the buffered counter ``name`` (idempotent across reloads).
+
+    Returns a native ``Counter`` when ``PROMETHEUS_MULTIPROC_DIR`` is set.
+    """
+    with _counters_lock:
+        existing = _counters.get(name)
+        if existing is not None:
+            return existing
+        created: Union[BufferedCounter, Counter]
+        if _multiprocess():
+            created = Counter(name, documentation, labelnames, registry=registry)
+        else:
+            created = BufferedCounter(name, documentation, labelnames, registry=registry)
+        _counters[name] = created
+        return created
+
+
+_bound: Dict[Tuple[Any, Tuple[Any, ...]], Any] = {}
+_bound_series: Dict[Any, int] = {}
+_bound_lock = threading.Lock()
+
+
+def bound(metric: Any, *labelvalues: Any) -> Any:
+    """Cached ``metric.labels(*labelvalues)`` for native Prometheus metrics.
+
+    New label tuples past ``METRICS_FAMILY_SERIES_MAX`` for ``metric`` map to
+    the overflow child.
+    """
+    key = (metric, labelvalues)
+    child = _bound.get(key)
+    if child is not None:
+        return child
+    with _bound_lock:
+        child = _bound.get(key)
+        if child is None:
+            if _bound_series.get(metric, 0) >= _series_max():
+                child = metric.labels(*((_OVERFLOW,) * len(labelvalues)))
+            else:
+                child = metric.labels(*labelvalues)
+                _bound_series[metric] = _bound_series.get(metric, 0) + 1
+            _bound[key] = child
+    return child
+
+
+# collector id -> (collector, collected families, rendered text)
+_render_cache: Dict[int, Tuple[Any, List[Tuple[Any, ...]], bytes]] = {}
+_render_lock = threading.Lock()
+
+
+def render(registry: CollectorRegistry = REGISTRY) -> bytes:
+    """Prometheus text exposition of ``registry``, reusing unchanged families.
+
+    Byte-for-byte the same as ``generate_latest(registry)``. Buffered counters
+    skip collection entirely while unchanged; other collectors are still
+    collected, but formatting - the bulk of the cost - is skipped when their
+    samples match the previous scrape.
+    """
+    collectors = getattr(registry, "_collector_to_names", None)
+    if not isinstance(collectors, dict) or getattr(registry, "_target_info", None):
+        return generate_latest(registry)
+    lock = getattr(registry, "_lock", None)
+    if lock is not None:
+        with lock:
+            items = list(collectors)
+    else:
+        items = list(collectors)
+
+    parts: List[bytes] = []
+    with _render_lock:
+        seen = set()
+        for collector in items:
+            fast = getattr(collector, "exposition", None)
+            if callable(fast):
+                parts.append(fast())
+                continue
+            metrics = list(collector.collect())
+            fingerprint = [(m.name, m.type, m.documentation, m.unit, m.samples) for m in metrics]
+            ident = id(collector)
+            seen.add(ident)
+            cached = _render_cache.get(ident)
+            if cached is not None and cached[0] is collector and cached[1] == fingerprint:
+                parts.append(cached[2])
+                continue
+            text = generate_latest(_Fixed(metrics))  # type: ignore[arg-type]
+            _render_cache[ident] = (collector, fingerprint, text)
+            parts.append(text)
+        for stale in [ident for ident in _render_cache if ident not in seen]:
+            del _render_cache[stale]
+    return b"".join(parts)
+
+
+__all__ = ["BufferedCounter", "bound", "counter", "render"]
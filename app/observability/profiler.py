@@ -0,0 +1,172 @@
+"""Opt-in sampling profiler for individual requests.
+
+One in ``PROFILE_SAMPLE_EVERY`` requests is profiled: a background thread
+snapshots the stack of the thread serving the request every
+``PROFILE_INTERVAL_MS`` until the response completes, and the samples are
+written to ``PROFILE_DIR`` in collapsed-stack format (``frame;frame;frame
+count`` per line), ready for ``flamegraph.pl`` or speedscope.
+
+The stacks come from the event-loop thread. Other requests that interleave
+with the sampled one on the same loop show up in its profile too, which is
+the price of sampling without instrumenting every call.
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import Dict, List, Optional
+
+_log = logging.getLogger(__name__)
+
+_MAX_DEPTH = 128
+
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return (
+        f"{getattr(code, 'co_qualname', code.co_name)} ({code.co_filename}:{code.co_firstlineno})"
+    )
+
+
+def collapse(frame: Optional[FrameType]) -> str:
+    """Root-first ``;``-joined stack for ``frame``."""
+    labels: List[str] = []
+    while frame is not None and len(labels) < _MAX_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return ";".join(labels)
+
+
+class _Session:
+    def __init__(self, thread_id: int, interval: float) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self.started = time.time()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="guardrail-profiler", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[collapse(frame)] += 1
+
+    def stop(self) -> Counter[str]:
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        return self.samples
+
+
+class RequestProfiler:
+    """Samples one request in ``every`` and dumps collapsed stacks per request.
+
+    At most one request is profiled at a time; a sampled request that finds
+    the profiler busy is simply not profiled.
+    """
+
+    def __init__(
+        self,
+        every: int,
+        *,
+        directory: str | os.PathLike[str] = "var/profiles",
+        interval_ms: float = 2.0,
+        keep: int = 100,
+    ) -> None:
+        self.every = max(0, int(every))
+        self.directory = Path(directory)
+        self.interval = max(0.0005, float(interval_ms) / 1000.0)
+        self.keep = max(1, int(keep))
+        self._seq = itertools.count(1)
+        self._busy = threading.Lock()
+        self.written = 0
+
+    @classmethod
+    def from_env(cls) -> "RequestProfiler":
+        return cls(
+            _int_env("PROFILE_SAMPLE_EVERY", 0),
+            directory=os.getenv("PROFILE_DIR") or "var/profiles",
+            interval_ms=float(_int_env("PROFILE_INTERVAL_MS", 2)),
+            keep=_int_env("PROFILE_KEEP", 100),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.every > 0
+
+    def maybe_start(self) -> Optional[_Session]:
+        if not self.every or next(self._seq) % self.every:
+            return None
+        if not self._busy.acquire(blocking=False):
+            return None
+        try:
+            return _Session(threading.get_ident(), self.interval)
+        except Exception as exc:  # pragma: no cover - thread start failure
+            self._busy.release()
+            _log.debug("profiler start failed: %s", exc)
+            return None
+
+    def finish(self, session: _Session, label: str) -> Optional[Path]:
+        """Stop ``session`` and write its samples; returns the file written.
+
+        Joins the sampler thread and touches the filesystem, so async callers
+        run it through ``asyncio.to_thread``.
+        """
+        try:
+            samples = session.stop()
+        finally:
+            self._busy.release()
+        if not samples:
+            return None
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            safe = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in label)[:64]
+            path = self.directory / f"{int(session.started * 1000)}-{safe or 'request'}.folded"
+            lines = [f"{stack} {count}\n" for stack, count in samples.most_common()]
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text("".join(lines), encoding="utf-8")
+            os.replace(tmp, path)
+            self.written += 1
+            self._prune()
+            return path
+        except OSError as exc:
+            _log.debug("profile write failed: %s", exc)
+            return None
+
+    def _prune(self) -> None:
+        files = sorted(self.directory.glob("*.folded"), key=lambda p: p.stat().st_mtime)
+        for stale in files[: max(0, len(files) - self.keep)]:
+            try:
+                stale.unlink()
+            except OSError:
+                pass
+
+
+def read_collapsed(path: str | os.PathLike[str]) -> Dict[str, int]:
+    """Parse a collapsed-stack file back into ``{stack: count}``."""
+    out: Dict[str, int] = {}
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        stack, _, count = line.rpartition(" ")
+        if stack:
+            out[stack] = out.get(stack, 0) + int(count)
+    return out
+
+
+__all__ = ["RequestProfiler", "collapse", "read_collapsed"]
@@ -0,0 +1,495 @@
+"""Append-only, time-segmented NDJSON log with sparse indexes.
+
+Records are JSON objects carrying an epoch-millisecond timestamp. Appends go
+to the segment of the current time bucket (``<bucket_start_ms>.jsonl``) over
+one open handle, and ``fsync`` is batched: every ``fsync_every`` appends or
+``fsync_interval_s`` seconds, and whenever a segment is sealed.
+
+Each segment keeps a small index (``<bucket_start_ms>.idx`` once sealed): the
+min/max record timestamp, the tenants and bots it contains, and one mark every
+``index_every`` records holding the byte offset and the largest timestamp
+written before it. Range scans skip segments whose index cannot match and seek
+past the marks that end before ``since``. Retention drops whole segments;
+only a segment straddling the cutoff, or one holding rows of a filtered
+tenant, is rewritten, and sealed segments are rewritten without blocking
+appends.
+
+On open, a segment whose index is missing or stale is rebuilt by scanning it,
+and a torn last record (a crash mid-write) is truncated away.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+_log = logging.getLogger(__name__)
+
+Record = Dict[str, Any]
+
+_SEG_SUFFIX = ".jsonl"
+_IDX_SUFFIX = ".idx"
+
+
+def _ts_ms(record: Record) -> int:
+    try:
+        return int(record.get("ts_ms", 0))
+    except Exception:
+        return 0
+
+
+@dataclass
+class _Segment:
+    start_ms: int
+    path: Path
+    size: int = 0
+    count: int = 0
+    min_ts: Optional[int] = None
+    max_ts: Optional[int] = None
+    tenants: Set[str] = field(default_factory=set)
+    bots: Set[str] = field(default_factory=set)
+    # (offset, largest ts of every record before offset), every index_every records
+    marks: List[Tuple[int, int]] = field(default_factory=list)
+
+    @property
+    def index_path(self) -> Path:
+        return self.path.with_suffix(_IDX_SUFFIX)
+
+    def note(self, ts: int, tenant: Any, bot: Any, length: int, index_every: int) -> None:
+        if self.count and self.count % index_every == 0 and self.max_ts is not None:
+            self.marks.append((self.size, self.max_ts))
+        self.size += length
+        self.count += 1
+        self.min_ts = ts if self.min_ts is None else min(self.min_ts, ts)
+        self.max_ts = ts if self.max_ts is None else max(self.max_ts, ts)
+        if tenant is not None:
+            self.tenants.add(str(tenant))
+        if bot is not None:
+            self.bots.add(str(bot))
+
+    def may_match(
+        self,
+        since: Optional[int],
+        until: Optional[int],
+        tenant: Optional[str],
+        bot: Optional[str],
+    ) -> bool:
+        if not self.count or self.min_ts is None or self.max_ts is None:
+            return False
+        if since is not None and self.max_ts < since:
+            return False
+        if until is not None and self.min_ts > until:
+            return False
+        if tenant and tenant not in self.tenants:
+            return False
+        if bot and bot not in self.bots:
+            return False
+        return True
+
+    def seek(self, since: Optional[int]) -> int:
+        if since is None:
+            return 0
+        offset = 0
+        for mark_offset, mark_max in self.marks:
+            if mark_max >= since:
+                break
+            offset = mark_offset
+        return offset
+
+    def to_index(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "count": self.count,
+            "min_ts": self.min_ts,
+            "max_ts": self.max_ts,
+            "tenants": sorted(self.tenants),
+            "bots": sorted(self.bots),
+            "marks": self.marks,
+        }
+
+    def load_index(self, data: Dict[str, Any]) -> None:
+        self.size = int(data["size"])
+        self.count = int(data["count"])
+        self.min_ts = None if data.get("min_ts") is None else int(data["min_ts"])
+        self.max_ts = None if data.get("max_ts") is None else int(data["max_ts"])
+        self.tenants = set(data.get("tenants") or ())
+        self.bots = set(data.get("bots") or ())
+        self.marks = [(int(o), int(m)) for o, m in data.get("marks") or ()]
+
+
+class SegmentLog:
+    """Thread-safe segmented log rooted at ``directory``."""
+
+    def __init__(
+        self,
+        directory: str | os.PathLike[str],
+        *,
+        segment_seconds: float = 3600.0,
+        fsync_every: int = 64,
+        fsync_interval_s: float = 1.0,
+        index_every: int = 128,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.directory = Path(directory)
+        self.segment_ms = max(1, int(float(segment_seconds) * 1000))
+        self.fsync_every = max(1, int(fsync_every))
+        self.fsync_interval_s = max(0.0, float(fsync_interval_s))
+        self.index_every = max(1, int(index_every))
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._segments: List[_Segment] = []
+        self._active: Optional[_Segment] = None
+        self._handle: Optional[Any] = None
+        self._pending = 0
+        self._last_sync = clock()
+        self.truncated_bytes = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._recover()
+
+    # ------------------------------------------------------------------ open
+
+    def _recover(self) -> None:
+        for path in sorted(
+            self.directory.glob(f"*{_SEG_SUFFIX}"), key=lambda p: (len(p.stem), p.stem)
+        ):
+            try:
+                start = int(path.stem)
+            except ValueError:
+                continue
+            seg = _Segment(start, path)
+            size = path.stat().st_size
+            try:
+                data = json.loads(seg.index_path.read_text(encoding="utf-8"))
+                if int(data["size"]) != size:
+                    raise ValueError("stale index")
+                seg.load_index(data)
+            except (OSError, ValueError, KeyError, TypeError):
+                self._rebuild(seg)
+            self._segments.append(seg)
+
+    def _rebuild(self, seg: _Segment) -> None:
+        raw = seg.path.read_bytes()
+        end = raw.rfind(b"\n") + 1
+        # A record whose bytes made it to disk but whose newline did not is torn.
+        lines = raw[:end].split(b"\n")[:-1]
+        while lines:
+            try:
+                json.loads(lines[-1])
+                break
+            except ValueError:
+                end -= len(lines.pop()) + 1
+        if end < len(raw):
+            with open(seg.path, "r+b") as handle:
+                handle.truncate(end)
+                os.fsync(handle.fileno())
+            self.truncated_bytes += len(raw) - end
+            _log.warning("segment %s: truncated %d torn bytes", seg.path.name, len(raw) - end)
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                seg.size += len(line) + 1  # unreadable, but keep offsets exact
+                continue
+            seg.note(
+                _ts_ms(record),
+                record.get("tenant"),
+                record.get("bot"),
+                len(line) + 1,
+                self.index_every,
+            )
+        self._write_index(seg)
+
+    # ---------------------------------------------------------------- append
+
+    def _write_index(self, seg: _Segment) -> None:
+        tmp = seg.index_path.with_suffix(".idx.tmp")
+        try:
+            tmp.write_text(json.dumps(seg.to_index(), separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, seg.index_path)
+        except OSError as exc:
+            _log.debug("segment index write failed: %s", exc)
+
+    def _sync(self) -> None:
+        if self._handle is not None and self._pending:
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+        self._pending = 0
+        self._last_sync = self._clock()
+
+    def _seal(self) -> None:
+        if self._active is None:
+            return
+        try:
+            self._sync()
+        finally:
+            if self._handle is not None:
+                self._handle.close()
+            self._handle = None
+            self._write_index(self._active)
+            self._active = None
+
+    def _active_for(self, now_ms: int) -> _Segment:
+        bucket = now_ms - now_ms % self.segment_ms
+        active = self._active
+        if active is not None and bucket <= active.start_ms:
+            return active
+        self._seal()
+        last = self._segments[-1] if self._segments else None
+        if last is not None and last.start_ms >= bucket:
+            seg = last  # reopened after a restart, or the clock stepped back
+        else:
+            seg = _Segment(bucket, self.directory / f"{bucket}{_SEG_SUFFIX}")
+            self._segments.append(seg)
+        try:
+            seg.index_path.unlink()
+        except OSError:
+            pass
+        self._handle = open(seg.path, "ab")
+        self._active = seg
+        return seg
+
+    def append(self, record: Record) -> None:
+        data = (json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n").encode()
+        with self._lock:
+            now = self._clock()
+            seg = self._active_for(int(now * 1000))
+            assert self._handle is not None
+            self._handle.write(data)
+            self._handle.flush()
+            seg.note(
+                _ts_ms(record), record.get("tenant"), record.get("bot"), len(data), self.index_every
+            )
+            self._pending += 1
+            if self._pending >= self.fsync_every or now - self._last_sync >= self.fsync_interval_s:
+                self._sync()
+
+    def flush(self) -> None:
+        """Force pending appends to disk."""
+        with self._lock:
+            self._sync()
+
+    def close(self) -> None:
+        with self._lock:
+            self._seal()
+
+    # ----------------------------------------------------------------- query
+
+    def _snapshot(self) -> List[Tuple[_Segment, int]]:
+        with self._lock:
+            return [(seg, seg.size) for seg in self._segments]
+
+    @staticmethod
+    def _matches(
+        record: Record,
+        since: Optional[int],
+        until: Optional[int],
+        tenant: Optional[str],
+        bot: Optional[str],
+    ) -> bool:
+        ts = _ts_ms(record)
+        if since is not None and ts < since:
+            return False
+        if until is not None and ts > until:
+            return False
+        if tenant and record.get("tenant") != tenant:
+            return False
+        if bot and record.get("bot") != bot:
+            return False
+        return True
+
+    @staticmethod
+    def _read(seg: _Segment, start: int, size: int) -> Iterator[Record]:
+        try:
+            with open(seg.path, "rb") as handle:
+                handle.seek(start)
+                remaining = size - start
+                for line in handle:
+                    remaining -= len(line)
+                    if remaining < 0:
+                        break
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            return
+
+    def scan(
+        self,
+        *,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        tenant: Optional[str] = None,
+        bot: Optional[str] = None,
+        reverse: bool = False,
+    ) -> Iterator[Record]:
+        """Records with ``since <= ts_ms <= until`` (and tenant/bot), in log order.
+
+        Only segments whose index may match are opened. Order is append order
+        per segment, segments oldest first (newest first with ``reverse``).
+        """
+        segments = self._snapshot()
+        if reverse:
+            segments.reverse()
+        for seg, size in segments:
+            if not seg.may_match(since, until, tenant, bot):
+                continue
+            records = self._read(seg, seg.seek(since), size)
+            if reverse:
+                records = iter(list(records)[::-1])
+            for record in records:
+                if self._matches(record, since, until, tenant, bot):
+                    yield record
+
+    def tail(self, limit: int) -> List[Record]:
+        """The last ``limit`` records, oldest first."""
+        out: List[Record] = []
+        if limit <= 0:
+            return out
+        for record in self.scan(reverse=True):
+            out.append(record)
+            if len(out) >= limit:
+                break
+        out.reverse()
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "segments": len(self._segments),
+                "records": sum(seg.count for seg in self._segments),
+                "bytes": sum(seg.size for seg in self._segments),
+                "truncated_bytes": self.truncated_bytes,
+            }
+
+    # ------------------------------------------------------------- retention
+
+    def drop_before(self, cutoff_ms: int, *, limit: Optional[int] = None) -> int:
+        """Unlink segments whose records are all older than ``cutoff_ms``, oldest first.
+
+        With ``limit``, stops before the first segment that would exceed it.
+        """
+        doomed: List[_Segment] = []
+        total = 0
+        with self._lock:
+            for seg in self._segments:
+                if not seg.count:
+                    if seg is not self._active:
+                        doomed.append(seg)
+                    continue
+                if seg.max_ts is None or seg.max_ts >= cutoff_ms:
+                    break
+                if limit is not None and total + seg.count > limit:
+                    break
+                doomed.append(seg)
+                total += seg.count
+            if self._active in doomed:
+                self._seal()
+            self._segments = [seg for seg in self._segments if seg not in doomed]
+        for seg in doomed:
+            for path in (seg.path, seg.index_path):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+        return total
+
+    def _rewrite(
+        self, seg: _Segment, drop: Callable[[Record], bool], limit: Optional[int] = None
+    ) -> int:
+        """Rewrite ``seg`` without (up to ``limit``) records ``drop`` selects."""
+        with self._lock:
+            if seg is self._active:
+                self._seal()
+            size = seg.size
+        kept = _Segment(seg.start_ms, seg.path)
+        tmp = seg.path.with_suffix(".jsonl.tmp")
+        removed = 0
+        with open(tmp, "wb") as out:
+            for record in self._read(seg, 0, size):
+                if (limit is None or removed < limit) and drop(record):
+                    removed += 1
+                    continue
+                data = (
+                    json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n"
+                ).encode()
+                out.write(data)
+                kept.note(
+                    _ts_ms(record),
+                    record.get("tenant"),
+                    record.get("bot"),
+                    len(data),
+                    self.index_every,
+                )
+            out.flush()
+            os.fsync(out.fileno())
+        with self._lock:
+            if not removed or seg not in self._segments or seg is self._active or seg.size != size:
+                # Nothing to drop, or an append reopened the segment meanwhile:
+                # leave it for the next purge.
+                tmp.unlink(missing_ok=True)
+                return 0
+            os.replace(tmp, seg.path)
+            seg.load_index(kept.to_index())
+            self._write_index(seg)
+        return removed
+
+    def delete_where(
+        self,
+        *,
+        before_ms: Optional[int] = None,
+        tenant: Optional[str] = None,
+        bot: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> int:
+        """Delete records older than ``before_ms`` matching ``tenant``/``bot``, oldest first."""
+        removed = 0
+        if before_ms is not None and not tenant and not bot:
+            removed += self.drop_before(before_ms, limit=limit)
+        until = before_ms - 1 if before_ms is not None else None
+
+        def drop(record: Record) -> bool:
+            return self._matches(record, None, until, tenant, bot)
+
+        for seg, _ in self._snapshot():
+            if limit is not None and removed >= limit:
+                break
+            if seg.may_match(None, until, tenant, bot):
+                budget = None if limit is None else limit - removed
+                removed += self._rewrite(seg, drop, budget)
+        return removed
+
+
+_LOGS: Dict[str, SegmentLog] = {}
+_LOGS_LOCK = threading.Lock()
+
+
+def open_log(directory: str | os.PathLike[str], **options: Any) -> SegmentLog:
+    """Process-wide :class:`SegmentLog` for ``directory`` (opened once)."""
+    key = os.path.abspath(os.fspath(directory))
+    with _LOGS_LOCK:
+        log = _LOGS.get(key)
+        if log is None:
+            log = SegmentLog(key, **options)
+            _LOGS[key] = log
+        return log
+
+
+def close_all() -> None:
+    with _LOGS_LOCK:
+        logs = list(_LOGS.values())
+        _LOGS.clear()
+    for log in logs:
+        try:
+            log.close()
+        except Exception as exc:
+            _log.debug("segment log close failed: %s", exc)
+
+
+__all__ = ["SegmentLog", "close_all", "open_log"]
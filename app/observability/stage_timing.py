@@ -0,0 +1,304 @@
+"""Per-request stage timing for the middleware stack and guardrail pipeline.
+
+:func:`install_stage_timing` wraps every middleware layer of the app (and
+the routed endpoint, as ``app``) so each request accumulates the *self* time
+of each layer - time spent in the layer itself, excluding the layers it
+calls. Route handlers subdivide their own time with :func:`lap` or
+:func:`stage`. At the end of the request every stage is observed into
+``guardrail_stage_seconds{stage}``. With ``SERVER_TIMING_HEADER`` on, the
+slowest stages completed before the response headers are also reported in
+a ``Server-Timing`` header; it is off by default because it shows stage
+names and timings to any client.
+
+Stage names are middleware class names (minus ``Middleware``) and
+``evaluate.<step>`` for pipeline steps, so the histogram's label set is
+bounded by the code, not by traffic.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from starlette.middleware import Middleware
+from starlette.middleware.exceptions import ExceptionMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.metrics.latency import STAGE_LATENCY
+from app.observability import metrics_facade
+from app.observability.profiler import RequestProfiler
+
+_perf = time.perf_counter
+
+
+class _Frame:
+    __slots__ = ("child", "child_mark", "mark", "name", "start")
+
+    def __init__(self, name: str, start: float) -> None:
+        self.name = name
+        self.start = start
+        self.child = 0.0  # time attributed to nested stages so far
+        self.mark = start  # last lap() boundary
+        self.child_mark = 0.0  # ``child`` at the last lap() boundary
+
+
+class StageTimings:
+    """Stage -> accumulated self seconds for one request."""
+
+    __slots__ = ("_open", "stages", "start")
+
+    def __init__(self, start: float) -> None:
+        self.start = start
+        self.stages: Dict[str, float] = {}
+        self._open: List[_Frame] = []
+
+    def record(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + max(0.0, seconds)
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, float]:
+        """Completed stages plus the self time so far of stages still open."""
+        now = _perf() if now is None else now
+        out = dict(self.stages)
+        frames = sorted(self._open, key=lambda f: f.start)
+        for frame, inner in zip(frames, frames[1:] + [None]):
+            until = inner.start if inner is not None else now
+            out[frame.name] = out.get(frame.name, 0.0) + max(0.0, until - frame.start - frame.child)
+        return out
+
+    def server_timing(self, now: Optional[float] = None, limit: int = 12) -> str:
+        now = _perf() if now is None else now
+        ranked = sorted(self.snapshot(now).items(), key=lambda kv: kv[1], reverse=True)
+        parts = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in ranked[:limit]]
+        parts.append(f"total;dur={(now - self.start) * 1000:.3f}")
+        return ", ".join(parts)
+
+
+_TIMINGS: contextvars.ContextVar[Optional[StageTimings]] = contextvars.ContextVar(
+    "guardrail_stage_timings", default=None
+)
+_FRAME: contextvars.ContextVar[Optional[_Frame]] = contextvars.ContextVar(
+    "guardrail_stage_frame", default=None
+)
+
+
+def current() -> Optional[StageTimings]:
+    """Timings of the request being served, if stage timing is active."""
+    return _TIMINGS.get()
+
+
+def _enter(timings: StageTimings, name: str) -> Tuple[_Frame, Optional[_Frame], Any]:
+    frame = _Frame(name, _perf())
+    timings._open.append(frame)
+    return frame, _FRAME.get(), _FRAME.set(frame)
+
+
+def _exit(timings: StageTimings, frame: _Frame, parent: Optional[_Frame], token: Any) -> None:
+    _FRAME.reset(token)
+    elapsed = _perf() - frame.start
+    timings.record(frame.name, elapsed - frame.child)
+    try:
+        timings._open.remove(frame)
+    except ValueError:  # pragma: no cover - defensive
+        pass
+    if parent is not None:
+        parent.child += elapsed
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Attribute the enclosed block to ``name`` (excluded from the caller's time)."""
+    timings = _TIMINGS.get()
+    if timings is None:
+        yield
+        return
+    frame, parent, token = _enter(timings, name)
+    try:
+        yield
+    finally:
+        _exit(timings, frame, parent, token)
+
+
+def lap(name: str) -> None:
+    """Attribute the time since the previous lap (or stage start) to ``name``.
+
+    Lets a long handler mark step boundaries without re-indenting its body;
+    the remainder after the last lap stays with the enclosing stage.
+    """
+    frame = _FRAME.get()
+    timings = _TIMINGS.get()
+    if frame is None or timings is None:
+        return
+    now = _perf()
+    spent = now - frame.mark - (frame.child - frame.child_mark)
+    timings.record(name, spent)
+    frame.child += max(0.0, spent)
+    frame.mark = now
+    frame.child_mark = frame.child
+
+
+class _TimedLayer:
+    """Wraps one ASGI layer and records its self time under ``name``."""
+
+    __slots__ = ("app", "name")
+
+    def __init__(self, app: ASGIApp, name: str) -> None:
+        self.app = app
+        self.name = name
+
+    def __getattr__(self, item: str) -> Any:
+        # Keep attribute lookups (e.g. ``app.middleware_stack.app``) transparent.
+        if item == "app":
+            raise AttributeError(item)
+        return getattr(self.app, item)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        timings = _TIMINGS.get()
+        if timings is None:
+            await self.app(scope, receive, send)
+            return
+        frame, parent, token = _enter(timings, self.name)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _exit(timings, frame, parent, token)
+
+
+def layer_name(cls: Any, kwargs: Dict[str, Any]) -> str:
+    dispatch = kwargs.get("dispatch")
+    if dispatch is not None:
+        name = getattr(dispatch, "__name__", "") or type(dispatch).__name__
+    else:
+        name = getattr(cls, "__name__", "") or type(cls).__name__
+    name = name.strip("_")
+    if name.endswith("Middleware") and name != "Middleware":
+        name = name[: -len("Middleware")]
+    return name or "middleware"
+
+
+def _timed_factory(cls: Any, name: str) -> Callable[..., ASGIApp]:
+    def build(app: ASGIApp, *args: Any, **kwargs: Any) -> ASGIApp:
+        if isinstance(app, ExceptionMiddleware):
+            app = _TimedLayer(app, "app")
+        return _TimedLayer(cls(app, *args, **kwargs), name)
+
+    return build
+
+
+def _timed(entry: Any) -> Any:
+    cls = getattr(entry, "cls", None)
+    if cls is None:
+        return entry
+    kwargs = dict(getattr(entry, "kwargs", {}) or {})
+    factory = _timed_factory(cls, layer_name(cls, kwargs))
+    return Middleware(factory, *getattr(entry, "args", ()), **kwargs)
+
+
+def _env_on(name: str, default: str = "1") -> bool:
+    return (os.getenv(name, default) or "").strip().lower() not in {"0", "false", "no", "off"}
+
+
+class StageTimingMiddleware:
+    """Outermost layer: owns the per-request timings, header and profiler."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        header: bool = False,
+        header_limit: int = 12,
+        profiler: Optional[RequestProfiler] = None,
+    ) -> None:
+        self.app = app
+        self.header = header
+        self.header_limit = header_limit
+        self.profiler = profiler if profiler is not None and profiler.enabled else None
+
+    def __getattr__(self, item: str) -> Any:
+        if item == "app":
+            raise AttributeError(item)
+        return getattr(self.app, item)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope.get("type") != "http":
+            await self.app(scope, receive, send)
+            return
+        timings = StageTimings(_perf())
+        timings_token = _TIMINGS.set(timings)
+        frame_token = _FRAME.set(None)
+        session = self.profiler.maybe_start() if self.profiler is not None else None
+
+        limit = self.header_limit
+
+        async def send_with_header(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                value = timings.server_timing(limit=limit).encode("latin-1")
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", value))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_header if self.header else send)
+        finally:
+            _FRAME.reset(frame_token)
+            _TIMINGS.reset(timings_token)
+            for name, seconds in timings.snapshot().items():
+                metrics_facade.bound(STAGE_LATENCY, name).observe(seconds)
+            if session is not None and self.profiler is not None:
+                label = f"{scope.get('method', '')}{scope.get('path', '')}"
+                # Joining the sampler and writing the file block; keep them off the loop.
+                await asyncio.to_thread(self.profiler.finish, session, label)
+
+
+_installed_lock = threading.Lock()
+
+
+def install_stage_timing(app: Any) -> None:
+    """Time every middleware layer of ``app`` from the next stack build on.
+
+    Controlled by ``STAGE_TIMING_ENABLED`` (default on), ``SERVER_TIMING_HEADER``
+    (default off), ``SERVER_TIMING_MAX_ENTRIES`` and the ``PROFILE_*`` settings
+    of :class:`~app.observability.profiler.RequestProfiler`.
+    """
+    if not _env_on("STAGE_TIMING_ENABLED"):
+        return
+    with _installed_lock:
+        if getattr(app.state, "stage_timing_installed", False):
+            return
+        app.state.stage_timing_installed = True
+    try:
+        limit = int(os.getenv("SERVER_TIMING_MAX_ENTRIES", "12"))
+    except ValueError:
+        limit = 12
+    header = _env_on("SERVER_TIMING_HEADER", "0")
+    profiler = RequestProfiler.from_env()
+    original = app.build_middleware_stack
+
+    def build_middleware_stack() -> ASGIApp:
+        declared = list(app.user_middleware)
+        app.user_middleware = [_timed(entry) for entry in declared]
+        try:
+            stack = original()
+        finally:
+            app.user_middleware = declared
+        return StageTimingMiddleware(stack, header=header, header_limit=limit, profiler=profiler)
+
+    app.build_middleware_stack = build_middleware_stack
+    if getattr(app, "middleware_stack", None) is not None:
+        app.middleware_stack = None
+
+
+__all__ = [
+    "StageTimingMiddleware",
+    "StageTimings",
+    "current",
+    "install_stage_timing",
+    "lap",
+    "layer_name",
+    "stage",
+]
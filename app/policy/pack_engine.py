@@ -1,9 +1,31 @@
 from __future__ import annotations
 
+import re
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Sequence, Tuple
+from re import _constants as _sre_constants, _parser as _sre_parser  # type: ignore[attr-defined]
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Pattern,
+    Sequence,
+    Set,
+    Tuple,
+    cast,
+)
 
-from app.policy.packs import AdvisoryLevel, LoadedPacks, SeverityLevel
+from app.policy.packs import (
+    AdvisoryLevel,
+    LoadedPacks,
+    Rule,
+    SeverityLevel,
+    packs_from_files,
+    read_pack_files,
+)
+from app.services import policy_snapshot
 
 ADVISORY_ORDER: Dict[AdvisoryLevel, int] = {
     "pass": 0,
@@ -21,20 +43,261 @@ class Violation:
     severity: SeverityLevel
 
 
-def evaluate_text(text: str, packs: LoadedPacks) -> Tuple[List[Violation], AdvisoryLevel]:
-    """Evaluate plain text against loaded policy rules."""
+class EvaluationPlan:
+    """``LoadedPacks`` compiled for repeated evaluation.
 
+    Every ``any_terms`` phrase and the longest literal each rule regex
+    requires are compiled into one trie-shaped scanner that runs once over
+    the lowercased input. Term hits resolve rules directly; literal hits
+    select the only regexes that can possibly match, so a pack's regex cost
+    follows what the text contains instead of how many rules exist.
+    Identical regexes shared by several rules are searched once. Regexes are
+    tried from ``block`` down so callers that only need the verdict can stop
+    at the first blocking hit.
+    """
+
+    def __init__(self, rules: Sequence[Rule]) -> None:
+        self.rules: Tuple[Rule, ...] = tuple(rules)
+        self.blocking: FrozenSet[int] = frozenset(
+            idx for idx, rule in enumerate(self.rules) if rule.advisory == "block"
+        )
+        self.slots: Tuple[_PatternSlot, ...] = _pattern_slots(self.rules)
+
+        term_rules: Dict[str, Set[int]] = {}
+        anchor_slots: Dict[str, Set[int]] = {}
+        always: Set[int] = set()
+        unanchored: Set[int] = set()
+        for idx, rule in enumerate(self.rules):
+            for term in rule.any_terms or ():
+                lowered = term.lower()
+                if lowered:
+                    term_rules.setdefault(lowered, set()).add(idx)
+                else:
+                    always.add(idx)
+        for pos, slot in enumerate(self.slots):
+            if slot.anchor:
+                anchor_slots.setdefault(slot.anchor, set()).add(pos)
+            else:
+                unanchored.add(pos)
+        self.always: FrozenSet[int] = frozenset(always)
+        self.unanchored: FrozenSet[int] = frozenset(unanchored)
+
+        self.scanner: Optional[Pattern[str]] = None
+        self.keys: Dict[str, Tuple[FrozenSet[int], FrozenSet[int]]] = {}
+        keys = set(term_rules) | set(anchor_slots)
+        if not keys:
+            return
+
+        trie: Dict[str, Any] = {}
+        for key in keys:
+            node = trie
+            for ch in key:
+                node = node.setdefault(ch, {})
+            node[""] = key
+
+        # The scanner reports the longest key starting at each position; every
+        # shorter key ending on the same trie path starts there too.
+        for key in keys:
+            node = trie
+            rules_hit: Set[int] = set()
+            slots_hit: Set[int] = set()
+            for ch in key:
+                node = node[ch]
+                if "" in node:
+                    rules_hit |= term_rules.get(node[""], set())
+                    slots_hit |= anchor_slots.get(node[""], set())
+            self.keys[key] = (frozenset(rules_hit), frozenset(slots_hit))
+        self.scanner = re.compile(f"(?=({_trie_pattern(trie)}))")
+
+    def match(self, text: str, *, stop_on_block: bool = False) -> Set[int]:
+        """Return the indices of rules hit by ``text``."""
+
+        hits: Set[int] = set(self.always)
+        candidates: Set[int] = set(self.unanchored)
+        if self.scanner is not None:
+            keys = self.keys
+            seen: Set[str] = set()
+            for found in self.scanner.finditer(text.lower()):
+                key = found.group(1)
+                if key not in seen:
+                    seen.add(key)
+                    rules_hit, slots_hit = keys[key]
+                    hits |= rules_hit
+                    candidates |= slots_hit
+        blocking = self.blocking
+        if stop_on_block and not hits.isdisjoint(blocking):
+            return hits
+
+        slots = self.slots
+        for pos in sorted(candidates):
+            slot = slots[pos]
+            if hits.issuperset(slot.members) or not slot.pattern.search(text):
+                continue
+            hits.update(slot.members)
+            if stop_on_block and not hits.isdisjoint(blocking):
+                break
+        return hits
+
+
+@dataclass(frozen=True)
+class _PatternSlot:
+    """One distinct rule regex, the rules sharing it, and its required literal."""
+
+    pattern: Pattern[str]
+    members: Tuple[int, ...]
+    rank: int
+    anchor: Optional[str]
+
+
+def _pattern_slots(rules: Sequence[Rule]) -> Tuple[_PatternSlot, ...]:
+    unique: Dict[Tuple[str, int], Tuple[Pattern[str], List[int]]] = {}
+    for idx, rule in enumerate(rules):
+        if rule.pattern is not None:
+            key = (rule.pattern.pattern, rule.pattern.flags)
+            unique.setdefault(key, (rule.pattern, []))[1].append(idx)
+    slots = [
+        _PatternSlot(
+            pattern=pattern,
+            members=tuple(members),
+            rank=max(ADVISORY_ORDER[rules[idx].advisory] for idx in members),
+            anchor=_required_literal(pattern),
+        )
+        for pattern, members in unique.values()
+    ]
+    # Highest advisory first so verdict-only evaluation can stop early.
+    slots.sort(key=lambda slot: -slot.rank)
+    return tuple(slots)
+
+
+# ASCII letters that ``re.IGNORECASE`` also matches against a non-ASCII
+# character whose ``str.lower()`` differs (dotless i, long s).
+_UNSAFE_LITERALS = frozenset("is")
+
+
+def _required_literal(pattern: Pattern[str]) -> Optional[str]:
+    """Longest ASCII literal every match of ``pattern`` contains, lowercased.
+
+    Only literal runs on the mandatory path are considered (top-level
+    sequence, groups and repeats with a minimum of one); alternations,
+    classes and optional parts end a run. ``None`` when nothing qualifies.
+    """
+
+    try:
+        tree = _sre_parser.parse(pattern.pattern, pattern.flags)
+    except Exception:
+        return None
+
+    best = ""
+
+    def flush(run: List[str]) -> None:
+        nonlocal best
+        if len(run) > len(best):
+            best = "".join(run)
+        run.clear()
+
+    def walk(seq: Any) -> None:
+        run: List[str] = []
+        for op, av in seq:
+            if op is _sre_constants.LITERAL and 0 < av < 128:
+                ch = chr(av).lower()
+                if ch not in _UNSAFE_LITERALS:
+                    run.append(ch)
+                    continue
+            flush(run)
+            if op is _sre_constants.SUBPATTERN:
+                walk(av[-1])
+            elif op is _sre_constants.ATOMIC_GROUP:
+                walk(av)
+            elif op in _REPEATS and av[0] >= 1:
+                walk(av[2])
+        flush(run)
+
+    walk(tree)
+    return best or None
+
+
+_REPEATS = (
+    _sre_constants.MAX_REPEAT,
+    _sre_constants.MIN_REPEAT,
+    _sre_constants.POSSESSIVE_REPEAT,
+)
+
+
+def _trie_pattern(node: Dict[str, Any]) -> str:
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ""
+    terminal = "" in node
+    if len(branches) == 1 and not terminal:
+        return branches[0]
+    body = f"(?:{'|'.join(branches)})"
+    return f"{body}?" if terminal else body
+
+
+def compile_packs(packs: LoadedPacks) -> EvaluationPlan:
+    """Return the evaluation plan for ``packs``, compiling it on first use."""
+
+    plan = packs.__dict__.get("_evaluation_plan")
+    if plan is None:
+        plan = EvaluationPlan(packs.rules)
+        object.__setattr__(packs, "_evaluation_plan", plan)
+    return cast(EvaluationPlan, plan)
+
+
+def load_compiled(dirpath: str = "policy/packs") -> LoadedPacks:
+    """``load_packs(dirpath)`` with its plan compiled, reusing a policy snapshot."""
+
+    files = read_pack_files(dirpath)
+
+    def build() -> LoadedPacks:
+        packs = packs_from_files(files)
+        compile_packs(packs)
+        return packs
+
+    sources = [(str(path), raw) for path, raw in files]
+    return policy_snapshot.load_or_build("packs", sources, build)
+
+
+def evaluate_text(
+    text: str,
+    packs: LoadedPacks,
+    *,
+    stop_on_block: bool = False,
+) -> Tuple[List[Violation], AdvisoryLevel]:
+    """Evaluate plain text against loaded policy rules.
+
+    With ``stop_on_block`` evaluation ends as soon as a ``block`` rule hits;
+    the returned action is unchanged but the violation list may be partial.
+    """
+
+    plan = compile_packs(packs)
     hits: List[Violation] = []
     max_action: AdvisoryLevel = "pass"
+    for idx in sorted(plan.match(text, stop_on_block=stop_on_block)):
+        rule = plan.rules[idx]
+        hits.append(
+            Violation(
+                pack=rule.pack,
+                rule_id=rule.id,
+                advisory=rule.advisory,
+                severity=rule.severity,
+            )
+        )
+        if ADVISORY_ORDER[rule.advisory] > ADVISORY_ORDER[max_action]:
+            max_action = rule.advisory
+    return hits, max_action
+
 
-    def bump(action: AdvisoryLevel) -> None:
-        nonlocal max_action
-        if ADVISORY_ORDER[action] > ADVISORY_ORDER[max_action]:
-            max_action = action
+def _evaluate_linear(text: str, packs: LoadedPacks) -> Tuple[List[Violation], AdvisoryLevel]:
+    """Reference rule-by-rule evaluation; kept for equivalence tests and benches."""
 
+    hits: List[Violation] = []
+    max_action: AdvisoryLevel = "pass"
     lower_text = text.lower()
     for rule in packs.rules:
-        if rule.pattern and rule.pattern.search(text):
+        if (rule.pattern and rule.pattern.search(text)) or (
+            rule.any_terms and _has_any_term(lower_text, rule.any_terms)
+        ):
             hits.append(
                 Violation(
                     pack=rule.pack,
@@ -43,19 +306,8 @@ def evaluate_text(text: str, packs: LoadedPacks) -> Tuple[List[Violation], Advis
                     severity=rule.severity,
                 )
             )
-            bump(rule.advisory)
-            continue
-        if rule.any_terms and _has_any_term(lower_text, rule.any_terms):
-            hits.append(
-                Violation(
-                    pack=rule.pack,
-                    rule_id=rule.id,
-                    advisory=rule.advisory,
-                    severity=rule.severity,
-                )
-            )
-            bump(rule.advisory)
-
+            if ADVISORY_ORDER[rule.advisory] > ADVISORY_ORDER[max_action]:
+                max_action = rule.advisory
     return hits, max_action
 
 
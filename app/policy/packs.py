@@ -94,14 +94,25 @@ def load_packs(
     dirpath: str = "policy/packs",
     tenant_overrides: Optional[TenantOverrides] = None,
 ) -> LoadedPacks:
+    return packs_from_files(read_pack_files(dirpath), tenant_overrides)
+
+
+def read_pack_files(dirpath: str = "policy/packs") -> List[Tuple[Path, bytes]]:
+    """Raw ``(path, bytes)`` of every pack file under ``dirpath`` in load order."""
     root = Path(dirpath)
     if not root.exists():
         raise FileNotFoundError(f"Policy pack directory not found: {dirpath}")
+    return [(pack_file, pack_file.read_bytes()) for pack_file in sorted(root.glob("*.yaml"))]
+
 
+def packs_from_files(
+    files: Sequence[Tuple[Path, bytes]],
+    tenant_overrides: Optional[TenantOverrides] = None,
+) -> LoadedPacks:
     overrides = _normalise_overrides(tenant_overrides)
     rules: List[Rule] = []
-    for pack_file in sorted(root.glob("*.yaml")):
-        data = _yaml_load(pack_file.read_text(encoding="utf-8"))
+    for pack_file, raw in files:
+        data = _yaml_load(raw.decode("utf-8"))
         if "pack" not in data:
             # Skip legacy pack files that do not follow the new schema.
             continue
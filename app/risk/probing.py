@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import operator
 import time
+import zlib
 from collections import deque
-from typing import Deque, Dict, Iterable, List
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
 
 DEFAULT_RATE_WINDOW_SECS = 30.0
 DEFAULT_MAX_REQS_PER_WINDOW = 20
@@ -43,6 +46,183 @@ def jaccard_similarity(a: str, b: str, n: int = 3) -> float:
     return float(inter) / float(union)
 
 
+Signature = Tuple[int, ...]
+
+_MASK64 = (1 << 64) - 1
+_GOLDEN64 = 0x9E3779B97F4A7C15
+
+
+class MinHasher:
+    """MinHash signatures over casefolded character n-gram sets.
+
+    Uses one-permutation hashing: each distinct n-gram is hashed once, the
+    top bits pick one of ``num_perm`` bins and each bin keeps its minimum;
+    empty bins borrow from the next non-empty one (rotation densification).
+    Building a signature is linear in the text, comparing two is
+    ``O(num_perm)`` regardless of how long the texts were, and the fraction
+    of agreeing bins estimates their Jaccard similarity with a standard
+    error of ``sqrt(J * (1 - J) / num_perm)``.
+    """
+
+    def __init__(self, num_perm: int = 128, n: int = 3, seed: int = 0x5EED) -> None:
+        if num_perm < 2 or num_perm & (num_perm - 1):
+            raise ValueError("num_perm must be a power of two")
+        self.num_perm = num_perm
+        self.n = n
+        self.seed = seed & 0xFFFFFFFF
+        self._shift = 64 - (num_perm.bit_length() - 1)
+        self._value_mask = (1 << self._shift) - 1
+
+    def signature(self, text: str) -> Signature:
+        """Return the signature of ``text``; empty when it has no n-grams."""
+        s = text.casefold()
+        n = self.n
+        grams = {s[i : i + n] for i in range(len(s) - n + 1)}
+        if not grams:
+            return ()
+        k = self.num_perm
+        shift, mask, seed = self._shift, self._value_mask, self.seed
+        empty = mask + 1
+        mins = [empty] * k
+        for gram in grams:
+            h = (zlib.crc32(gram.encode("utf-8"), seed) * _GOLDEN64) & _MASK64
+            slot = h >> shift
+            value = h & mask
+            if value < mins[slot]:
+                mins[slot] = value
+        for j in range(k):
+            if mins[j] == empty:
+                t = 1
+                while mins[(j + t) % k] >= empty:
+                    t += 1
+                # Offset by distance so borrowed values never equal native ones.
+                mins[j] = mins[(j + t) % k] + t * empty
+        return tuple(mins)
+
+    @staticmethod
+    def estimate(a: Signature, b: Signature) -> float:
+        """Estimated Jaccard similarity of the texts behind two signatures."""
+        if not a or not b or len(a) != len(b):
+            return 0.0
+        return float(sum(map(operator.eq, a, b))) / len(a)
+
+
+@dataclass
+class _SessionWindow:
+    last: float
+    seq: int = 0
+    order: Deque[int] = field(default_factory=deque)
+    signatures: Dict[int, Signature] = field(default_factory=dict)
+    buckets: Dict[Tuple[int, int], Set[int]] = field(default_factory=dict)
+
+
+class NearDuplicateIndex:
+    """Per-session window of the last ``window`` prompt signatures.
+
+    Signatures are split into ``bands`` bands; prompts sharing any band are
+    candidates (LSH), and only the ``verify`` candidates sharing the most
+    bands are compared bin by bin, so a lookup costs ``O(bands)`` dict probes
+    plus a handful of comparisons whatever the window size or prompt length.
+    Only signatures are kept, never the prompt text.
+    """
+
+    def __init__(
+        self,
+        window: int = 16,
+        num_perm: int = 128,
+        bands: int = 32,
+        ttl_secs: float = 15 * 60,
+        max_sessions: int = 50_000,
+        verify: int = 4,
+    ) -> None:
+        if num_perm % bands:
+            raise ValueError("bands must divide num_perm")
+        self.hasher = MinHasher(num_perm=num_perm)
+        self.window = window
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ttl_secs = ttl_secs
+        self.max_sessions = max_sessions
+        self.verify = verify
+        self._sessions: Dict[str, _SessionWindow] = {}
+
+    def signature(self, text: str) -> Signature:
+        return self.hasher.signature(text)
+
+    def _band_keys(self, sig: Signature) -> List[Tuple[int, int]]:
+        r = self.rows
+        return [(b, hash(sig[b * r : (b + 1) * r])) for b in range(self.bands)]
+
+    def _session(self, key: str, now: float) -> Optional[_SessionWindow]:
+        session = self._sessions.get(key)
+        if session is not None and now - session.last > self.ttl_secs:
+            self._sessions.pop(key, None)
+            return None
+        return session
+
+    def best_match(self, key: str, sig: Signature, now: Optional[float] = None) -> float:
+        """Highest estimated similarity of ``sig`` to the session's window."""
+        if not sig:
+            return 0.0
+        session = self._session(key, now or time.time())
+        if session is None or not session.signatures:
+            return 0.0
+        shared: Dict[int, int] = {}
+        for band in self._band_keys(sig):
+            for seq in session.buckets.get(band, ()):
+                shared[seq] = shared.get(seq, 0) + 1
+        if not shared:
+            return 0.0
+        # The entries sharing the most bands are the most similar ones; only
+        # those few are compared bin by bin.
+        ranked = sorted(shared, key=shared.__getitem__, reverse=True)[: self.verify]
+        signatures = session.signatures
+        return max(self.hasher.estimate(sig, signatures[seq]) for seq in ranked)
+
+    def add(self, key: str, sig: Signature, now: Optional[float] = None) -> None:
+        """Append ``sig`` to the session window, evicting the oldest entry."""
+        if not sig:
+            return
+        now = now or time.time()
+        session = self._session(key, now)
+        if session is None:
+            self._gc(now)
+            session = _SessionWindow(last=now)
+            self._sessions[key] = session
+        session.last = now
+        seq = session.seq
+        session.seq += 1
+        session.order.append(seq)
+        session.signatures[seq] = sig
+        for band in self._band_keys(sig):
+            session.buckets.setdefault(band, set()).add(seq)
+        while len(session.order) > self.window:
+            old_seq = session.order.popleft()
+            old_sig = session.signatures.pop(old_seq)
+            for band in self._band_keys(old_sig):
+                members = session.buckets.get(band)
+                if members is not None:
+                    members.discard(old_seq)
+                    if not members:
+                        del session.buckets[band]
+
+    def _gc(self, now: float) -> None:
+        if len(self._sessions) < self.max_sessions:
+            return
+        cutoff = now - self.ttl_secs
+        for key in [k for k, v in self._sessions.items() if v.last < cutoff]:
+            self._sessions.pop(key, None)
+        if len(self._sessions) >= self.max_sessions:
+            # drop oldest ~5%
+            items = sorted(self._sessions.items(), key=lambda kv: kv[1].last)
+            for key, _ in items[: max(1, len(items) // 20)]:
+                self._sessions.pop(key, None)
+
+    def size(self, key: str) -> int:
+        session = self._sessions.get(key)
+        return len(session.order) if session else 0
+
+
 class RollingRate:
     def __init__(self) -> None:
         self._bins: Dict[str, Deque[float]] = {}
@@ -76,6 +256,13 @@ def rate_store() -> RollingRate:
     return _rate_store
 
 
+_near_duplicate_index = NearDuplicateIndex()
+
+
+def near_duplicate_index() -> NearDuplicateIndex:
+    return _near_duplicate_index
+
+
 _LEAKAGE_HINTS = [
     "training data",
     "internal document",
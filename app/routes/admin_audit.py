@@ -2,9 +2,10 @@ from __future__ import annotations
 
 from typing import Any, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
-from app.audit.exporter import bundle_to_csv, make_bundle
+from app.audit.exporter import ExportStream, decode_cursor
 from app.audit.models import AuditStore
 from app.security.rbac import require_admin
 
@@ -21,22 +22,25 @@ def export_audit(
     incident_id: Optional[str] = None,
     start: Optional[str] = None,
     end: Optional[str] = None,
-    fmt: str = Query("json", pattern="^(json|csv)$"),
+    fmt: str = Query("json", pattern="^(json|csv|ndjson)$"),
+    after: Optional[str] = Query(None, description="Resume cursor from a previous export"),
+    gzip: bool = Query(False),
     store: AuditStore = Depends(get_audit_store),
 ) -> Any:
-    rows = store.query(
+    try:
+        after_key = decode_cursor(after) if after else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid cursor") from None
+    records = store.iter_records(
         tenant=tenant,
         start_iso=start,
         end_iso=end,
         incident_id=incident_id,
-        limit=10_000,
+        after=after_key,
+    )
+    stream = ExportStream(tenant, records, fmt=fmt, after=after, gzip=gzip)
+    return StreamingResponse(
+        iter(stream),
+        media_type=stream.media_type,
+        headers={"Content-Disposition": f"attachment; filename={stream.filename}"},
     )
-    bundle = make_bundle(tenant, rows)
-    if fmt == "csv":
-        csv_text = bundle_to_csv(bundle)
-        return Response(
-            content=csv_text,
-            media_type="text/csv; charset=utf-8",
-            headers={"Content-Disposition": "attachment; filename=bundle.csv"},
-        )
-    return bundle
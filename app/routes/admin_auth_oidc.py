@@ -114,7 +114,9 @@ async def callback(request: Request, code: str | None = None, state: str | None
         raise HTTPException(status_code=400, detail="Missing id_token in response")
 
     try:
-        jwks = await oidc_helpers.fetch_jwks(openid["jwks_uri"])
+        jwks = await oidc_helpers.fetch_jwks(
+            openid["jwks_uri"], kid=oidc_helpers.token_kid(id_token)
+        )
         claims = oidc_helpers.verify_id_token(id_token, jwks)
     except Exception as exc:
         raise HTTPException(status_code=400, detail=f"ID token verification failed: {exc}") from exc
@@ -28,7 +28,7 @@ from fastapi.responses import JSONResponse
 
 from app.models.debug import SourceDebug
 from app.services.debug_sources import make_source
-from app.services.decisions_bus import publish
+from app.services.decisions_bus import publish, publish_shadow_verdict
 from app.services.policy import (
     apply_injection_default,
     maybe_route_to_verifier,
@@ -51,9 +51,9 @@ from app.services.fingerprint import fingerprint
 from app.services import escalation as esc
 from app.services.decision_headers import apply_decision_headers, REQ_ID_HEADER
 from app.services.enforcement import Mode, choose_mode
-from app.services.mitigation_modes import get_modes as get_mitigation_modes
+from app.services.mitigation_modes import get_modes_async as get_mitigation_modes
 from app.services.policy_types import PolicyResult
-from app.services.shadow_policy import maybe_eval_shadow
+from app.services.shadow_policy import submit_shadow_eval
 from app.shared.headers import attach_guardrail_headers
 from app.egress.redaction import redact_response_body
 
@@ -67,11 +67,11 @@ from app.services.config_store import get_config
 from app.telemetry import metrics as m
 from app.observability import adjudication_log as _adj_log
 from app.observability import metrics as _obs_metrics
+from app.observability.stage_timing import lap as _lap
 from app.telemetry.metrics import (
     inc_actor_decisions_total,
     inc_mode,
     inc_rule_hits,
-    inc_shadow_disagreement,
 )
 from app.services.audit import emit_audit_event as _emit
 from app.security.unicode_sanitizer import (
@@ -1412,7 +1412,7 @@ async def guardrail_legacy(
         request.headers.get("X-Tenant-ID") or request.headers.get("X-Tenant") or ""
     ).strip()
     raw_bot = (request.headers.get("X-Bot-ID") or request.headers.get("X-Bot") or "").strip()
-    mitigation_modes = get_mitigation_modes(raw_tenant, raw_bot)
+    mitigation_modes = await get_mitigation_modes(raw_tenant, raw_bot)
     mitigation_forced: Optional[str] = None
     if mitigation_modes.get("block"):
         if str(action or "").lower() not in _BLOCK_DECISIONS:
@@ -1533,7 +1533,7 @@ async def guardrail_evaluate(request: Request):
     )
     raw_tenant = (headers.get("X-Tenant-ID") or headers.get("X-Tenant") or "").strip()
     raw_bot = (headers.get("X-Bot-ID") or headers.get("X-Bot") or "").strip()
-    mitigation_modes = get_mitigation_modes(raw_tenant, raw_bot)
+    mitigation_modes = await get_mitigation_modes(raw_tenant, raw_bot)
     want_debug = _debug_requested(headers.get("X-Debug"))
     m.inc_requests_total("ingress_evaluate")
     m.set_policy_version(current_rules_version())
@@ -1578,6 +1578,7 @@ async def guardrail_evaluate(request: Request):
     unicode_header_payload: Optional[str] = None
     unicode_annotation: Optional[Dict[str, Any]] = None
     unicode_findings_summary: Optional[Dict[str, Any]] = None
+    _lap("evaluate.parse")
 
     def finalize_response(
         response: Response,
@@ -1637,29 +1638,6 @@ async def guardrail_evaluate(request: Request):
             except Exception:
                 shadow_payload = {}
 
-        shadow_res = maybe_eval_shadow(
-            payload=shadow_payload,
-            live_action=live_action_norm,
-            route=str(request.url.path),
-            evaluator=_shadow_policy_evaluator,
-        )
-
-        shadow_action_val: Optional[str] = None
-        shadow_rule_ids_list: List[str] = []
-        if shadow_res:
-            raw_shadow_action = shadow_res.get("action")
-            if isinstance(raw_shadow_action, str):
-                action_str = raw_shadow_action.strip().lower()
-                if action_str:
-                    shadow_action_val = action_str
-            raw_shadow_rule_ids = shadow_res.get("rule_ids")
-            if isinstance(raw_shadow_rule_ids, (list, tuple, set)):
-                shadow_rule_ids_list = [str(rid) for rid in raw_shadow_rule_ids if str(rid).strip()]
-            elif isinstance(raw_shadow_rule_ids, str):
-                rid_str = raw_shadow_rule_ids.strip()
-                if rid_str:
-                    shadow_rule_ids_list = [rid_str]
-
         # 2) Finalize the response (sets headers, status, etc.)
         resp = _finalize_ingress_response(
             response,
@@ -1690,8 +1668,6 @@ async def guardrail_evaluate(request: Request):
                 final_mode = "allow"
 
         route_label_val = resp.headers.get("X-Guardrail-Endpoint") or str(request.url.path)
-        if shadow_action_val and shadow_action_val and shadow_action_val != live_action_norm:
-            inc_shadow_disagreement(route_label_val, live_action_norm, shadow_action_val)
 
         # 4) Publish the decision event for admin feed / SSE / CSV
         # We publish the fields we can reliably determine here. tenant/bot/endpoint
@@ -1708,14 +1684,34 @@ async def guardrail_evaluate(request: Request):
             "endpoint": resp.headers.get("X-Guardrail-Endpoint"),  # optional
             "rule_ids": final_rule_ids or [],
             "policy_version": resp.headers.get("X-Guardrail-Policy-Version"),
-            "shadow_action": shadow_action_val,
-            "shadow_rule_ids": shadow_rule_ids_list,
+            # The shadow worker publishes its verdict as a follow-up
+            # ``shadow_verdict`` event with the same request_id (see below).
+            "shadow_action": None,
+            "shadow_rule_ids": [],
             # latency_ms can be added here if you track it on request.state.*
         }
         if unicode_annotation:
             event_payload["unicode"] = unicode_annotation
         if unicode_findings_summary:
             event_payload["unicode_findings"] = unicode_findings_summary
+
+        def _record_shadow(action: str, shadow_rule_ids: List[str]) -> None:
+            publish_shadow_verdict(
+                request_id,
+                action,
+                shadow_rule_ids,
+                incident_id=event_payload["incident_id"],
+                tenant=event_payload["tenant"],
+                bot=event_payload["bot"],
+            )
+
+        submit_shadow_eval(
+            payload=shadow_payload,
+            live_action=live_action_norm,
+            route=route_label_val,
+            evaluator=_shadow_policy_evaluator,
+            on_result=_record_shadow,
+        )
         publish(event_payload)
 
         cfg = get_config()
@@ -1768,6 +1764,7 @@ async def guardrail_evaluate(request: Request):
             provider=provider_hint,
             score=score_val,
         )
+        _lap("evaluate.finalize")
 
         return resp
 
@@ -1877,9 +1874,11 @@ async def guardrail_evaluate(request: Request):
             unicode_header_payload = None
 
     prompt_hash_val = _prompt_hash(combined_text)
+    _lap("evaluate.unicode")
 
     # Ingress rulepack enforcement (opt-in)
     should_block, hits = ingress_should_block(combined_text or "")
+    _lap("evaluate.rulepacks")
     if should_block:
         # Honor configured RULEPACKS_INGRESS_MODE
         mode_cfg = ingress_mode()
@@ -1994,6 +1993,7 @@ async def guardrail_evaluate(request: Request):
     classifier_outcome, policy_hits, policy_dbg = _evaluate_ingress_policy(
         combined_text, want_debug
     )
+    _lap("evaluate.policy")
     if classifier_outcome in {"allow", "block", "ambiguous", "unknown"}:
         action = map_classifier_outcome_to_action(classifier_outcome)  # type: ignore[arg-type]
     else:
@@ -2058,6 +2058,7 @@ async def guardrail_evaluate(request: Request):
     for k, v in redaction_hits.items():
         policy_hits.setdefault(k, []).extend(v)
     _normalize_wildcards(policy_hits, is_deny=(action == "deny"))
+    _lap("evaluate.redact")
 
     dbg_sources: List[SourceDebug] = []
     dbg: Optional[Dict[str, Any]] = None
@@ -2119,6 +2120,7 @@ async def guardrail_evaluate(request: Request):
         bot=bot,
         family=headers.get("X-Model-Family"),
     )
+    _lap("evaluate.verifier")
     latency_ms = int((time.perf_counter() - t_hv) * 1000)
     hv_headers = dict(hv_headers or {})
     hv_headers.setdefault("X-Guardrail-Verifier-Latency", str(latency_ms))
@@ -2244,7 +2246,7 @@ async def guardrail_evaluate_multipart(request: Request):
     )
     raw_tenant = (headers.get("X-Tenant-ID") or headers.get("X-Tenant") or "").strip()
     raw_bot = (headers.get("X-Bot-ID") or headers.get("X-Bot") or "").strip()
-    mitigation_modes = get_mitigation_modes(raw_tenant, raw_bot)
+    mitigation_modes = await get_mitigation_modes(raw_tenant, raw_bot)
     want_debug = _debug_requested(headers.get("X-Debug"))
     m.inc_requests_total("ingress_evaluate")
     m.set_policy_version(current_rules_version())
@@ -3,6 +3,7 @@
 # - Enabled unless METRICS_ROUTE_ENABLED is an explicit "off" value.
 # - Optional API key via METRICS_API_KEY (X-API-KEY or Bearer).
 # - Forces Prometheus text exposition v0.0.4 content type regardless of library defaults.
+# - Unchanged families are served from the exposition cache in metrics_facade.render.
 
 from __future__ import annotations
 
@@ -16,10 +17,9 @@ router = APIRouter()
 
 # Prometheus is optional; degrade gracefully if unavailable.
 try:  # pragma: no cover
-    from prometheus_client import (
-        REGISTRY as PROM_REGISTRY,
-        generate_latest as prom_generate_latest,
-    )
+    from prometheus_client import REGISTRY as PROM_REGISTRY
+
+    from app.observability.metrics_facade import render as prom_generate_latest
 
     REGISTRY: Any | None = PROM_REGISTRY
     generate_latest: Optional[Callable[[Any], bytes]] = prom_generate_latest
@@ -1,11 +1,21 @@
 from __future__ import annotations
 
 import base64
-import json
 import os
 import time
 import uuid
-from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 from fastapi import (
     APIRouter,
@@ -19,10 +29,12 @@ from fastapi import (
 )
 from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field, field_validator
+from starlette.concurrency import iterate_in_threadpool
 
 from app.services.audit import emit_audit_event
 from app.services.detectors import evaluate_prompt
 from app.services.egress import egress_check
+from app.services.event_stream import DeltaCoalescer, FrameEncoder, coalesce, sse_stream
 from app.services.llm_client import get_client
 from app.services.policy import (
     _normalize_family,
@@ -336,8 +348,83 @@ def _compat_models() -> List[Dict[str, Any]]:
     return out
 
 
-def _sse(obj: Dict[str, Any]) -> str:
-    return f"data: {json.dumps(obj)}\n\n"
+_FRAMES = FrameEncoder()
+_DONE = _FRAMES.encode("[DONE]")
+
+
+def _sse(obj: Dict[str, Any]) -> bytes:
+    return _FRAMES.encode(obj)
+
+
+def _env_float(name: str) -> float:
+    try:
+        return max(0.0, float(os.getenv(name) or 0.0))
+    except ValueError:
+        return 0.0
+
+
+# A chat stream yields ready frames (bytes) and content deltas (str); deltas are
+# framed by ``encode_delta`` and, when a flush window is set, merged first.
+ChatEvents = Iterable[Union[bytes, str]]
+
+
+def _framed(events: ChatEvents, encode_delta: Callable[[str], bytes]) -> Iterator[bytes]:
+    for item in events:
+        yield encode_delta(item) if isinstance(item, str) else item
+
+
+async def _coalesced(
+    events: ChatEvents, encode_delta: Callable[[str], bytes], window_s: float
+) -> AsyncIterator[bytes]:
+    items = iterate_in_threadpool(iter(events))
+    first: Optional[str] = None
+    async for item in items:
+        if isinstance(item, str):
+            first = item
+            break
+        yield item
+    if first is None:
+        return
+
+    tail: List[bytes] = []
+
+    async def deltas() -> AsyncIterator[str]:
+        yield first
+        async for item in items:
+            if isinstance(item, str) and not tail:
+                yield item
+            else:
+                tail.append(encode_delta(item) if isinstance(item, str) else item)
+
+    async for frame in coalesce(deltas(), DeltaCoalescer(encode_delta, window_s=window_s)):
+        yield frame
+    for frame in tail:
+        yield frame
+
+
+def _chat_stream_body(
+    events: ChatEvents, encode_delta: Callable[[str], bytes]
+) -> Union[Iterator[bytes], AsyncIterator[bytes]]:
+    """
+    Response body for a chat completion stream.
+
+    ``OAI_COMPAT_STREAM_COALESCE_MS`` (default 0, off) merges adjacent content
+    deltas into one chunk per flush window; ``OAI_COMPAT_STREAM_HEARTBEAT_S``
+    (default 0, off) adds idle ``:`` heartbeats from the shared timer wheel.
+    With both off the frames go out one per upstream piece, as before.
+    """
+    window_s = _env_float("OAI_COMPAT_STREAM_COALESCE_MS") / 1000.0
+    heartbeat_s = _env_float("OAI_COMPAT_STREAM_HEARTBEAT_S")
+    if window_s <= 0.0 and heartbeat_s <= 0.0:
+        return _framed(events, encode_delta)
+    frames: AsyncIterator[bytes]
+    if window_s > 0.0:
+        frames = _coalesced(events, encode_delta, window_s)
+    else:
+        frames = iterate_in_threadpool(_framed(events, encode_delta))
+    if heartbeat_s > 0.0:
+        frames = sse_stream(frames, heartbeat_s=heartbeat_s)
+    return frames
 
 
 def _chunk_text(s: str, max_len: int) -> List[str]:
@@ -536,7 +623,24 @@ async def chat_completions(
         e_reds_final = 0
         e_hits_final: Optional[List[str]] = None
 
-        def gen() -> Iterable[str]:
+        def delta_frame(text: str) -> bytes:
+            return _sse(
+                {
+                    "id": sid,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model_id,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "delta": {"content": text},
+                            "finish_reason": None,
+                        }
+                    ],
+                }
+            )
+
+        def gen() -> ChatEvents:
             nonlocal accum_raw, last_sanitized
             nonlocal e_action_final, e_reds_final, e_hits_final
 
@@ -580,27 +684,13 @@ async def chat_completions(
                             ],
                         }
                     )
-                    yield "data: [DONE]\n\n"
+                    yield _DONE
                     return
 
                 sanitized_full = str(payload.get("text", ""))
                 delta = sanitized_full[len(last_sanitized) :]
                 if delta:
-                    yield _sse(
-                        {
-                            "id": sid,
-                            "object": "chat.completion.chunk",
-                            "created": created,
-                            "model": model_id,
-                            "choices": [
-                                {
-                                    "index": 0,
-                                    "delta": {"content": delta},
-                                    "finish_reason": None,
-                                }
-                            ],
-                        }
-                    )
+                    yield delta
                     last_sanitized = sanitized_full
                     e_action_final = "allow"
                     e_reds_final = int(payload.get("redactions") or 0)
@@ -615,7 +705,7 @@ async def chat_completions(
                     "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
                 }
             )
-            yield "data: [DONE]\n\n"
+            yield _DONE
 
             fam = _family_for(e_action_final, int(e_reds_final or 0))
             inc_decision_family(fam)
@@ -668,7 +758,7 @@ async def chat_completions(
         }
         if strict_egress:
             headers["X-Guardrail-Egress-Mode"] = "strict"
-        return StreamingResponse(gen(), headers=headers)
+        return StreamingResponse(_chat_stream_body(gen(), delta_frame), headers=headers)
 
     # ---------- Non-streaming path ----------
     client = get_client()
@@ -1699,7 +1789,7 @@ async def completions(
         created = now_ts
         model_id = body.model
 
-        def gen() -> Iterable[str]:
+        def gen() -> Iterable[bytes]:
             for piece in _chunk_text(e_text, max_len=60):
                 yield _sse(
                     {
@@ -1719,7 +1809,7 @@ async def completions(
                     "choices": [{"index": 0, "text": "", "finish_reason": "stop"}],
                 }
             )
-            yield "data: [DONE]\n\n"
+            yield _DONE
 
         headers = {
             "Content-Type": "text/event-stream",
@@ -5,13 +5,13 @@ import importlib
 import inspect
 from typing import Dict, Optional
 
-from redis.asyncio import Redis, from_url as redis_from_url
-from redis.asyncio.connection import BlockingConnectionPool
+from redis.asyncio import Redis
 
 from app import settings
 from app.idempotency.memory_store import InMemoryIdemStore, MemoryReservationStore
 from app.idempotency.redis_store import RedisIdemStore, RedisReservationStore
 from app.idempotency.store import IdempotencyStore, IdemStore
+from app.services import redis_manager
 from app.services.dlq import DLQService
 from app.services.purge_coordinator import PurgeCoordinator
 from app.services.purge_receipts import Ed25519Signer, HmacSigner, Signer
@@ -20,6 +20,7 @@ from app.services.retention import (
     InMemoryRetentionStore,
     RedisRetentionStore,
     RetentionStore,
+    _decisions_supports_sql,
 )
 
 # Lazily initialized singletons for process lifetime.
@@ -44,7 +45,7 @@ def redis_client() -> Redis:
 
     global _redis
     if _redis is None:
-        _redis = redis_from_url(settings.IDEMP_REDIS_URL, decode_responses=False)
+        _redis = redis_manager.get_manager(settings.IDEMP_REDIS_URL).client()
     return _redis
 
 
@@ -79,21 +80,14 @@ def idem_store() -> IdemStore:
 
 def get_redis() -> Redis:
     """
-    Return a pooled Redis client for reservation/caching paths that use
-    BlockingConnectionPool with explicit timeouts.
+    Return the shared, auto-pipelined Redis client for REDIS_URL. The
+    process-wide manager owns the bounded BlockingConnectionPool.
     """
     global _redis_client
     if _redis_client is not None:
         return _redis_client
 
-    pool: BlockingConnectionPool = BlockingConnectionPool.from_url(
-        settings.REDIS_URL,
-        timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT_S,
-        socket_timeout=settings.REDIS_SOCKET_TIMEOUT_S,
-        health_check_interval=settings.REDIS_HEALTHCHECK_INTERVAL_S,
-        max_connections=50,
-    )
-    _redis_client = Redis(connection_pool=pool)
+    _redis_client = redis_manager.get_manager(settings.REDIS_URL).client()
     return _redis_client
 
 
@@ -164,7 +158,9 @@ def _get_purge_targets(redis: Redis) -> Dict[str, PurgeTarget]:
     global _purge_targets
     if _purge_targets is None:
         include_sql = bool(getattr(settings, "RETENTION_AUDIT_SQL_ENABLED", False))
-        _purge_targets = build_registry(redis, include_sql=include_sql)
+        _purge_targets = build_registry(
+            redis, include_sql=include_sql, include_decisions=_decisions_supports_sql()
+        )
     return _purge_targets
 
 
@@ -188,6 +184,12 @@ async def close_redis_connections() -> None:
     client_main = _redis_client
     legacy_client = _redis
 
+    if isinstance(_store, RedisIdemStore):
+        try:
+            await _store.close()
+        except Exception:
+            pass
+
     _redis_client = None
     _redis = None
     _dlq_service = None
@@ -198,6 +200,7 @@ async def close_redis_connections() -> None:
 
     await _close_client(client_main)
     await _close_client(legacy_client)
+    redis_manager.shutdown()
 
 
 async def _close_client(client: Optional[Redis]) -> None:
@@ -114,6 +114,9 @@ class ArmRuntime:
             "enabled" if self.egress_enabled else "egress arm disabled",
         )
         self._last_degradation_reason = ""
+        # Last (ingress, egress, mode, gauge) published; the gauges are set
+        # only when this changes rather than on every evaluation.
+        self._published: Tuple[Any, ...] | None = None
         self._update_metrics_locked()
 
     @property
@@ -142,6 +145,7 @@ class ArmRuntime:
                 "up" if self.egress_enabled else "down",
                 "enabled" if self.egress_enabled else "egress arm disabled",
             )
+            self._published = None
             self._update_metrics_locked()
 
     def force_ingress_degraded(self, reason: str | None = None) -> None:
@@ -215,6 +219,10 @@ class ArmRuntime:
     def _update_metrics_locked(self) -> None:
         ingress_state = self._ingress_status.state
         egress_state = self._egress_status.state
+        published = (ingress_state, egress_state, self._mode, metrics.guardrail_arm_status)
+        if published == self._published:
+            return
+        self._published = published
         for state in ("up", "degraded", "down"):
             metrics.guardrail_arm_status.labels("ingress", state).set(
                 1.0 if ingress_state == state else 0.0
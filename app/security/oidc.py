@@ -1,6 +1,10 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import threading
+import time
+import weakref
 from typing import Any, Dict, Iterable, Optional, cast
 
 import httpx
@@ -19,18 +23,151 @@ def _openid_config_url(issuer: str) -> str:
     return f"{base}/.well-known/openid-configuration"
 
 
+_MIN_TTL_S = 30.0
+_REFRESH_AHEAD = 0.8
+_RETRY_BACKOFF_S = 5.0
+
+
+def _max_age(headers: httpx.Headers) -> Optional[float]:
+    """Return the Cache-Control freshness lifetime in seconds, if any."""
+
+    directives = [d.strip().lower() for d in (headers.get("cache-control") or "").split(",")]
+    if "no-store" in directives or "no-cache" in directives:
+        return 0.0
+    for directive in directives:
+        if directive.startswith("max-age="):
+            try:
+                return max(0.0, float(directive[len("max-age=") :].strip('"')))
+            except ValueError:
+                return None
+    return None
+
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _new_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(timeout=5)
+
+
+def _client() -> httpx.AsyncClient:
+    """Keep-alive client for the running loop, so refreshes reuse TLS sessions."""
+
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = _clients[loop] = _new_client()
+    return client
+
+
+class _CachedDocument:
+    """One issuer document (discovery or JWKS) with refresh-ahead and stale-if-error.
+
+    A fresh value is served from memory; once ``_REFRESH_AHEAD`` of its
+    lifetime has passed a background refresh is started. An expired value is
+    still served while a refresh runs, for up to ``OIDC_CACHE_MAX_STALE_S``,
+    so an IdP outage does not fail requests that the cached keys can verify.
+    Concurrent refreshes on the same loop share one request.
+    """
+
+    def __init__(self, url: str, label: str) -> None:
+        self.url = url
+        self.label = label
+        self.value: Optional[Dict[str, Any]] = None
+        self.fetched_at = 0.0
+        self.fresh_until = 0.0
+        self.refresh_at = 0.0
+        self.last_attempt = 0.0
+        self.retry_after = 0.0
+        self._inflight: Optional["asyncio.Task[Dict[str, Any]]"] = None
+
+    async def get(self, *, force: bool = False) -> Dict[str, Any]:
+        now = time.monotonic()
+        value = self.value
+        if value is not None and not force:
+            if now >= self.refresh_at and now >= self.retry_after:
+                self._refresh()
+            if now < self.fresh_until or self._serve_stale(now):
+                return value
+        try:
+            return await asyncio.shield(self._refresh())
+        except Exception as exc:
+            if self.value is not None and self._serve_stale(time.monotonic()):
+                return self.value
+            if isinstance(exc, OIDCError):
+                raise
+            raise OIDCError(f"Unable to fetch {self.label}: {exc}") from exc
+
+    def _serve_stale(self, now: float) -> bool:
+        return now - self.fetched_at <= config.OIDC_CACHE_MAX_STALE_S
+
+    def _refresh(self) -> "asyncio.Task[Dict[str, Any]]":
+        loop = asyncio.get_running_loop()
+        task = self._inflight
+        if task is None or task.done() or task.get_loop() is not loop:
+            task = loop.create_task(self._fetch())
+            task.add_done_callback(_consume_exception)
+            self._inflight = task
+        return task
+
+    async def _fetch(self) -> Dict[str, Any]:
+        self.last_attempt = time.monotonic()
+        try:
+            response = await _client().get(self.url)
+            response.raise_for_status()
+            payload = response.json()
+            if not isinstance(payload, dict):
+                raise OIDCError(f"Invalid {self.label} payload")
+        except Exception:
+            self.retry_after = time.monotonic() + _RETRY_BACKOFF_S
+            raise
+
+        ttl = _max_age(response.headers)
+        ttl = max(config.OIDC_CACHE_TTL_S if ttl is None else ttl, _MIN_TTL_S)
+        now = time.monotonic()
+        self.value = cast(Dict[str, Any], payload)
+        self.fetched_at = now
+        self.fresh_until = now + ttl
+        self.refresh_at = now + ttl * _REFRESH_AHEAD
+        self.retry_after = 0.0
+        return self.value
+
+
+def _consume_exception(task: "asyncio.Task[Any]") -> None:
+    if not task.cancelled():
+        task.exception()
+
+
+_documents: Dict[str, _CachedDocument] = {}
+_documents_lock = threading.Lock()
+
+
+def _document(url: str, label: str) -> _CachedDocument:
+    doc = _documents.get(url)
+    if doc is None:
+        with _documents_lock:
+            doc = _documents.setdefault(url, _CachedDocument(url, label))
+    return doc
+
+
+def reset_cache() -> None:
+    """Drop cached issuer documents and keep-alive clients (tests, config reloads)."""
+
+    with _documents_lock:
+        _documents.clear()
+    _clients.clear()
+
+
 async def fetch_openid_config() -> Dict[str, Any]:
-    """Fetch the OpenID configuration for the configured issuer."""
+    """Return the (cached) OpenID configuration for the configured issuer."""
 
     if not config.OIDC_ISSUER:
         raise OIDCError("OIDC issuer not configured")
 
-    async with httpx.AsyncClient(timeout=5) as client:
-        response = await client.get(_openid_config_url(config.OIDC_ISSUER))
-        response.raise_for_status()
-        data = response.json()
-    if not isinstance(data, dict):
-        raise OIDCError("Invalid OpenID configuration payload")
+    doc = _document(_openid_config_url(config.OIDC_ISSUER), "OpenID configuration")
+    data = await doc.get()
 
     try:
         jwks_uri = data["jwks_uri"]
@@ -51,16 +188,41 @@ async def fetch_openid_config() -> Dict[str, Any]:
     return result
 
 
-async def fetch_jwks(jwks_uri: str) -> Dict[str, Any]:
-    """Retrieve the JWKS document referenced by the issuer."""
+def _has_kid(jwks: Dict[str, Any], kid: str) -> bool:
+    keys = jwks.get("keys")
+    if not isinstance(keys, list):
+        return False
+    return any(isinstance(entry, dict) and entry.get("kid") == kid for entry in keys)
+
+
+async def fetch_jwks(jwks_uri: str, kid: Optional[str] = None) -> Dict[str, Any]:
+    """Return the (cached) JWKS document referenced by the issuer.
+
+    When ``kid`` is not among the cached keys the document is refetched once,
+    at most every ``OIDC_JWKS_REFETCH_MIN_S``, so key rotation is picked up
+    without letting unknown ``kid`` values drive traffic to the IdP.
+    """
 
-    async with httpx.AsyncClient(timeout=5) as client:
-        response = await client.get(jwks_uri)
-        response.raise_for_status()
-        payload = response.json()
-    if not isinstance(payload, dict):
-        raise OIDCError("Invalid JWKS payload")
-    return cast(Dict[str, Any], payload)
+    doc = _document(jwks_uri, "JWKS")
+    payload = await doc.get()
+    if (
+        kid
+        and not _has_kid(payload, kid)
+        and time.monotonic() - doc.last_attempt >= config.OIDC_JWKS_REFETCH_MIN_S
+    ):
+        payload = await doc.get(force=True)
+    return payload
+
+
+def token_kid(id_token: str) -> Optional[str]:
+    """Return the ``kid`` from an unverified token header, if present."""
+
+    try:
+        header = jwt.get_unverified_header(id_token)
+    except PyJWTError:
+        return None
+    kid = header.get("kid") if isinstance(header, dict) else None
+    return kid if isinstance(kid, str) else None
 
 
 def _candidate_keys(jwks: Dict[str, Any], kid: Optional[str]) -> Iterable[Dict[str, Any]]:
@@ -203,5 +365,7 @@ __all__ = [
     "fetch_openid_config",
     "fetch_jwks",
     "map_role",
+    "reset_cache",
+    "token_kid",
     "verify_id_token",
 ]
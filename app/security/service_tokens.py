@@ -2,10 +2,14 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import os
+import threading
 import time
 import uuid
-from typing import Any, Dict, List, Optional, cast
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, cast
 
 import jwt
 
@@ -50,26 +54,95 @@ def mint(
     return {"token": token, "jti": jti, "exp": exp, "claims": claims}
 
 
+class _VerifiedCache:
+    """Bounded LRU of verified claims keyed by token digest, expiring at ``exp``.
+
+    The digest covers the secret, issuer and audience so a config change
+    never serves claims verified under the old settings.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max(0, int(max_entries))
+        self._data: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(token: str) -> str:
+        h = hashlib.blake2b(digest_size=20)
+        for part in (
+            config.SERVICE_TOKEN_SECRET,
+            config.SERVICE_TOKEN_ISSUER,
+            config.SERVICE_TOKEN_AUDIENCE,
+            token,
+        ):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None:
+                return None
+            claims, exp = hit
+            if exp <= time.time():
+                self._data.pop(key, None)
+                return None
+            self._data.move_to_end(key)
+            return claims
+
+    def put(self, key: str, claims: Dict[str, Any]) -> None:
+        if self.max_entries <= 0:
+            return
+        exp = claims.get("exp")
+        if isinstance(exp, bool) or not isinstance(exp, (int, float)):
+            return
+        with self._lock:
+            self._data[key] = (claims, float(exp))
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_VERIFIED = _VerifiedCache(config.SERVICE_TOKEN_CACHE_MAX)
+
+
 def verify(token: str) -> Dict[str, Any]:
-    """Verify a token and return its claims."""
+    """Verify a token and return its claims.
 
-    try:
-        claims = cast(
-            Dict[str, Any],
-            jwt.decode(
-                token,
-                config.SERVICE_TOKEN_SECRET,
-                algorithms=["HS256"],
-                audience=config.SERVICE_TOKEN_AUDIENCE,
-                issuer=config.SERVICE_TOKEN_ISSUER,
-                leeway=30,
-            ),
-        )
-    except Exception as exc:  # pragma: no cover - delegated to jwt
-        raise TokenError(f"invalid token: {exc}") from exc
+    Tokens already verified are served from a local cache, and revocation is
+    checked against a locally synced copy of the revoked set, so repeat calls
+    do no signature work and no Redis round-trip.
+    """
+
+    key = _VerifiedCache.digest(token)
+    claims = _VERIFIED.get(key)
+    if claims is None:
+        try:
+            claims = cast(
+                Dict[str, Any],
+                jwt.decode(
+                    token,
+                    config.SERVICE_TOKEN_SECRET,
+                    algorithms=["HS256"],
+                    audience=config.SERVICE_TOKEN_AUDIENCE,
+                    issuer=config.SERVICE_TOKEN_ISSUER,
+                    leeway=30,
+                ),
+            )
+        except Exception as exc:  # pragma: no cover - delegated to jwt
+            raise TokenError(f"invalid token: {exc}") from exc
+        _VERIFIED.put(key, claims)
     if is_revoked(str(claims.get("jti", ""))):
         raise TokenError("token revoked")
-    return claims
+    return dict(claims)
 
 
 _REV_MEM: set[str] = set()
@@ -77,25 +150,132 @@ _REV_MEM: set[str] = set()
 
 def _redis():
     try:
-        import redis
+        from app.services import redis_manager
 
-        return redis.Redis.from_url(
-            os.getenv("REDIS_URL", "redis://localhost:6379/0"),
-            decode_responses=True,
-        )
+        return redis_manager.get_manager(os.getenv("REDIS_URL", "redis://localhost:6379/0")).sync()
     except Exception:  # pragma: no cover - optional dependency
         return None
 
 
+def _revoked_key() -> str:
+    return f"{config.SERVICE_TOKEN_REDIS_PREFIX}:revoked"
+
+
+class _RevocationSync:
+    """Local mirror of the Redis revoked set.
+
+    A task on the Redis manager loop subscribes to ``<prefix>:revoked:events``
+    (pushed by :func:`revoke` on any worker) and polls ``<prefix>:revoked:ver``
+    every ``SERVICE_TOKEN_REVOCATION_SYNC_MS``; a version change triggers a full
+    reload. A revocation is therefore visible locally within one sync interval
+    even if the push is lost.
+    """
+
+    def __init__(self, url: str, interval_s: float) -> None:
+        self.url = url
+        self.interval_s = max(0.01, float(interval_s))
+        self.revoked: set[str] = set()
+        self.version: Optional[str] = None
+        self.ready = threading.Event()
+        self._stop = False
+        self._future: Any = None
+
+    def start(self) -> None:
+        from app.services import redis_manager
+
+        mgr = redis_manager.get_manager(self.url)
+        self._future = asyncio.run_coroutine_threadsafe(self._run(mgr), mgr.loop)
+
+    def stop(self) -> None:
+        self._stop = True
+        fut = self._future
+        if fut is not None:
+            fut.cancel()
+
+    def running(self) -> bool:
+        return self._future is not None and not self._future.done()
+
+    async def _reload(self, client: Any) -> None:
+        prefix = _revoked_key()
+        pipe = client.pipeline(transaction=False)
+        pipe.get(f"{prefix}:ver")
+        pipe.smembers(prefix)
+        version, members = await pipe.execute()
+        self.revoked = set(members or ())
+        self.version = version
+        self.ready.set()
+
+    async def _run(self, mgr: Any) -> None:
+        client = mgr.client(decode=True)
+        prefix = _revoked_key()
+        pubsub = None
+        next_poll = 0.0
+        while not self._stop:
+            try:
+                if pubsub is None:
+                    pubsub = client.pubsub(ignore_subscribe_messages=True)
+                    await pubsub.subscribe(f"{prefix}:events")
+                    await self._reload(client)
+                    next_poll = time.monotonic() + self.interval_s
+                msg = await pubsub.get_message(timeout=self.interval_s)
+                if msg and msg.get("type") == "message" and msg.get("data"):
+                    self.revoked.add(str(msg["data"]))
+                if time.monotonic() >= next_poll:
+                    next_poll = time.monotonic() + self.interval_s
+                    if await client.get(f"{prefix}:ver") != self.version:
+                        await self._reload(client)
+            except asyncio.CancelledError:
+                break
+            except Exception:
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+                pubsub = None
+                await asyncio.sleep(self.interval_s)
+        if pubsub is not None:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+
+_SYNC: Optional[_RevocationSync] = None
+_SYNC_LOCK = threading.Lock()
+
+
+def _revocation_sync() -> _RevocationSync:
+    global _SYNC
+    url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    sync = _SYNC
+    if sync is not None and sync.url == url and sync.running():
+        return sync
+    with _SYNC_LOCK:
+        if _SYNC is None or _SYNC.url != url or not _SYNC.running():
+            if _SYNC is not None:
+                _SYNC.stop()
+            _SYNC = _RevocationSync(url, config.SERVICE_TOKEN_REVOCATION_SYNC_MS / 1000.0)
+            _SYNC.start()
+        return _SYNC
+
+
 def revoke(jti: str) -> None:
-    """Mark a token identifier as revoked."""
+    """Mark a token identifier as revoked and notify every worker."""
 
     if not jti:
         return
     if config.SERVICE_TOKEN_USE_REDIS:
         client = _redis()
         if client:
-            client.sadd(f"{config.SERVICE_TOKEN_REDIS_PREFIX}:revoked", jti)
+            prefix = _revoked_key()
+            with client.pipeline(transaction=False) as pipe:
+                pipe.sadd(prefix, jti)
+                pipe.incr(f"{prefix}:ver")
+                pipe.publish(f"{prefix}:events", jti)
+                pipe.execute()
+            if _SYNC is not None:
+                _SYNC.revoked.add(jti)
             return
     _REV_MEM.add(jti)
 
@@ -104,9 +284,16 @@ def is_revoked(jti: str) -> bool:
     if not jti:
         return True
     if config.SERVICE_TOKEN_USE_REDIS:
+        try:
+            sync = _revocation_sync()
+        except Exception:
+            sync = None
+        if sync is not None and sync.ready.is_set():
+            return jti in sync.revoked
+        # Not synced yet: ask Redis directly.
         client = _redis()
         if client:
-            return bool(client.sismember(f"{config.SERVICE_TOKEN_REDIS_PREFIX}:revoked", jti))
+            return bool(client.sismember(_revoked_key(), jti))
     return jti in _REV_MEM
 
 
@@ -116,7 +303,7 @@ def list_revoked() -> List[str]:
     if config.SERVICE_TOKEN_USE_REDIS:
         client = _redis()
         if client:
-            members = client.smembers(f"{config.SERVICE_TOKEN_REDIS_PREFIX}:revoked")
+            members = client.smembers(_revoked_key())
             if isinstance(members, list):
                 return members
             if isinstance(members, set):
@@ -126,6 +313,12 @@ def list_revoked() -> List[str]:
 
 
 def reset_memory_store() -> None:
-    """Clear the in-memory revocation cache (useful for tests)."""
+    """Clear the in-memory revocation cache and verified claims (useful for tests)."""
 
+    global _SYNC
     _REV_MEM.clear()
+    _VERIFIED.clear()
+    with _SYNC_LOCK:
+        if _SYNC is not None:
+            _SYNC.stop()
+        _SYNC = None
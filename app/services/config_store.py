@@ -6,7 +6,7 @@ import time
 from dataclasses import dataclass
 from pathlib import Path
 from threading import RLock
-from typing import Any, Dict, Iterable, List, Mapping, Optional, TypedDict, cast
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, TypedDict, cast
 
 import yaml
 
@@ -18,6 +18,8 @@ _CONFIG_PATH = _CONFIG_DIR / "bindings.yaml"
 _ADMIN_CONFIG_PATH = _CONFIG_DIR / "admin_config.yaml"
 
 _LOCK = RLock()
+_BINDINGS_LISTENERS: List[Callable[[], None]] = []
+_CONFIG_LISTENERS: List[Callable[[], object]] = []
 
 
 class Binding(TypedDict):
@@ -58,12 +60,37 @@ def load_bindings() -> BindingsDoc:
         return BindingsDoc(version=version, bindings=bindings)
 
 
+def add_bindings_listener(listener: Callable[[], None]) -> None:
+    """Call ``listener`` after every successful :func:`save_bindings`."""
+    with _LOCK:
+        if listener not in _BINDINGS_LISTENERS:
+            _BINDINGS_LISTENERS.append(listener)
+
+
+def add_config_listener(listener: Callable[[], object]) -> None:
+    """Call ``listener`` after every :func:`set_config` / :func:`reset_config`."""
+    with _LOCK:
+        if listener not in _CONFIG_LISTENERS:
+            _CONFIG_LISTENERS.append(listener)
+
+
+def _notify(listeners: Iterable[Callable[[], object]]) -> None:
+    for listener in listeners:
+        try:
+            listener()
+        except Exception:
+            pass
+
+
 def save_bindings(bindings: List[Binding], version: Optional[str] = None) -> BindingsDoc:
     with _LOCK:
         _ensure_dirs()
         doc = {"version": str(version or "1"), "bindings": list(bindings)}
         _CONFIG_PATH.write_text(yaml.safe_dump(doc, sort_keys=False), encoding="utf-8")
-        return load_bindings()
+        saved = load_bindings()
+        listeners = list(_BINDINGS_LISTENERS)
+    _notify(listeners)
+    return saved
 
 
 def upsert_binding(tenant: str, bot: str, rules_path: str) -> BindingsDoc:
@@ -111,25 +138,18 @@ def resolve_rules_path(tenant: str, bot: str) -> Optional[str]:
     Exact match first; then wildcard '*' for tenant and/or bot.
     Return first matching rules_path, else None.
     """
+    return match_binding(load_bindings().bindings, tenant, bot)
+
+
+def match_binding(bindings: Iterable[Binding], tenant: str, bot: str) -> Optional[str]:
+    """Apply the :func:`resolve_rules_path` precedence to an in-memory binding list."""
     tenant = tenant.strip() or "default"
     bot = bot.strip() or "default"
-    doc = load_bindings()
-    # exact
-    for b in doc.bindings:
-        if b["tenant"] == tenant and b["bot"] == bot:
-            return b["rules_path"]
-    # tenant + wildcard bot
-    for b in doc.bindings:
-        if b["tenant"] == tenant and b["bot"] == "*":
-            return b["rules_path"]
-    # wildcard tenant + bot
-    for b in doc.bindings:
-        if b["tenant"] == "*" and b["bot"] == bot:
-            return b["rules_path"]
-    # global wildcard
-    for b in doc.bindings:
-        if b["tenant"] == "*" and b["bot"] == "*":
-            return b["rules_path"]
+    items = list(bindings)
+    for want_tenant, want_bot in ((tenant, bot), (tenant, "*"), ("*", bot), ("*", "*")):
+        for b in items:
+            if b["tenant"] == want_tenant and b["bot"] == want_bot:
+                return b["rules_path"]
     return None
 
 
@@ -837,8 +857,10 @@ def set_config(
         after_effective = dict(_current_config_locked())
         if updated and after_effective != before_effective:
             _append_audit_entry(before_effective, after_effective, actor)
+        listeners = list(_CONFIG_LISTENERS) if updated else []
 
-        return cast(ConfigDict, after_effective)
+    _notify(listeners)
+    return cast(ConfigDict, after_effective)
 
 
 def reset_config() -> None:
@@ -846,3 +868,5 @@ def reset_config() -> None:
     with _LOCK:
         _CONFIG_STATE = {}
         _CONFIG_LOADED = False
+        listeners = list(_CONFIG_LISTENERS)
+    _notify(listeners)
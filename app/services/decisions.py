@@ -19,7 +19,7 @@ from sqlalchemy import (
     select,
     text,
 )
-from sqlalchemy.sql import and_, func
+from sqlalchemy.sql import and_, func, or_
 
 from app.observability.metrics import mitigation_override_counter
 from app.services.mitigation_prefs import Mode, resolve_mode, validate_mode
@@ -249,17 +249,122 @@ def record(
         cx.execute(insert(decisions).values(**payload))
 
 
-def prune(older_than_days: Optional[int] = None) -> int:
+def _range_conditions(
+    cutoff: datetime,
+    tenant: Optional[str],
+    bot: Optional[str],
+    after: Optional[Tuple[datetime, str]],
+) -> List[Any]:
+    conds: List[Any] = [decisions.c.ts < cutoff]
+    if tenant:
+        conds.append(decisions.c.tenant == tenant)
+    if bot:
+        conds.append(decisions.c.bot == bot)
+    if after is not None:
+        a_ts, a_id = after
+        # The plain bound keeps the keyset predicate on the ts index.
+        conds.append(decisions.c.ts >= a_ts)
+        conds.append(
+            or_(decisions.c.ts > a_ts, and_(decisions.c.ts == a_ts, decisions.c.id > a_id))
+        )
+    return conds
+
+
+def _aware(ts: datetime) -> datetime:
+    # SQLite hands back naive datetimes; everything is stored as UTC.
+    return ts if ts.tzinfo is not None else ts.replace(tzinfo=timezone.utc)
+
+
+def delete_range(
+    cutoff: datetime,
+    *,
+    tenant: Optional[str] = None,
+    bot: Optional[str] = None,
+    after: Optional[Tuple[datetime, str]] = None,
+    limit: int = 500,
+) -> Tuple[int, Optional[Tuple[datetime, str]]]:
     """
-    Delete rows older than N days. Returns deleted row count.
+    Delete up to ``limit`` rows older than ``cutoff`` in ``(ts, id)`` order,
+    starting after ``after``. Each call is one short transaction: the
+    ``(ts, id)`` of the chunk's last row is looked up on the index and the
+    chunk is removed with a single range DELETE bounded by it, so no id list
+    is shipped back and forth. Returns ``(deleted, last)``; ``last`` is
+    ``None`` once fewer than ``limit`` rows remained.
     """
-    days = int(_PRUNE_DAYS if older_than_days is None else older_than_days)
-    cutoff = _utcnow() - timedelta(days=days)
+    if limit <= 0:
+        return 0, after
+    conds = _range_conditions(cutoff, tenant, bot, after)
+    boundary = (
+        select(decisions.c.ts, decisions.c.id)
+        .where(and_(*conds))
+        .order_by(decisions.c.ts.asc(), decisions.c.id.asc())
+        .offset(limit - 1)
+        .limit(1)
+    )
     with _get_engine().begin() as cx:
-        res = cx.execute(text("DELETE FROM decisions WHERE ts < :cutoff"), {"cutoff": cutoff})
+        last = cx.execute(boundary).first()
+        if last is not None:
+            conds.append(decisions.c.ts <= last.ts)
+            conds.append(
+                or_(
+                    decisions.c.ts < last.ts,
+                    and_(decisions.c.ts == last.ts, decisions.c.id <= last.id),
+                )
+            )
+        res = cx.execute(decisions.delete().where(and_(*conds)))
+        deleted = int(res.rowcount or 0)
+    if last is None:
+        return deleted, None
+    return deleted, (_aware(last.ts), str(last.id))
+
+
+def expired_ids(cutoff: datetime, *, tenant: Optional[str] = None, limit: int = 500) -> List[str]:
+    """Ids of up to ``limit`` rows older than ``cutoff``, oldest first."""
+    stmt = (
+        select(decisions.c.id)
+        .where(and_(*_range_conditions(cutoff, tenant, None, None)))
+        .order_by(decisions.c.ts.asc(), decisions.c.id.asc())
+        .limit(max(0, int(limit)))
+    )
+    with _get_engine().connect() as cx:
+        return [str(row.id) for row in cx.execute(stmt)]
+
+
+def delete_ids(ids: List[str], *, tenant: Optional[str] = None) -> int:
+    if not ids:
+        return 0
+    conds: List[Any] = [decisions.c.id.in_(list(ids))]
+    if tenant:
+        conds.append(decisions.c.tenant == tenant)
+    with _get_engine().begin() as cx:
+        res = cx.execute(decisions.delete().where(and_(*conds)))
         return int(res.rowcount or 0)
 
 
+def prune_cutoff(older_than_days: Optional[int] = None) -> datetime:
+    """Rows older than this are expired (``DECISIONS_PRUNE_DAYS`` by default)."""
+    days = int(_PRUNE_DAYS if older_than_days is None else older_than_days)
+    return _utcnow() - timedelta(days=days)
+
+
+def prune(older_than_days: Optional[int] = None, *, chunk: int = 5000) -> int:
+    """
+    Delete rows older than N days. Returns deleted row count.
+
+    Runs as a series of bounded range deletes (see :func:`delete_range`) so a
+    large backlog never holds one long write transaction. Unthrottled; the
+    background prune loop goes through the purge engine instead.
+    """
+    cutoff = prune_cutoff(older_than_days)
+    total = 0
+    after: Optional[Tuple[datetime, str]] = None
+    while True:
+        deleted, after = delete_range(cutoff, after=after, limit=max(1, int(chunk)))
+        total += deleted
+        if after is None:
+            return total
+
+
 def ensure_ready() -> None:
     """
     Initialize the engine/tables on startup if autocreate is enabled.
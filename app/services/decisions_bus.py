@@ -6,7 +6,7 @@ import os
 import queue
 import threading
 import time
-from typing import Any, Deque, Dict, Iterator, Optional
+from typing import Any, Deque, Dict, Iterator, List, Optional
 
 # Runtime-configurable storage
 _PATH = os.getenv("DECISIONS_AUDIT_PATH", "var/decisions.jsonl")
@@ -15,6 +15,9 @@ _MAX = int(os.getenv("DECISIONS_BUFFER_MAX", "2000"))
 _lock = threading.RLock()
 _buf: Deque[Dict[str, Any]] = collections.deque(maxlen=_MAX)
 
+# ``type`` of the follow-up event carrying a late shadow verdict.
+SHADOW_VERDICT_EVENT = "shadow_verdict"
+
 # Subscribers receive events on a SimpleQueue published by publish().
 _subscribers: set[queue.SimpleQueue[Dict[str, Any]]] = set()
 
@@ -25,30 +28,58 @@ def _ensure_dir(path: str) -> None:
 
 
 def publish(evt: Dict[str, Any]) -> None:
-    """Publish a decision event to buffer, audit log, and subscriber queues."""
+    """Publish a decision event to buffer, audit log, and subscriber queues.
+
+    The buffer and every subscriber get their own shallow copy, so later
+    changes to ``evt`` (or by one consumer) never leak into the others.
+    """
     with _lock:
         if "ts" not in evt:
             evt["ts"] = int(time.time())
+        record = dict(evt)
 
         # ring buffer
-        _buf.append(evt)
+        _buf.append(record)
 
         # append-only audit log
         _ensure_dir(_PATH)
         with open(_PATH, "a", encoding="utf-8") as f:
-            f.write(json.dumps(evt) + "\n")
+            f.write(json.dumps(record) + "\n")
 
         # fan-out to subscribers (non-blocking)
         dead: list[queue.SimpleQueue[Dict[str, Any]]] = []
         for q in _subscribers:
             try:
-                q.put_nowait(evt)
+                q.put_nowait(dict(record))
             except Exception:
                 dead.append(q)
         for q in dead:
             _subscribers.discard(q)
 
 
+def publish_shadow_verdict(
+    request_id: Optional[str],
+    shadow_action: str,
+    shadow_rule_ids: List[str],
+    **fields: Any,
+) -> None:
+    """Publish a late shadow verdict as a follow-up event keyed by ``request_id``.
+
+    The original decision event is never edited after publish; consumers join
+    the ``shadow_verdict`` event back to it by ``request_id``.
+    """
+    evt: Dict[str, Any] = dict(fields)
+    evt.update(
+        {
+            "type": SHADOW_VERDICT_EVENT,
+            "request_id": request_id,
+            "shadow_action": shadow_action,
+            "shadow_rule_ids": list(shadow_rule_ids),
+        }
+    )
+    publish(evt)
+
+
 def snapshot() -> list[Dict[str, Any]]:
     """Return a copy of the current buffer (newest last)."""
     with _lock:
@@ -285,12 +316,14 @@ def delete_where(
 
 
 __all__ = [
+    "SHADOW_VERDICT_EVENT",
     "configure",
     "delete_where",
     "iter_all",
     "iter_decisions",
     "list_decisions",
     "publish",
+    "publish_shadow_verdict",
     "snapshot",
     "subscribe",
     "unsubscribe",
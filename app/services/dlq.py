@@ -7,11 +7,12 @@ import time
 import uuid
 from collections.abc import Iterable, Mapping, Sequence
 from dataclasses import dataclass
-from typing import Any, Optional, cast
+from typing import Any, Optional, TypeVar, cast
 
 from redis.asyncio import Redis
+from redis.exceptions import NoScriptError
 
-RedisHashMapping = Mapping[str | bytes, bytes | float | int | str]
+T = TypeVar("T")
 
 
 @dataclass(slots=True)
@@ -28,14 +29,137 @@ class DLQMessage:
     last_error: Optional[str]
 
 
+# Every state transition runs as one server-side script so it is atomic. Every
+# key a script touches is declared in KEYS and built by the ``_*_key`` helpers;
+# batch scripts take one (message, pending zset, quarantine set) triple per id,
+# resolved from the message scope with a single pipelined lookup per batch.
+
+_ENQUEUE_LUA = """
+local msg_key = KEYS[1]
+local zset_key = KEYS[2]
+redis.call('HSET', msg_key,
+  'id', ARGV[1], 'tenant', ARGV[2], 'topic', ARGV[3], 'payload', ARGV[4],
+  'tries', '0', 'created_ts', ARGV[5], 'first_failure_ts', ARGV[5],
+  'last_attempt_ts', '', 'next_attempt_ts', ARGV[5], 'last_error', ARGV[6])
+redis.call('ZADD', zset_key, ARGV[5], ARGV[1])
+return 1
+"""
+
+_ACK_LUA = """
+local out = {}
+for i = 1, #ARGV do
+  local id = ARGV[i]
+  local k = (i - 1) * 3
+  if redis.call('DEL', KEYS[k + 1]) == 1 then
+    redis.call('ZREM', KEYS[k + 2], id)
+    redis.call('SREM', KEYS[k + 3], id)
+    out[i] = 1
+  else
+    out[i] = 0
+  end
+end
+return out
+"""
+
+_NACK_LUA = """
+local now = tonumber(ARGV[1])
+local max_tries = tonumber(ARGV[2])
+local base_delay = tonumber(ARGV[3])
+local mult = tonumber(ARGV[4])
+local max_delay = tonumber(ARGV[5])
+local jitter_frac = tonumber(ARGV[6])
+local now_s = ARGV[1]
+local out = {}
+local n = 0
+for i = 7, #ARGV, 3 do
+  n = n + 1
+  local id = ARGV[i]
+  local err = ARGV[i + 1]
+  local jitter = tonumber(ARGV[i + 2])
+  local k = (n - 1) * 3
+  local key, zset_key, quarantine_key = KEYS[k + 1], KEYS[k + 2], KEYS[k + 3]
+  if redis.call('EXISTS', key) == 1 then
+    local tries = (tonumber(redis.call('HGET', key, 'tries')) or 0) + 1
+    if tries >= max_tries then
+      redis.call('HSET', key, 'tries', tostring(tries), 'last_attempt_ts', now_s,
+        'last_error', err, 'next_attempt_ts', now_s)
+      redis.call('ZREM', zset_key, id)
+      redis.call('SADD', quarantine_key, id)
+      out[n] = {2}
+    else
+      local delay = base_delay * (mult ^ math.max(tries - 1, 0))
+      if delay > max_delay then
+        delay = max_delay
+      end
+      delay = math.max(delay + delay * jitter_frac * jitter, 0)
+      local next_s = string.format('%.17g', now + delay)
+      redis.call('HSET', key, 'tries', tostring(tries), 'last_attempt_ts', now_s,
+        'last_error', err, 'next_attempt_ts', next_s)
+      redis.call('ZADD', zset_key, next_s, id)
+      redis.call('SREM', quarantine_key, id)
+      out[n] = {1, redis.call('HGETALL', key)}
+    end
+  else
+    out[n] = {0}
+  end
+end
+return out
+"""
+
+_REPLAY_LUA = """
+local now_s = ARGV[1]
+local out = {}
+for i = 2, #ARGV do
+  local id = ARGV[i]
+  local k = (i - 2) * 3
+  local key = KEYS[k + 1]
+  if redis.call('EXISTS', key) == 1 then
+    redis.call('HSET', key, 'next_attempt_ts', now_s)
+    redis.call('ZADD', KEYS[k + 2], now_s, id)
+    redis.call('SREM', KEYS[k + 3], id)
+    out[i - 1] = redis.call('HGETALL', key)
+  else
+    out[i - 1] = {}
+  end
+end
+return out
+"""
+
+_QUARANTINE_LUA = """
+local out = {}
+for i = 1, #ARGV do
+  local id = ARGV[i]
+  local k = (i - 1) * 3
+  if redis.call('EXISTS', KEYS[k + 1]) == 1 then
+    redis.call('ZREM', KEYS[k + 2], id)
+    redis.call('SADD', KEYS[k + 3], id)
+    out[i] = 1
+  else
+    out[i] = 0
+  end
+end
+return out
+"""
+
+_SCRIPTS: dict[str, str] = {
+    "enqueue": _ENQUEUE_LUA,
+    "ack": _ACK_LUA,
+    "nack": _NACK_LUA,
+    "replay": _REPLAY_LUA,
+    "quarantine": _QUARANTINE_LUA,
+}
+
+
 class DLQService:
     def __init__(self, redis: Redis) -> None:
         self._redis = redis
+        self._shas: dict[str, str] = {}
         self.max_tries = self._parse_int("DLQ_MAX_TRIES", 8, minimum=1)
         self.base_delay = self._parse_float("DLQ_BASE_DELAY_SEC", 5.0, minimum=0.0)
         self.backoff_mult = self._parse_float("DLQ_BACKOFF_MULT", 6.0, minimum=1.0)
         self.max_delay = self._parse_float("DLQ_MAX_DELAY_SEC", 900.0, minimum=0.0)
         self.jitter_frac = self._parse_float("DLQ_JITTER_FRAC", 0.15, minimum=0.0, maximum=1.0)
+        self.batch_size = self._parse_int("DLQ_BATCH_SIZE", 500, minimum=1)
 
     async def enqueue(
         self, tenant: str, topic: str, payload: Any, error: Optional[str] = None
@@ -44,24 +168,11 @@ class DLQService:
         msg_id = uuid.uuid4().hex
         payload_json = json.dumps(payload, default=str, separators=(",", ":"))
         error_text = str(error) if error else ""
-        record = {
-            "id": msg_id,
-            "tenant": tenant,
-            "topic": topic,
-            "payload": payload_json,
-            "tries": "0",
-            "created_ts": str(now),
-            "first_failure_ts": str(now),
-            "last_attempt_ts": "",
-            "next_attempt_ts": str(now),
-            "last_error": error_text,
-        }
-        key = self._msg_key(msg_id)
-        zset_key = self._zset_key(tenant, topic)
-        await self._redis.hset(key, mapping=cast(RedisHashMapping, record))
-        await self._redis.zadd(zset_key, {msg_id: now})
-        if error_text:
-            await self._redis.hset(key, mapping=cast(RedisHashMapping, {"last_error": error_text}))
+        await self._run_script(
+            "enqueue",
+            [self._msg_key(msg_id), self._zset_key(tenant, topic)],
+            [msg_id, tenant, topic, payload_json, repr(now), error_text],
+        )
         message = DLQMessage(
             id=msg_id,
             tenant=tenant,
@@ -85,77 +196,70 @@ class DLQService:
         return await self._load_messages(ids)
 
     async def ack(self, msg_id: str) -> bool:
-        message = await self._load_message(msg_id)
-        if message is None:
-            return False
-        await self._redis.zrem(self._zset_key(message.tenant, message.topic), msg_id)
-        await self._redis.srem(self._quarantine_key(message.tenant, message.topic), msg_id)
-        await self._redis.delete(self._msg_key(msg_id))
-        return True
+        return await self.ack_many([msg_id]) == 1
+
+    async def ack_many(self, msg_ids: Sequence[str]) -> int:
+        """Delete messages from pending and quarantine; returns how many existed."""
+        acked = 0
+        for chunk in self._chunks(msg_ids):
+            result = await self._run_batch("ack", chunk)
+            acked += sum(int(flag or 0) for flag in result)
+        return acked
 
     async def nack(self, msg_id: str, error: str) -> Optional[DLQMessage]:
-        message = await self._load_message(msg_id)
-        if message is None:
-            return None
-        tries = message.tries + 1
-        now = self._now()
-        hash_key = self._msg_key(msg_id)
-        error_text = str(error) if error else ""
-        mapping = {
-            "tries": str(tries),
-            "last_attempt_ts": str(now),
-            "last_error": error_text,
-        }
-        if tries >= self.max_tries:
-            mapping["next_attempt_ts"] = str(now)
-            await self._redis.hset(hash_key, mapping=cast(RedisHashMapping, mapping))
-            await self._redis.zrem(self._zset_key(message.tenant, message.topic), msg_id)
-            await self._redis.sadd(self._quarantine_key(message.tenant, message.topic), msg_id)
-            return None
-        delay = self._compute_delay(tries)
-        next_attempt = max(now + delay, now)
-        mapping["next_attempt_ts"] = str(next_attempt)
-        await self._redis.hset(hash_key, mapping=cast(RedisHashMapping, mapping))
-        await self._redis.zadd(
-            self._zset_key(message.tenant, message.topic), {msg_id: next_attempt}
-        )
-        await self._redis.srem(self._quarantine_key(message.tenant, message.topic), msg_id)
-        return DLQMessage(
-            id=message.id,
-            tenant=message.tenant,
-            topic=message.topic,
-            payload=message.payload,
-            tries=tries,
-            created_ts=message.created_ts,
-            first_failure_ts=message.first_failure_ts,
-            last_attempt_ts=now,
-            next_attempt_ts=next_attempt,
-            last_error=error_text or None,
-        )
+        return (await self.nack_many([(msg_id, error)]))[0]
+
+    async def nack_many(self, failures: Sequence[tuple[str, str]]) -> list[Optional[DLQMessage]]:
+        """Record failed attempts and reschedule with backoff.
+
+        Returns one entry per input: the rescheduled message, or None when the
+        message is missing or has just been quarantined after ``max_tries``.
+        """
+        out: list[Optional[DLQMessage]] = []
+        for chunk in self._chunks(failures):
+            head: list[str] = [
+                repr(self._now()),
+                str(self.max_tries),
+                repr(self.base_delay),
+                repr(self.backoff_mult),
+                repr(self.max_delay),
+                repr(self.jitter_frac),
+            ]
+            extra = [
+                [str(error) if error else "", repr(random.uniform(-1.0, 1.0))] for _, error in chunk
+            ]
+            result = await self._run_batch(
+                "nack", [msg_id for msg_id, _ in chunk], head=head, extra=extra
+            )
+            for (msg_id, _), entry in zip(chunk, result):
+                if not entry or int(entry[0]) != 1:
+                    out.append(None)
+                    continue
+                out.append(self._parse_record(msg_id, self._pairs(entry[1])))
+        return out
 
     async def replay_now(self, msg_id: str) -> Optional[DLQMessage]:
-        message = await self._load_message(msg_id)
-        if message is None:
-            return None
-        now = self._now()
-        await self._redis.hset(
-            self._msg_key(msg_id),
-            mapping=cast(RedisHashMapping, {"next_attempt_ts": str(now)}),
-        )
-        await self._redis.zadd(self._zset_key(message.tenant, message.topic), {msg_id: now})
-        await self._redis.srem(self._quarantine_key(message.tenant, message.topic), msg_id)
-        return DLQMessage(
-            id=message.id,
-            tenant=message.tenant,
-            topic=message.topic,
-            payload=message.payload,
-            tries=message.tries,
-            created_ts=message.created_ts,
-            first_failure_ts=message.first_failure_ts,
-            last_attempt_ts=message.last_attempt_ts,
-            next_attempt_ts=now,
-            last_error=message.last_error,
-        )
+        return (await self.replay_many([msg_id]))[0]
+
+    async def replay_many(self, msg_ids: Sequence[str]) -> list[Optional[DLQMessage]]:
+        """Make messages due immediately, releasing them from quarantine."""
+        out: list[Optional[DLQMessage]] = []
+        for chunk in self._chunks(msg_ids):
+            result = await self._run_batch("replay", chunk, head=[repr(self._now())])
+            for msg_id, flat in zip(chunk, result):
+                out.append(self._parse_record(msg_id, self._pairs(flat)))
+        return out
+
+    async def quarantine(self, msg_id: str) -> bool:
+        return await self.quarantine_many([msg_id]) == 1
+
+    async def quarantine_many(self, msg_ids: Sequence[str]) -> int:
+        """Move messages out of the pending schedule into quarantine."""
+        moved = 0
+        for chunk in self._chunks(msg_ids):
+            result = await self._run_batch("quarantine", chunk)
+            moved += sum(int(flag or 0) for flag in result)
+        return moved
 
     async def list_pending(self, tenant: str, topic: str, limit: int = 100) -> list[DLQMessage]:
         key = self._zset_key(tenant, topic)
@@ -188,12 +292,6 @@ class DLQService:
         messages.sort(key=lambda msg: msg.next_attempt_ts)
         return messages
 
-    async def _load_message(self, msg_id: str) -> Optional[DLQMessage]:
-        record = await self._redis.hgetall(self._msg_key(msg_id))
-        if not record:
-            return None
-        return self._parse_record(msg_id, record)
-
     def _parse_record(self, msg_id: str, record: Mapping[bytes, bytes]) -> Optional[DLQMessage]:
         if not record:
             return None
@@ -225,13 +323,82 @@ class DLQService:
             last_error=last_error,
         )
 
-    def _compute_delay(self, tries: int) -> float:
-        delay = self.base_delay * (self.backoff_mult ** max(tries - 1, 0))
-        delay = min(delay, self.max_delay)
-        jitter_range = delay * self.jitter_frac
-        if jitter_range > 0.0:
-            delay += random.uniform(-jitter_range, jitter_range)
-        return max(delay, 0.0)
+    def _chunks(self, items: Sequence[T]) -> Iterable[Sequence[T]]:
+        for start in range(0, len(items), self.batch_size):
+            yield items[start : start + self.batch_size]
+
+    async def _scopes(self, msg_ids: Sequence[str]) -> list[Optional[tuple[str, str]]]:
+        """(tenant, topic) per message id, None for unknown ids; one round-trip."""
+        pipe = self._redis.pipeline()
+        for msg_id in msg_ids:
+            pipe.hmget(self._msg_key(msg_id), ["tenant", "topic"])
+        rows: Iterable[Any] = await pipe.execute()
+        scopes: list[Optional[tuple[str, str]]] = []
+        for row in rows:
+            tenant, topic = (self._decode(value) for value in row)
+            scopes.append((tenant, topic) if tenant and topic else None)
+        return scopes
+
+    async def _run_batch(
+        self,
+        name: str,
+        msg_ids: Sequence[str],
+        *,
+        head: Sequence[str] = (),
+        extra: Optional[Sequence[Sequence[str]]] = None,
+    ) -> list[Any]:
+        """Run a batch script with declared keys; entries for unknown ids are None.
+
+        ARGV is ``head`` followed by each known id and its ``extra`` arguments.
+        """
+        keys: list[str] = []
+        args: list[str] = list(head)
+        known: list[int] = []
+        for idx, (msg_id, scope) in enumerate(zip(msg_ids, await self._scopes(msg_ids))):
+            if scope is None:
+                continue
+            known.append(idx)
+            keys.extend(
+                [
+                    self._msg_key(msg_id),
+                    self._zset_key(*scope),
+                    self._quarantine_key(*scope),
+                ]
+            )
+            args.append(msg_id)
+            if extra is not None:
+                args.extend(extra[idx])
+        out: list[Any] = [None] * len(msg_ids)
+        if known:
+            result = await self._run_script(name, keys, args)
+            for idx, entry in zip(known, result):
+                out[idx] = entry
+        return out
+
+    async def _run_script(self, name: str, keys: list[str], args: list[str]) -> Any:
+        client = cast(Any, self._redis)
+        script = _SCRIPTS[name]
+        sha = self._shas.get(name)
+        if sha is None:
+            loaded = await client.script_load(script)
+            sha = loaded.decode() if isinstance(loaded, bytes) else str(loaded)
+            self._shas[name] = sha
+        try:
+            return await client.evalsha(sha, len(keys), *keys, *args)
+        except Exception as exc:
+            if not isinstance(exc, NoScriptError) and "NOSCRIPT" not in str(exc).upper():
+                raise
+        self._shas.pop(name, None)
+        return await client.eval(script, len(keys), *keys, *args)
+
+    @staticmethod
+    def _pairs(flat: Any) -> dict[bytes, bytes]:
+        if not flat:
+            return {}
+        items = list(flat)
+        return {
+            cast(bytes, items[i]): cast(bytes, items[i + 1]) for i in range(0, len(items) - 1, 2)
+        }
 
     @staticmethod
     def _msg_key(msg_id: str) -> str:
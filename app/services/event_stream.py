@@ -1,8 +1,95 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import re
+import time
+import weakref
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Coroutine, Deque, Dict, List, Optional, Set
 
-__all__ = ["EventStream"]
+__all__ = [
+    "EventStream",
+    "FrameEncoder",
+    "DeltaCoalescer",
+    "coalesce",
+    "TimerWheel",
+    "shared_wheel",
+    "sse_stream",
+]
+
+# Everything str.splitlines() treats as a line boundary; a payload without any
+# of these is framed as a single ``data:`` line.
+_LINE_BREAKS = re.compile("[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+_JSON = json.JSONEncoder(ensure_ascii=False).encode
+_DATA = b"data: "
+_HEARTBEAT = b":\n\n"
+
+
+def _coerce(value: object) -> str:
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "ignore")
+    if isinstance(value, str):
+        return value
+    return _JSON(value)
+
+
+def _field(name: str, value: str) -> bytes:
+    return f"{name}: {value}\n".encode("utf-8")
+
+
+def _data_lines(text: str) -> bytes:
+    if text == "":
+        return b"data:\n"
+    if _LINE_BREAKS.search(text) is None:
+        return _DATA + text.encode("utf-8") + b"\n"
+    lines = [f"data: {part}" for part in text.splitlines()]
+    if text.endswith("\n"):
+        lines.append("data:")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class FrameEncoder:
+    """
+    SSE frame encoder for one event type.
+
+    The ``event:`` line is encoded once up front; single-line payloads (every
+    JSON object, most token deltas) skip the split/join and go straight to
+    ``prefix + b"data: " + payload + b"\\n\\n"``. Output is byte-identical to
+    :meth:`EventStream.frame`.
+    """
+
+    __slots__ = ("event", "_prefix")
+
+    def __init__(self, event: Optional[str] = None) -> None:
+        self.event = event
+        self._prefix = _field("event", event) if event is not None else b""
+
+    def encode(self, data: object, id: Optional[str] = None) -> bytes:
+        body = _data_lines(_coerce(data))
+        if id is not None:
+            return _field("id", id) + self._prefix + body + b"\n"
+        return self._prefix + body + b"\n"
+
+    def encode_many(self, payloads: List[object]) -> bytes:
+        """Frame several events into one buffer (one write instead of many)."""
+        prefix = self._prefix
+        return b"".join([prefix + _data_lines(_coerce(p)) + b"\n" for p in payloads])
+
+
+_DEFAULT = FrameEncoder()
+_ENCODERS: Dict[str, FrameEncoder] = {}
+
+
+def _encoder(event: Optional[str]) -> FrameEncoder:
+    if event is None:
+        return _DEFAULT
+    enc = _ENCODERS.get(event)
+    if enc is None:
+        if len(_ENCODERS) >= 256:
+            return FrameEncoder(event)
+        enc = _ENCODERS[event] = FrameEncoder(event)
+    return enc
 
 
 class EventStream:
@@ -11,20 +98,7 @@ class EventStream:
     @staticmethod
     def frame(data: object, event: str | None = None, id: str | None = None) -> bytes:
         """Encode ``data`` into an SSE ``data:`` frame."""
-        text = EventStream._coerce(data)
-        lines: list[str] = []
-        if id is not None:
-            lines.append(f"id: {id}")
-        if event is not None:
-            lines.append(f"event: {event}")
-        if text == "":
-            lines.append("data:")
-        else:
-            for part in text.splitlines():
-                lines.append(f"data: {part}")
-            if text.endswith("\n"):
-                lines.append("data:")
-        return ("\n".join(lines) + "\n\n").encode("utf-8")
+        return _encoder(event).encode(data, id=id)
 
     @staticmethod
     def retry(delay_ms: int = 3000) -> bytes:
@@ -35,12 +109,345 @@ class EventStream:
     @staticmethod
     def heartbeat() -> bytes:
         """Emit a comment heartbeat frame."""
-        return b":\n\n"
+        return _HEARTBEAT
 
     @staticmethod
     def _coerce(value: object) -> str:
-        if isinstance(value, bytes):
-            return value.decode("utf-8", "ignore")
-        if isinstance(value, str):
-            return value
-        return json.dumps(value, ensure_ascii=False)
+        return _coerce(value)
+
+
+class DeltaCoalescer:
+    """
+    Merges adjacent text deltas into one frame per flush window.
+
+    :meth:`push` buffers a delta and returns a frame once ``window_s`` has
+    passed since the first buffered delta or ``max_chars`` are pending;
+    :meth:`flush` drains whatever is left. ``encode`` turns the merged text
+    into a frame (e.g. a chat-chunk envelope).
+    """
+
+    def __init__(
+        self,
+        encode: Callable[[str], bytes],
+        *,
+        window_s: float = 0.02,
+        max_chars: int = 2048,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._encode = encode
+        self.window_s = max(0.0, float(window_s))
+        self.max_chars = max(1, int(max_chars))
+        self._clock = clock
+        self._parts: List[str] = []
+        self._size = 0
+        self._since = 0.0
+
+    @property
+    def pending(self) -> bool:
+        return bool(self._parts)
+
+    def remaining(self) -> float:
+        """Seconds until the pending batch is due (0 when nothing is pending)."""
+        if not self._parts:
+            return 0.0
+        return max(0.0, self._since + self.window_s - self._clock())
+
+    def push(self, delta: str) -> Optional[bytes]:
+        if not self._parts:
+            self._since = self._clock()
+        self._parts.append(delta)
+        self._size += len(delta)
+        if self._size >= self.max_chars or self.remaining() <= 0.0:
+            return self.flush()
+        return None
+
+    def flush(self) -> Optional[bytes]:
+        if not self._parts:
+            return None
+        text = "".join(self._parts)
+        self._parts, self._size = [], 0
+        return self._encode(text)
+
+
+class _Relay:
+    """
+    Single-consumer handoff from a pump task and loop callbacks to an async
+    generator. Items cost a deque append; the consumer parks on one future
+    only when the queue is empty, instead of a task and ``asyncio.wait`` per
+    item.
+    """
+
+    def __init__(self, max_ready: int = 8) -> None:
+        self.max_ready = max(1, int(max_ready))
+        self.ready: Deque[bytes] = deque()
+        self.finished = False
+        self.failure: Optional[BaseException] = None
+        self._room = asyncio.Event()
+        self._signal: Optional["asyncio.Future[None]"] = None
+
+    def put(self, frame: Optional[bytes]) -> None:
+        if frame:
+            self.ready.append(frame)
+            self._wake()
+
+    def finish(self, failure: Optional[BaseException] = None) -> None:
+        self.finished, self.failure = True, failure
+        self._wake()
+
+    def _wake(self) -> None:
+        if self._signal is not None and not self._signal.done():
+            self._signal.set_result(None)
+
+    @property
+    def full(self) -> bool:
+        return len(self.ready) >= self.max_ready
+
+    async def wait_room(self) -> None:
+        while self.full:
+            self._room.clear()
+            await self._room.wait()
+
+    async def drain(self, pump: Coroutine[Any, Any, None]) -> AsyncIterator[bytes]:
+        loop = asyncio.get_running_loop()
+        task = loop.create_task(pump)
+        try:
+            while True:
+                while self.ready:
+                    yield self.ready.popleft()
+                    self._room.set()
+                if self.finished:
+                    if self.failure is not None:
+                        raise self.failure
+                    if not self.ready:
+                        return
+                    continue
+                self._signal = loop.create_future()
+                await self._signal
+                self._signal = None
+        finally:
+            if not task.done():
+                task.cancel()
+
+
+async def coalesce(
+    source: AsyncIterator[str], coalescer: DeltaCoalescer, *, max_ready: int = 8
+) -> AsyncIterator[bytes]:
+    """
+    Frames from ``source`` deltas, merged per ``coalescer`` window. A pending
+    batch is flushed when its window expires even if the source is idle.
+
+    A pump task reads the source and arms one timer per batch, so a delta
+    costs a generator step. It pauses while ``max_ready`` frames are waiting
+    on a slow consumer.
+    """
+    loop = asyncio.get_running_loop()
+    relay = _Relay(max_ready)
+    timer: Optional[asyncio.TimerHandle] = None
+
+    def expire() -> None:
+        nonlocal timer
+        timer = None
+        relay.put(coalescer.flush())
+
+    async def pump() -> None:
+        nonlocal timer
+        try:
+            async for delta in source:
+                frame = coalescer.push(delta)
+                if frame:
+                    if timer is not None:
+                        timer.cancel()
+                        timer = None
+                    relay.put(frame)
+                elif timer is None:
+                    timer = loop.call_later(coalescer.remaining(), expire)
+                if relay.full:
+                    await relay.wait_room()
+        except Exception as exc:
+            relay.finish(exc)
+            return
+        finally:
+            if timer is not None:
+                timer.cancel()
+                timer = None
+        relay.put(coalescer.flush())
+        relay.finish()
+
+    async for frame in relay.drain(pump()):
+        yield frame
+
+
+class _Timer:
+    __slots__ = ("callback", "ticks", "rounds", "periodic", "cancelled", "slot", "wheel")
+
+    def __init__(
+        self, wheel: "TimerWheel", callback: Callable[[], None], ticks: int, periodic: bool
+    ) -> None:
+        self.wheel = wheel
+        self.callback = callback
+        self.ticks = ticks
+        self.rounds = 0
+        self.periodic = periodic
+        self.cancelled = False
+        self.slot = -1
+
+    def cancel(self) -> None:
+        if not self.cancelled:
+            self.cancelled = True
+            self.wheel._discard(self)
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel driven by a single task on the running loop.
+
+    Timers land in ``slots`` buckets of ``tick_s``; one sleep per tick fires
+    every due callback, so thousands of streams share one timer instead of
+    each parking its own. Resolution is one tick. The driver task starts with
+    the first timer and exits once the wheel is empty.
+    """
+
+    def __init__(self, tick_s: float = 0.25, slots: int = 512) -> None:
+        self.tick_s = max(0.001, float(tick_s))
+        self._slots: List[Set[_Timer]] = [set() for _ in range(max(1, int(slots)))]
+        self._cursor = 0
+        self._count = 0
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def call_later(self, delay_s: float, callback: Callable[[], None]) -> _Timer:
+        return self._add(_Timer(self, callback, self._ticks(delay_s), periodic=False))
+
+    def call_every(self, interval_s: float, callback: Callable[[], None]) -> _Timer:
+        return self._add(_Timer(self, callback, self._ticks(interval_s), periodic=True))
+
+    def _ticks(self, delay_s: float) -> int:
+        return max(1, round(float(delay_s) / self.tick_s))
+
+    def _add(self, timer: _Timer) -> _Timer:
+        self._place(timer)
+        self._count += 1
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._drive())
+        return timer
+
+    def _place(self, timer: _Timer) -> None:
+        n = len(self._slots)
+        timer.rounds = (timer.ticks - 1) // n
+        timer.slot = (self._cursor + timer.ticks) % n
+        self._slots[timer.slot].add(timer)
+
+    def _discard(self, timer: _Timer) -> None:
+        if timer.slot >= 0 and timer in self._slots[timer.slot]:
+            self._slots[timer.slot].discard(timer)
+            self._count -= 1
+        timer.slot = -1
+
+    def close(self) -> None:
+        """Drop every timer and stop the driver task."""
+        for slot in self._slots:
+            for timer in slot:
+                timer.cancelled = True
+                timer.slot = -1
+            slot.clear()
+        self._count = 0
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    def advance(self) -> int:
+        """Move one tick and fire due timers; returns how many fired."""
+        self._cursor = (self._cursor + 1) % len(self._slots)
+        slot = self._slots[self._cursor]
+        fired = 0
+        for timer in list(slot):
+            if timer.rounds > 0:
+                timer.rounds -= 1
+                continue
+            slot.discard(timer)
+            timer.slot = -1
+            try:
+                timer.callback()
+            except Exception:
+                pass
+            fired += 1
+            if timer.periodic and not timer.cancelled:
+                self._place(timer)
+            else:
+                # One-shot, or cancelled from its own callback (not in a slot then).
+                timer.cancelled = True
+                self._count -= 1
+        return fired
+
+    async def _drive(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_at = loop.time()
+        while self._count > 0:
+            next_at += self.tick_s
+            await asyncio.sleep(max(0.0, next_at - loop.time()))
+            self.advance()
+
+
+_WHEELS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, TimerWheel]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def shared_wheel() -> TimerWheel:
+    """The running loop's process-wide :class:`TimerWheel`."""
+    loop = asyncio.get_running_loop()
+    wheel = _WHEELS.get(loop)
+    if wheel is None:
+        wheel = _WHEELS[loop] = TimerWheel()
+    return wheel
+
+
+async def sse_stream(
+    frames: AsyncIterator[bytes],
+    *,
+    heartbeat_s: Optional[float] = 15.0,
+    retry_ms: Optional[int] = None,
+    wheel: Optional[TimerWheel] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Wrap ``frames`` with an initial ``retry:`` hint and idle heartbeats.
+
+    Heartbeats come from the shared :class:`TimerWheel`: each tick of
+    ``heartbeat_s`` writes ``:\\n\\n`` only if no frame went out since the
+    previous tick.
+    """
+    if retry_ms is not None:
+        yield EventStream.retry(retry_ms)
+    if not heartbeat_s:
+        async for frame in frames:
+            yield frame
+        return
+
+    relay = _Relay()
+    idle = [True]
+
+    def tick() -> None:
+        if idle[0]:
+            relay.put(_HEARTBEAT)
+        idle[0] = True
+
+    async def pump() -> None:
+        try:
+            async for frame in frames:
+                idle[0] = False
+                relay.put(frame)
+                if relay.full:
+                    await relay.wait_room()
+        except Exception as exc:
+            relay.finish(exc)
+            return
+        relay.finish()
+
+    timer = (wheel if wheel is not None else shared_wheel()).call_every(heartbeat_s, tick)
+    try:
+        async for frame in relay.drain(pump()):
+            yield frame
+    finally:
+        timer.cancel()
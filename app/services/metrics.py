@@ -141,6 +141,11 @@ purge_duration_seconds: HistogramLike = _mk_histogram(
     "purge_duration_seconds",
     "Duration of purge runs in seconds.",
 )
+purge_throttled_seconds_total: CounterLike = _mk_counter(
+    "purge_throttled_seconds_total",
+    "Seconds purge runs spent waiting on the row budget or on request latency.",
+    labels=["reason"],
+)
 
 # Family + tenant/bot breakdowns
 guardrail_decisions_family_total: CounterLike = _mk_counter(
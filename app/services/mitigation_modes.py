@@ -51,6 +51,18 @@ def get_modes(tenant: str, bot: str) -> Dict[str, bool]:
         return _from_mode(mode)
 
 
+async def get_modes_async(tenant: str, bot: str) -> Dict[str, bool]:
+    """:func:`get_modes` for async callers; the store lookup is awaited."""
+
+    key = _normalize_key(tenant, bot)
+    with _LOCK:
+        stored = _LEGACY_STORE.get(key)
+        if stored is not None:
+            return dict(stored)
+    mode = await prefs.get_mode_async(*key)
+    return _from_mode(mode)
+
+
 def set_modes(tenant: str, bot: str, modes: Mapping[str, bool]) -> Dict[str, bool]:
     """Persist mitigation modes for the tenant/bot pair and return the saved copy."""
 
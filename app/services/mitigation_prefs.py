@@ -29,6 +29,13 @@ def get_mode(tenant: str, bot: str) -> Optional[Mode]:
     return validate_mode(raw)
 
 
+async def get_mode_async(tenant: str, bot: str) -> Optional[Mode]:
+    raw = await mitigation_store.get_mode_async(tenant, bot)
+    if raw is None:
+        return None
+    return validate_mode(raw)
+
+
 def set_mode(tenant: str, bot: str, mode: Mode) -> None:
     mitigation_store.set_mode(tenant, bot, validate_mode(mode))
 
@@ -105,22 +105,41 @@ def _file_save(path: str, data: Dict[Tuple[str, str], str]) -> None:
             pass
 
 
-def _redis_client() -> Any | None:
+def _redis_url() -> Optional[str]:
     backend = _backend()
     url = os.getenv("REDIS_URL", "").strip()
     if backend == "redis" or (backend == "" and url):
-        return _ensure_redis_client(url or "redis://localhost:6379/0")
+        return url or "redis://localhost:6379/0"
     return None
 
 
+def _redis_client() -> Any | None:
+    url = _redis_url()
+    if url is None:
+        return None
+    return _ensure_redis_client(url)
+
+
+def _redis_async_client() -> Any | None:
+    url = _redis_url()
+    if url is None:
+        return None
+    try:
+        from app.services import redis_manager
+
+        return redis_manager.get_manager(url).client(decode=True)
+    except Exception:
+        return None
+
+
 def _ensure_redis_client(url: str) -> Any | None:
     global _REDIS_CLIENT, _REDIS_URL
     if _REDIS_CLIENT is not None and _REDIS_URL == url:
         return _REDIS_CLIENT
     try:
-        import redis
+        from app.services import redis_manager
 
-        client = redis.Redis.from_url(url, decode_responses=True)
+        client = redis_manager.get_manager(url).sync()
     except Exception:
         _REDIS_CLIENT = None
         _REDIS_URL = None
@@ -166,6 +185,25 @@ def get_mode(tenant: str, bot: str) -> Optional[str]:
         return _MEM_STORE.get((tenant, bot))
 
 
+async def get_mode_async(tenant: str, bot: str) -> Optional[str]:
+    """:func:`get_mode` for async callers; Redis reads are awaited, not blocked on."""
+    tenant, bot = _key(tenant, bot)
+    client = _redis_async_client()
+    if client is not None:
+        try:
+            for key in (_redis_key(tenant, bot), _legacy_redis_key(tenant, bot)):
+                value = await client.get(key)
+                if isinstance(value, str) and value:
+                    return value
+        except Exception:
+            pass
+    path = _file_location()
+    with _LOCK:
+        if path:
+            return _file_load(path).get((tenant, bot))
+        return _MEM_STORE.get((tenant, bot))
+
+
 def set_mode(tenant: str, bot: str, mode: str) -> None:
     tenant, bot = _key(tenant, bot)
     mode = _norm_mode(mode)
@@ -10,7 +10,7 @@ from typing import Any, Dict, Iterable, List, Literal, Mapping, Optional, Patter
 
 from app.config import get_settings
 from app.models.verifier import VerifierInput
-from app.services import runtime_flags, verifier_client as vcli
+from app.services import policy_snapshot, runtime_flags, verifier_client as vcli
 from app.services.config_store import get_policy_packs
 from app.services.policy_packs import merge_packs
 from app.services.text_normalization import normalize_text_for_policy
@@ -204,22 +204,32 @@ def _load_yaml(path: Path) -> Dict[str, Any]:
 
     Uses PyYAML if available; otherwise falls back to a tiny parser that handles the
     test-fixture shape (version + deny items with pattern and optional flags).
+    The parsed result is reused from a policy snapshot when one matches.
     """
+    try:
+        raw = path.read_bytes()
+    except Exception:
+        return {}
+    return policy_snapshot.load_or_build(
+        "legacy-rules", [(str(path), raw)], lambda: _parse_rules_yaml(raw)
+    )
+
+
+def _parse_rules_yaml(raw: bytes) -> Dict[str, Any]:
     # Try PyYAML first
     try:
         import yaml  # noqa: F401
 
-        with path.open("r", encoding="utf-8") as f:
-            raw = yaml.safe_load(f) or {}
-        if isinstance(raw, dict):
-            return raw
+        loaded = yaml.safe_load(raw.decode("utf-8")) or {}
+        if isinstance(loaded, dict):
+            return loaded
     except Exception:
         # Fall through to naive parser
         pass
 
     # Naive fallback: extract version and deny entries from plain text
     try:
-        text = path.read_text(encoding="utf-8")
+        text = raw.decode("utf-8")
     except Exception:
         return {}
 
@@ -4,13 +4,20 @@ from __future__ import annotations
 import contextvars
 import os
 import re
-from dataclasses import dataclass
+import threading
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Pattern, Tuple
+from typing import Any, Dict, List, Optional, Pattern, Tuple
 
 import yaml
 
 from app.config import Settings
+from app.services import policy_snapshot, policy_watcher
+
+try:  # optional binding store
+    from app.services import config_store as _config_store
+except Exception:  # pragma: no cover - binding store unavailable
+    _config_store = None  # type: ignore[assignment]
 
 
 @dataclass
@@ -77,27 +84,175 @@ def _binding_path_or_none(tenant: str, bot: str) -> str | None:
         return None
 
 
-def _resolve_path() -> str:
+@dataclass
+class _ResolutionIndex:
+    """Snapshot of everything path resolution depends on.
+
+    Built at startup and replaced wholesale on admin reload or when the
+    bindings change, so :func:`get_policy` only does dictionary lookups.
+    ``routes`` holds the resolved path for each ``(tenant, bot)`` pair the
+    bindings name, filled once at build time; any other pair (tenant and bot
+    come from client headers) falls back through the wildcard keys without
+    being cached, so the map stays as large as the binding list.
     """
-    Resolution priority (to satisfy tests and keep ops intuitive):
-      1) Explicit ENV override: POLICY_RULES_PATH (live from os.environ)
-      2) Binding store (if present) for current {tenant, bot}
-      3) Bundled default rules.yaml
+
+    env_path: Optional[str]
+    default_path: str
+    bindings: Tuple[Any, ...]
+    bindings_source: Any
+    autoreload: bool
+    routes: Dict[Tuple[str, str], str] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        for b in self.bindings:
+            try:
+                key = (str(b["tenant"]), str(b["bot"]))
+            except Exception:
+                continue
+            self.routes.setdefault(key, self._resolve(*key))
+
+    def route(self, tenant: str, bot: str) -> str:
+        path = self.routes.get((tenant, bot))
+        if path is not None:
+            return path
+        if self.env_path:
+            return self.env_path
+        routes = self.routes
+        for key in ((tenant, "*"), ("*", bot), ("*", "*")):
+            path = routes.get(key)
+            if path is not None:
+                return path
+        return self.default_path
+
+    def _resolve(self, tenant: str, bot: str) -> str:
+        """
+        Resolution priority (to satisfy tests and keep ops intuitive):
+          1) Explicit ENV override: POLICY_RULES_PATH (snapshotted at build)
+          2) Binding store (if present) for the {tenant, bot}
+          3) Bundled default rules.yaml
+        """
+        if self.env_path:
+            return self.env_path
+        if _config_store is not None and self.bindings:
+            bound = _config_store.match_binding(self.bindings, tenant, bot)
+            if bound and bound.strip():
+                return bound.strip()
+        return self.default_path
+
+
+_index: Optional[_ResolutionIndex] = None
+_index_lock = threading.RLock()
+
+
+def _bindings_source() -> Any:
+    return getattr(_config_store, "_CONFIG_PATH", None)
+
+
+def _snapshot_bindings() -> Tuple[Any, ...]:
+    if _config_store is None:
+        return ()
+    try:
+        return tuple(_config_store.load_bindings().bindings)
+    except Exception:
+        return ()
+
+
+def build_index() -> None:
+    """(Re)build the resolution index from env, settings and the binding store.
+
+    Preloads the policy for every known route and (re)arms the file watcher
+    when ``POLICY_AUTORELOAD`` is on.
     """
-    # 1) ENV override (read directly so test-time changes are honored)
+    global _index
     env_raw = os.environ.get("POLICY_RULES_PATH", "")
-    if env_raw and env_raw.strip():
-        return env_raw.strip()
+    index = _ResolutionIndex(
+        env_path=env_raw.strip() or None,
+        default_path=_default_path(),
+        bindings=_snapshot_bindings(),
+        bindings_source=_bindings_source(),
+        autoreload=bool(Settings().POLICY_AUTORELOAD),
+    )
+    with _index_lock:
+        _index = index
+    _arm_watcher(index)
+    paths = {index.env_path or index.default_path}
+    if not index.env_path:
+        paths.update(str(b["rules_path"]).strip() for b in index.bindings)
+    for path in paths:
+        if path and path not in _cache:
+            try:
+                _store(path, _load_from_disk(path))
+            except Exception:
+                continue
+
+
+def _arm_watcher(index: _ResolutionIndex) -> None:
+    watcher = policy_watcher.get_watcher()
+    if not index.autoreload:
+        watcher.stop()
+        return
+    source = index.bindings_source
+    if source is not None:
+        watcher.watch(str(source), _on_bindings_file_changed)
+    for path in list(_cache):
+        watcher.watch(path, _on_policy_file_changed)
+    watcher.start()
+
+
+def _current_index() -> _ResolutionIndex:
+    index = _index
+    if index is None or index.bindings_source is not _bindings_source():
+        with _index_lock:
+            index = _index
+            if index is None or index.bindings_source is not _bindings_source():
+                build_index()
+                index = _index
+    assert index is not None
+    return index
+
+
+def invalidate_bindings() -> None:
+    """Re-snapshot bindings (called after the binding store is saved)."""
+    global _index
+    with _index_lock:
+        index = _index
+        if index is None:
+            return
+        _index = _ResolutionIndex(
+            env_path=index.env_path,
+            default_path=index.default_path,
+            bindings=_snapshot_bindings(),
+            bindings_source=_bindings_source(),
+            autoreload=index.autoreload,
+        )
+
+
+def _on_bindings_file_changed(_path: str) -> None:
+    invalidate_bindings()
+
+
+def _on_policy_file_changed(path: str) -> None:
+    index = _index
+    if index is None or not index.autoreload or path not in _cache:
+        return
+    try:
+        blob = _load_from_disk(path)
+    except Exception:
+        # Deleted, renamed away or mid-write: keep serving the last good blob.
+        return
+    _cache[path] = blob
 
-    # 2) Binding store (optional)
-    tenant = _CTX_TENANT.get()
-    bot = _CTX_BOT.get()
-    bound = _binding_path_or_none(tenant, bot)
-    if bound:
-        return bound
 
-    # 3) Bundled default
-    return _default_path()
+def _store(path: str, blob: PolicyBlob) -> PolicyBlob:
+    _cache[path] = blob
+    index = _index
+    if index is not None and index.autoreload:
+        policy_watcher.get_watcher().watch(path, _on_policy_file_changed)
+    return blob
+
+
+if _config_store is not None:
+    _config_store.add_bindings_listener(invalidate_bindings)
 
 
 def _flag_bits(flags: List[str] | None) -> int:
@@ -132,14 +287,20 @@ def _compile_deny(rules: Dict[str, Any]) -> List[Tuple[str, Pattern[str]]]:
     return out
 
 
+def _parse_rules(raw: bytes) -> Tuple[Dict[str, Any], List[Tuple[str, Pattern[str]]]]:
+    rules = yaml.safe_load(raw.decode("utf-8")) or {}
+    return rules, _compile_deny(rules)
+
+
 def _load_from_disk(path: str) -> PolicyBlob:
     p = Path(path)
-    text = p.read_text(encoding="utf-8")
-    rules = yaml.safe_load(text) or {}
+    raw = p.read_bytes()
+    rules, deny_compiled = policy_snapshot.load_or_build(
+        "rules", [(str(p), raw)], lambda: _parse_rules(raw)
+    )
     mtime = p.stat().st_mtime
     version_val = rules.get("version", int(mtime))
     version = str(version_val)
-    deny_compiled = _compile_deny(rules)
     return PolicyBlob(
         rules=rules,
         version=version,
@@ -150,34 +311,27 @@ def _load_from_disk(path: str) -> PolicyBlob:
 
 
 def get_policy() -> PolicyBlob:
-    """Return the current policy; refresh if POLICY_AUTORELOAD and mtime changed."""
-    path = _resolve_path()
-    s = Settings()
+    """Return the current policy for the bound {tenant, bot}.
 
+    Resolution and the loaded blob come from the in-memory index; edits on
+    disk are picked up by the policy watcher when POLICY_AUTORELOAD is on,
+    or by :func:`reload_now`.
+    """
+    path = _current_index().route(_CTX_TENANT.get(), _CTX_BOT.get())
     blob = _cache.get(path)
     if blob is None:
-        blob = _load_from_disk(path)
-        _cache[path] = blob
-        return blob
-
-    if s.POLICY_AUTORELOAD:
-        try:
-            mtime = Path(path).stat().st_mtime
-        except FileNotFoundError:
-            return blob
-        if mtime != blob.mtime:
-            blob = _load_from_disk(path)
-            _cache[path] = blob
-
+        blob = _store(path, _load_from_disk(path))
     return blob
 
 
 def reload_now() -> PolicyBlob:
-    """Force a reload regardless of POLICY_AUTORELOAD."""
-    path = _resolve_path()
-    blob = _load_from_disk(path)
-    _cache[path] = blob
-    return blob
+    """Rebuild the resolution index and force a reload from disk."""
+    from app.services import policy_packs
+
+    policy_packs.invalidate_pack_index()
+    build_index()
+    path = _current_index().route(_CTX_TENANT.get(), _CTX_BOT.get())
+    return _store(path, _load_from_disk(path))
 
 
 # ---- Optional binding inspection (admin ergonomics) --------------------------
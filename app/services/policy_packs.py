@@ -5,12 +5,15 @@ from __future__ import annotations
 import hashlib
 import io
 import os
+import threading
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import yaml
 
+from app.services import policy_snapshot
+
 # Backward/forward-compatible search roots (ordered by precedence)
 _PACKS_DIRS: List[Path] = [
     Path("policies/packs"),
@@ -62,6 +65,81 @@ def _existing_dirs() -> List[Path]:
     return dirs
 
 
+@dataclass(frozen=True)
+class _PackIndex:
+    """Pack name -> path map for one set of search roots."""
+
+    key: Tuple[Any, ...]
+    paths: Dict[str, Path]
+    available: Tuple[Tuple[str, Path], ...]
+
+
+_pack_index: Optional[_PackIndex] = None
+_pack_index_lock = threading.Lock()
+
+
+def _pack_index_key() -> Tuple[Any, ...]:
+    return (tuple(_PACKS_DIRS), project_root, os.getcwd())
+
+
+def _build_pack_index(key: Tuple[Any, ...]) -> _PackIndex:
+    dirs = _existing_dirs()
+    paths: Dict[str, Path] = {}
+    for root in dirs:
+        for suffix in (".yaml", ".yml"):
+            try:
+                entries = sorted(root.glob(f"*{suffix}"))
+            except Exception:
+                continue
+            for path in entries:
+                if path.stem not in paths and path.is_file():
+                    paths[path.stem] = path
+
+    seen: set[str] = set()
+    available: List[Tuple[str, Path]] = []
+    for root in dirs:
+        try:
+            for pack in sorted(root.glob("*.y*ml")):
+                if pack.stem not in seen:
+                    seen.add(pack.stem)
+                    available.append((pack.stem, pack))
+        except Exception:
+            continue
+
+    try:
+        from app.services import policy_watcher
+
+        watcher = policy_watcher.get_watcher()
+        for root in dirs:
+            watcher.watch(str(root), lambda _path: invalidate_pack_index())
+    except Exception:
+        pass
+    return _PackIndex(key=key, paths=paths, available=tuple(available))
+
+
+def _current_pack_index() -> _PackIndex:
+    global _pack_index
+    key = _pack_index_key()
+    index = _pack_index
+    if index is None or index.key != key:
+        with _pack_index_lock:
+            index = _pack_index
+            if index is None or index.key != key:
+                index = _pack_index = _build_pack_index(key)
+    return index
+
+
+def invalidate_pack_index() -> None:
+    """Forget resolved pack paths; the next lookup re-scans the pack directories.
+
+    Called by the policy watcher when a pack directory changes (file added,
+    removed or renamed) and on admin reload.
+    """
+    global _pack_index
+    with _pack_index_lock:
+        _pack_index = None
+
+
 def resolve_pack_path(name: str) -> Optional[Path]:
     """Resolve a policy pack name to a concrete YAML path."""
 
@@ -70,6 +148,9 @@ def resolve_pack_path(name: str) -> Optional[Path]:
         safe = safe[: -len(".yaml")]
     elif safe.endswith(".yml"):
         safe = safe[: -len(".yml")]
+    if "/" not in safe and os.sep not in safe:
+        return _current_pack_index().paths.get(safe)
+    # Nested names are not indexed; probe the roots directly.
     candidates = [f"{safe}.yaml", f"{safe}.yml"]
     for root in _existing_dirs():
         for fname in candidates:
@@ -85,19 +166,7 @@ def resolve_pack_path(name: str) -> Optional[Path]:
 def list_available_packs() -> List[Tuple[str, Path]]:
     """Enumerate available packs de-duplicated by name respecting precedence."""
 
-    seen: set[str] = set()
-    out: List[Tuple[str, Path]] = []
-    for root in _existing_dirs():
-        try:
-            for pack in sorted(root.glob("*.y*ml")):
-                name = pack.stem
-                if name in seen:
-                    continue
-                seen.add(name)
-                out.append((name, pack))
-        except Exception:
-            continue
-    return out
+    return list(_current_pack_index().available)
 
 
 @dataclass(frozen=True)
@@ -148,7 +217,9 @@ def load_pack(name: str) -> Tuple[PackRef, Dict[str, Any], bytes]:
     ref = PackRef(name=name, path=str(path))
     with io.open(ref.path, "rb") as fh:
         raw = fh.read()
-    data = yaml.safe_load(raw) or {}
+    data = policy_snapshot.load_or_build(
+        "pack", [(ref.path, raw)], lambda: yaml.safe_load(raw) or {}
+    )
     if not isinstance(data, dict):
         raise ValueError(f"Pack {name} is not a dict at top-level")
     return ref, data, raw
@@ -181,6 +252,7 @@ __all__ = [
     "load_pack",
     "load_pack_text",
     "merge_packs",
+    "invalidate_pack_index",
     "list_available_packs",
     "resolve_pack_path",
 ]
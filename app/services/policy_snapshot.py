@@ -0,0 +1,203 @@
+"""Content-addressed snapshots of compiled policy artifacts.
+
+Parsing YAML and normalising rules dominates policy load time, and every
+worker used to repeat it at startup and on every reload. :func:`load_or_build`
+hashes the raw source bytes together with the artifact kind, its schema and
+the interpreter's cache tag. When ``POLICY_SNAPSHOT_DIR`` already holds an
+artifact under that digest it is deserialised from an ``mmap`` of the file
+instead of re-running the compile step. A missing, stale or unreadable
+snapshot falls back to compiling from source, and the result is written back
+atomically so the next worker (or restart) can skip the work.
+
+Snapshots are pickles, so the directory must only be writable by the service
+account. The file pages are shared between workers through the page cache;
+the objects rebuilt from them are private to each worker.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import mmap
+import os
+import pickle
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, TypeVar, cast
+
+_log = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+_MAGIC = b"GRSNAP\x01\n"
+# Older artifacts of one kind kept next to the newest (e.g. for rollbacks).
+_KEEP_PER_KIND = 4
+
+T = TypeVar("T")
+# (label, raw bytes) for every input the artifact is compiled from.
+Source = Tuple[str, bytes]
+
+_stats: Dict[str, int] = {"hits": 0, "misses": 0, "writes": 0, "errors": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(key: str) -> None:
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def stats() -> Dict[str, int]:
+    """Return hit/miss/write/error counters since process start."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def snapshot_dir() -> Optional[Path]:
+    raw = (os.getenv("POLICY_SNAPSHOT_DIR") or "").strip()
+    return Path(raw) if raw else None
+
+
+def source_digest(kind: str, sources: Sequence[Source], *, schema: int = 1) -> str:
+    h = hashlib.sha256()
+    tag = sys.implementation.cache_tag or sys.version
+    h.update(f"{FORMAT_VERSION}\0{kind}\0{schema}\0{tag}\0".encode("utf-8"))
+    for label, data in sources:
+        h.update(f"{label}\0{len(data)}\0".encode("utf-8"))
+        h.update(data)
+    return h.hexdigest()
+
+
+def snapshot_path(directory: Path, kind: str, digest: str) -> Path:
+    return directory / f"{kind}-{digest}.snap"
+
+
+def load_or_build(
+    kind: str,
+    sources: Sequence[Source],
+    build: Callable[[], T],
+    *,
+    schema: int = 1,
+) -> T:
+    """Return the artifact compiled from ``sources``, via snapshot when possible.
+
+    ``build`` must derive the artifact from exactly the bytes in ``sources``
+    so a snapshot can never outlive an edit. Bump ``schema`` whenever the
+    shape of the artifact changes.
+    """
+    directory = snapshot_dir()
+    if directory is None:
+        return build()
+    digest = source_digest(kind, sources, schema=schema)
+    path = snapshot_path(directory, kind, digest)
+    try:
+        value = _read(path, digest)
+    except FileNotFoundError:
+        _count("misses")
+    except Exception as exc:
+        _count("errors")
+        _log.debug("policy snapshot %s unreadable, recompiling: %s", path, exc)
+    else:
+        _count("hits")
+        return cast(T, value)
+
+    value = build()
+    try:
+        _write(path, digest, value)
+    except Exception as exc:
+        _count("errors")
+        _log.debug("policy snapshot %s not written: %s", path, exc)
+    else:
+        _count("writes")
+    return value
+
+
+def _header(digest: str) -> bytes:
+    return _MAGIC + digest.encode("ascii") + b"\n"
+
+
+def _read(path: Path, digest: str) -> Any:
+    header = _header(digest)
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if mm[: len(header)] != header:
+            raise ValueError("snapshot header does not match its content digest")
+        view = memoryview(mm)
+        try:
+            payload = view[len(header) :]
+            try:
+                return pickle.loads(payload)
+            finally:
+                payload.release()
+        finally:
+            view.release()
+
+
+def _write(path: Path, digest: str, value: Any) -> None:
+    payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "wb") as fh:
+            fh.write(_header(digest))
+            fh.write(payload)
+        os.replace(tmp, path)
+    finally:
+        try:
+            tmp.unlink()
+        except FileNotFoundError:
+            pass
+    _prune(path)
+
+
+def _prune(current: Path) -> None:
+    kind = current.name.rsplit("-", 1)[0]
+    try:
+        older = sorted(
+            (p for p in current.parent.glob(f"{kind}-*.snap") if p != current),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True,
+        )
+        for stale in older[_KEEP_PER_KIND:]:
+            stale.unlink()
+    except OSError as exc:
+        _log.debug("policy snapshot prune failed: %s", exc)
+
+
+def compile_all() -> Dict[str, Any]:
+    """Compile every artifact the current configuration loads at startup.
+
+    Run once (e.g. at image build or before forking workers) with
+    ``POLICY_SNAPSHOT_DIR`` set so workers start from snapshots.
+    """
+    from app.policy import pack_engine
+    from app.services import policy, policy_loader, rulepacks_engine
+
+    before = stats()
+    policy_loader._cache.clear()
+    policy_loader.build_index()
+    rulepacks = rulepacks_engine.compile_active_rulepacks(force=True)
+    packs = pack_engine.load_compiled()
+    try:
+        version = policy.force_reload()
+    except Exception as exc:
+        _log.debug("policy packs not compiled: %s", exc)
+        version = None
+    after = stats()
+    return {
+        "dir": str(snapshot_dir() or ""),
+        "policies": sorted(policy_loader._cache),
+        "rulepacks": list(rulepacks.names),
+        "pack_rules": len(packs.rules),
+        "policy_version": version,
+        **{key: after[key] - before[key] for key in after},
+    }
+
+
+__all__ = [
+    "FORMAT_VERSION",
+    "compile_all",
+    "load_or_build",
+    "snapshot_dir",
+    "snapshot_path",
+    "source_digest",
+    "stats",
+]
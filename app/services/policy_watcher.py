@@ -0,0 +1,125 @@
+"""Polling watcher that invalidates the policy resolution index.
+
+Policy files, the bindings file and the pack directories are registered with
+a single daemon thread that ``stat``s them every ``POLICY_WATCH_INTERVAL_MS``.
+A changed fingerprint (mtime, size, inode, or the path disappearing) invokes
+the registered callback on the watcher thread, so request handlers never
+touch the filesystem to notice edits.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+_log = logging.getLogger(__name__)
+
+Fingerprint = Optional[Tuple[int, int, int]]
+Callback = Callable[[str], None]
+
+
+def _interval_s() -> float:
+    try:
+        return max(0.01, int(os.getenv("POLICY_WATCH_INTERVAL_MS", "1000")) / 1000.0)
+    except ValueError:
+        return 1.0
+
+
+def fingerprint(path: str) -> Fingerprint:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class PolicyWatcher:
+    """Poll registered paths and fire their callback when they change."""
+
+    def __init__(self, interval_s: Optional[float] = None) -> None:
+        self.interval_s = interval_s if interval_s is not None else _interval_s()
+        self._lock = threading.Lock()
+        self._watched: Dict[str, Tuple[Callback, Fingerprint]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, path: str, callback: Callback) -> None:
+        """Register ``path``; its current state is the baseline for changes."""
+        with self._lock:
+            self._watched[path] = (callback, fingerprint(path))
+
+    def unwatch(self, path: str) -> None:
+        with self._lock:
+            self._watched.pop(path, None)
+
+    def watched(self) -> Tuple[str, ...]:
+        with self._lock:
+            return tuple(self._watched)
+
+    def running(self) -> bool:
+        thread = self._thread
+        return thread is not None and thread.is_alive()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="policy-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        self._thread = None
+
+    def poll_once(self) -> int:
+        """Check every registered path once; return how many callbacks fired."""
+        with self._lock:
+            items = list(self._watched.items())
+        fired = 0
+        for path, (callback, previous) in items:
+            current = fingerprint(path)
+            if current == previous:
+                continue
+            with self._lock:
+                entry = self._watched.get(path)
+                if entry is None or entry[1] != previous:
+                    continue
+                self._watched[path] = (entry[0], current)
+            try:
+                callback(path)
+            except Exception as exc:
+                _log.debug("policy watcher callback for %s failed: %s", path, exc)
+            fired += 1
+        return fired
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            self.poll_once()
+
+
+_WATCHER: Optional[PolicyWatcher] = None
+_WATCHER_LOCK = threading.Lock()
+
+
+def get_watcher() -> PolicyWatcher:
+    global _WATCHER
+    with _WATCHER_LOCK:
+        if _WATCHER is None:
+            _WATCHER = PolicyWatcher()
+        return _WATCHER
+
+
+def shutdown() -> None:
+    """Stop the watcher thread; registrations survive and resume on next start."""
+    watcher = _WATCHER
+    if watcher is not None:
+        watcher.stop()
+
+
+__all__ = ["PolicyWatcher", "fingerprint", "get_watcher", "shutdown"]
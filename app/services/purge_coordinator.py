@@ -60,12 +60,37 @@ class PurgeCoordinator:
         deleted = 0
         if not dry_run and target is not None and snapshot:
             deleted = await target.purge_ids(tenant, snapshot)
-        completed = time.time()
+        return await self.record(
+            tenant,
+            resource,
+            snapshot,
+            deleted=deleted,
+            started=started,
+            completed=time.time(),
+            dry_run=dry_run,
+            actor=actor,
+            mode=mode,
+        )
+
+    async def record(
+        self,
+        tenant: str,
+        resource: str,
+        ids: List[str],
+        *,
+        deleted: int,
+        started: float,
+        completed: float,
+        dry_run: bool,
+        actor: str,
+        mode: str,
+    ) -> PurgeReceipt:
+        """Sign and store the receipt for a purge that already ran."""
         receipt = PurgeReceipt.build(
             tenant=tenant,
             resource=resource,
             count=deleted if not dry_run else 0,
-            ids=snapshot,
+            ids=list(ids),
             started_ts=started,
             completed_ts=completed,
             actor=actor,
@@ -77,6 +102,10 @@ class PurgeCoordinator:
         await store_receipt(self._redis, receipt, signature)
         return receipt
 
+    @property
+    def targets(self) -> Dict[str, PurgeTarget]:
+        return self._targets
+
     async def latest_receipts(self, tenant: str, limit: int) -> List[PurgeReceipt]:
         return await load_latest_receipts(self._redis, tenant, limit)
 
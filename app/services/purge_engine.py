@@ -0,0 +1,390 @@
+"""Throttled, resumable retention purge engine.
+
+A purge *job* is one ``(tenant, resource, cutoff)`` triple. The engine drains
+each job in chunks through the target's ``purge_chunk`` (a single range
+delete), so no statement holds locks on the live table for longer than one
+chunk takes:
+
+* a shared :class:`PurgeBudget` caps deleted rows per second across all jobs;
+* :class:`LatencyBackpressure` pauses between chunks while recent request
+  latency is above a threshold;
+* after every chunk the job's position is saved in a :class:`CursorStore`, so
+  a run that crashes or hits its row cap resumes where it stopped;
+* jobs for different tenants run concurrently (bounded); one tenant's jobs
+  run one after another.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Protocol,
+    Tuple,
+    cast,
+)
+
+from redis.asyncio import Redis
+
+from app.metrics.latency import recent_request_seconds
+from app.services.metrics import (
+    purge_items_deleted_total,
+    purge_throttled_seconds_total,
+)
+from app.services.purge_receipts import MAX_RECEIPT_IDS
+from app.services.purge_targets import Position, PurgeChunk, PurgeTarget
+
+_log = logging.getLogger(__name__)
+
+Sleep = Callable[[float], Awaitable[None]]
+Clock = Callable[[], float]
+
+
+@dataclass(frozen=True, slots=True)
+class PurgeJob:
+    tenant: str
+    resource: str
+    cutoff: float  # epoch seconds; rows strictly older are deleted
+
+
+@dataclass(slots=True)
+class PurgeCursor:
+    """Progress of the current pass over one ``(tenant, resource)``."""
+
+    tenant: str
+    resource: str
+    position: Optional[Position] = None
+    deleted: int = 0
+    pass_started: float = 0.0
+    updated: float = 0.0
+    passes: int = 0
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, raw: str | bytes) -> "PurgeCursor":
+        data = json.loads(raw)
+        position = data.get("position")
+        return cls(
+            tenant=str(data.get("tenant", "")),
+            resource=str(data.get("resource", "")),
+            position=(float(position[0]), str(position[1])) if position else None,
+            deleted=int(data.get("deleted", 0)),
+            pass_started=float(data.get("pass_started", 0.0)),
+            updated=float(data.get("updated", 0.0)),
+            passes=int(data.get("passes", 0)),
+        )
+
+
+class CursorStore(Protocol):
+    async def load(self, tenant: str, resource: str) -> Optional[PurgeCursor]: ...
+
+    async def save(self, cursor: PurgeCursor) -> None: ...
+
+
+class InMemoryCursorStore(CursorStore):
+    def __init__(self) -> None:
+        self._cursors: Dict[Tuple[str, str], str] = {}
+
+    async def load(self, tenant: str, resource: str) -> Optional[PurgeCursor]:
+        raw = self._cursors.get((tenant, resource))
+        return PurgeCursor.from_json(raw) if raw is not None else None
+
+    async def save(self, cursor: PurgeCursor) -> None:
+        self._cursors[(cursor.tenant, cursor.resource)] = cursor.to_json()
+
+
+class RedisCursorStore(CursorStore):
+    def __init__(self, redis: Redis[Any], prefix: str = "retention:cursor") -> None:
+        self._redis = redis
+        self._prefix = prefix
+
+    def _key(self, tenant: str, resource: str) -> str:
+        return f"{self._prefix}:{tenant}:{resource}"
+
+    async def load(self, tenant: str, resource: str) -> Optional[PurgeCursor]:
+        raw = await self._redis.get(self._key(tenant, resource))
+        if raw is None:
+            return None
+        try:
+            return PurgeCursor.from_json(cast(bytes, raw))
+        except (ValueError, TypeError, IndexError):
+            return None
+
+    async def save(self, cursor: PurgeCursor) -> None:
+        await self._redis.set(self._key(cursor.tenant, cursor.resource), cursor.to_json())
+
+
+class PurgeBudget:
+    """Token bucket of deletable rows shared by every job of an engine.
+
+    ``acquire(n)`` reserves ``n`` rows and sleeps until the bucket covers
+    them; ``refund`` returns rows a chunk reserved but did not delete. A rate
+    of ``0`` disables throttling.
+    """
+
+    def __init__(
+        self,
+        rows_per_second: float,
+        *,
+        burst: Optional[float] = None,
+        clock: Clock = time.monotonic,
+        sleep: Sleep = asyncio.sleep,
+    ) -> None:
+        self.rate = max(0.0, float(rows_per_second))
+        self.burst = max(1.0, float(burst if burst is not None else self.rate))
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.burst
+        self._stamp = clock()
+        self._lock = asyncio.Lock()
+        self.waited = 0.0
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    async def acquire(self, rows: int) -> None:
+        if self.rate <= 0 or rows <= 0:
+            return
+        async with self._lock:
+            self._refill()
+            self._tokens -= rows
+            deficit = -self._tokens
+            if deficit > 0:
+                delay = deficit / self.rate
+                self.waited += delay
+                _inc_throttled("budget", delay)
+                await self._sleep(delay)
+
+    def refund(self, rows: int) -> None:
+        if self.rate > 0 and rows > 0:
+            self._tokens = min(self.burst, self._tokens + rows)
+
+
+class LatencyBackpressure:
+    """Hold purges back while recent request latency exceeds ``threshold_s``.
+
+    Waits with doubling backoff (``initial_s`` up to ``max_backoff_s``) and
+    gives up after ``max_pause_s`` so a permanently slow service still makes
+    progress, one chunk per pause.
+    """
+
+    def __init__(
+        self,
+        threshold_s: float,
+        *,
+        signal: Callable[[], float] = recent_request_seconds,
+        initial_s: float = 0.25,
+        max_backoff_s: float = 5.0,
+        max_pause_s: float = 30.0,
+        sleep: Sleep = asyncio.sleep,
+    ) -> None:
+        self.threshold_s = float(threshold_s)
+        self._signal = signal
+        self.initial_s = max(0.001, float(initial_s))
+        self.max_backoff_s = max(self.initial_s, float(max_backoff_s))
+        self.max_pause_s = max(0.0, float(max_pause_s))
+        self._sleep = sleep
+        self.paused = 0.0
+
+    async def wait(self) -> float:
+        """Sleep while the signal is high; returns the seconds spent paused."""
+        if self.threshold_s <= 0:
+            return 0.0
+        paused = 0.0
+        delay = self.initial_s
+        while paused < self.max_pause_s and self._signal() > self.threshold_s:
+            step = min(delay, self.max_pause_s - paused)
+            await self._sleep(step)
+            paused += step
+            delay = min(delay * 2, self.max_backoff_s)
+        if paused:
+            self.paused += paused
+            _inc_throttled("latency", paused)
+        return paused
+
+
+def _inc_throttled(reason: str, seconds: float) -> None:
+    try:
+        purge_throttled_seconds_total.labels(reason).inc(seconds)
+    except Exception:
+        pass
+
+
+@dataclass
+class JobResult:
+    job: PurgeJob
+    deleted: int = 0
+    chunks: int = 0
+    drained: bool = False
+    ids: List[str] = field(default_factory=list)
+    started: float = 0.0
+    completed: float = 0.0
+    error: Optional[str] = None
+
+
+ChunkHook = Callable[[PurgeJob, PurgeChunk], Awaitable[None]]
+
+
+class PurgeEngine:
+    """Drains purge jobs in throttled, resumable chunks."""
+
+    def __init__(
+        self,
+        targets: Dict[str, PurgeTarget],
+        cursors: CursorStore,
+        *,
+        budget: Optional[PurgeBudget] = None,
+        backpressure: Optional[LatencyBackpressure] = None,
+        chunk_size: int = 500,
+        concurrency: int = 2,
+        clock: Clock = time.time,
+        on_chunk: Optional[ChunkHook] = None,
+        keep_ids: int = MAX_RECEIPT_IDS + 1,
+    ) -> None:
+        self._targets = targets
+        self._cursors = cursors
+        self.budget = budget or PurgeBudget(0)
+        self.backpressure = backpressure
+        self.chunk_size = max(1, int(chunk_size))
+        self.concurrency = max(1, int(concurrency))
+        self._clock = clock
+        self._on_chunk = on_chunk
+        # Ids kept per job for its receipt; one past the receipt cap marks it truncated.
+        self.keep_ids = max(0, int(keep_ids))
+
+    async def _chunk(
+        self, target: PurgeTarget, job: PurgeJob, after: Optional[Position], limit: int
+    ) -> PurgeChunk:
+        purge_chunk = getattr(target, "purge_chunk", None)
+        if callable(purge_chunk):
+            return cast(PurgeChunk, await purge_chunk(job.tenant, job.cutoff, after, limit))
+        # Targets without range deletes: consume the oldest expired ids from the head.
+        ids = await target.list_expired(job.tenant, job.cutoff, limit)
+        if not ids:
+            return PurgeChunk(0, None)
+        deleted = await target.purge_ids(job.tenant, ids)
+        return PurgeChunk(deleted, (job.cutoff, ids[-1]) if len(ids) >= limit else None, ids)
+
+    async def drain(self, job: PurgeJob, *, max_rows: Optional[int] = None) -> JobResult:
+        """Delete ``job``'s expired rows until drained or ``max_rows`` is reached."""
+        result = JobResult(job, started=self._clock())
+        target = self._targets.get(job.resource)
+        if target is None:
+            result.error = "no target"
+            return result
+        cursor = await self._cursors.load(job.tenant, job.resource)
+        if cursor is None:
+            cursor = PurgeCursor(job.tenant, job.resource)
+        if cursor.position is None:
+            cursor.deleted = 0
+            cursor.pass_started = result.started
+        while max_rows is None or result.deleted < max_rows:
+            limit = self.chunk_size
+            if max_rows is not None:
+                limit = min(limit, max_rows - result.deleted)
+            if self.backpressure is not None:
+                await self.backpressure.wait()
+            await self.budget.acquire(limit)
+            chunk = await self._chunk(target, job, cursor.position, limit)
+            self.budget.refund(limit - chunk.deleted)
+            result.deleted += chunk.deleted
+            result.chunks += 1
+            room = self.keep_ids - len(result.ids)
+            if room > 0 and chunk.ids:
+                result.ids.extend(chunk.ids[:room])
+            cursor.deleted += chunk.deleted
+            cursor.updated = self._clock()
+            stalled = chunk.deleted == 0 and chunk.position is not None
+            if not stalled:
+                cursor.position = chunk.position
+            if chunk.position is None:
+                cursor.passes += 1
+                result.drained = True
+            await self._cursors.save(cursor)
+            if chunk.deleted:
+                try:
+                    purge_items_deleted_total.labels(job.resource).inc(chunk.deleted)
+                except Exception:
+                    pass
+            if self._on_chunk is not None:
+                await self._on_chunk(job, chunk)
+            if result.drained or stalled:
+                break
+        result.completed = self._clock()
+        return result
+
+    async def run(
+        self, jobs: Iterable[PurgeJob], *, max_rows_per_job: Optional[int] = None
+    ) -> List[JobResult]:
+        """Drain ``jobs``: tenants concurrently, each tenant's jobs in order.
+
+        A job that raises is reported with ``error`` set and does not stop the
+        other jobs; its cursor keeps the last committed position.
+        """
+        by_tenant: Dict[str, List[PurgeJob]] = {}
+        for job in jobs:
+            by_tenant.setdefault(job.tenant, []).append(job)
+        gate = asyncio.Semaphore(self.concurrency)
+        results: List[JobResult] = []
+
+        async def tenant_worker(tenant_jobs: List[PurgeJob]) -> None:
+            async with gate:
+                for job in tenant_jobs:
+                    try:
+                        results.append(await self.drain(job, max_rows=max_rows_per_job))
+                    except Exception as exc:
+                        _log.warning("purge %s/%s failed: %s", job.tenant, job.resource, exc)
+                        results.append(JobResult(job, error=str(exc)))
+
+        await asyncio.gather(*(tenant_worker(group) for group in by_tenant.values()))
+        return results
+
+
+def engine_from_settings(
+    targets: Dict[str, PurgeTarget], cursors: CursorStore, **overrides: Any
+) -> PurgeEngine:
+    """Engine configured from the ``RETENTION_PURGE_*`` settings."""
+    from app import settings
+
+    chunk = int(overrides.pop("chunk_size", settings.RETENTION_PURGE_CHUNK))
+    rate = float(overrides.pop("rows_per_second", settings.RETENTION_PURGE_ROWS_PER_SEC))
+    threshold_ms = float(overrides.pop("max_latency_ms", settings.RETENTION_PURGE_MAX_LATENCY_MS))
+    return PurgeEngine(
+        targets,
+        cursors,
+        budget=PurgeBudget(rate, burst=max(rate, chunk)),
+        backpressure=LatencyBackpressure(
+            threshold_ms / 1000.0, max_pause_s=settings.RETENTION_PURGE_MAX_PAUSE_S
+        ),
+        chunk_size=chunk,
+        concurrency=int(overrides.pop("concurrency", settings.RETENTION_PURGE_CONCURRENCY)),
+        **overrides,
+    )
+
+
+__all__ = [
+    "CursorStore",
+    "InMemoryCursorStore",
+    "JobResult",
+    "LatencyBackpressure",
+    "PurgeBudget",
+    "PurgeCursor",
+    "PurgeEngine",
+    "PurgeJob",
+    "RedisCursorStore",
+    "engine_from_settings",
+]
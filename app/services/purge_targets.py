@@ -1,11 +1,24 @@
 from __future__ import annotations
 
-from typing import Dict, List, Protocol
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional, Protocol, Tuple
 
 from redis.asyncio import Redis
 
 from app.services.retention import Resource
 
+# Resume point of a chunked purge: (score or epoch seconds, id) of the last row deleted.
+Position = Tuple[float, str]
+
+
+class PurgeChunk(NamedTuple):
+    """Outcome of one chunk; ``position`` is ``None`` once nothing older remains."""
+
+    deleted: int
+    position: Optional[Position]
+    ids: List[str] = []
+
 
 class PurgeTarget(Protocol):
     async def list_expired(self, tenant: str, now: float, limit: int) -> List[str]: ...
@@ -13,6 +26,12 @@ class PurgeTarget(Protocol):
     async def purge_ids(self, tenant: str, ids: List[str]) -> int: ...
 
 
+class ChunkedPurgeTarget(PurgeTarget, Protocol):
+    async def purge_chunk(
+        self, tenant: str, cutoff: float, after: Optional[Position], limit: int
+    ) -> PurgeChunk: ...
+
+
 class RedisZsetTarget(PurgeTarget):
     def __init__(self, redis: Redis, resource: Resource) -> None:
         self._redis = redis
@@ -28,61 +47,60 @@ class RedisZsetTarget(PurgeTarget):
         ids = await self._redis.zrangebyscore(key, "-inf", now, start=0, num=limit)
         return [item.decode("utf-8") if isinstance(item, bytes) else str(item) for item in ids]
 
+    def _payload_keys(self, ids: List[str]) -> List[str]:
+        return []
+
     async def purge_ids(self, tenant: str, ids: List[str]) -> int:
         if not ids:
             return 0
-        key = self._index_key(tenant)
-        pipe = self._redis.pipeline()
-        for item in ids:
-            pipe.zrem(key, item)
+        # Two variadic commands per batch instead of one ZREM/DEL per id.
+        pipe = self._redis.pipeline(transaction=False)
+        payload = self._payload_keys(ids)
+        if payload:
+            pipe.delete(*payload)
+        pipe.zrem(self._index_key(tenant), *ids)
         await pipe.execute()
         return len(ids)
 
+    async def purge_chunk(
+        self, tenant: str, cutoff: float, after: Optional[Position], limit: int
+    ) -> PurgeChunk:
+        if limit <= 0:
+            return PurgeChunk(0, after)
+        low = after[0] if after is not None else "-inf"
+        rows = await self._redis.zrangebyscore(
+            self._index_key(tenant), low, f"({cutoff}", start=0, num=limit, withscores=True
+        )
+        if not rows:
+            return PurgeChunk(0, None)
+        ids = [item.decode("utf-8") if isinstance(item, bytes) else str(item) for item, _ in rows]
+        deleted = await self.purge_ids(tenant, ids)
+        position = (float(rows[-1][1]), ids[-1]) if len(rows) >= limit else None
+        return PurgeChunk(deleted, position, ids)
+
 
 class RedisDLQMessages(RedisZsetTarget):
     def __init__(self, redis: Redis) -> None:
         super().__init__(redis, Resource.DLQ_MSG)
 
-    async def purge_ids(self, tenant: str, ids: List[str]) -> int:
-        if not ids:
-            return 0
-        key_prefix = "dlq:msg:"
-        pipe = self._redis.pipeline()
-        for item in ids:
-            pipe.delete(f"{key_prefix}{item}")
-        await pipe.execute()
-        removed = await super().purge_ids(tenant, ids)
-        return removed
+    def _payload_keys(self, ids: List[str]) -> List[str]:
+        return [f"dlq:msg:{item}" for item in ids]
 
 
 class RedisIdempotency(RedisZsetTarget):
     def __init__(self, redis: Redis) -> None:
         super().__init__(redis, Resource.IDEMP_KEYS)
 
-    async def purge_ids(self, tenant: str, ids: List[str]) -> int:
-        if not ids:
-            return 0
-        pipe = self._redis.pipeline()
-        for item in ids:
-            pipe.delete(item)
-        await pipe.execute()
-        removed = await super().purge_ids(tenant, ids)
-        return removed
+    def _payload_keys(self, ids: List[str]) -> List[str]:
+        return list(ids)
 
 
 class WebhookLogsRedis(RedisZsetTarget):
     def __init__(self, redis: Redis) -> None:
         super().__init__(redis, Resource.WEBHOOK_LOGS)
 
-    async def purge_ids(self, tenant: str, ids: List[str]) -> int:
-        if not ids:
-            return 0
-        pipe = self._redis.pipeline()
-        for item in ids:
-            pipe.delete(item)
-        await pipe.execute()
-        removed = await super().purge_ids(tenant, ids)
-        return removed
+    def _payload_keys(self, ids: List[str]) -> List[str]:
+        return list(ids)
 
 
 class AuditLogsSQL(PurgeTarget):
@@ -95,7 +113,53 @@ class AuditLogsSQL(PurgeTarget):
         return 0
 
 
-def build_registry(redis: Redis, *, include_sql: bool = False) -> Dict[str, PurgeTarget]:
+class DecisionsSQL(PurgeTarget):
+    """The SQL decisions table; tenant ``*`` spans every tenant.
+
+    Chunks are range deletes over ``(ts, id)`` run in a worker thread, see
+    :func:`app.services.decisions.delete_range`.
+    """
+
+    @staticmethod
+    def _tenant(tenant: str) -> Optional[str]:
+        return None if tenant in ("", "*") else tenant
+
+    @staticmethod
+    def _dt(epoch: float) -> datetime:
+        return datetime.fromtimestamp(epoch, tz=timezone.utc)
+
+    async def list_expired(self, tenant: str, now: float, limit: int) -> List[str]:
+        from app.services import decisions
+
+        return await asyncio.to_thread(
+            decisions.expired_ids, self._dt(now), tenant=self._tenant(tenant), limit=limit
+        )
+
+    async def purge_ids(self, tenant: str, ids: List[str]) -> int:
+        from app.services import decisions
+
+        return await asyncio.to_thread(decisions.delete_ids, ids, tenant=self._tenant(tenant))
+
+    async def purge_chunk(
+        self, tenant: str, cutoff: float, after: Optional[Position], limit: int
+    ) -> PurgeChunk:
+        from app.services import decisions
+
+        start = (self._dt(after[0]), after[1]) if after is not None else None
+        deleted, last = await asyncio.to_thread(
+            decisions.delete_range,
+            self._dt(cutoff),
+            tenant=self._tenant(tenant),
+            after=start,
+            limit=limit,
+        )
+        position = (last[0].timestamp(), last[1]) if last is not None else None
+        return PurgeChunk(deleted, position)
+
+
+def build_registry(
+    redis: Redis, *, include_sql: bool = False, include_decisions: bool = False
+) -> Dict[str, PurgeTarget]:
     registry: Dict[str, PurgeTarget] = {
         Resource.DLQ_MSG.value: RedisDLQMessages(redis),
         Resource.IDEMP_KEYS.value: RedisIdempotency(redis),
@@ -103,6 +167,8 @@ def build_registry(redis: Redis, *, include_sql: bool = False) -> Dict[str, Purg
     }
     if include_sql:
         registry[Resource.AUDIT.value] = AuditLogsSQL()
+    if include_decisions:
+        registry[Resource.DECISIONS.value] = DecisionsSQL()
     return registry
 
 
@@ -111,6 +177,10 @@ REGISTRY: Dict[str, PurgeTarget] = {}
 
 __all__ = [
     "AuditLogsSQL",
+    "ChunkedPurgeTarget",
+    "DecisionsSQL",
+    "Position",
+    "PurgeChunk",
     "PurgeTarget",
     "RedisDLQMessages",
     "RedisIdempotency",
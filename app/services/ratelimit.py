@@ -84,14 +84,34 @@ class RateLimiter:
         self._backend = backend
 
     def allow(self, tenant: str, bot: str, cost: float = 1.0) -> Tuple[bool, Optional[int], float]:
-        key = f"{tenant}:{bot}"
         allowed, retry_after_seconds, remaining = self._backend.allow(
-            key,
+            f"{tenant}:{bot}",
             cost=cost,
             rps=self.refill_rate,
             burst=self.capacity,
         )
-
+        return self._result(tenant, bot, allowed, retry_after_seconds, remaining)
+
+    async def allow_async(
+        self, tenant: str, bot: str, cost: float = 1.0
+    ) -> Tuple[bool, Optional[int], float]:
+        """Like :meth:`allow`, awaiting backends that talk to Redis."""
+        allowed, retry_after_seconds, remaining = await self._backend.allow_async(
+            f"{tenant}:{bot}",
+            cost=cost,
+            rps=self.refill_rate,
+            burst=self.capacity,
+        )
+        return self._result(tenant, bot, allowed, retry_after_seconds, remaining)
+
+    @staticmethod
+    def _result(
+        tenant: str,
+        bot: str,
+        allowed: bool,
+        retry_after_seconds: float,
+        remaining: Optional[float],
+    ) -> Tuple[bool, Optional[int], float]:
         retry_after: Optional[int]
         if allowed or (retry_after_seconds or 0) <= 0:
             retry_after = None
@@ -4,7 +4,7 @@ import logging
 import os
 import threading
 import time
-from typing import TYPE_CHECKING, Callable, Dict, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
 
 from app.observability import metrics_ratelimit as _mrl
 
@@ -46,6 +46,18 @@ class RateLimiterBackend:
 
         raise NotImplementedError
 
+    async def allow_async(
+        self,
+        key: str,
+        *,
+        cost: float,
+        rps: float,
+        burst: float,
+    ) -> Tuple[bool, float, Optional[float]]:
+        """Awaitable :meth:`allow`; backends that do network I/O override this."""
+
+        return self.allow(key, cost=cost, rps=rps, burst=burst)
+
 
 class _LocalBucket:
     __slots__ = ("capacity", "refill_rate", "tokens", "last", "lock", "_now")
@@ -185,13 +197,22 @@ class RedisTokenBucket(RateLimiterBackend):
     return {allowed, tostring(retry_after), tostring(tokens)}
     """
 
-    def __init__(self, client, prefix: str, timeout_ms: int = 50) -> None:
+    def __init__(self, client, prefix: str, timeout_ms: int = 50, async_client: Any = None) -> None:
         self._client = client
         self._prefix = prefix
         self._timeout = int(timeout_ms)
         self._fallback = LocalTokenBucket()
         self._sha_lock = threading.Lock()
         self._sha: Optional[str] = None
+        self._async: Any = None
+        if async_client is not None:
+            from app.services.ratelimit_backends_async import AsyncRedisTokenBucket
+
+            # The script is loaded lazily on first use; no blocking I/O here.
+            self._async = AsyncRedisTokenBucket(
+                async_client, prefix, timeout_s=self._timeout / 1000.0, fallback=self._fallback
+            )
+            return
         try:
             self._store_sha(self._client.script_load(self._LUA))
         except Exception:
@@ -303,6 +324,33 @@ class RedisTokenBucket(RateLimiterBackend):
             _mrl.inc_fallback("redis_error")
             return self._fallback.allow(key, cost=cost, rps=rps, burst=burst)
 
+    async def allow_async(
+        self,
+        key: str,
+        *,
+        cost: float,
+        rps: float,
+        burst: float,
+    ) -> Tuple[bool, float, Optional[float]]:
+        if self._async is None:
+            return self.allow(key, cost=cost, rps=rps, burst=burst)
+        result: Tuple[bool, float, Optional[float]] = await self._async.allow(
+            key, cost=cost, rps=rps, burst=burst
+        )
+        return result
+
+
+def _redis_clients(url: str, timeout_s: float) -> Tuple[Any, Any]:
+    """``(sync, async)`` clients on the shared manager, else a plain sync client only."""
+    import redis
+
+    try:
+        from app.services import redis_manager
+    except ImportError:
+        return redis.Redis.from_url(url, socket_timeout=timeout_s), None
+    manager = redis_manager.get_manager(url)
+    return manager.sync(decode=False, timeout_s=timeout_s), manager.client(decode=False)
+
 
 def build_backend() -> RateLimiterBackend:
     backend = (os.getenv("RATE_LIMIT_BACKEND") or "local").strip().lower()
@@ -319,10 +367,10 @@ def build_backend() -> RateLimiterBackend:
         timeout_ms = 50
 
     try:
-        import redis
-
-        client = redis.Redis.from_url(url, socket_timeout=timeout_ms / 1000.0)
-        backend_obj = RedisTokenBucket(client, prefix=prefix, timeout_ms=timeout_ms)
+        client, async_client = _redis_clients(url, timeout_ms / 1000.0)
+        backend_obj = RedisTokenBucket(
+            client, prefix=prefix, timeout_ms=timeout_ms, async_client=async_client
+        )
         _mrl.set_backend_in_use("redis")
         return backend_obj
     except Exception:
@@ -18,10 +18,18 @@ class AsyncRedisTokenBucket:
 
     _LUA = RedisTokenBucket._LUA
 
-    def __init__(self, client: Any, prefix: str) -> None:
+    def __init__(
+        self,
+        client: Any,
+        prefix: str,
+        *,
+        timeout_s: Optional[float] = None,
+        fallback: Optional[LocalTokenBucket] = None,
+    ) -> None:
         self._client = client
         self._prefix = prefix
-        self._fallback = LocalTokenBucket()
+        self._timeout_s = timeout_s
+        self._fallback = fallback or LocalTokenBucket()
         self._sha: Optional[str] = None
         self._sha_lock = asyncio.Lock()
 
@@ -133,7 +141,9 @@ class AsyncRedisTokenBucket:
         now = time.time()
         redis_key = self._key(key)
         try:
-            result = await self._call_script(redis_key, now, rps, burst, cost)
+            result = await asyncio.wait_for(
+                self._call_script(redis_key, now, rps, burst, cost), self._timeout_s
+            )
             allowed = int(result[0]) == 1
             retry_after = float(result[1])
             remaining = float(result[2])
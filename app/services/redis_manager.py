@@ -0,0 +1,516 @@
+"""Process-wide async Redis manager with automatic pipelining.
+
+Every subsystem that talks to a given Redis URL shares one manager, which owns a
+single bounded ``BlockingConnectionPool`` on a private event loop running on a
+daemon thread. Commands issued through :meth:`RedisManager.client` are queued
+on that loop and everything submitted in the same loop tick is flushed as one
+non-transactional pipeline, so concurrent requests (rate limit, idempotency,
+revocation, mitigation mode) share sockets and round-trips instead of queueing
+behind each other.
+
+Sync callers use :meth:`RedisManager.sync`, a thin facade that hands the call
+to the manager loop and blocks on the result. Subscribers get connections from
+one dedicated pub/sub pool per manager (and decode mode), closed with it.
+
+Tunables: ``REDIS_MAX_CONNECTIONS`` (default 50) bounds the pool and
+``REDIS_PIPELINE_MAX`` (default 256) caps the commands in one auto-pipeline.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import os
+import threading
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    cast,
+)
+
+from redis.asyncio import BlockingConnectionPool, ConnectionPool, Redis
+from redis.asyncio.client import Pipeline, PubSub
+
+from app import settings
+
+_log = logging.getLogger(__name__)
+
+# The stubs make Redis/Pipeline generic over the response type; the runtime
+# classes are not subscriptable, so only the type checker sees the parameters.
+if TYPE_CHECKING:
+    _RedisBase = Redis[Any]
+    _PipelineBase = Pipeline[Any]
+else:
+    _RedisBase = Redis
+    _PipelineBase = Pipeline
+
+T = TypeVar("T")
+
+# Commands that block server-side or change connection state must not share a
+# pipeline with unrelated callers.
+_UNBATCHED = frozenset(
+    {
+        "BLPOP",
+        "BRPOP",
+        "BRPOPLPUSH",
+        "BLMOVE",
+        "BLMPOP",
+        "BZPOPMIN",
+        "BZPOPMAX",
+        "BZMPOP",
+        "XREAD",
+        "XREADGROUP",
+        "WAIT",
+        "MULTI",
+        "EXEC",
+        "WATCH",
+        "UNWATCH",
+        "SELECT",
+        "CLIENT",
+    }
+)
+
+
+def _int_env(name: str, default: int) -> int:
+    raw = os.getenv(name)
+    try:
+        value = int(raw) if raw is not None else default
+    except Exception:
+        value = default
+    return max(1, value)
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "replace")
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    if isinstance(value, tuple):
+        return tuple(_decode(v) for v in value)
+    if isinstance(value, set):
+        return {_decode(v) for v in value}
+    if isinstance(value, dict):
+        return {_decode(k): _decode(v) for k, v in value.items()}
+    return value
+
+
+class _Pending:
+    __slots__ = ("args", "options", "future")
+
+    def __init__(self, args: Tuple[Any, ...], options: Dict[str, Any], future: Any) -> None:
+        self.args = args
+        self.options = options
+        self.future = future
+
+
+class RedisManager:
+    """Owns the shared pool, the I/O loop and the auto-pipeline batcher."""
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        max_connections: Optional[int] = None,
+        pipeline_max: Optional[int] = None,
+        pool_factory: Optional[Callable[[], ConnectionPool[Any]]] = None,
+    ) -> None:
+        self.url = url
+        self.max_connections = max_connections or _int_env("REDIS_MAX_CONNECTIONS", 50)
+        self.pipeline_max = pipeline_max or _int_env("REDIS_PIPELINE_MAX", 256)
+        self._pool_factory = pool_factory or self._default_pool
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pool: Optional[ConnectionPool[Any]] = None
+        self._raw: Optional[Redis[Any]] = None
+        self._pubsub_pools: Dict[bool, ConnectionPool[Any]] = {}
+        self._pending: List[_Pending] = []
+        self._flush_scheduled = False
+        self._clients: Dict[bool, SharedRedis] = {}
+        self._stats = {"commands": 0, "pipelines": 0, "max_batch": 0}
+
+    def _default_pool(self) -> ConnectionPool[Any]:
+        return BlockingConnectionPool.from_url(
+            self.url,
+            max_connections=self.max_connections,
+            timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT_S,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT_S,
+            socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT_S,
+            health_check_interval=settings.REDIS_HEALTHCHECK_INTERVAL_S,
+        )
+
+    # ------------------------------------------------------------------ loop
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._ensure_started()
+
+    @property
+    def pool(self) -> ConnectionPool[Any]:
+        self._ensure_started()
+        assert self._pool is not None
+        return self._pool
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        loop = self._loop
+        if loop is not None:
+            return loop
+        with self._lock:
+            if self._loop is None:
+                ready = threading.Event()
+                new_loop = asyncio.new_event_loop()
+
+                def _run() -> None:
+                    asyncio.set_event_loop(new_loop)
+                    self._pool = self._pool_factory()
+                    self._raw = Redis(connection_pool=self._pool)
+                    ready.set()
+                    new_loop.run_forever()
+
+                self._thread = threading.Thread(target=_run, name="redis-io", daemon=True)
+                self._thread.start()
+                ready.wait()
+                self._loop = new_loop
+            return self._loop
+
+    def _on_loop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    async def run(self, factory: Callable[[], Awaitable[T]]) -> T:
+        """Await ``factory()`` on the manager loop from any event loop."""
+        loop = self._ensure_started()
+        if self._on_loop():
+            return await factory()
+        fut = asyncio.run_coroutine_threadsafe(_call(factory), loop)
+        return await asyncio.wrap_future(fut)
+
+    def run_sync(self, factory: Callable[[], Awaitable[T]], timeout: Optional[float] = None) -> T:
+        """Run ``factory()`` on the manager loop and block for the result."""
+        loop = self._ensure_started()
+        if self._on_loop():
+            raise RuntimeError("sync Redis facade used from the Redis I/O loop")
+        fut = asyncio.run_coroutine_threadsafe(_call(factory), loop)
+        try:
+            return fut.result(timeout)
+        except TimeoutError:
+            fut.cancel()
+            raise
+
+    # ------------------------------------------------------------- batching
+
+    async def execute(self, args: Tuple[Any, ...], options: Dict[str, Any]) -> Any:
+        if not self._on_loop():
+            return await self.run(lambda: self.execute(args, options))
+        raw = self._raw
+        assert raw is not None
+        if str(args[0]).upper() in _UNBATCHED:
+            return await cast(Any, raw).execute_command(*args, **options)
+        fut = asyncio.get_running_loop().create_future()
+        self._pending.append(_Pending(args, options, fut))
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self._start_flush)
+        return await fut
+
+    def _start_flush(self) -> None:
+        self._flush_scheduled = False
+        while self._pending:
+            batch = self._pending[: self.pipeline_max]
+            del self._pending[: self.pipeline_max]
+            asyncio.ensure_future(self._flush(batch))
+
+    async def _flush(self, batch: List[_Pending]) -> None:
+        raw = self._raw
+        assert raw is not None
+        self._stats["commands"] += len(batch)
+        self._stats["max_batch"] = max(self._stats["max_batch"], len(batch))
+        if len(batch) == 1:
+            item = batch[0]
+            try:
+                result = await cast(Any, raw).execute_command(*item.args, **item.options)
+            except BaseException as exc:
+                _settle(item.future, exc=exc)
+            else:
+                _settle(item.future, result=result)
+            return
+
+        self._stats["pipelines"] += 1
+        pipe = raw.pipeline(transaction=False)
+        for item in batch:
+            pipe.execute_command(*item.args, **item.options)
+        try:
+            results = await pipe.execute(raise_on_error=False)
+        except BaseException as exc:
+            for item in batch:
+                _settle(item.future, exc=exc)
+            return
+        for item, result in zip(batch, results):
+            if isinstance(result, Exception):
+                _settle(item.future, exc=result)
+            else:
+                _settle(item.future, result=result)
+
+    # -------------------------------------------------------------- clients
+
+    def client(self, decode: bool = False) -> "SharedRedis":
+        """Async client sharing this manager's pool and auto-pipeline."""
+        self._ensure_started()
+        with self._lock:
+            cli = self._clients.get(decode)
+            if cli is None:
+                assert self._pool is not None
+                cli = SharedRedis(self, self._pool, decode)
+                self._clients[decode] = cli
+            return cli
+
+    def pubsub_pool(self, decode: bool) -> ConnectionPool[Any]:
+        """The dedicated pool subscribers draw their connections from.
+
+        A subscribed socket cannot carry other commands, so pub/sub never uses
+        the shared pool. ``PubSub.aclose()`` disconnects before releasing, so an
+        idle connection here is never bound to a previous caller's loop.
+        """
+        pool = self.pool
+        with self._lock:
+            dedicated = self._pubsub_pools.get(decode)
+            if dedicated is None:
+                kwargs = dict(pool.connection_kwargs, decode_responses=decode)
+                dedicated = ConnectionPool(connection_class=pool.connection_class, **kwargs)
+                self._pubsub_pools[decode] = dedicated
+            return dedicated
+
+    def sync(self, decode: bool = True, timeout_s: Optional[float] = None) -> "SyncRedis":
+        """Blocking facade over :meth:`client` for sync callers."""
+        if timeout_s is None:
+            timeout_s = settings.REDIS_SOCKET_TIMEOUT_S + settings.REDIS_SOCKET_CONNECT_TIMEOUT_S
+        return SyncRedis(self, self.client(decode), timeout_s)
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self._stats, pending=len(self._pending))
+
+    def close(self) -> None:
+        with self._lock:
+            loop, thread, pool = self._loop, self._thread, self._pool
+            self._loop = self._thread = self._pool = self._raw = None
+            pubsub_pools = list(self._pubsub_pools.values())
+            self._pubsub_pools.clear()
+        if loop is None:
+            return
+        if pool is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(pool.disconnect(), loop).result(2.0)
+            except Exception as exc:
+                _log.debug("redis pool disconnect failed: %s", exc)
+        for dedicated in pubsub_pools:
+            # Live subscriptions run on their caller's loop and close their own
+            # connection; only idle ones are dropped here.
+            try:
+                asyncio.run_coroutine_threadsafe(
+                    dedicated.disconnect(inuse_connections=False), loop
+                ).result(2.0)
+            except Exception as exc:
+                _log.debug("redis pub/sub pool disconnect failed: %s", exc)
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout=2.0)
+
+
+async def _call(factory: Callable[[], Awaitable[T]]) -> T:
+    return await factory()
+
+
+async def _awaited(awaitable: Awaitable[T]) -> T:
+    return await awaitable
+
+
+def _settle(future: Any, *, result: Any = None, exc: Optional[BaseException] = None) -> None:
+    if future.done():
+        return
+    if exc is not None:
+        future.set_exception(exc)
+    else:
+        future.set_result(result)
+
+
+class SharedRedis(_RedisBase):
+    """``redis.asyncio.Redis`` whose commands run through the manager.
+
+    Usable from any event loop. ``pipeline()`` executes on the manager loop;
+    ``pubsub()`` runs on the caller's loop with a connection from the
+    manager's dedicated pub/sub pool. ``close()`` is a no-op:
+    the manager owns the pool.
+    """
+
+    def __init__(self, manager: RedisManager, pool: ConnectionPool[Any], decode: bool) -> None:
+        super().__init__(connection_pool=pool)
+        self._manager = manager
+        self._decode = decode
+
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        result = await self._manager.execute(args, options)
+        return _decode(result) if self._decode else result
+
+    def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None) -> Pipeline[Any]:
+        return _SharedPipeline(
+            self._manager,
+            self._decode,
+            self._manager.pool,
+            self.response_callbacks,
+            transaction,
+            shard_hint,
+        )
+
+    def pubsub(self, **kwargs: Any) -> PubSub:
+        subscriber: Redis[Any] = Redis(connection_pool=self._manager.pubsub_pool(self._decode))
+        return subscriber.pubsub(**kwargs)
+
+    async def close(self, close_connection_pool: Optional[bool] = None) -> None:
+        return None
+
+    async def aclose(self, close_connection_pool: Optional[bool] = None) -> None:
+        return None
+
+
+class _SharedPipeline(_PipelineBase):
+    def __init__(self, manager: RedisManager, decode: bool, *args: Any) -> None:
+        super().__init__(*args)
+        self._manager = manager
+        self._decode = decode
+
+    async def execute(self, raise_on_error: bool = True) -> List[Any]:
+        results: List[Any] = await self._manager.run(lambda: Pipeline.execute(self, raise_on_error))
+        if self._decode:
+            decoded: List[Any] = _decode(results)
+            return decoded
+        return results
+
+
+class SyncRedis:
+    """Blocking facade: ``facade.get(k)`` runs ``await client.get(k)`` on the manager."""
+
+    def __init__(self, manager: RedisManager, client: SharedRedis, timeout_s: float) -> None:
+        self._manager = manager
+        self._client = client
+        self._timeout = timeout_s
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        def _call_sync(*args: Any, **kwargs: Any) -> Any:
+            # Commands return awaitables (most are plain functions, not
+            # coroutine functions); helpers such as lock(), get_encoder() or
+            # register_script() return objects and pass through unchanged.
+            result = attr(*args, **kwargs)
+            if not inspect.isawaitable(result):
+                return result
+            return self._manager.run_sync(lambda: _awaited(result), self._timeout)
+
+        return _call_sync
+
+    def pipeline(self, transaction: bool = True) -> "_SyncPipeline":
+        return _SyncPipeline(self, transaction)
+
+    def scan_iter(self, match: Optional[str] = None, count: Optional[int] = None) -> Any:
+        cursor = 0
+        while True:
+            cursor, keys = self.scan(cursor=cursor, match=match, count=count)
+            yield from keys
+            if not cursor:
+                return
+
+    def close(self) -> None:
+        return None
+
+
+class _SyncPipeline:
+    def __init__(self, facade: SyncRedis, transaction: bool) -> None:
+        self._facade = facade
+        self._transaction = transaction
+        self._calls: List[Tuple[str, Tuple[Any, ...], Dict[str, Any]]] = []
+
+    def __enter__(self) -> "_SyncPipeline":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._calls.clear()
+
+    def __getattr__(self, name: str) -> Any:
+        def _record(*args: Any, **kwargs: Any) -> "_SyncPipeline":
+            self._calls.append((name, args, kwargs))
+            return self
+
+        return _record
+
+    def execute(self, raise_on_error: bool = True) -> List[Any]:
+        calls, self._calls = self._calls, []
+        client = self._facade._client
+
+        async def _run() -> List[Any]:
+            pipe = client.pipeline(transaction=self._transaction)
+            for name, args, kwargs in calls:
+                getattr(pipe, name)(*args, **kwargs)
+            results: List[Any] = await pipe.execute(raise_on_error=raise_on_error)
+            return results
+
+        return self._facade._manager.run_sync(_run, self._facade._timeout)
+
+
+# ----------------------------------------------------------------- registry
+
+_managers: Dict[str, RedisManager] = {}
+_registry_lock = threading.Lock()
+
+
+def default_url() -> str:
+    return os.getenv("REDIS_URL") or settings.REDIS_URL
+
+
+def get_manager(url: Optional[str] = None) -> RedisManager:
+    """Return the process-wide manager for ``url`` (default ``REDIS_URL``)."""
+    key = url or default_url()
+    mgr = _managers.get(key)
+    if mgr is not None:
+        return mgr
+    with _registry_lock:
+        mgr = _managers.get(key)
+        if mgr is None:
+            mgr = RedisManager(key)
+            _managers[key] = mgr
+        return mgr
+
+
+def install(manager: RedisManager, url: Optional[str] = None) -> None:
+    """Register ``manager`` for ``url`` (tests use this with a fakeredis pool)."""
+    with _registry_lock:
+        old = _managers.get(url or manager.url)
+        _managers[url or manager.url] = manager
+    if old is not None and old is not manager:
+        old.close()
+
+
+def shutdown() -> None:
+    """Close every manager's pool and loop; they restart lazily on next use."""
+    with _registry_lock:
+        managers = list(_managers.values())
+    for mgr in managers:
+        mgr.close()
+
+
+def reset() -> None:
+    """Close and forget all managers (test helper)."""
+    shutdown()
+    with _registry_lock:
+        _managers.clear()
@@ -5,6 +5,8 @@ from typing import Optional
 
 from redis.asyncio import Redis
 
+from app.services import redis_manager
+
 _redis: Optional[Redis] = None
 
 
@@ -12,7 +14,7 @@ def get_redis() -> Redis:
     global _redis
     if _redis is None:
         url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-        _redis = Redis.from_url(url, encoding="utf-8", decode_responses=True)
+        _redis = redis_manager.get_manager(url).client(decode=True)
     return _redis
 
 
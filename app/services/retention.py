@@ -7,7 +7,6 @@ from enum import Enum
 from typing import (
     Any,
     Callable,
-    ContextManager,
     Dict,
     Iterable,
     List,
@@ -22,6 +21,7 @@ from redis.asyncio import Redis
 
 class Resource(str, Enum):
     AUDIT = "audit"
+    DECISIONS = "decisions"
     DLQ_MSG = "dlq_msg"
     IDEMP_KEYS = "idemp_keys"
     WEBHOOK_LOGS = "webhook_logs"
@@ -167,6 +167,9 @@ def _decisions_supports_sql() -> bool:
     return True
 
 
+_DELETE_CHUNK = 1000
+
+
 def _cutoff_dt(cutoff_ms: int) -> datetime:
     cutoff = max(int(cutoff_ms), 0)
     return datetime.fromtimestamp(cutoff / 1000.0, tz=timezone.utc)
@@ -251,30 +254,24 @@ def delete_decisions_before(
 
     if _decisions_supports_sql():
         try:
-            from sqlalchemy import and_, delete, select
-
             from app.services import decisions as decisions_service
 
-            table = decisions_service.decisions
             cutoff_dt = _cutoff_dt(cutoff_ms)
-            conditions = [table.c.ts < cutoff_dt]
-            if tenant:
-                conditions.append(table.c.tenant == tenant)
-            if bot:
-                conditions.append(table.c.bot == bot)
-            stmt = (
-                select(table.c.id)
-                .where(and_(*conditions))
-                .order_by(table.c.ts.asc(), table.c.id.asc())
-                .limit(limit)
-            )
-            with decisions_service._get_engine().begin() as conn:
-                ids = [row.id for row in conn.execute(stmt)]
-                if not ids:
-                    return 0
-                del_stmt = delete(table).where(table.c.id.in_(ids))
-                result = conn.execute(del_stmt)
-            return int(result.rowcount or 0)
+            removed = 0
+            after = None
+            # Bounded range deletes, one short transaction per chunk.
+            while removed < limit:
+                deleted, after = decisions_service.delete_range(
+                    cutoff_dt,
+                    tenant=tenant,
+                    bot=bot,
+                    after=after,
+                    limit=min(_DELETE_CHUNK, limit - removed),
+                )
+                removed += deleted
+                if after is None:
+                    break
+            return removed
         except Exception:
             pass
 
@@ -339,60 +336,7 @@ def delete_adjudications_before(
 
     from app.observability import adjudication_log as log
 
-    cutoff = cutoff_ms
-    try:
-        cap = int(getattr(log, "_CAP", 10000))
-    except Exception:
-        cap = 10000
-
-    lock_obj = getattr(log, "_LOCK", None)
-
-    def _compute_and_apply() -> int:
-        snapshot_desc = []
-        snapshot_fn = getattr(log, "_snapshot_records_desc", None)
-
-        if callable(snapshot_fn):
-            try:
-                snapshot_desc = list(snapshot_fn())
-            except Exception:
-                snapshot_desc = []
-
-        if not snapshot_desc:
-            try:
-                records, _ = log.paged_query(
-                    tenant=None,
-                    bot=None,
-                    limit=cap,
-                    offset=0,
-                    sort="ts_asc",
-                )
-            except Exception:
-                records = []
-        else:
-            records = list(reversed(snapshot_desc))
-
-        kept = []
-        removed = 0
-        for record in records:
-            ts_val = log._record_ts_ms(record) if hasattr(log, "_record_ts_ms") else 0
-            match_tenant = tenant is None or getattr(record, "tenant", None) == tenant
-            match_bot = bot is None or getattr(record, "bot", None) == bot
-            if removed < limit and match_tenant and match_bot and ts_val < cutoff:
-                removed += 1
-                continue
-            kept.append(record)
-
-        if removed and hasattr(log, "clear") and hasattr(log, "append"):
-            log.clear()
-            for entry in kept:
-                log.append(entry)
-        return removed
-
-    if lock_obj is not None and hasattr(lock_obj, "__enter__") and hasattr(lock_obj, "__exit__"):
-        lock_cm = cast(ContextManager[Any], lock_obj)
-        with lock_cm:
-            return _compute_and_apply()
     try:
-        return _compute_and_apply()
+        return int(log.delete_before(cutoff_ms, tenant=tenant, bot=bot, limit=limit))
     except Exception:
         return 0
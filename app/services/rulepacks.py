@@ -12,8 +12,12 @@ def _rulepack_dir() -> str:
     return os.getenv("RULEPACKS_DIR", RULEPACK_DIR_DEFAULT)
 
 
+def rulepack_path(name: str) -> str:
+    return os.path.join(_rulepack_dir(), f"{name}.yaml")
+
+
 def load_rulepack(name: str) -> Dict[str, Any]:
-    path = os.path.join(_rulepack_dir(), f"{name}.yaml")
+    path = rulepack_path(name)
     with open(path, "r", encoding="utf-8") as f:
         return cast(Dict[str, Any], yaml.safe_load(f))
 
@@ -3,9 +3,12 @@ from __future__ import annotations
 import os
 import re
 from dataclasses import dataclass
-from typing import List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from app.services.rulepacks import load_rulepack
+import yaml
+
+from app.services import policy_snapshot
+from app.services.rulepacks import rulepack_path
 
 Redaction = Tuple[re.Pattern[str], str]
 
@@ -52,11 +55,25 @@ def compile_active_rulepacks(force: bool = False) -> CompiledRulepacks:
     if not force and _CACHE is not None and _CACHE_KEY == key:
         return _CACHE
 
+    sources: List[policy_snapshot.Source] = []
+    for name in names:
+        path = rulepack_path(name)
+        with open(path, "rb") as fh:  # raises if missing
+            sources.append((path, fh.read()))
+
+    _CACHE = policy_snapshot.load_or_build(
+        "rulepacks", sources, lambda: _compile(names, [raw for _, raw in sources])
+    )
+    _CACHE_KEY = key
+    return _CACHE
+
+
+def _compile(names: Tuple[str, ...], raws: Sequence[bytes]) -> CompiledRulepacks:
     egress_redactions: List[Redaction] = []
     ingress_block_regexes: List[re.Pattern[str]] = []
 
-    for name in names:
-        data = load_rulepack(name)  # raises if missing
+    for raw in raws:
+        data: Dict[str, Any] = yaml.safe_load(raw.decode("utf-8"))
         controls = data.get("controls") or []
         for ctl in controls:
             phase = str(ctl.get("phase", "")).lower()
@@ -87,13 +104,11 @@ def compile_active_rulepacks(force: bool = False) -> CompiledRulepacks:
                 if c:
                     ingress_block_regexes.append(c)
 
-    _CACHE = CompiledRulepacks(
+    return CompiledRulepacks(
         egress_redactions=tuple(egress_redactions),
         ingress_block_regexes=tuple(ingress_block_regexes),
         names=names,
     )
-    _CACHE_KEY = key
-    return _CACHE
 
 
 def rulepacks_enabled() -> bool:
@@ -1,12 +1,39 @@
+"""Shadow policy evaluation.
+
+Shadow evaluation runs a candidate policy next to the live one and records how
+often the two disagree. It must never slow down live traffic, so the request
+path only samples and enqueues; parsing the policy blob and running the
+evaluator happen on background worker threads.
+
+Tunables (env):
+  SHADOW_QUEUE_MAX  bounded queue size (default 1000); excess samples are dropped
+  SHADOW_WORKERS    number of worker threads (default 1)
+"""
+
 from __future__ import annotations
 
 import json
+import logging
 import os
+import queue
+import random
+import threading
 import time
-from typing import Any, Mapping, Optional
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple
 
 from .config_store import get_config
 
+_log = logging.getLogger(__name__)
+
+ShadowEvaluator = Callable[..., Any]
+# Receives (shadow_action, shadow_rule_ids) on the worker once a verdict lands.
+ShadowResultHook = Callable[[str, List[str]], None]
+
+# path -> ((mtime_ns, size), compiled policy or None when unreadable)
+_POLICY_CACHE: Dict[str, Tuple[Tuple[int, int], Optional[Mapping[str, Any]]]] = {}
+_CACHE_LOCK = threading.Lock()
+
 
 def _load_policy_blob(path: str) -> Optional[Mapping[str, Any]]:
     try:
@@ -20,43 +47,67 @@ def _load_policy_blob(path: str) -> Optional[Mapping[str, Any]]:
     return None
 
 
-def maybe_eval_shadow(
-    payload: Mapping[str, Any],
-    live_action: str,
-    route: str,
-    evaluator,
-) -> Optional[Mapping[str, Any]]:
-    cfg = get_config()
-    if not bool(cfg.get("shadow_enable", False)):
+def _compile_policy(blob: Mapping[str, Any]) -> Mapping[str, Any]:
+    # Read-only view so a single parsed policy can be shared by all workers.
+    return MappingProxyType(dict(blob))
+
+
+def load_policy_cached(path: str) -> Optional[Mapping[str, Any]]:
+    """Return the compiled shadow policy, re-reading only when the file changes."""
+
+    expanded = os.path.expanduser(path)
+    try:
+        st = os.stat(expanded)
+    except OSError:
+        with _CACHE_LOCK:
+            _POLICY_CACHE.pop(expanded, None)
         return None
+    sig = (int(st.st_mtime_ns), int(st.st_size))
+    with _CACHE_LOCK:
+        hit = _POLICY_CACHE.get(expanded)
+    if hit is not None and hit[0] == sig:
+        return hit[1]
+
+    blob = _load_policy_blob(expanded)
+    compiled = _compile_policy(blob) if blob else None
+    with _CACHE_LOCK:
+        _POLICY_CACHE[expanded] = (sig, compiled)
+    return compiled
+
 
+def clear_policy_cache() -> None:
+    with _CACHE_LOCK:
+        _POLICY_CACHE.clear()
+
+
+def _sampled(cfg: Mapping[str, Any]) -> bool:
     try:
         sr = float(cfg.get("shadow_sample_rate", 1.0))
     except Exception:
         sr = 1.0
-    if sr < 1.0:
-        try:
-            import random
+    if sr >= 1.0:
+        return True
+    return random.random() <= max(0.0, min(1.0, sr))
 
-            if random.random() > max(0.0, min(1.0, sr)):
-                return None
-        except Exception:
-            pass
-
-    path_val = cfg.get("shadow_policy_path")
-    if not path_val:
-        return None
-    policy = _load_policy_blob(str(path_val))
-    if not policy:
-        return None
 
+def _budget_ms(cfg: Mapping[str, Any]) -> int:
     try:
         budget_ms = int(cfg.get("shadow_timeout_ms", 100))
     except Exception:
         budget_ms = 100
     if budget_ms <= 0:
         budget_ms = 100
+    return budget_ms
+
 
+def _evaluate(
+    policy: Mapping[str, Any],
+    payload: Mapping[str, Any],
+    live_action: str,
+    route: str,
+    evaluator: ShadowEvaluator,
+    budget_ms: int,
+) -> Optional[Mapping[str, Any]]:
     start = time.time()
     try:
         result = evaluator(payload, policy=policy)
@@ -74,3 +125,275 @@ def maybe_eval_shadow(
     result.setdefault("_shadow_live_action", live_action)
     result.setdefault("_shadow_route", route)
     return result
+
+
+def maybe_eval_shadow(
+    payload: Mapping[str, Any],
+    live_action: str,
+    route: str,
+    evaluator: ShadowEvaluator,
+) -> Optional[Mapping[str, Any]]:
+    """Evaluate the shadow policy inline and return its result.
+
+    Prefer :func:`submit_shadow_eval` on request paths; this synchronous form is
+    kept for callers that need the shadow verdict itself.
+    """
+
+    cfg = get_config()
+    if not bool(cfg.get("shadow_enable", False)):
+        return None
+    if not _sampled(cfg):
+        return None
+
+    path_val = cfg.get("shadow_policy_path")
+    if not path_val:
+        return None
+    policy = load_policy_cached(str(path_val))
+    if not policy:
+        return None
+
+    return _evaluate(policy, payload, live_action, route, evaluator, _budget_ms(cfg))
+
+
+# --------------------------- async side pipeline ------------------------------
+
+
+class _ShadowJob(NamedTuple):
+    payload: Mapping[str, Any]
+    live_action: str
+    route: str
+    evaluator: ShadowEvaluator
+    policy_path: str
+    budget_ms: int
+    on_result: Optional[ShadowResultHook] = None
+
+
+_lock = threading.RLock()
+_q: "queue.Queue[Any]" = queue.Queue(maxsize=1000)
+_workers: List[threading.Thread] = []
+_stop_event = threading.Event()
+_STOP = object()
+
+_stats: Dict[str, int] = {
+    "submitted": 0,
+    "evaluated": 0,
+    "agree": 0,
+    "disagree": 0,
+    "dropped": 0,
+    "errors": 0,
+}
+
+
+def _env_int(name: str, default: int, minimum: int) -> int:
+    raw = os.getenv(name)
+    try:
+        value = int(raw) if raw is not None else default
+    except Exception:
+        value = default
+    return max(minimum, value)
+
+
+def _queue_max() -> int:
+    return _env_int("SHADOW_QUEUE_MAX", 1000, 1)
+
+
+def _worker_count() -> int:
+    return _env_int("SHADOW_WORKERS", 1, 1)
+
+
+def _shadow_action(result: Mapping[str, Any]) -> Optional[str]:
+    raw = result.get("action")
+    if isinstance(raw, str):
+        action = raw.strip().lower()
+        if action:
+            return action
+    return None
+
+
+def _shadow_rule_ids(result: Mapping[str, Any]) -> List[str]:
+    raw = result.get("rule_ids")
+    if isinstance(raw, (list, tuple, set)):
+        return [str(rid) for rid in raw if str(rid).strip()]
+    if isinstance(raw, str) and raw.strip():
+        return [raw.strip()]
+    return []
+
+
+def _record(route: str, outcome: str) -> None:
+    try:
+        from app.telemetry.metrics import inc_shadow_evaluation
+
+        inc_shadow_evaluation(route, outcome)
+    except Exception as exc:  # pragma: no cover
+        _log.debug("shadow evaluation metric failed: %s", exc)
+
+
+def _process(job: _ShadowJob) -> None:
+    policy = load_policy_cached(job.policy_path)
+    result = None
+    if policy:
+        result = _evaluate(
+            policy, job.payload, job.live_action, job.route, job.evaluator, job.budget_ms
+        )
+    action = _shadow_action(result) if result else None
+    if action is None:
+        with _lock:
+            _stats["errors"] += 1
+        _record(job.route, "error")
+        return
+
+    if job.on_result is not None and result is not None:
+        try:
+            job.on_result(action, _shadow_rule_ids(result))
+        except Exception as exc:  # pragma: no cover
+            _log.debug("shadow result hook failed: %s", exc)
+
+    agree = action == job.live_action
+    with _lock:
+        _stats["evaluated"] += 1
+        _stats["agree" if agree else "disagree"] += 1
+    _record(job.route, "agree" if agree else "disagree")
+    if not agree:
+        try:
+            from app.telemetry.metrics import inc_shadow_disagreement
+
+            inc_shadow_disagreement(job.route, job.live_action, action)
+        except Exception as exc:  # pragma: no cover
+            _log.debug("shadow disagreement metric failed: %s", exc)
+
+
+def _worker() -> None:
+    while True:
+        try:
+            job = _q.get(timeout=0.1)
+        except queue.Empty:
+            if _stop_event.is_set():
+                break
+            continue
+        try:
+            if job is _STOP:
+                break
+            _process(job)
+        except Exception as exc:  # pragma: no cover
+            _log.debug("shadow evaluation failed: %s", exc)
+        finally:
+            _q.task_done()
+
+
+def _ensure_workers() -> None:
+    to_start: List[threading.Thread] = []
+    with _lock:
+        alive = [t for t in _workers if t.is_alive()]
+        _workers[:] = alive
+        missing = _worker_count() - len(alive)
+        if missing <= 0:
+            return
+        _stop_event.clear()
+        for idx in range(missing):
+            thread = threading.Thread(
+                target=_worker,
+                name=f"shadow-worker-{len(alive) + idx}",
+                daemon=True,
+            )
+            _workers.append(thread)
+            to_start.append(thread)
+    for thread in to_start:
+        thread.start()
+
+
+def submit_shadow_eval(
+    payload: Mapping[str, Any],
+    live_action: str,
+    route: str,
+    evaluator: ShadowEvaluator,
+    on_result: Optional[ShadowResultHook] = None,
+) -> bool:
+    """Sample and enqueue a shadow evaluation without blocking the caller.
+
+    Returns True when the payload was queued. A full queue drops the sample
+    (counted as ``dropped``) instead of applying backpressure to live traffic.
+    ``on_result`` is called from the worker with the shadow action and rule
+    ids once the verdict is known.
+    """
+
+    cfg = get_config()
+    if not bool(cfg.get("shadow_enable", False)):
+        return False
+    path_val = cfg.get("shadow_policy_path")
+    if not path_val:
+        return False
+    if not _sampled(cfg):
+        return False
+
+    job = _ShadowJob(
+        payload=payload,
+        live_action=str(live_action or "unknown"),
+        route=str(route or "unknown"),
+        evaluator=evaluator,
+        policy_path=str(path_val),
+        budget_ms=_budget_ms(cfg),
+        on_result=on_result,
+    )
+    _ensure_workers()
+    try:
+        _q.put_nowait(job)
+    except queue.Full:
+        with _lock:
+            _stats["dropped"] += 1
+        _record(job.route, "dropped")
+        return False
+    with _lock:
+        _stats["submitted"] += 1
+    return True
+
+
+def drain(timeout: float = 1.0) -> bool:
+    """Wait until queued shadow jobs are processed. Returns False on timeout."""
+
+    deadline = time.monotonic() + max(0.0, timeout)
+    while _q.unfinished_tasks:
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def shutdown(timeout: float = 0.5) -> None:
+    """Signal workers to stop and wait briefly for them to exit."""
+
+    with _lock:
+        threads = list(_workers)
+        _stop_event.set()
+    for _ in threads:
+        try:
+            _q.put_nowait(_STOP)
+        except queue.Full:
+            pass
+    for thread in threads:
+        thread.join(timeout=timeout)
+    with _lock:
+        _workers[:] = [t for t in _workers if t.is_alive()]
+
+
+def configure(*, reset: bool = False) -> None:
+    """Test helper: rebuild the queue from env and reset counters."""
+
+    global _q
+    if reset:
+        shutdown()
+    with _lock:
+        if reset:
+            _q = queue.Queue(maxsize=_queue_max())
+            for key in _stats:
+                _stats[key] = 0
+            clear_policy_cache()
+
+
+def stats() -> Dict[str, int]:
+    with _lock:
+        out = dict(_stats)
+    out["queue_depth"] = _q.qsize()
+    return out
+
+
+configure(reset=True)
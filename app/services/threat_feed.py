@@ -1,16 +1,52 @@
 # app/services/threat_feed.py
+"""Threat-feed redactions.
+
+Feeds are JSON documents (``{"version": ..., "redactions": [{"pattern",
+"tag", "replacement"}, ...]}``) fetched from ``THREAT_FEED_URLS``. Their rules
+are compiled into one :class:`FeedSnapshot` that is published by swapping a
+module reference, so :func:`apply_dynamic_redactions` reads it without a lock.
+
+The snapshot scans text once: every rule pattern is an alternative of a
+single group-free regex (group-free alternations compile fast and ``re``
+factors their common literal prefixes). A hit is attributed to the first rule,
+in feed order, that matches at that position; candidate rules are narrowed by
+the literal first character of their pattern. Rules that cannot share a regex
+(named groups or backreferences) are applied afterwards on their own.
+
+:class:`ThreatFeedRefresher` re-fetches feeds in the background every
+``THREAT_FEED_REFRESH_S`` seconds with jitter. A feed that answers 304 to its
+last ``ETag`` or repeats its ``version`` is not recompiled, and a feed that
+fails or returns no usable rule keeps its last good rules.
+"""
+
 from __future__ import annotations
 
+import importlib
+import json
+import logging
 import os
+import random
 import re
+import threading
+import time
+from dataclasses import dataclass, field
 from threading import RLock
-from typing import Any, Dict, List, Pattern, Tuple
+from typing import Any, Dict, List, Mapping, Optional, Pattern, Tuple
+from urllib.parse import urlparse
+from urllib.request import url2pathname
 
 from app.services import runtime_flags
 
-# Compiled rule: (regex, replacement, tag)
-_Rules: List[Tuple[Pattern[str], str, str]] = []
-_LOCK = RLock()
+try:  # Python 3.11+
+    _sre_parse: Any = importlib.import_module("re._parser")
+except ImportError:  # pragma: no cover - older interpreters
+    _sre_parse = importlib.import_module("sre_parse")
+
+_log = logging.getLogger(__name__)
+
+_LOCK = RLock()  # serialises reloads; readers use the published snapshot
+_GLOBAL_FLAGS = re.compile(r"^\(\?([aiLmsux]+)\)")
+_BACKREF = re.compile(r"\\[1-9]|\(\?P=")
 
 
 def _truthy(val: object) -> bool:
@@ -22,9 +58,174 @@ def threat_feed_enabled() -> bool:
     return bool(runtime_flags.get("threat_feed_enabled"))
 
 
-def _fetch_json(url: str) -> Dict[str, Any]:
+@dataclass(frozen=True)
+class FeedRule:
+    rx: Pattern[str]
+    replacement: str
+    tag: str
+    first: Optional[str]  # literal first character, when the pattern has one
+
+    def substitute(self, text: str, start: int) -> str:
+        if "\\" not in self.replacement:
+            return self.replacement
+        m = self.rx.match(text, start)
+        return m.expand(self.replacement) if m is not None else self.replacement
+
+
+@dataclass(frozen=True)
+class FeedSnapshot:
+    rules: Tuple[FeedRule, ...] = ()
+    scanner: Optional[Pattern[str]] = None
+    by_first: Mapping[str, Tuple[int, ...]] = field(default_factory=dict)
+    wild: Tuple[int, ...] = ()
+    standalone: Tuple[int, ...] = ()
+    versions: Mapping[str, str] = field(default_factory=dict)
+    generation: int = 0
+    built_at: float = 0.0
+
+    def candidates(self, ch: str) -> Tuple[int, ...]:
+        specific = self.by_first.get(ch, ())
+        if not specific:
+            return self.wild
+        if not self.wild:
+            return specific
+        return tuple(sorted(specific + self.wild))
+
+
+_SNAPSHOT = FeedSnapshot()
+
+
+def snapshot() -> FeedSnapshot:
+    """The published rule snapshot."""
+    return _SNAPSHOT
+
+
+def _first_literal(rx: Pattern[str]) -> Optional[str]:
+    if rx.flags & re.IGNORECASE:
+        return None
+    try:
+        parsed = _sre_parse.parse(rx.pattern, rx.flags)
+    except Exception:
+        return None
+    if len(parsed) and parsed[0][0] == _sre_parse.LITERAL:
+        return chr(parsed[0][1])
+    return None
+
+
+def _scoped(pattern: str) -> str:
+    # Leading global flags are only legal at the start of the combined regex.
+    m = _GLOBAL_FLAGS.match(pattern)
+    if m is None:
+        return f"(?:{pattern})"
+    return f"(?{m.group(1)}:{pattern[m.end() :]})"
+
+
+def _build(rules: List[FeedRule], versions: Mapping[str, str], generation: int) -> FeedSnapshot:
+    shared: List[int] = []
+    standalone: List[int] = []
+    for idx, rule in enumerate(rules):
+        if rule.rx.groupindex or _BACKREF.search(rule.rx.pattern):
+            standalone.append(idx)
+        else:
+            shared.append(idx)
+    scanner: Optional[Pattern[str]] = None
+    if shared:
+        try:
+            scanner = re.compile("|".join(_scoped(rules[i].rx.pattern) for i in shared))
+        except re.error as exc:
+            _log.warning("threat feed: combined scanner failed (%s); scanning per rule", exc)
+            standalone = sorted(standalone + shared)
+            shared = []
+    by_first: Dict[str, List[int]] = {}
+    wild: List[int] = []
+    for idx in shared:
+        first = rules[idx].first
+        if first is None:
+            wild.append(idx)
+        else:
+            by_first.setdefault(first, []).append(idx)
+    return FeedSnapshot(
+        rules=tuple(rules),
+        scanner=scanner,
+        by_first={ch: tuple(ids) for ch, ids in by_first.items()},
+        wild=tuple(wild),
+        standalone=tuple(standalone),
+        versions=dict(versions),
+        generation=generation,
+        built_at=time.time(),
+    )
+
+
+def _compile_rules(spec: Mapping[str, Any]) -> List[FeedRule]:
+    rules: List[FeedRule] = []
+    for entry in spec.get("redactions", []) or []:
+        if not isinstance(entry, dict):
+            continue
+        pat = entry.get("pattern")
+        tag = entry.get("tag") or "threat_feed"
+        repl = entry.get("replacement") or "[REDACTED]"
+        if not isinstance(pat, str) or not pat:
+            continue
+        try:
+            rx = re.compile(pat)
+        except re.error:
+            # Skip invalid regex
+            continue
+        if rx.match("") is not None:
+            continue  # would match between every character
+        rules.append(FeedRule(rx, str(repl), str(tag), _first_literal(rx)))
+    return rules
+
+
+@dataclass
+class _Source:
+    rules: List[FeedRule]
+    version: str = ""
+    etag: Optional[str] = None
+    checked: float = 0.0
+    error: Optional[str] = None
+
+
+_SOURCES: Dict[str, _Source] = {}
+
+
+def _timeout_s() -> float:
+    try:
+        return max(0.1, float(os.getenv("THREAT_FEED_TIMEOUT_S", "5")))
+    except ValueError:
+        return 5.0
+
+
+def fetch_feed(url: str, etag: Optional[str] = None) -> Optional[Dict[str, Any]]:
     """
-    Placeholder implementation. Tests monkeypatch this to return:
+    Fetch one feed document from an ``http(s)://`` or ``file://`` URL (or a
+    plain path). Returns ``None`` when the server answers 304 to ``etag``;
+    otherwise the parsed document, with the response ``ETag`` under
+    ``"_etag"``.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme in ("http", "https"):
+        import httpx
+
+        headers = {"If-None-Match": etag} if etag else {}
+        resp = httpx.get(url, headers=headers, timeout=_timeout_s(), follow_redirects=True)
+        if resp.status_code == 304:
+            return None
+        resp.raise_for_status()
+        doc = resp.json()
+        if isinstance(doc, dict) and resp.headers.get("etag"):
+            doc["_etag"] = resp.headers["etag"]
+        return doc if isinstance(doc, dict) else {}
+    path = url2pathname(parsed.path) if parsed.scheme == "file" else url
+    with open(path, "r", encoding="utf-8") as handle:
+        doc = json.load(handle)
+    return doc if isinstance(doc, dict) else {}
+
+
+def _fetch_json(url: str, etag: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Indirection over :func:`fetch_feed`. Tests monkeypatch this with a
+    one-argument stub returning:
     {
       "version": "test",
       "redactions": [
@@ -37,8 +238,21 @@ def _fetch_json(url: str) -> Dict[str, Any]:
       ],
     }
     """
-    # Default no-op payload.
-    return {"version": "empty", "redactions": []}
+    return fetch_feed(url, etag)
+
+
+def _publish(urls: List[str]) -> FeedSnapshot:
+    global _SNAPSHOT
+    rules: List[FeedRule] = []
+    versions: Dict[str, str] = {}
+    for u in urls:
+        source = _SOURCES.get(u)
+        if source is None:
+            continue
+        rules.extend(source.rules)
+        versions[u] = source.version
+    _SNAPSHOT = _build(rules, versions, _SNAPSHOT.generation + 1)
+    return _SNAPSHOT
 
 
 def reload_from_urls(urls: List[str]) -> int:
@@ -46,37 +260,51 @@ def reload_from_urls(urls: List[str]) -> int:
     Fetch and compile redaction rules from the given URLs
     (using _fetch_json, which tests monkeypatch).
 
-    Returns the number of compiled rules.
+    Feeds that fail keep their last good rules; feeds whose ETag or version
+    is unchanged are not recompiled. A new snapshot is published only when
+    some feed changed. Returns the number of active rules.
     """
-    compiled: List[Tuple[Pattern[str], str, str]] = []
-    total = 0
-
-    for u in urls:
-        try:
-            spec = _fetch_json(u)
-        except Exception:
-            continue
-
-        redactions = (spec or {}).get("redactions", []) or []
-        for entry in redactions:
-            pat = entry.get("pattern")
-            tag = entry.get("tag") or "threat_feed"
-            repl = entry.get("replacement") or "[REDACTED]"
-            if not isinstance(pat, str) or not pat:
-                continue
+    with _LOCK:
+        changed = set(_SOURCES) != set(urls)
+        for u in urls:
+            previous = _SOURCES.get(u)
             try:
-                rx = re.compile(pat)
-            except re.error:
-                # Skip invalid regex
+                # The ETag is only sent once the feed has handed one out.
+                if previous is not None and previous.etag:
+                    spec = _fetch_json(u, etag=previous.etag)
+                else:
+                    spec = _fetch_json(u)
+            except Exception as exc:
+                _log.warning("threat feed %s: fetch failed: %s", u, exc)
+                if previous is not None:
+                    previous.error = str(exc)
                 continue
-            compiled.append((rx, repl, tag))
-            total += 1
+            now = time.time()
+            if spec is None:
+                if previous is not None:
+                    previous.checked, previous.error = now, None
+                continue
+            spec = spec or {}
+            version = str(spec.get("version") or "")
+            if previous is not None and version and version == previous.version:
+                previous.checked, previous.error = now, None
+                continue
+            rules = _compile_rules(spec)
+            if not rules and spec.get("redactions") and previous is not None:
+                previous.error = "no valid rules"
+                continue
+            _SOURCES[u] = _Source(rules, version, spec.get("_etag"), now)
+            changed = True
+        for stale in set(_SOURCES) - set(urls):
+            del _SOURCES[stale]
+        if changed:
+            _publish(urls)
+        return len(_SNAPSHOT.rules)
 
-    with _LOCK:
-        _Rules.clear()
-        _Rules.extend(compiled)
 
-    return total
+def _env_urls() -> List[str]:
+    urls_env = os.environ.get("THREAT_FEED_URLS", "") or ""
+    return [u.strip() for u in urls_env.split(",") if u.strip()]
 
 
 def refresh_from_env() -> int:
@@ -84,16 +312,34 @@ def refresh_from_env() -> int:
     Convenience helper used by some routes:
     reads THREAT_FEED_URLS (comma-separated), reloads, returns compiled count.
     """
-    urls_env = os.environ.get("THREAT_FEED_URLS", "") or ""
-    urls: List[str] = [u.strip() for u in urls_env.split(",") if u.strip()]
+    urls = _env_urls()
     if not urls:
         # Clearing rules when no URLs is safer (keeps behavior deterministic)
         with _LOCK:
-            _Rules.clear()
+            _SOURCES.clear()
+            _publish([])
         return 0
     return reload_from_urls(urls)
 
 
+def status() -> Dict[str, Any]:
+    snap = _SNAPSHOT
+    with _LOCK:
+        sources = {
+            u: {"version": s.version, "rules": len(s.rules), "checked": s.checked, "error": s.error}
+            for u, s in _SOURCES.items()
+        }
+    return {"generation": snap.generation, "rules": len(snap.rules), "sources": sources}
+
+
+def _count(families: Dict[str, int], tag: str, n: int = 1) -> None:
+    families[tag] = families.get(tag, 0) + n
+    # Wildcard family (e.g., "secrets:*")
+    if ":" in tag:
+        wildcard = f"{tag.split(':', 1)[0]}:*"
+        families[wildcard] = families.get(wildcard, 0) + n
+
+
 def apply_dynamic_redactions(
     text: str,
     debug: bool = False,
@@ -108,46 +354,154 @@ def apply_dynamic_redactions(
       - debug matches (list[str]) when debug=True else []
 
     Notes:
-      * Multiple rules may match; replacements are applied sequentially.
-      * We count matches via regex finditer BEFORE substitution so counts reflect
-        how many occurrences were present.
+      * One pass over the text: matches are leftmost and non-overlapping;
+        where several rules match at the same position the earliest rule in
+        feed order wins.
       * Also increments a wildcard family "<prefix>:*" derived from tag prefix
         before the first ":" (e.g., "secrets:*").
     """
-    if not text:
+    snap = _SNAPSHOT
+    if not text or not snap.rules:
         return text, {}, 0, []
 
-    with _LOCK:
-        rules_snapshot = list(_Rules)
-
     families: Dict[str, int] = {}
     debug_matches: List[str] = []
     total = 0
     out = text
 
-    for rx, repl, tag in rules_snapshot:
-        # Count occurrences first
-        matches = list(rx.finditer(out))
-        n = len(matches)
-        if n == 0:
+    if snap.scanner is not None:
+        parts: List[str] = []
+        last = 0
+        for m in snap.scanner.finditer(text):
+            start, end = m.span()
+            if start == end:
+                continue
+            rule: Optional[FeedRule] = None
+            for idx in snap.candidates(text[start]):
+                hit = snap.rules[idx].rx.match(text, start)
+                if hit is not None and hit.end() == end:
+                    rule = snap.rules[idx]
+                    break
+            if rule is None:
+                continue
+            parts.append(text[last:start])
+            parts.append(rule.substitute(text, start))
+            last = end
+            total += 1
+            _count(families, rule.tag)
+            if debug:
+                # Record a compact representation of matches (tag + first 50 chars)
+                debug_matches.append(f"{rule.tag}:{m.group(0)[:50]}")
+        if parts:
+            parts.append(text[last:])
+            out = "".join(parts)
+
+    for idx in snap.standalone:
+        rule = snap.rules[idx]
+        matches = list(rule.rx.finditer(out))
+        if not matches:
             continue
+        total += len(matches)
+        _count(families, rule.tag, len(matches))
+        if debug:
+            debug_matches.extend(f"{rule.tag}:{m.group(0)[:50]}" for m in matches)
+        out = rule.rx.sub(rule.replacement, out)
+
+    return out, families, total, (debug_matches if debug else [])
 
-        total += n
-        # Specific tag count
-        families[tag] = families.get(tag, 0) + n
-        # Wildcard family (e.g., "secrets:*")
-        if ":" in tag:
-            prefix = tag.split(":", 1)[0]
-            wildcard = f"{prefix}:*"
-            families[wildcard] = families.get(wildcard, 0) + n
 
-        if debug:
-            # Record a compact representation of matches (tag + first 50 chars)
-            for m in matches:
-                span_txt = m.group(0)
-                debug_matches.append(f"{tag}:{span_txt[:50]}")
+def _refresh_interval_s() -> float:
+    try:
+        return max(0.0, float(os.getenv("THREAT_FEED_REFRESH_S", "300")))
+    except ValueError:
+        return 300.0
 
-        # Apply substitution
-        out = rx.sub(repl, out)
 
-    return out, families, total, (debug_matches if debug else [])
+class ThreatFeedRefresher:
+    """Daemon thread reloading ``THREAT_FEED_URLS`` every ``interval_s`` (± ``jitter``)."""
+
+    def __init__(self, interval_s: Optional[float] = None, *, jitter: float = 0.1) -> None:
+        self.interval_s = interval_s if interval_s is not None else _refresh_interval_s()
+        self.jitter = min(max(0.0, float(jitter)), 0.9)
+        self.runs = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def next_delay(self) -> float:
+        spread = self.interval_s * self.jitter
+        return max(0.01, self.interval_s + random.uniform(-spread, spread))
+
+    def tick(self) -> int:
+        urls = _env_urls()
+        self.runs += 1
+        if not urls:
+            return len(_SNAPSHOT.rules)
+        return reload_from_urls(urls)
+
+    def running(self) -> bool:
+        thread = self._thread
+        return thread is not None and thread.is_alive()
+
+    def start(self) -> None:
+        with self._lock:
+            if self.running() or self.interval_s <= 0:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="threat-feed", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        # First load right away, then spread refreshes so replicas do not stampede.
+        delay = 0.0
+        while not self._stop.wait(delay):
+            try:
+                self.tick()
+            except Exception as exc:
+                _log.debug("threat feed refresh failed: %s", exc)
+            delay = self.next_delay()
+
+
+_REFRESHER: Optional[ThreatFeedRefresher] = None
+_REFRESHER_LOCK = threading.Lock()
+
+
+def start_refresher() -> Optional[ThreatFeedRefresher]:
+    """Start the background refresher when feeds and a refresh interval are configured."""
+    global _REFRESHER
+    if not _env_urls() or _refresh_interval_s() <= 0:
+        return None
+    with _REFRESHER_LOCK:
+        if _REFRESHER is None:
+            _REFRESHER = ThreatFeedRefresher()
+        _REFRESHER.start()
+        return _REFRESHER
+
+
+def shutdown() -> None:
+    refresher = _REFRESHER
+    if refresher is not None:
+        refresher.stop()
+
+
+__all__ = [
+    "FeedRule",
+    "FeedSnapshot",
+    "ThreatFeedRefresher",
+    "apply_dynamic_redactions",
+    "fetch_feed",
+    "refresh_from_env",
+    "reload_from_urls",
+    "shutdown",
+    "snapshot",
+    "start_refresher",
+    "status",
+    "threat_feed_enabled",
+]
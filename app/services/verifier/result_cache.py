@@ -73,9 +73,9 @@ class _RedisCache:
         self._ttl = max(1, int(ttl_s))
         self._cli = None
         try:
-            import redis  # noqa: F401
+            from app.services import redis_manager
 
-            self._cli = redis.from_url(url, decode_responses=True)
+            self._cli = redis_manager.get_manager(url).sync()
         except Exception:
             self._cli = None
 
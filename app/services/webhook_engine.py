@@ -0,0 +1,514 @@
+"""Asyncio webhook delivery engine.
+
+Events are grouped by destination host. Every host gets its own ready queue, a
+bounded number of concurrent requests over a keep-alive ``httpx.AsyncClient``
+pool, and its own circuit breaker (``webhooks_cb`` keys breakers by host).
+Retries are parked in a single timer heap instead of sleeping, so a slow or
+failing receiver only delays its own events.
+
+The engine owns a private event loop on a daemon thread, which lets the sync
+``webhooks.enqueue`` hand events over from any thread. Dead-letter writes run
+in a worker thread so the loop never blocks on file I/O. ``stop()`` lets
+in-flight and queued deliveries finish within its timeout, then dead-letters
+whatever is left (parked retries, queued and cancelled attempts) with reason
+``shutdown``, like the threaded worker draining its queue.
+
+Enabled with ``WEBHOOK_ENGINE=async``. ``WEBHOOK_HOST_CONCURRENCY`` caps the
+requests in flight per host (default 8).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+import app.telemetry.metrics as telemetry_metrics
+from app.observability.metrics import (
+    webhook_abort_total,
+    webhook_destination_deliveries_total,
+    webhook_destination_inflight,
+    webhook_destination_latency_seconds,
+    webhook_destination_queued,
+    webhook_failed_inc,
+    webhook_processed_inc,
+    webhook_retried_inc,
+    webhook_retry_total,
+)
+from app.services import webhooks as _wh
+from app.services.config_store import get_config
+from app.services.webhooks_cb import get_cb_registry
+
+_log = logging.getLogger(__name__)
+
+
+def engine_enabled() -> bool:
+    return (os.getenv("WEBHOOK_ENGINE") or "thread").strip().lower() == "async"
+
+
+def _host_concurrency() -> int:
+    raw = os.getenv("WEBHOOK_HOST_CONCURRENCY")
+    try:
+        value = int(raw) if raw is not None else 8
+    except Exception:
+        value = 8
+    return max(1, value)
+
+
+@dataclass
+class _Job:
+    evt: Dict[str, Any]
+    url: str
+    host: str
+    body: bytes
+    headers: Dict[str, str]
+    timeout_s: float
+    verify: bool
+    base_ms: int
+    max_ms: int
+    max_attempts: int
+    horizon_ms: int
+    started: float = field(default_factory=time.monotonic)
+    attempts: int = 0
+    sleep_ms: int = 0
+    last_code: Optional[int] = None
+    last_exc: Optional[str] = None
+    # Set once the final outcome is decided, before its dead-letter write.
+    outcome: Optional[Tuple[str, str]] = None
+
+
+@dataclass
+class _Destination:
+    host: str
+    client: httpx.AsyncClient
+    ready: Deque[_Job] = field(default_factory=deque)
+    inflight: int = 0
+    scheduled: int = 0
+
+
+class AsyncDeliveryEngine:
+    def __init__(
+        self,
+        *,
+        concurrency: Optional[int] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self._concurrency = concurrency or _host_concurrency()
+        self._transport = transport
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+        self._dests: Dict[Tuple[str, float, bool], _Destination] = {}
+        self._timers: List[Tuple[float, int, _Job]] = []
+        self._timer_seq = 0
+        self._timer_wakeup: Optional[asyncio.Event] = None
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._lifecycle_lock = threading.Lock()
+        self._closing = False
+        self._halted = False
+        self._stranded: List[_Job] = []
+
+    # ------------------------------------------------------------------ lifecycle
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        with self._lifecycle_lock:
+            if self.running:
+                return
+            self._closing = self._halted = False
+            self._started.clear()
+            self._thread = threading.Thread(target=self._run, name="webhook-engine", daemon=True)
+            self._thread.start()
+            self._started.wait(timeout=2.0)
+
+    def _run(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        self._timer_wakeup = asyncio.Event()
+        timer_task = loop.create_task(self._timer_loop())
+        self._started.set()
+        try:
+            loop.run_forever()
+        finally:
+            timer_task.cancel()
+            pending = [timer_task, *self._tasks]
+            for task in pending:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self._dead_letter_stray()
+            loop.run_until_complete(self._close_clients())
+            loop.run_until_complete(loop.shutdown_default_executor())
+            loop.close()
+            if self._loop is loop:
+                self._loop = None
+
+    def stop(self, timeout: float = 0.5) -> None:
+        """Drain for up to ``timeout`` seconds, dead-letter the rest, stop the loop."""
+        with self._lifecycle_lock:
+            loop, thread = self._loop, self._thread
+            if loop is None or thread is None:
+                return
+            try:
+                drained = asyncio.run_coroutine_threadsafe(self._shutdown(timeout), loop)
+                # Dead-letter writes after the grace period get a bounded extra wait.
+                drained.result(timeout=max(0.0, timeout) + 5.0)
+            except Exception as exc:
+                _log.debug("webhook engine drain on stop failed: %s", exc)
+            try:
+                loop.call_soon_threadsafe(loop.stop)
+            except RuntimeError:
+                pass
+            thread.join(timeout=timeout)
+            self._thread = None
+
+    async def _shutdown(self, grace_s: float) -> None:
+        self._closing = True
+        if self._timer_wakeup is not None:
+            self._timer_wakeup.set()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max(0.0, grace_s)
+        # Parked retries would outlive the grace period: dead-letter them now.
+        parked = [job for _, _, job in self._timers]
+        self._timers.clear()
+        for dest in self._dests.values():
+            dest.scheduled = 0
+        await self._dead_letter(parked)
+
+        while self._tasks and loop.time() < deadline:
+            await asyncio.wait(
+                set(self._tasks),
+                timeout=deadline - loop.time(),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        self._halted = True
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        leftovers, self._stranded = self._stranded, []
+        for dest in self._dests.values():
+            leftovers.extend(dest.ready)
+            dest.ready.clear()
+            self._sync_gauges(dest)
+        await self._dead_letter(leftovers)
+
+    def _dead_letter_stray(self) -> None:
+        # Anything handed over after the drain (or left by a stop that timed
+        # out) is written synchronously: the loop is no longer serving.
+        stray, self._stranded = self._stranded, []
+        stray.extend(job for _, _, job in self._timers)
+        self._timers.clear()
+        for dest in self._dests.values():
+            stray.extend(dest.ready)
+            dest.ready.clear()
+        for job in stray:
+            _wh._dlq_write(job.evt, reason="shutdown")
+            webhook_failed_inc()
+            self._record(job, "dlq", "shutdown")
+
+    async def _dead_letter(self, jobs: List[_Job]) -> None:
+        if not jobs:
+            return
+        for job in jobs:
+            job.outcome = ("dlq", "shutdown")
+
+        def write() -> None:
+            for job in jobs:
+                _wh._dlq_write(job.evt, reason="shutdown")
+
+        await asyncio.to_thread(write)
+        for job in jobs:
+            webhook_failed_inc()
+            self._record(job, "dlq", "shutdown")
+
+    async def _close_clients(self) -> None:
+        for dest in self._dests.values():
+            try:
+                await dest.client.aclose()
+            except Exception as exc:  # pragma: no cover
+                _log.debug("close webhook client for %s failed: %s", dest.host, exc)
+        self._dests.clear()
+
+    def drain(self, timeout: float = 2.0) -> bool:
+        """Wait until every submitted event reached a final outcome."""
+        deadline = time.monotonic() + max(0.0, timeout)
+        while self.pending():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def pending(self) -> int:
+        with self._pending_lock:
+            return self._pending
+
+    # ------------------------------------------------------------------ intake
+
+    def submit(self, evt: Dict[str, Any], url: Optional[str] = None) -> bool:
+        """Hand an event to the engine. Thread-safe; never blocks on delivery."""
+        cfg = get_config()
+        target = str(url or cfg.get("webhook_url") or "")
+        if not target or not _wh._allow_host(target, str(cfg.get("webhook_allowlist_host") or "")):
+            telemetry_metrics.WEBHOOK_DELIVERIES_TOTAL.labels("failed", "error").inc()
+            self._final_stats("failed", "error")
+            return False
+
+        body = json.dumps(evt).encode("utf-8")
+        headers = {
+            "Content-Type": "application/json",
+            "X-Guardrail-Idempotency-Key": (evt.get("incident_id") or evt.get("request_id") or ""),
+        }
+        secret = str(cfg.get("webhook_secret") or "")
+        if secret:
+            headers.update(_wh._signing_headers(body, secret.encode("utf-8")))
+        base_ms, max_ms, max_attempts, horizon_ms = _wh._backoff_params()
+        job = _Job(
+            evt=evt,
+            url=target,
+            host=urlparse(target).netloc or "unknown",
+            body=body,
+            headers=headers,
+            timeout_s=int(cfg.get("webhook_timeout_ms") or 2000) / 1000.0,
+            verify=not bool(cfg.get("webhook_allow_insecure_tls") or False),
+            base_ms=max(1, base_ms),
+            max_ms=max(base_ms, max_ms),
+            max_attempts=max(1, max_attempts),
+            horizon_ms=max(0, horizon_ms),
+            sleep_ms=max(1, base_ms),
+        )
+        self.start()
+        loop = self._loop
+        if loop is None:
+            return False
+        with self._pending_lock:
+            self._pending += 1
+        try:
+            loop.call_soon_threadsafe(self._accept, job)
+        except RuntimeError:
+            # The loop closed between start() and hand-off (concurrent stop).
+            _wh._dlq_write(evt, reason="shutdown")
+            self._record(job, "dlq", "shutdown")
+            return False
+        return True
+
+    def _dest(self, job: _Job) -> _Destination:
+        key = (job.host, job.timeout_s, job.verify)
+        dest = self._dests.get(key)
+        if dest is None:
+            limits = httpx.Limits(
+                max_connections=self._concurrency,
+                max_keepalive_connections=self._concurrency,
+            )
+            client = httpx.AsyncClient(
+                timeout=job.timeout_s,
+                verify=job.verify,
+                limits=limits,
+                transport=self._transport,
+            )
+            dest = _Destination(host=job.host, client=client)
+            self._dests[key] = dest
+        return dest
+
+    def _accept(self, job: _Job) -> None:
+        dest = self._dest(job)
+        dest.ready.append(job)
+        self._pump(dest)
+
+    def _pump(self, dest: _Destination) -> None:
+        loop = self._loop
+        if loop is None or self._halted:
+            return
+        while dest.inflight < self._concurrency and dest.ready:
+            job = dest.ready.popleft()
+            dest.inflight += 1
+            task = loop.create_task(self._attempt(dest, job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        self._sync_gauges(dest)
+
+    def _sync_gauges(self, dest: _Destination) -> None:
+        def update() -> None:
+            webhook_destination_inflight.labels(dest.host).set(dest.inflight)
+            webhook_destination_queued.labels(dest.host).set(len(dest.ready) + dest.scheduled)
+
+        _wh._best_effort("set webhook destination gauges", update)
+
+    # ------------------------------------------------------------------ delivery
+
+    async def _attempt(self, dest: _Destination, job: _Job) -> None:
+        try:
+            await self._send(dest, job)
+        except asyncio.CancelledError:
+            if job.outcome is None:
+                self._stranded.append(job)
+            else:
+                # Cancelled while its dead-letter write was running in the thread.
+                self._record(job, *job.outcome)
+            raise
+        except Exception as exc:  # pragma: no cover
+            _log.debug("webhook attempt failed unexpectedly: %s", exc)
+            await self._finish(job, "failed", "error")
+        finally:
+            dest.inflight -= 1
+            self._pump(dest)
+
+    async def _send(self, dest: _Destination, job: _Job) -> None:
+        reg = get_cb_registry()
+        if reg.should_dlq_now(job.url):
+            webhook_abort_total.labels("cb_open").inc()
+            await self._finish(job, "cb_open", "-")
+            return
+
+        job.attempts += 1
+        err_kind: Optional[str] = None
+        t0 = time.perf_counter()
+        try:
+            resp = await dest.client.post(job.url, content=job.body, headers=job.headers)
+            job.last_code, job.last_exc = resp.status_code, None
+        except httpx.TimeoutException:
+            job.last_code, job.last_exc, err_kind = None, "timeout", "timeout"
+        except Exception:
+            job.last_code, job.last_exc, err_kind = None, "error", "network"
+        elapsed = time.perf_counter() - t0
+        telemetry_metrics.WEBHOOK_LATENCY_SECONDS.observe(elapsed)
+        webhook_destination_latency_seconds.labels(job.host).observe(elapsed)
+
+        if job.last_code is not None and 200 <= job.last_code < 300:
+            reg.on_success(job.url)
+            webhook_processed_inc()
+            await self._finish(job, "sent", _wh._status_bucket(job.last_code, None))
+            return
+        reg.on_failure(job.url)
+
+        retry, reason = _wh._should_retry(job.last_code, err_kind)
+        if reg.should_dlq_now(job.url):
+            retry, reason = False, "cb_open"
+        if not retry:
+            webhook_abort_total.labels(reason or "4xx").inc()
+            await self._fail(job, reason)
+            return
+        if job.attempts >= job.max_attempts:
+            webhook_abort_total.labels("attempts").inc()
+            await self._fail(job, None)
+            return
+        elapsed_ms = int((time.monotonic() - job.started) * 1000)
+        if job.horizon_ms and elapsed_ms >= job.horizon_ms:
+            webhook_abort_total.labels("horizon").inc()
+            await self._fail(job, None)
+            return
+        if self._closing:
+            await self._dead_letter([job])
+            return
+
+        webhook_retry_total.labels(reason or "network").inc()
+        webhook_retried_inc()
+        job.sleep_ms = _wh._decorrelated_jitter_sleep_ms(job.sleep_ms, job.base_ms, job.max_ms)
+        self._schedule(dest, job, job.sleep_ms / 1000.0)
+
+    async def _fail(self, job: _Job, reason: Optional[str]) -> None:
+        if reason == "cb_open":
+            await self._finish(job, "cb_open", "-")
+        else:
+            webhook_failed_inc()
+            await self._finish(job, "dlq", _wh._status_bucket(job.last_code, job.last_exc))
+
+    async def _finish(self, job: _Job, outcome: str, status: str) -> None:
+        job.outcome = (outcome, status)
+        if outcome != "sent":
+            reason = "cb_open" if outcome == "cb_open" else status
+            await asyncio.to_thread(_wh._dlq_write, job.evt, reason)
+        self._record(job, outcome, status)
+
+    def _record(self, job: _Job, outcome: str, status: str) -> None:
+        if outcome != "sent":
+            telemetry_metrics.WEBHOOK_EVENTS_TOTAL.labels("enqueued").inc()
+        telemetry_metrics.WEBHOOK_DELIVERIES_TOTAL.labels(outcome, status).inc()
+        webhook_destination_deliveries_total.labels(job.host, outcome).inc()
+        self._final_stats(outcome, status)
+        with self._pending_lock:
+            self._pending = max(0, self._pending - 1)
+
+    @staticmethod
+    def _final_stats(outcome: str, status: str) -> None:
+        with _wh._lock:
+            _wh._stats["processed"] += 1
+            _wh._stats["last_status"] = status
+            _wh._stats["last_error"] = "" if outcome == "sent" else status
+
+    # ------------------------------------------------------------------ timers
+
+    def _schedule(self, dest: _Destination, job: _Job, delay_s: float) -> None:
+        self._timer_seq += 1
+        heapq.heappush(self._timers, (time.monotonic() + delay_s, self._timer_seq, job))
+        dest.scheduled += 1
+        self._sync_gauges(dest)
+        if self._timer_wakeup is not None:
+            self._timer_wakeup.set()
+
+    async def _timer_loop(self) -> None:
+        wakeup = self._timer_wakeup
+        assert wakeup is not None
+        while True:
+            now = time.monotonic()
+            while self._timers and self._timers[0][0] <= now:
+                _, _, job = heapq.heappop(self._timers)
+                dest = self._dest(job)
+                dest.scheduled = max(0, dest.scheduled - 1)
+                dest.ready.append(job)
+                self._pump(dest)
+            timeout = self._timers[0][0] - now if self._timers else None
+            wakeup.clear()
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def destinations(self) -> Dict[str, Dict[str, int]]:
+        """Snapshot of per-host queue state (best-effort, for admin/tests)."""
+        out: Dict[str, Dict[str, int]] = {}
+        for dest in list(self._dests.values()):
+            entry = out.setdefault(dest.host, {"ready": 0, "inflight": 0, "scheduled": 0})
+            entry["ready"] += len(dest.ready)
+            entry["inflight"] += dest.inflight
+            entry["scheduled"] += dest.scheduled
+        return out
+
+
+_engine: Optional[AsyncDeliveryEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> AsyncDeliveryEngine:
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = AsyncDeliveryEngine()
+        return _engine
+
+
+def shutdown(timeout: float = 0.5) -> None:
+    global _engine
+    with _engine_lock:
+        engine, _engine = _engine, None
+    if engine is not None:
+        engine.stop(timeout=timeout)
+
+
+__all__ = ["AsyncDeliveryEngine", "engine_enabled", "get_engine", "shutdown"]
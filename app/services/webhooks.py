@@ -591,8 +591,35 @@ def _ensure_worker(*, require_enabled: bool) -> None:
         thread_to_start.start()
 
 
+def _engine_enabled() -> bool:
+    from app.services import webhook_engine
+
+    return webhook_engine.engine_enabled()
+
+
+def _dispatch(evt: Dict[str, Any]) -> None:
+    """Route an event to the async engine when enabled, else the worker queue."""
+    if _engine_enabled():
+        from app.services import webhook_engine
+
+        webhook_engine.get_engine().submit(evt)
+        return
+    _ensure_worker(require_enabled=False)
+    _q.put(evt)
+
+
 def ensure_started() -> None:
     """Best-effort start of the delivery worker if webhooks are enabled."""
+    if _engine_enabled():
+
+        def start_engine() -> None:
+            from app.services import webhook_engine
+
+            if _worker_enabled():
+                webhook_engine.get_engine().start()
+
+        _best_effort("ensure webhook engine", start_engine)
+        return
     _best_effort(
         "ensure webhook worker",
         lambda: _ensure_worker(require_enabled=True),
@@ -602,6 +629,13 @@ def ensure_started() -> None:
 def shutdown(timeout: float = 0.5) -> None:
     """Signal the worker to stop and wait briefly for exit."""
     global _worker_thread
+
+    def stop_engine() -> None:
+        from app.services import webhook_engine
+
+        webhook_engine.shutdown(timeout=timeout)
+
+    _best_effort("shutdown webhook engine", stop_engine)
     thread: Optional[threading.Thread]
     with _lock:
         thread = _worker_thread
@@ -626,8 +660,7 @@ def enqueue(evt: Dict[str, Any]) -> None:
     with _lock:
         _stats["queued"] += 1
     telemetry_metrics.WEBHOOK_EVENTS_TOTAL.labels("enqueued").inc()
-    _ensure_worker(require_enabled=False)
-    _q.put(evt)
+    _dispatch(evt)
     _sync_pending_queue_length()
 
 
@@ -762,9 +795,6 @@ def requeue_from_dlq(limit: int) -> int:
             if not os.path.exists(path):
                 return 0
 
-            # Ensure worker consumes the current _q
-            _ensure_worker(require_enabled=False)
-
             with open(path, "r", encoding="utf-8") as f:
                 lines = f.readlines()
 
@@ -778,7 +808,7 @@ def requeue_from_dlq(limit: int) -> int:
                     rec = json.loads(line)
                     evt = rec.get("event")
                     if isinstance(evt, dict):
-                        _q.put(evt)
+                        _dispatch(evt)
                         requeued += 1
                         telemetry_metrics.WEBHOOK_DELIVERIES_TOTAL.labels(
                             "dlq_replayed",
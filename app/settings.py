@@ -581,6 +581,19 @@ RETENTION_MAX_IDS_PER_RUN: int = int(os.getenv("RETENTION_MAX_IDS_PER_RUN", "100
 RETENTION_AUDIT_SQL_ENABLED: bool = os.getenv(
     "RETENTION_AUDIT_SQL_ENABLED", "0"
 ).strip().lower() in {"1", "true", "yes", "on"}
+# Throttled purge engine: rows per chunk (one range delete), global rows/sec budget
+# (0 = unthrottled), tenants drained in parallel, and the recent request latency
+# above which purging pauses (0 = never), for at most RETENTION_PURGE_MAX_PAUSE_S.
+RETENTION_PURGE_CHUNK: int = int(os.getenv("RETENTION_PURGE_CHUNK", "500") or "500")
+RETENTION_PURGE_ROWS_PER_SEC: float = float(
+    os.getenv("RETENTION_PURGE_ROWS_PER_SEC", "2000") or "2000"
+)
+RETENTION_PURGE_CONCURRENCY: int = int(os.getenv("RETENTION_PURGE_CONCURRENCY", "2") or "2")
+RETENTION_PURGE_MAX_LATENCY_MS: float = float(
+    os.getenv("RETENTION_PURGE_MAX_LATENCY_MS", "250") or "250"
+)
+RETENTION_PURGE_MAX_PAUSE_S: float = float(os.getenv("RETENTION_PURGE_MAX_PAUSE_S", "30") or "30")
+RETENTION_PURGE_INTERVAL_S: float = float(os.getenv("RETENTION_PURGE_INTERVAL_S", "60") or "60")
 
 # Webhook retry/DLQ settings
 WH_REDIS_PREFIX: str = os.getenv("WH_REDIS_PREFIX", "whq")
@@ -141,6 +141,19 @@ def _mk_counter(name: str, doc: str, labels: Iterable[str] | None = None) -> Cou
     return cast(CounterLike, _get_or_create(name, _factory))
 
 
+def _mk_buffered_counter(name: str, doc: str, labels: Iterable[str] | None = None) -> CounterLike:
+    """Counter bumped on every request: cached children, lock-free increments."""
+    if not _PROM_OK:
+        return _mk_counter(name, doc, labels)
+
+    def _factory() -> Any:
+        from app.observability import metrics_facade
+
+        return metrics_facade.counter(name, doc, tuple(labels or ()))
+
+    return cast(CounterLike, _get_or_create(name, _factory))
+
+
 def _mk_histogram(name: str, doc: str, labels: Iterable[str] | None = None) -> HistogramLike:
     def _factory() -> Any:
         if labels:
@@ -161,10 +174,10 @@ def _mk_gauge(name: str, doc: str, labels: Iterable[str] | None = None) -> Gauge
 
 # ---- Core collectors (names must match tests) --------------------------------
 
-guardrail_requests_total: CounterLike = _mk_counter(
+guardrail_requests_total: CounterLike = _mk_buffered_counter(
     "guardrail_requests_total", "Total guardrail requests.", labels=["endpoint"]
 )
-guardrail_decisions_total: CounterLike = _mk_counter(
+guardrail_decisions_total: CounterLike = _mk_buffered_counter(
     "guardrail_decisions_total", "Total guardrail decisions.", labels=["family"]
 )
 guardrail_latency_seconds: HistogramLike = _mk_histogram(
@@ -179,7 +192,7 @@ guardrail_quota_rejects_total: CounterLike = _mk_counter(
     "guardrail_quota_rejects_total", "Requests rejected due to quotas.", ["tenant", "bot"]
 )
 
-guardrail_mode_total: CounterLike = _mk_counter(
+guardrail_mode_total: CounterLike = _mk_buffered_counter(
     "guardrail_mode_total",
     "Guardrail enforcement mode totals.",
     ["mode"],
@@ -197,16 +210,22 @@ guardrail_policy_disagreement_total: CounterLike = _mk_counter(
     ["route", "live_action", "shadow_action"],
 )
 
+guardrail_shadow_evaluations_total: CounterLike = _mk_counter(
+    "guardrail_shadow_evaluations_total",
+    "Background shadow policy evaluations by outcome (agree|disagree|error|dropped).",
+    ["route", "outcome"],
+)
+
 # Family + tenant/bot breakdowns
-guardrail_decisions_family_total: CounterLike = _mk_counter(
+guardrail_decisions_family_total: CounterLike = _mk_buffered_counter(
     "guardrail_decisions_family_total", "Decision totals by family.", ["family"]
 )
-guardrail_decisions_family_tenant_total: CounterLike = _mk_counter(
+guardrail_decisions_family_tenant_total: CounterLike = _mk_buffered_counter(
     "guardrail_decisions_family_tenant_total",
     "Decision totals by tenant and family.",
     ["tenant", "family"],
 )
-guardrail_decisions_family_bot_total: CounterLike = _mk_counter(
+guardrail_decisions_family_bot_total: CounterLike = _mk_buffered_counter(
     "guardrail_decisions_family_bot_total",
     "Decision totals by tenant/bot and family.",
     ["tenant", "bot", "family"],
@@ -224,7 +243,7 @@ except Exception:  # pragma: no cover
         return tenant_v, bot_v
 
 
-guardrail_actor_decisions_total: CounterLike = _mk_counter(
+guardrail_actor_decisions_total: CounterLike = _mk_buffered_counter(
     "guardrail_actor_decisions_total",
     "Guardrail decisions partitioned by family, tenant, and bot",
     ["family", "tenant", "bot"],
@@ -257,15 +276,15 @@ def _labels2_direction_tag(direction: object, tag: object) -> tuple[str, str]:
 
 
 # Direction-scoped decision families
-guardrail_ingress_decisions_family_total: CounterLike = _mk_counter(
+guardrail_ingress_decisions_family_total: CounterLike = _mk_buffered_counter(
     "guardrail_ingress_decisions_family_total", "Ingress decisions by family.", ["family"]
 )
-guardrail_egress_decisions_family_total: CounterLike = _mk_counter(
+guardrail_egress_decisions_family_total: CounterLike = _mk_buffered_counter(
     "guardrail_egress_decisions_family_total", "Egress decisions by family.", ["family"]
 )
 
 # Verifier outcomes
-guardrail_verifier_outcome_total: CounterLike = _mk_counter(
+guardrail_verifier_outcome_total: CounterLike = _mk_buffered_counter(
     "guardrail_verifier_outcome_total", "Verifier outcome totals.", ["verifier", "outcome"]
 )
 
@@ -520,6 +539,12 @@ def inc_shadow_disagreement(route: str, live: str, shadow: str) -> None:
     ).inc()
 
 
+def inc_shadow_evaluation(route: str, outcome: str) -> None:
+    guardrail_shadow_evaluations_total.labels(
+        str(route or "unknown"), str(outcome or "unknown")
+    ).inc()
+
+
 def inc_rate_limited(
     amount: float = 1.0, tenant: str | None = None, bot: str | None = None
 ) -> None:
@@ -1,8 +1,13 @@
 from __future__ import annotations
 
+import asyncio
+import inspect
+import random
+import statistics
+import threading
 import time
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Sequence, Tuple
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 
 from app.metrics_verifier import verifier_events
 from app.verifier.base import (
@@ -17,42 +22,255 @@ from app.verifier.base import (
 
 @dataclass
 class _Health:
-    ok: bool
-    ts: float
+    """Rolling view of one provider, fed by probes and real requests."""
+
+    ok: bool = True  # last probe verdict; optimistic until the first probe lands
+    ts: float = 0.0  # last probe time
+    latency_ms: Optional[float] = None  # EWMA
+    error_rate: float = 0.0  # EWMA of failures (0..1)
+    samples: int = 0
+    consecutive_failures: int = 0
+    ejected_until: float = 0.0
+    ejections: int = 0
+    recovered_at: Optional[float] = None  # start of slow-start ramp
 
 
 class VerifierManager:
     """
-    Provider-agnostic verifier manager with health cache and failover.
+    Provider-agnostic verifier manager with background health probing,
+    latency-aware selection and failover.
+
+    - A prober (:meth:`start_prober` or :meth:`probe_once`) calls ``health()``
+      off the request path; requests only read the cached state. With
+      ``auto_probe`` (the default) the first verify call starts the prober,
+      so providers are only taken on trust until its first pass completes.
+    - Probes and requests feed an EWMA of latency and error rate per
+      provider. The first provider is drawn with weight
+      ``(1 - error_rate)^2 / latency``; the rest follow by descending weight.
+    - A provider is ejected for ``eject_s`` (doubling on repeats) after
+      ``eject_consecutive`` failures in a row, an error EWMA of at least
+      ``eject_error_rate``, or latency above ``outlier_factor`` x the median of
+      its peers. It is never ejected when that would leave no provider.
+    - A provider returning from ejection or a failed probe ramps its weight
+      over ``slow_start_s``.
     """
 
-    def __init__(self, providers: Sequence[Verifier], health_ttl_s: float = 10.0) -> None:
+    def __init__(
+        self,
+        providers: Sequence[Verifier],
+        health_ttl_s: float = 10.0,
+        *,
+        alpha: float = 0.3,
+        eject_consecutive: int = 3,
+        eject_error_rate: float = 0.5,
+        outlier_factor: float = 3.0,
+        min_samples: int = 5,
+        eject_s: float = 30.0,
+        slow_start_s: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Optional[random.Random] = None,
+        auto_probe: bool = True,
+    ) -> None:
         self._providers: List[Verifier] = list(providers)
         # Key health by object identity to avoid name collisions across instances.
-        self._health: Dict[int, _Health] = {}
-        self._ttl = health_ttl_s
-        self._rr = 0
+        self._health: Dict[int, _Health] = {self._key(p): _Health() for p in self._providers}
+        self._ttl = health_ttl_s  # probe interval
+        self._alpha = min(max(alpha, 0.01), 1.0)
+        self._eject_consecutive = max(1, int(eject_consecutive))
+        self._eject_error_rate = eject_error_rate
+        self._outlier_factor = outlier_factor
+        self._min_samples = max(1, int(min_samples))
+        self._eject_s = eject_s
+        self._slow_start_s = slow_start_s
+        self._clock = clock
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._auto_probe = auto_probe
+        self._prober_lock = threading.Lock()
 
     @staticmethod
     def _key(p: Verifier) -> int:
         # Object identity is stable for the life of the instance.
         return id(p)
 
-    def _is_healthy(self, p: Verifier, now: float) -> bool:
-        k = self._key(p)
-        h = self._health.get(k)
-        if h and now - h.ts < self._ttl:
-            return h.ok
-        ok = False
-        try:
-            ok = bool(p.health())
-        except Exception:
-            ok = False
-        self._health[k] = _Health(ok=ok, ts=now)
-        return ok
+    def _state(self, p: Verifier) -> _Health:
+        return self._health.setdefault(self._key(p), _Health())
+
+    # ----------------------------- observations ------------------------------
+
+    def _observe(self, p: Verifier, latency_s: float, ok: bool) -> None:
+        now = self._clock()
+        a = self._alpha
+        with self._lock:
+            h = self._state(p)
+            ms = max(0.0, latency_s * 1000.0)
+            h.latency_ms = ms if h.latency_ms is None else a * ms + (1 - a) * h.latency_ms
+            h.error_rate = a * (0.0 if ok else 1.0) + (1 - a) * h.error_rate
+            h.samples += 1
+            h.consecutive_failures = 0 if ok else h.consecutive_failures + 1
+            if self._should_eject(p, h, now):
+                h.ejections += 1
+                h.ejected_until = now + self._eject_s * (2 ** min(h.ejections - 1, 4))
+                h.recovered_at = h.ejected_until
+                verifier_events.labels(p.name, "ejected").inc()
+
+    def _should_eject(self, p: Verifier, h: _Health, now: float) -> bool:
+        if h.ejected_until > now:
+            return False
+        others = [
+            self._state(q)
+            for q in self._providers
+            if q is not p and self._state(q).ejected_until <= now
+        ]
+        if not others:
+            return False  # never eject the last provider in rotation
+        if h.consecutive_failures >= self._eject_consecutive:
+            return True
+        if h.samples < self._min_samples:
+            return False
+        if h.error_rate >= self._eject_error_rate:
+            return True
+        peers = [o.latency_ms for o in others if o.latency_ms is not None]
+        if peers and h.latency_ms is not None:
+            return h.latency_ms > self._outlier_factor * max(statistics.median(peers), 1.0)
+        return False
 
     def _mark_unhealthy(self, p: Verifier) -> None:
-        self._health[self._key(p)] = _Health(ok=False, ts=time.time())
+        self._observe(p, 0.0, ok=False)
+
+    # -------------------------------- probing --------------------------------
+
+    def probe_once(self) -> None:
+        """Call ``health()`` on every provider and record the outcome."""
+        for p in list(self._providers):
+            started = self._clock()
+            try:
+                ok = bool(p.health())
+            except Exception:
+                ok = False
+            now = self._clock()
+            with self._lock:
+                h = self._state(p)
+                if ok and not h.ok:
+                    h.recovered_at = now
+                h.ok, h.ts = ok, now
+            if not ok:
+                verifier_events.labels(p.name, "probe_fail").inc()
+            self._observe(p, now - started, ok)
+
+    def start_prober(self) -> None:
+        with self._prober_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="verifier-prober", daemon=True)
+            self._thread.start()
+
+    def stop_prober(self, timeout: float = 2.0) -> None:
+        """Stop the prober; it is not restarted lazily afterwards."""
+        self._auto_probe = False
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        self._thread = None
+
+    def _ensure_prober(self) -> None:
+        if self._auto_probe and self._thread is None:
+            self.start_prober()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.probe_once()
+            except Exception:
+                pass
+            # Jitter keeps probes of many managers from lining up.
+            self._stop.wait(self._ttl * (0.9 + 0.2 * self._rng.random()))
+
+    # ------------------------------- selection -------------------------------
+
+    def _is_healthy(self, p: Verifier, now: float) -> bool:
+        h = self._state(p)
+        return h.ok and h.ejected_until <= now
+
+    def weight(self, p: Verifier, now: Optional[float] = None) -> float:
+        now = self._clock() if now is None else now
+        h = self._state(p)
+        if not self._is_healthy(p, now):
+            return 0.0
+        latency = max(h.latency_ms if h.latency_ms is not None else 1.0, 1.0)
+        w = (1.0 - h.error_rate) ** 2 / latency
+        if h.recovered_at is not None and self._slow_start_s > 0:
+            ramp = (now - h.recovered_at) / self._slow_start_s
+            if ramp < 1.0:
+                w *= max(0.05, ramp)
+        return w
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        now = self._clock()
+        out: Dict[str, Dict[str, object]] = {}
+        for i, p in enumerate(self._providers):
+            h = self._state(p)
+            out[f"{i}:{p.name}"] = {
+                "ok": h.ok,
+                "latency_ms": h.latency_ms,
+                "error_rate": round(h.error_rate, 4),
+                "ejected": h.ejected_until > now,
+                "weight": self.weight(p, now),
+            }
+        return out
+
+    def _order(self) -> List[Verifier]:
+        now = self._clock()
+        weighted = [(self.weight(p, now), i, p) for i, p in enumerate(self._providers)]
+        live = [e for e in weighted if e[0] > 0]
+        if not live:
+            # Nothing looks usable: try everything, least-failing first.
+            return [
+                p
+                for _, _, p in sorted(
+                    ((self._state(p).error_rate, i, p) for i, p in enumerate(self._providers)),
+                    key=lambda t: (t[0], t[1]),
+                )
+            ]
+        total = sum(w for w, _, _ in live)
+        pick = self._rng.random() * total
+        first = live[-1]
+        for entry in live:
+            pick -= entry[0]
+            if pick <= 0:
+                first = entry
+                break
+        rest = sorted((e for e in weighted if e[1] != first[1]), key=lambda e: (-e[0], e[1]))
+        return [first[2]] + [p for _, _, p in rest]
+
+    # ------------------------------- verifying -------------------------------
+
+    def _success(self, p: Verifier, res: VerifyResult) -> Tuple[VerifyResult, Dict[str, str], str]:
+        verifier_events.labels(p.name, "success").inc()
+        mode = "allow" if res.allowed else "block_input"
+        hdr = decision_headers(res.allowed, mode=mode, incident_id=None)
+        return res, hdr, p.name
+
+    @staticmethod
+    def _outage(last_err: Optional[str]) -> Tuple[VerifyResult, Dict[str, str], str]:
+        # All failed or unhealthy: default-block with incident id.
+        inc = new_incident_id()
+        provider = "failover"
+        verifier_events.labels(provider, "outage").inc()
+        hdr = decision_headers(False, mode="block_input", incident_id=inc)
+        res = VerifyResult(allowed=False, reason=last_err or "outage", confidence=0.0)
+        return res, hdr, provider
+
+    @staticmethod
+    def _no_providers() -> Tuple[VerifyResult, Dict[str, str], str]:
+        inc = new_incident_id()
+        verifier_events.labels("none", "outage").inc()
+        hdr = decision_headers(False, mode="block_input", incident_id=inc)
+        return VerifyResult(False, "no_providers", 0.0), hdr, "none"
 
     def verify_with_failover(
         self, req: VerifyInput, timeout_s: float = 5.0
@@ -61,50 +279,61 @@ class VerifierManager:
         Returns: (result, headers, provider_name_or_default)
         On total outage, returns default-block with incident headers.
         """
-        now = time.time()
-        n = len(self._providers)
-        if n == 0:
-            inc = new_incident_id()
-            verifier_events.labels("none", "outage").inc()
-            hdr = decision_headers(False, mode="block_input", incident_id=inc)
-            return VerifyResult(False, "no_providers", 0.0), hdr, "none"
-
-        # Round-robin start
-        start = self._rr % n
-        self._rr = (self._rr + 1) % n
-
-        # First pass: pick healthy providers
-        order: List[Verifier] = []
-        for i in range(n):
-            p = self._providers[(start + i) % n]
-            if self._is_healthy(p, now):
-                order.append(p)
-        # Fallback: if none are healthy per cache, try all anyway
-        if not order:
-            order = list(self._providers)
+        if not self._providers:
+            return self._no_providers()
+        self._ensure_prober()
 
         last_err: Optional[str] = None
-
-        for p in order:
+        for p in self._order():
+            started = self._clock()
             try:
                 res = p.verify(req, timeout_s=timeout_s)
-                verifier_events.labels(p.name, "success").inc()
-                mode = "allow" if res.allowed else "block_input"
-                hdr = decision_headers(res.allowed, mode=mode, incident_id=None)
-                return res, hdr, p.name
             except VerifierTimeout:
                 last_err = "timeout"
-                self._mark_unhealthy(p)
+                self._observe(p, self._clock() - started, ok=False)
                 verifier_events.labels(p.name, "timeout").inc()
+                continue
             except Exception:
                 last_err = "error"
-                self._mark_unhealthy(p)
+                self._observe(p, self._clock() - started, ok=False)
                 verifier_events.labels(p.name, "error").inc()
+                continue
+            self._observe(p, self._clock() - started, ok=True)
+            return self._success(p, res)
+        return self._outage(last_err)
 
-        # All failed or unhealthy: default-block with incident id.
-        inc = new_incident_id()
-        provider = "failover"
-        verifier_events.labels(provider, "outage").inc()
-        hdr = decision_headers(False, mode="block_input", incident_id=inc)
-        res = VerifyResult(allowed=False, reason=last_err or "outage", confidence=0.0)
-        return res, hdr, provider
+    async def averify_with_failover(
+        self, req: VerifyInput, timeout_s: float = 5.0
+    ) -> Tuple[VerifyResult, Dict[str, str], str]:
+        """
+        Async :meth:`verify_with_failover`. Providers exposing a coroutine
+        ``averify`` are awaited; blocking ``verify`` runs in a worker thread.
+        Each attempt is bounded by ``timeout_s`` on the event loop.
+        """
+        if not self._providers:
+            return self._no_providers()
+        self._ensure_prober()
+
+        last_err: Optional[str] = None
+        for p in self._order():
+            started = self._clock()
+            averify = getattr(p, "averify", None)
+            try:
+                if averify is not None and inspect.iscoroutinefunction(averify):
+                    call = averify(req, timeout_s=timeout_s)
+                else:
+                    call = asyncio.to_thread(p.verify, req, timeout_s)
+                res = await asyncio.wait_for(call, timeout=timeout_s)
+            except (VerifierTimeout, asyncio.TimeoutError):
+                last_err = "timeout"
+                self._observe(p, self._clock() - started, ok=False)
+                verifier_events.labels(p.name, "timeout").inc()
+                continue
+            except Exception:
+                last_err = "error"
+                self._observe(p, self._clock() - started, ok=False)
+                verifier_events.labels(p.name, "error").inc()
+                continue
+            self._observe(p, self._clock() - started, ok=True)
+            return self._success(p, res)
+        return self._outage(last_err)
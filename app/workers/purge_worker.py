@@ -1,19 +1,57 @@
 from __future__ import annotations
 
+import asyncio
+import logging
 import time
-from typing import Optional
+from typing import List, Optional
 
 from app import settings
-from app.runtime import get_purge_coordinator, get_retention_store
-from app.services.metrics import (
-    purge_duration_seconds,
-    purge_items_deleted_total,
-    purge_runs_total,
+from app.runtime import get_purge_coordinator, get_redis, get_retention_store
+from app.services.metrics import purge_duration_seconds, purge_runs_total
+from app.services.purge_engine import (
+    CursorStore,
+    InMemoryCursorStore,
+    JobResult,
+    PurgeEngine,
+    PurgeJob,
+    RedisCursorStore,
+    engine_from_settings,
 )
 from app.services.retention import RetentionPolicy
 
+_log = logging.getLogger(__name__)
 
-async def run_once(now: Optional[float] = None, per_resource_limit: int = 100) -> int:
+_engine: Optional[PurgeEngine] = None
+
+
+def _cursor_store() -> CursorStore:
+    try:
+        return RedisCursorStore(get_redis())
+    except Exception:
+        return InMemoryCursorStore()
+
+
+def get_engine() -> PurgeEngine:
+    """Process-wide engine over the coordinator's targets, one shared row budget."""
+    global _engine
+    if _engine is None:
+        _engine = engine_from_settings(get_purge_coordinator().targets, _cursor_store())
+    return _engine
+
+
+def reset_engine() -> None:
+    global _engine
+    _engine = None
+
+
+async def run_once(now: Optional[float] = None, per_resource_limit: Optional[int] = 100) -> int:
+    """Purge expired items of every active policy; returns the number deleted.
+
+    Each ``(tenant, resource)`` job deletes at most ``per_resource_limit``
+    items (capped by ``RETENTION_MAX_IDS_PER_RUN``); ``None`` drains it.
+    Unfinished jobs resume from their saved cursor on the next run, and each
+    job with deletions gets one signed receipt.
+    """
     if not settings.RETENTION_WORKER_ENABLED:
         return 0
 
@@ -21,32 +59,41 @@ async def run_once(now: Optional[float] = None, per_resource_limit: int = 100) -
     coordinator = get_purge_coordinator()
     policies = await store.list_policies()
     current = now if now is not None else time.time()
-    limit = max(1, min(per_resource_limit, settings.RETENTION_MAX_IDS_PER_RUN))
-    deleted_total = 0
+    limit: Optional[int] = None
+    if per_resource_limit is not None:
+        limit = max(1, min(per_resource_limit, settings.RETENTION_MAX_IDS_PER_RUN))
     started = time.time()
 
+    jobs: List[PurgeJob] = []
     for policy in policies:
         if not _policy_active(policy):
             continue
+        jobs.append(
+            PurgeJob(policy.tenant, policy.resource.value, current - float(policy.ttl_seconds))
+        )
+
+    results: List[JobResult] = []
+    if jobs:
+        results = await get_engine().run(jobs, max_rows_per_job=limit)
+    deleted_total = 0
+    for result in results:
+        deleted_total += result.deleted
+        if not result.deleted:
+            continue
         try:
-            ids = await coordinator.plan(policy.tenant, policy.resource.value, current, limit)
-            if not ids:
-                continue
-            receipt = await coordinator.execute(
-                policy.tenant,
-                policy.resource.value,
-                ids,
+            await coordinator.record(
+                result.job.tenant,
+                result.job.resource,
+                result.ids,
+                deleted=result.deleted,
+                started=result.started,
+                completed=result.completed,
                 dry_run=False,
                 actor="scheduler",
                 mode="auto",
             )
-            deleted_total += int(receipt.count)
-            try:
-                purge_items_deleted_total.labels(policy.resource.value).inc(int(receipt.count))
-            except Exception:
-                pass
-        except Exception:
-            continue
+        except Exception as exc:
+            _log.debug("purge receipt failed: %s", exc)
 
     try:
         purge_runs_total.inc()
@@ -56,8 +103,23 @@ async def run_once(now: Optional[float] = None, per_resource_limit: int = 100) -
     return deleted_total
 
 
+async def run_forever(interval_s: Optional[float] = None) -> None:
+    """Run :func:`run_once` continuously, draining each pass under the row budget."""
+    interval = max(
+        1.0, float(settings.RETENTION_PURGE_INTERVAL_S if interval_s is None else interval_s)
+    )
+    while True:
+        try:
+            await run_once(per_resource_limit=None)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            _log.warning("retention purge pass failed: %s", exc)
+        await asyncio.sleep(interval)
+
+
 def _policy_active(policy: RetentionPolicy) -> bool:
     return bool(policy.enabled and policy.ttl_seconds > 0)
 
 
-__all__ = ["run_once"]
+__all__ = ["get_engine", "reset_engine", "run_forever", "run_once"]
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Response compression cost per codec.
+
+Drives :class:`app.middleware.compression.CompressionMiddleware` directly over
+ASGI for every installed codec (``gzip`` always; ``br`` / ``zstd`` when
+``brotli`` / ``zstandard`` are installed) plus ``identity``:
+
+* ``export`` - one buffered JSON decisions export: CPU seconds per MB of input
+  and compression ratio.
+* ``sse`` - a chat-style event stream: time to the first body byte, total
+  time, and wire bytes per event.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.middleware.compression import CompressionMiddleware, available_codecs  # noqa: E402
+
+RESULTS_DIR = Path("bench/results")
+
+
+def _export_body(rows: int) -> bytes:
+    return json.dumps(
+        [
+            {
+                "id": f"d{i:08d}",
+                "ts": 1_767_225_600_000 + i,
+                "tenant": f"tenant-{i % 7}",
+                "bot": f"bot-{i % 13}",
+                "outcome": "allow" if i % 5 else "block",
+                "rule_hits": ["secrets:*", "pii:email"] if i % 3 == 0 else [],
+            }
+            for i in range(rows)
+        ]
+    ).encode()
+
+
+def _apps(body: bytes, events: int, event_bytes: int) -> Dict[str, Any]:
+    async def export(scope, receive, send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"application/json")],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    async def sse(scope, receive, send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"text/event-stream")],
+            }
+        )
+        for i in range(events):
+            payload = {"delta": ("token " * (event_bytes // 6))[:event_bytes], "n": i}
+            chunk = f"data: {json.dumps(payload)}\n\n".encode()
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await asyncio.sleep(0)
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    return {"export": CompressionMiddleware(export), "sse": CompressionMiddleware(sse)}
+
+
+async def _drive(app: Any, codec: str) -> Dict[str, Any]:
+    scope = {"type": "http", "headers": [(b"accept-encoding", codec.encode())]}
+    first: List[float] = []
+    wire = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal wire
+        if message["type"] == "http.response.body" and message.get("body"):
+            if not first:
+                first.append(time.perf_counter())
+            wire += len(message["body"])
+
+    started = time.perf_counter()
+    cpu = time.process_time()
+    await app(scope, receive, send)
+    return {
+        "elapsed_s": time.perf_counter() - started,
+        "cpu_s": time.process_time() - cpu,
+        "ttfb_ms": (first[0] - started) * 1000.0 if first else 0.0,
+        "wire_bytes": wire,
+    }
+
+
+def run(rows: int = 20_000, events: int = 200, event_bytes: int = 120) -> Dict[str, Any]:
+    """Execute both scenarios for each codec and persist a JSON artifact."""
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    body = _export_body(rows)
+    saved = {k: os.environ.get(k) for k in ("COMPRESSION_ENABLED", "COMPRESSION_STREAMING")}
+    os.environ["COMPRESSION_ENABLED"] = "1"
+    os.environ["COMPRESSION_STREAMING"] = "1"
+    apps = _apps(body, events, event_bytes)
+    codecs: Dict[str, Any] = {}
+    try:
+        for codec in ("identity",) + available_codecs():
+            export = asyncio.run(_drive(apps["export"], codec))
+            sse = asyncio.run(_drive(apps["sse"], codec))
+            mb = len(body) / (1024 * 1024)
+            codecs[codec] = {
+                "export_cpu_s_per_mb": export["cpu_s"] / mb if mb else 0.0,
+                "export_ratio": len(body) / export["wire_bytes"] if export["wire_bytes"] else 0.0,
+                "sse_ttfb_ms": sse["ttfb_ms"],
+                "sse_total_ms": sse["elapsed_s"] * 1000.0,
+                "sse_bytes_per_event": sse["wire_bytes"] / events if events else 0.0,
+            }
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+    result: Dict[str, Any] = {
+        "version": 1,
+        "ts": int(time.time()),
+        "host": os.uname().nodename if hasattr(os, "uname") else "",
+        "export_bytes": len(body),
+        "events": events,
+        "codecs": codecs,
+    }
+    path = RESULTS_DIR / f"compression_{result['ts']}.json"
+    path.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    for name, row in codecs.items():
+        print(
+            f"{name:8s} export: {row['export_cpu_s_per_mb'] * 1000:.1f}ms CPU/MB "
+            f"ratio={row['export_ratio']:.1f}  sse: ttfb={row['sse_ttfb_ms']:.3f}ms "
+            f"{row['sse_bytes_per_event']:.0f}B/event"
+        )
+    print(f"Wrote {path}")
+    return result
+
+
+if __name__ == "__main__":
+    run()
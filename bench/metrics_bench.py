@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Instrumentation overhead: metric calls per request, cost per event, scrape latency.
+
+* ``per_request`` drives ``/guardrail/evaluate`` in-process and counts native
+  ``prometheus_client`` label resolutions and increments per request next to
+  increments on buffered counters from ``app.observability.metrics_facade``.
+* ``per_event`` times one counter increment through each path.
+* ``scrape`` builds registries holding ``series`` tenant/bot series and times
+  ``generate_latest`` against ``metrics_facade.render`` cold, unchanged, and
+  after a single increment.
+"""
+
+from __future__ import annotations
+
+import collections
+import json
+import os
+import sys
+import time
+import timeit
+from pathlib import Path
+from statistics import median
+from typing import Any, Callable, Dict, List, Sequence
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from prometheus_client import (  # noqa: E402
+    CollectorRegistry,
+    Counter,
+    generate_latest,
+    metrics as prom_metrics,
+)
+
+from app.observability import metrics_facade  # noqa: E402
+
+RESULTS_DIR = Path("bench/results")
+
+BODY = {"text": "hello there, please summarise this ticket for the team"}
+
+
+def _count_calls(requests: int) -> Dict[str, Any]:
+    from fastapi.testclient import TestClient
+
+    from app.main import create_app
+
+    calls: collections.Counter[str] = collections.Counter()
+    patched: List[tuple[Any, str, Any]] = []
+
+    def _patch(owner: Any, attr: str, key: str) -> None:
+        original = getattr(owner, attr)
+
+        def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+            calls[key] += 1
+            return original(self, *args, **kwargs)
+
+        patched.append((owner, attr, original))
+        setattr(owner, attr, wrapper)
+
+    client = TestClient(create_app())
+    client.post("/guardrail/evaluate", json=BODY)  # warm caches and create children
+    _patch(prom_metrics.MetricWrapperBase, "labels", "native_labels")
+    _patch(prom_metrics.Counter, "inc", "native_inc")
+    _patch(prom_metrics.Gauge, "set", "native_set")
+    _patch(prom_metrics.Histogram, "observe", "native_observe")
+    _patch(metrics_facade._CounterChild, "inc", "buffered_inc")
+    try:
+        started = time.perf_counter()
+        for _ in range(requests):
+            client.post("/guardrail/evaluate", json=BODY)
+        elapsed = time.perf_counter() - started
+    finally:
+        for owner, attr, original in reversed(patched):
+            setattr(owner, attr, original)
+    per_request = {key: calls[key] / requests for key in sorted(calls)}
+    per_request["request_ms"] = elapsed / requests * 1e3
+    return per_request
+
+
+def _ns(fn: Callable[[], Any], number: int) -> float:
+    return median(timeit.repeat(fn, number=number, repeat=5)) / number * 1e9
+
+
+def _per_event(number: int) -> Dict[str, float]:
+    registry = CollectorRegistry()
+    native = Counter("bench_native_total", "native", ("tenant", "bot"), registry=registry)
+    buffered = metrics_facade.BufferedCounter(
+        "bench_buffered_total", "buffered", ("tenant", "bot"), registry=registry
+    )
+    native_child = native.labels("acme", "support")
+    buffered_child = buffered.labels("acme", "support")
+    baseline = _ns(lambda: None, number)
+    return {
+        "native_labels_inc_ns": _ns(lambda: native.labels("acme", "support").inc(), number)
+        - baseline,
+        "native_child_inc_ns": _ns(native_child.inc, number) - baseline,
+        "buffered_labels_inc_ns": _ns(lambda: buffered.labels("acme", "support").inc(), number)
+        - baseline,
+        "buffered_child_inc_ns": _ns(buffered_child.inc, number) - baseline,
+    }
+
+
+def _ms(fn: Callable[[], Any]) -> float:
+    started = time.perf_counter()
+    fn()
+    return (time.perf_counter() - started) * 1e3
+
+
+def _scrape(series: int, families: int) -> Dict[str, Any]:
+    per_family = max(1, series // families)
+    native_reg = CollectorRegistry()
+    buffered_reg = CollectorRegistry()
+    buffered: List[metrics_facade.BufferedCounter] = []
+    for f in range(families):
+        name = f"bench_family_{f}_total"
+        native = Counter(name, "bench family", ("tenant", "bot"), registry=native_reg)
+        fast = metrics_facade.BufferedCounter(
+            name, "bench family", ("tenant", "bot"), registry=buffered_reg, max_series=per_family
+        )
+        buffered.append(fast)
+        for i in range(per_family):
+            native.labels(f"t{i % 100}", f"b{i}").inc(i)
+            fast.labels(f"t{i % 100}", f"b{i}").inc(i)
+
+    generate = _ms(lambda: generate_latest(native_reg))
+    native_cold = _ms(lambda: metrics_facade.render(native_reg))
+    native_warm = median(_ms(lambda: metrics_facade.render(native_reg)) for _ in range(3))
+    cold = _ms(lambda: metrics_facade.render(buffered_reg))
+    warm = median(_ms(lambda: metrics_facade.render(buffered_reg)) for _ in range(3))
+    buffered[0].labels("t0", "b0").inc()
+    one_dirty = _ms(lambda: metrics_facade.render(buffered_reg))
+    return {
+        "series": per_family * families,
+        "families": families,
+        "generate_latest_ms": generate,
+        "render_native_cold_ms": native_cold,
+        "render_native_unchanged_ms": native_warm,
+        "render_buffered_cold_ms": cold,
+        "render_buffered_unchanged_ms": warm,
+        "render_buffered_one_dirty_ms": one_dirty,
+        "bytes": len(metrics_facade.render(buffered_reg)),
+    }
+
+
+def run(
+    requests: int = 200,
+    number: int = 100_000,
+    series: Sequence[int] = (10_000,),
+    families: int = 20,
+) -> Dict[str, Any]:
+    """Execute the metrics scenarios and persist a JSON artifact."""
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    result = {
+        "version": 1,
+        "ts": int(time.time()),
+        "host": os.uname().nodename if hasattr(os, "uname") else "",
+        "per_request": _count_calls(requests),
+        "per_event": _per_event(number),
+        "scrape": [_scrape(n, families) for n in series],
+    }
+    path = RESULTS_DIR / f"metrics_{result['ts']}.json"
+    path.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    calls = result["per_request"]
+    print(
+        "per request: "
+        + ", ".join(f"{k}={v:.1f}" for k, v in calls.items() if k != "request_ms")
+        + f" ({calls['request_ms']:.2f}ms/request)"
+    )
+    print("per event:   " + ", ".join(f"{k}={v:.0f}" for k, v in result["per_event"].items()))
+    for row in result["scrape"]:
+        print(
+            f"scrape {row['series']:>6} series: generate_latest={row['generate_latest_ms']:.1f}ms "
+            f"render cold={row['render_buffered_cold_ms']:.1f}ms "
+            f"unchanged={row['render_buffered_unchanged_ms']:.1f}ms "
+            f"one dirty={row['render_buffered_one_dirty_ms']:.1f}ms "
+            f"(native unchanged={row['render_native_unchanged_ms']:.1f}ms)"
+        )
+    print(f"Wrote {path}")
+    return result
+
+
+if __name__ == "__main__":
+    run()
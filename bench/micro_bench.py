@@ -0,0 +1,560 @@
+#!/usr/bin/env python3
+"""In-process component microbenchmarks with a regression gate.
+
+Each component runs in isolation against the seeded corpus from
+:mod:`bench.corpus`:
+
+* ``middleware.<Layer>`` mounts one entry of ``create_app().user_middleware``
+  around a bare echo endpoint and drives it with raw ASGI calls.
+* ``detector.<name>`` calls a detector or sanitizer function directly.
+* ``store.<name>`` exercises the idempotency stores (in-memory and Redis via
+  ``fakeredis``) and the SQLite decisions store in a temporary directory.
+
+Every case records ops/sec (best of ``repeat`` timed batches) plus two
+allocation figures from ``tracemalloc``: the median per-op allocation
+high-water mark and the net blocks retained per op. :func:`check` compares
+a run with the locked baseline in ``bench/baseline/micro.json`` and reports
+every case whose throughput dropped, or whose peak allocation grew, by more
+than the tolerance. Nothing here needs the network.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import fnmatch
+import gc
+import itertools
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from pathlib import Path
+from statistics import median
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from starlette.types import Receive, Scope, Send  # noqa: E402
+
+from bench import corpus  # noqa: E402
+
+RESULTS_DIR = Path("bench/results")
+BASELINE = Path("bench/baseline/micro.json")
+
+DETECTOR_PROFILES = tuple(corpus.PROFILES)
+MIDDLEWARE_PROFILES = ("small_en", "adversarial")
+TOKEN_TERMS = ("ignore previous instructions", "system prompt", "password", "api key")
+# Peak allocations below this many bytes never count as a regression.
+ALLOC_SLACK_BYTES = 512
+_MAX_BATCH = 1 << 20
+
+
+@dataclass
+class Case:
+    """One component bound to one corpus profile.
+
+    ``op`` performs a single operation; for async cases it returns an
+    awaitable that :func:`measure` drives on ``loop``.
+    """
+
+    id: str
+    component: str
+    profile: str
+    op: Callable[[], Any]
+    loop: Optional[asyncio.AbstractEventLoop] = None
+    info: Dict[str, Any] = field(default_factory=dict)
+
+
+def _cycle(items: Sequence[Any]) -> Iterator[Any]:
+    return itertools.cycle(list(items))
+
+
+# ---------------------------------------------------------------------------
+# Detectors
+# ---------------------------------------------------------------------------
+
+
+def _detectors() -> Dict[str, Callable[[str], Any]]:
+    from app.routes import guardrail
+    from app.sanitizer import detect_confusables
+    from app.sanitizers import unicode as unicode_hygiene
+    from app.sanitizers.unicode_sanitizer import sanitize_text
+    from app.scanners.token_sequence_detector import find_terms_tokenized
+    from app.security.unicode_sanitizer import UnicodeSanitizerCfg, sanitize_unicode
+    from app.services import policy
+    from app.services.detectors import evaluate_prompt
+
+    cfg = UnicodeSanitizerCfg()
+    return {
+        "evaluate_prompt": evaluate_prompt,
+        "rule_hits": policy.rule_hits,
+        "redact.policy": policy._apply_redactions,
+        "redact.route": lambda t: guardrail._apply_redactions(t, direction="ingress"),
+        "unicode.hygiene": unicode_hygiene.sanitize_unicode,
+        "unicode.sanitize_text": sanitize_text,
+        "unicode.threats": lambda t: sanitize_unicode(t, cfg),
+        "unicode.confusables": detect_confusables,
+        "token_sequence": lambda t: find_terms_tokenized(t, TOKEN_TERMS),
+    }
+
+
+def _feed(fn: Callable[[str], Any], texts: Iterator[str]) -> Callable[[], Any]:
+    return lambda: fn(next(texts))
+
+
+def detector_cases(texts: Dict[str, List[str]]) -> List[Case]:
+    cases: List[Case] = []
+    for name, fn in _detectors().items():
+        for profile in DETECTOR_PROFILES:
+            it = _cycle(texts[profile])
+            cases.append(
+                Case(
+                    f"detector.{name}/{profile}",
+                    f"detector.{name}",
+                    profile,
+                    _feed(fn, it),
+                )
+            )
+    return cases
+
+
+# ---------------------------------------------------------------------------
+# Middleware
+# ---------------------------------------------------------------------------
+
+
+async def _echo(scope: Scope, receive: Receive, send: Send) -> None:
+    while True:
+        message = await receive()
+        if message["type"] != "http.request" or not message.get("more_body"):
+            break
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/json")],
+        }
+    )
+    await send({"type": "http.response.body", "body": b'{"ok":true}'})
+
+
+def _request(
+    body: bytes, app: Any = None
+) -> Tuple[Dict[str, Any], Callable[[], Awaitable[Dict[str, Any]]]]:
+    # Starlette sets ``scope["app"]`` before the middleware stack runs.
+    scope = {
+        "app": app,
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/guardrail/evaluate",
+        "raw_path": b"/guardrail/evaluate",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"bench"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"x-guardrail-tenant", b"bench"),
+            (b"x-guardrail-bot", b"micro"),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+        "state": {},
+    }
+    sent = False
+
+    async def receive() -> Dict[str, Any]:
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return scope, receive
+
+
+def middleware_cases(texts: Dict[str, List[str]]) -> Tuple[List[Case], List[Dict[str, str]]]:
+    from app.main import create_app
+    from app.observability.stage_timing import layer_name
+
+    app = create_app()
+    cases: List[Case] = []
+    skipped: List[Dict[str, str]] = []
+    seen: Dict[str, int] = {}
+    for entry in app.user_middleware:
+        kwargs: Dict[str, Any] = dict(entry.kwargs or {})
+        name = layer_name(entry.cls, kwargs)
+        seen[name] = seen.get(name, 0) + 1
+        if seen[name] > 1:
+            name = f"{name}{seen[name]}"
+        component = f"middleware.{name}"
+        try:
+            layer = entry.cls(_echo, *entry.args, **kwargs)
+        except Exception as exc:
+            skipped.append({"id": component, "reason": f"{type(exc).__name__}: {exc}"})
+            continue
+        for profile in MIDDLEWARE_PROFILES:
+            bodies = _cycle([json.dumps({"text": t}).encode() for t in texts[profile]])
+            case = Case(f"{component}/{profile}", component, profile, lambda: None)
+
+            async def call(layer: Any = layer, bodies: Any = bodies, case: Case = case) -> None:
+                scope, receive = _request(next(bodies), app)
+
+                async def send(message: Dict[str, Any]) -> None:
+                    if message["type"] == "http.response.start":
+                        case.info["status"] = message["status"]
+
+                await layer(scope, receive, send)
+
+            case.op = call
+            case.loop = asyncio.new_event_loop()
+            cases.append(case)
+    return cases, skipped
+
+
+# ---------------------------------------------------------------------------
+# Stores
+# ---------------------------------------------------------------------------
+
+
+def _idem_case(component: str, store: Any, loop: asyncio.AbstractEventLoop, body: bytes) -> Case:
+    from app.idempotency.store import StoredResponse
+
+    keys = _cycle([f"k{i}" for i in range(1024)])
+    resp = StoredResponse(200, {"content-type": "application/json"}, body, "application/json")
+
+    async def cycle() -> None:
+        key = next(keys)
+        leader, owner = await store.acquire_leader(key, 60, "fp")
+        if leader:
+            await store.put(key, resp, 60)
+            await store.release(key, owner)
+        await store.get(key)
+        await store.purge(key)
+
+    return Case(f"{component}/small_en", component, "small_en", cycle, loop=loop)
+
+
+def store_cases(
+    texts: Dict[str, List[str]], stack: ExitStack
+) -> Tuple[List[Case], List[Dict[str, str]]]:
+    from app.idempotency.memory_store import MemoryIdemStore
+    from app.idempotency.redis_store import RedisIdemStore
+
+    cases: List[Case] = []
+    skipped: List[Dict[str, str]] = []
+    body = json.dumps({"text": texts["small_en"][0]}).encode()
+
+    loop = asyncio.new_event_loop()
+    cases.append(_idem_case("store.idem.memory", MemoryIdemStore(), loop, body))
+
+    try:
+        from fakeredis import aioredis as fake_aioredis
+    except ImportError as exc:
+        skipped.append({"id": "store.idem.redis", "reason": str(exc)})
+    else:
+        loop = asyncio.new_event_loop()
+        client = loop.run_until_complete(_make_fake_redis(fake_aioredis))
+        cases.append(_idem_case("store.idem.redis", RedisIdemStore(client), loop, body))
+
+    try:
+        cases.extend(_decision_cases(texts, stack))
+    except ImportError as exc:  # SQLAlchemy is optional for the decisions store
+        skipped.append({"id": "store.decisions", "reason": str(exc)})
+    return cases, skipped
+
+
+def _decision_cases(texts: Dict[str, List[str]], stack: ExitStack) -> List[Case]:
+    from sqlalchemy import create_engine
+
+    from app.services import decisions
+
+    tmp = stack.enter_context(tempfile.TemporaryDirectory(prefix="micro-bench-"))
+    engine = create_engine(f"sqlite:///{tmp}/decisions.db", future=True)
+    decisions._meta.create_all(engine)
+    previous = decisions._engine_instance
+    decisions._engine_instance = engine
+    stack.callback(setattr, decisions, "_engine_instance", previous)
+    stack.callback(engine.dispose)
+
+    ids = itertools.count()
+    details = {"text": texts["small_en"][0][:128], "rule_hits": ["secrets:openai_key"]}
+
+    def record() -> None:
+        n = next(ids)
+        decisions.record(
+            id=f"micro-{n}", tenant="bench", bot=f"bot-{n % 8}", outcome="allow", details=details
+        )
+
+    def query() -> None:
+        decisions.query(None, "bench", None, None, 50, 0)
+
+    return [
+        Case("store.decisions.record/small_en", "store.decisions.record", "small_en", record),
+        Case("store.decisions.query/small_en", "store.decisions.query", "small_en", query),
+    ]
+
+
+async def _make_fake_redis(module: Any) -> Any:
+    return module.FakeRedis()
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+
+def _batch(case: Case, n: int) -> float:
+    op = case.op
+    if case.loop is None:
+        started = time.perf_counter()
+        for _ in range(n):
+            op()
+        return time.perf_counter() - started
+
+    async def many() -> float:
+        started = time.perf_counter()
+        for _ in range(n):
+            await op()
+        return time.perf_counter() - started
+
+    return case.loop.run_until_complete(many())
+
+
+def _allocations(case: Case, samples: int) -> Tuple[int, float]:
+    peaks: List[int] = []
+    gc.collect()
+    tracemalloc.start()
+    try:
+        blocks = sys.getallocatedblocks()
+        for _ in range(samples):
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            _batch(case, 1)
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+        gc.collect()
+        retained = (sys.getallocatedblocks() - blocks) / samples
+    finally:
+        tracemalloc.stop()
+    return int(median(peaks)), retained
+
+
+def measure(case: Case, min_time: float, repeat: int, alloc_samples: int) -> Dict[str, Any]:
+    """Time ``case`` and sample its allocations."""
+    _batch(case, 3)  # warm caches, compiled regexes, lazily built state
+    n = 1
+    while n < _MAX_BATCH and _batch(case, n) < min_time:
+        n *= 2
+    best = min(_batch(case, n) for _ in range(max(1, repeat)))
+    peak, retained = _allocations(case, max(1, alloc_samples))
+    row: Dict[str, Any] = {
+        "id": case.id,
+        "component": case.component,
+        "profile": case.profile,
+        "iterations": n,
+        "ops_per_sec": n / best if best > 0 else 0.0,
+        "ns_per_op": best / n * 1e9,
+        "peak_alloc_bytes": peak,
+        "retained_blocks_per_op": round(retained, 3),
+    }
+    row.update(case.info)
+    return row
+
+
+def _selected(case_id: str, only: Sequence[str]) -> bool:
+    return not only or any(fnmatch.fnmatchcase(case_id, pattern) for pattern in only)
+
+
+def run(
+    only: Sequence[str] = (),
+    seed: int = 1337,
+    min_time: float = 0.05,
+    repeat: int = 5,
+    alloc_samples: int = 20,
+) -> Dict[str, Any]:
+    """Run every selected case and persist a JSON artifact.
+
+    ``only`` holds ``fnmatch`` patterns over case ids such as
+    ``detector.*`` or ``middleware.IngressRisk/*``.
+    """
+    texts = {name: corpus.generate(profile, seed) for name, profile in corpus.PROFILES.items()}
+    rows: List[Dict[str, Any]] = []
+    skipped: List[Dict[str, str]] = []
+    with ExitStack() as stack:
+        cases = detector_cases(texts)
+        for build in (middleware_cases, lambda t: store_cases(t, stack)):
+            built, missing = build(texts)
+            cases.extend(built)
+            skipped.extend(missing)
+        loops = {id(case.loop): case.loop for case in cases if case.loop is not None}
+        logging.disable(logging.INFO)  # access/decision logs would dominate the timings
+        try:
+            for case in cases:
+                if not _selected(case.id, only):
+                    continue
+                try:
+                    rows.append(measure(case, min_time, repeat, alloc_samples))
+                except Exception as exc:
+                    skipped.append({"id": case.id, "reason": f"{type(exc).__name__}: {exc}"})
+        finally:
+            logging.disable(logging.NOTSET)
+            for loop in loops.values():
+                loop.close()
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    result: Dict[str, Any] = {
+        "version": 1,
+        "ts": int(time.time()),
+        "host": os.uname().nodename if hasattr(os, "uname") else "",
+        "python": sys.version.split()[0],
+        "seed": seed,
+        "cases": rows,
+        "skipped": [s for s in skipped if _selected(s["id"], only)],
+    }
+    text = json.dumps(result, indent=2)
+    path = RESULTS_DIR / f"micro_{result['ts']}.json"
+    path.write_text(text, encoding="utf-8")
+    (RESULTS_DIR / "micro_last.json").write_text(text, encoding="utf-8")
+    for row in rows:
+        print(
+            f"{row['id']:<52} {row['ops_per_sec']:>12,.0f} ops/s "
+            f"{row['peak_alloc_bytes']:>9,} B peak {row['retained_blocks_per_op']:>7.2f} blk"
+        )
+    for miss in result["skipped"]:
+        print(f"{miss['id']:<52} skipped: {miss['reason']}")
+    print(f"Wrote {path}")
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Regression gate
+# ---------------------------------------------------------------------------
+
+
+def _load(path: Path) -> Dict[str, Any]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(data, dict):
+        raise ValueError(f"{path} must contain a JSON object")
+    return data
+
+
+def check(
+    result: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: Optional[float] = None,
+) -> Tuple[bool, List[str]]:
+    """Compare ``result`` with ``baseline``; returns ``(ok, regressions)``.
+
+    A case regresses when its ops/sec falls below ``(1 - tolerance)`` of the
+    baseline or its peak allocation exceeds ``(1 + tolerance)`` of it (plus
+    :data:`ALLOC_SLACK_BYTES`). Baseline cases may set their own
+    ``tolerance``; cases missing from either side are ignored.
+    """
+    default = float(baseline.get("tolerance", 0.25) if tolerance is None else tolerance)
+    current = {row["id"]: row for row in result.get("cases", [])}
+    problems: List[str] = []
+    for base in baseline.get("cases", []):
+        row = current.get(base.get("id"))
+        if row is None:
+            continue
+        tol = float(base.get("tolerance", default))
+        base_ops = float(base.get("ops_per_sec", 0.0))
+        ops = float(row.get("ops_per_sec", 0.0))
+        if base_ops > 0 and ops < base_ops * (1.0 - tol):
+            problems.append(f"{row['id']}: {ops:,.0f} ops/s < {base_ops:,.0f} * (1-{tol:.2f})")
+        base_peak = float(base.get("peak_alloc_bytes", 0))
+        peak = float(row.get("peak_alloc_bytes", 0))
+        if peak > base_peak * (1.0 + tol) + ALLOC_SLACK_BYTES:
+            problems.append(
+                f"{row['id']}: peak alloc {peak:,.0f} B > {base_peak:,.0f} B * (1+{tol:.2f})"
+            )
+    return not problems, problems
+
+
+def check_baseline(
+    result: Dict[str, Any], path: Path = BASELINE, tolerance: Optional[float] = None
+) -> Tuple[bool, str]:
+    """:func:`check` against the baseline file.
+
+    A missing, unlocked or empty baseline fails, as does a run that shares no
+    case with it: a gate that compares nothing must not report a pass.
+    """
+    if not path.exists():
+        return False, f"{path} missing; lock one with --write-baseline"
+    baseline = _load(path)
+    if not baseline.get("locked", False):
+        return False, f"{path} is not locked; lock one with --write-baseline"
+    base_ids = {c.get("id") for c in baseline.get("cases", [])}
+    if not base_ids:
+        return False, f"{path} has no cases; lock one with --write-baseline"
+    if not base_ids & {row.get("id") for row in result.get("cases", [])}:
+        return False, "No case of this run is in the baseline; nothing compared"
+    ok, problems = check(result, baseline, tolerance)
+    if ok:
+        return True, "No component regressions beyond tolerance"
+    return False, "\n".join(["Component regression over tolerance:", *problems])
+
+
+def write_baseline(result: Dict[str, Any], path: Path = BASELINE, tolerance: float = 0.25) -> None:
+    """Lock ``result`` in as the baseline, keeping per-case tolerances already set."""
+    previous: Dict[str, Any] = {}
+    if path.exists():
+        previous = {c["id"]: c for c in _load(path).get("cases", []) if "tolerance" in c}
+    cases = []
+    for row in result["cases"]:
+        entry = {k: row[k] for k in ("id", "ops_per_sec", "peak_alloc_bytes")}
+        if row["id"] in previous:
+            entry["tolerance"] = previous[row["id"]]["tolerance"]
+        cases.append(entry)
+    baseline = {
+        "version": 1,
+        "locked": True,
+        "tolerance": tolerance,
+        "seed": result["seed"],
+        "host": result["host"],
+        "python": result["python"],
+        "cases": cases,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(baseline, indent=2) + "\n", encoding="utf-8")
+
+
+def _main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--only", action="append", default=[], help="fnmatch pattern over case ids")
+    ap.add_argument("--seed", type=int, default=1337)
+    ap.add_argument("--min-time", type=float, default=0.05, help="seconds per timed batch")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--check", action="store_true", help="fail on regressions vs the baseline")
+    ap.add_argument("--write-baseline", action="store_true", help="lock this run as baseline")
+    ap.add_argument(
+        "--tolerance",
+        type=float,
+        default=float(os.environ["BENCH_THRESHOLD"]) if os.environ.get("BENCH_THRESHOLD") else None,
+    )
+    args = ap.parse_args(argv)
+    result = run(args.only, seed=args.seed, min_time=args.min_time, repeat=args.repeat)
+    if args.write_baseline:
+        write_baseline(result, tolerance=0.25 if args.tolerance is None else args.tolerance)
+        print(f"Locked baseline {BASELINE}")
+        return 0
+    if args.check:
+        ok, message = check_baseline(result, tolerance=args.tolerance)
+        print(message)
+        return 0 if ok else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
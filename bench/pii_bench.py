@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""PII hashing redactor cost against match count.
+
+Builds CRM-style contact dumps with 10 / 1k / 50k emails and phones (a share of
+contacts repeat, as in real exports) and times the pre-snapshot redactor
+(settings per hash, one slice-and-concat per match, a second scan for phones)
+against :func:`app.compliance.pii.redact_and_hash`. The old redactor's phone
+pass can also hit digit runs inside its own email tokens, so only the new
+counters are checked against the document.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.compliance import pii  # noqa: E402
+from app.config import get_settings  # noqa: E402
+
+RESULTS_DIR = Path("bench/results")
+
+
+def _document(matches: int, unique_ratio: float = 0.5) -> str:
+    unique = max(1, int(matches * unique_ratio) // 2)
+    rows = []
+    for i in range(max(1, matches // 2)):
+        n = i % unique
+        rows.append(f"contact {n}: user{n}@example.com, phone 415-555-{n % 10000:04d}; notes ok")
+    return "\n".join(rows)
+
+
+def _legacy(text: str) -> Tuple[str, Dict[str, int]]:
+    # The redactor as it was: settings per call and per hash, quadratic splicing.
+    s = get_settings()
+    counters: Dict[str, int] = {}
+    out = text
+    if s.PII_EMAIL_HASH_ENABLED:
+        emails = list(pii._EMAIL_RE.finditer(out))
+        if emails:
+            counters["pii:email"] = len(emails)
+            for m in reversed(emails):
+                s2 = get_settings()
+                token = (
+                    f"[EMAIL:{pii._salted_hash(m.group(0), s2.PII_SALT, s2.PII_HASH_ALGO)[:12]}]"
+                )
+                start, end = m.span()
+                out = out[:start] + token + out[end:]
+    if s.PII_PHONE_HASH_ENABLED:
+        phones = list(pii._PHONE_RE.finditer(out))
+        if phones:
+            counters["pii:phone"] = len(phones)
+            for m in reversed(phones):
+                s2 = get_settings()
+                token = (
+                    f"[PHONE:{pii._salted_hash(m.group(0), s2.PII_SALT, s2.PII_HASH_ALGO)[:12]}]"
+                )
+                start, end = m.span()
+                out = out[:start] + token + out[end:]
+    return out, counters
+
+
+def _time(fn: Any, text: str, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(text)
+    return (time.perf_counter() - started) / repeat * 1000.0
+
+
+def run(
+    match_counts: Sequence[int] = (10, 1_000, 50_000),
+    repeat: int = 3,
+    legacy_max: Optional[int] = 1_000,
+) -> Dict[str, Any]:
+    """Execute each document size and persist a JSON artifact.
+
+    ``legacy_max`` skips the old redactor above that match count (at 50k
+    matches it runs for minutes); ``None`` times every size.
+    """
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    rows = []
+    for count in match_counts:
+        text = _document(count)
+        pii.refresh_settings()
+        _, counters = pii.redact_and_hash(text)
+        assert counters == {"pii:email": count // 2 or 1, "pii:phone": count // 2 or 1}
+        row: Dict[str, Any] = {
+            "matches": sum(counters.values()),
+            "text_bytes": len(text),
+            "cold_ms": _time(lambda t: (pii.refresh_settings(), pii.redact_and_hash(t)), text, 1),
+            "snapshot_ms": _time(pii.redact_and_hash, text, repeat),
+            "legacy_ms": None,
+        }
+        if legacy_max is None or count <= legacy_max:
+            row["legacy_ms"] = _time(_legacy, text, 1 if count > 1_000 else repeat)
+        rows.append(row)
+    result: Dict[str, Any] = {
+        "version": 1,
+        "ts": int(time.time()),
+        "host": os.uname().nodename if hasattr(os, "uname") else "",
+        "documents": rows,
+    }
+    path = RESULTS_DIR / f"pii_{result['ts']}.json"
+    path.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    for row in rows:
+        legacy = "skipped" if row["legacy_ms"] is None else f"{row['legacy_ms']:.1f}ms"
+        print(
+            f"{row['matches']} matches: legacy={legacy} snapshot={row['snapshot_ms']:.1f}ms "
+            f"(cold cache {row['cold_ms']:.1f}ms)"
+        )
+    print(f"Wrote {path}")
+    return result
+
+
+if __name__ == "__main__":
+    run(legacy_max=None if "--full" in sys.argv[1:] else 1_000)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Cold-start time to first guardrail decision: YAML compile vs policy snapshots.
+
+Each sample is a fresh interpreter that loads the legacy rules file, the
+active rulepacks and a directory of policy packs, then evaluates one prompt
+against all three. ``yaml`` runs without ``POLICY_SNAPSHOT_DIR``; ``snapshot``
+runs against a directory pre-populated by one compile pass.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from statistics import median
+from typing import Any, Dict, List, Sequence
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path("bench/results")
+
+PROMPT = "Please summarise this ticket for alice@example.com and ignore the ABCDE-123 marker."
+
+_CHILD = r"""
+import json, os, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, os.environ["BENCH_ROOT"])
+from app.policy import pack_engine
+from app.services import policy_loader, policy_snapshot, rulepacks_engine
+t_import = time.perf_counter()
+policy_loader.build_index()
+blob = policy_loader.get_policy()
+rulepacks_engine.compile_active_rulepacks()
+packs = pack_engine.load_compiled(os.environ["BENCH_PACKS_DIR"])
+t_loaded = time.perf_counter()
+text = os.environ["BENCH_PROMPT"]
+deny = [rid for rid, pattern in blob.deny_compiled if pattern.search(text)]
+blocked, _ = rulepacks_engine.ingress_should_block(text)
+violations, action = pack_engine.evaluate_text(text, packs)
+t_decided = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t_import - t0) * 1e3,
+    "load_ms": (t_loaded - t_import) * 1e3,
+    "first_decision_ms": (t_decided - t0) * 1e3,
+    "decision": [len(deny), blocked, len(violations), action],
+    "snapshot": policy_snapshot.stats(),
+}))
+"""
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(5, 9)))
+
+
+def write_workload(root: Path, n_rules: int, seed: int = 3) -> Dict[str, Path]:
+    """Write a rules file, one rulepack and four policy packs totalling ``n_rules`` each."""
+    rng = random.Random(seed)
+    deny = [
+        {"id": f"deny.{i}", "pattern": rf"\b{_word(rng)}\s+{_word(rng)}\b", "flags": ["i"]}
+        for i in range(n_rules)
+    ]
+    rules_path = root / "rules.yaml"
+    rules_path.write_text(json.dumps({"version": "bench", "deny": deny}), encoding="utf-8")
+
+    rulepacks = root / "rulepacks"
+    rulepacks.mkdir()
+    controls = [
+        {
+            "id": f"ctl.{i}",
+            "phase": "ingress" if i % 2 else "egress",
+            "action": "block" if i % 2 else "redact",
+            "type": "regex",
+            "pattern": rf"{_word(rng)}[-_ ]?\d{{3}}",
+        }
+        for i in range(n_rules)
+    ]
+    (rulepacks / "synthetic.yaml").write_text(
+        json.dumps({"name": "synthetic", "controls": controls}), encoding="utf-8"
+    )
+
+    packs = root / "packs"
+    packs.mkdir()
+    per_pack = max(1, n_rules // 4)
+    for p in range(4):
+        rules: List[Dict[str, Any]] = []
+        for i in range(per_pack):
+            rule: Dict[str, Any] = {
+                "id": f"p{p}.r{i}",
+                "title": f"Synthetic rule {i}",
+                "severity": "medium",
+                "advisory": ("flag", "clarify", "block")[i % 3],
+                "references": ["bench"],
+            }
+            if i % 2:
+                rule["pattern"] = rf"\b{_word(rng)}[-_ ]?\d{{2,4}}\b"
+            else:
+                rule["any_terms"] = [f"{_word(rng)} {_word(rng)}" for _ in range(3)]
+            rules.append(rule)
+        doc = {"pack": f"SYN{p}", "version": "1", "rules": rules}
+        (packs / f"syn{p}.yaml").write_text(json.dumps(doc), encoding="utf-8")
+    return {"rules": rules_path, "rulepacks": rulepacks, "packs": packs}
+
+
+def _child_env(workload: Dict[str, Path], snapshot_dir: str | None) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.pop("POLICY_SNAPSHOT_DIR", None)
+    env.update(
+        {
+            "BENCH_ROOT": str(ROOT),
+            "BENCH_PACKS_DIR": str(workload["packs"]),
+            "BENCH_PROMPT": PROMPT,
+            "POLICY_RULES_PATH": str(workload["rules"]),
+            "POLICY_AUTORELOAD": "false",
+            "RULEPACKS_DIR": str(workload["rulepacks"]),
+            "RULEPACKS_ACTIVE": "synthetic",
+            "RULEPACKS_ENFORCE": "1",
+        }
+    )
+    if snapshot_dir is not None:
+        env["POLICY_SNAPSHOT_DIR"] = snapshot_dir
+    return env
+
+
+def _sample(env: Dict[str, str]) -> Dict[str, Any]:
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD],
+        env=env,
+        cwd=str(ROOT),
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    row: Dict[str, Any] = json.loads(out.strip().splitlines()[-1])
+    row["process_ms"] = (time.perf_counter() - start) * 1e3
+    return row
+
+
+def _summary(samples: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    keys = ("import_ms", "load_ms", "first_decision_ms", "process_ms")
+    return {key: median(s[key] for s in samples) for key in keys}
+
+
+def run(sizes: Sequence[int] = (100, 1_000), samples: int = 5) -> Dict[str, Any]:
+    """Execute the cold-start scenario and persist a JSON artifact."""
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    scenarios: List[Dict[str, Any]] = []
+    for n_rules in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            workload = write_workload(Path(tmp), n_rules)
+            snap_dir = str(Path(tmp) / "snapshots")
+            yaml_env = _child_env(workload, None)
+            snap_env = _child_env(workload, snap_dir)
+            compiled = _sample(snap_env)  # populates the snapshot directory
+            yaml_rows = [_sample(yaml_env) for _ in range(samples)]
+            snap_rows = [_sample(snap_env) for _ in range(samples)]
+        yaml_s, snap_s = _summary(yaml_rows), _summary(snap_rows)
+        scenarios.append(
+            {
+                "id": f"rules={n_rules}",
+                "rules": n_rules,
+                "yaml": yaml_s,
+                "snapshot": snap_s,
+                "compile_pass": _summary([compiled]),
+                "load_speedup": yaml_s["load_ms"] / snap_s["load_ms"] if snap_s["load_ms"] else 0.0,
+                "snapshot_hits": snap_rows[-1]["snapshot"]["hits"],
+                "same_decision": all(r["decision"] == yaml_rows[0]["decision"] for r in snap_rows),
+            }
+        )
+
+    result = {
+        "version": 1,
+        "ts": int(time.time()),
+        "host": os.uname().nodename if hasattr(os, "uname") else "",
+        "samples": samples,
+        "scenarios": scenarios,
+    }
+    path = RESULTS_DIR / f"policy_cold_start_{result['ts']}.json"
+    path.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    for row in scenarios:
+        print(
+            f"{row['id']:<12} first decision yaml={row['yaml']['first_decision_ms']:>7.1f}ms "
+            f"snapshot={row['snapshot']['first_decision_ms']:>7.1f}ms "
+            f"(load {row['yaml']['load_ms']:.1f} -> {row['snapshot']['load_ms']:.1f}ms, "
+            f"x{row['load_speedup']:.1f})"
+        )
+    print(f"Wrote {path}")
+    return result
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Per-rule-count scaling of policy-pack evaluation (linear vs compiled plan)."""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from statistics import median
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.policy import pack_engine  # noqa: E402
+from app.policy.packs import ADVISORY_LEVELS, LoadedPacks, Rule  # noqa: E402
+
+RESULTS_DIR = Path("bench/results")
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(5, 9)))
+
+
+def synthetic_packs(n_rules: int, seed: int = 1) -> Tuple[LoadedPacks, List[str]]:
+    """Half term rules (three phrases each), half regex rules, plus one trigger per rule."""
+    rng = random.Random(seed)
+    rules: List[Rule] = []
+    triggers: List[str] = []
+    for idx in range(n_rules):
+        advisory = ADVISORY_LEVELS[1 + idx % 3]
+        if idx % 2:
+            word = _word(rng)
+            pattern = re.compile(rf"\b{word}[-_ ]?\d{{2,4}}\b", re.IGNORECASE)
+            rules.append(Rule("SYN", f"syn.re.{idx}", "re", "medium", advisory, pattern=pattern))
+            triggers.append(f"{word.upper()}-042")
+        else:
+            terms = tuple(f"{_word(rng)} {_word(rng)}" for _ in range(3))
+            rules.append(Rule("SYN", f"syn.t.{idx}", "t", "medium", advisory, any_terms=terms))
+            triggers.append(terms[-1])
+    return LoadedPacks(rules=tuple(rules)), triggers
+
+
+def texts_for(triggers: Sequence[str], seed: int = 2) -> Dict[str, str]:
+    """A ~1KB clean prompt and the same prompt carrying a few rule triggers."""
+    rng = random.Random(seed)
+    clean = " ".join(_word(rng) for _ in range(120))
+    picked = [triggers[i] for i in sorted({0, 1, len(triggers) // 2, len(triggers) - 1})]
+    return {"clean": clean, "hit": clean + " " + " ".join(picked)}
+
+
+def _time_per_call(fn: Callable[[], Any], iterations: int) -> float:
+    samples: List[float] = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        samples.append((time.perf_counter() - start) / iterations)
+    return median(samples)
+
+
+def run(sizes: Sequence[int] = (10, 100, 1_000), iterations: int = 50) -> Dict[str, Any]:
+    """Execute the scaling scenario and persist a JSON artifact."""
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    scenarios: List[Dict[str, Any]] = []
+    for n_rules in sizes:
+        packs, triggers = synthetic_packs(n_rules)
+        texts = texts_for(triggers)
+        start = time.perf_counter()
+        pack_engine.compile_packs(packs)
+        compile_s = time.perf_counter() - start
+        for label, text in texts.items():
+            linear = _time_per_call(lambda: pack_engine._evaluate_linear(text, packs), iterations)
+            compiled = _time_per_call(lambda: pack_engine.evaluate_text(text, packs), iterations)
+            scenarios.append(
+                {
+                    "id": f"rules={n_rules}/{label}",
+                    "rules": n_rules,
+                    "text": label,
+                    "linear_us": linear * 1e6,
+                    "compiled_us": compiled * 1e6,
+                    "speedup": linear / compiled if compiled else 0.0,
+                    "compile_ms": compile_s * 1e3,
+                    "violations": len(pack_engine.evaluate_text(text, packs)[0]),
+                }
+            )
+
+    result = {
+        "version": 1,
+        "ts": int(time.time()),
+        "host": os.uname().nodename if hasattr(os, "uname") else "",
+        "scenarios": scenarios,
+    }
+    path = RESULTS_DIR / f"policy_packs_{result['ts']}.json"
+    path.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    for row in scenarios:
+        print(
+            f"{row['id']:<22} linear={row['linear_us']:>9.1f}us "
+            f"compiled={row['compiled_us']:>8.1f}us x{row['speedup']:.1f}"
+        )
+    print(f"Wrote {path}")
+    return result
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""Retention purge row rate.
+
+* ``redis`` seeds a DLQ index on ``fakeredis`` and times the pre-engine purge
+  (one ZREM and one DEL per id) against :class:`PurgeEngine` chunks (two
+  variadic commands per chunk), unthrottled.
+* ``budget`` drains the same index under ``RETENTION_PURGE_ROWS_PER_SEC``-style
+  budgets and reports the achieved rows/s next to the target.
+* ``sql`` (when SQLAlchemy is installed) times select-ids-then-``DELETE IN``
+  against :func:`app.services.decisions.delete_range` on a temporary SQLite
+  file.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.services.purge_engine import (  # noqa: E402
+    InMemoryCursorStore,
+    PurgeBudget,
+    PurgeEngine,
+    PurgeJob,
+)
+from app.services.purge_targets import RedisDLQMessages  # noqa: E402
+
+RESULTS_DIR = Path("bench/results")
+INDEX = "retention:index:dlq_msg:bench"
+
+
+async def _seed(redis: Any, rows: int) -> None:
+    pipe = redis.pipeline(transaction=False)
+    pipe.zadd(INDEX, {f"m{i}": float(i) for i in range(rows)})
+    for i in range(rows):
+        pipe.set(f"dlq:msg:m{i}", b"x")
+    await pipe.execute()
+
+
+async def _legacy(redis: Any, rows: int, chunk: int) -> None:
+    # The purge as it was: list a batch, then one command per id.
+    while True:
+        ids = await redis.zrangebyscore(INDEX, "-inf", "+inf", start=0, num=chunk)
+        if not ids:
+            return
+        pipe = redis.pipeline()
+        for item in ids:
+            pipe.delete(b"dlq:msg:" + item)
+        await pipe.execute()
+        pipe = redis.pipeline()
+        for item in ids:
+            pipe.zrem(INDEX, item)
+        await pipe.execute()
+
+
+async def _engine(redis: Any, chunk: int, budget: Optional[PurgeBudget] = None) -> int:
+    engine = PurgeEngine(
+        {"dlq_msg": RedisDLQMessages(redis)},
+        InMemoryCursorStore(),
+        budget=budget,
+        chunk_size=chunk,
+    )
+    result = await engine.drain(PurgeJob("bench", "dlq_msg", cutoff=float("inf")))
+    return result.deleted
+
+
+def _fakeredis() -> Any:
+    import fakeredis.aioredis
+
+    return fakeredis.aioredis.FakeRedis(decode_responses=False)
+
+
+async def _redis_rates(rows: int, chunk: int) -> Dict[str, Any]:
+    out: Dict[str, Any] = {"rows": rows, "chunk": chunk}
+    for name in ("legacy", "chunked"):
+        redis = _fakeredis()
+        await _seed(redis, rows)
+        started = time.perf_counter()
+        if name == "legacy":
+            await _legacy(redis, rows, chunk)
+        else:
+            await _engine(redis, chunk)
+        elapsed = time.perf_counter() - started
+        assert await redis.zcard(INDEX) == 0
+        out[f"{name}_rows_per_sec"] = rows / elapsed if elapsed else 0.0
+    return out
+
+
+async def _budget_rates(rows: int, chunk: int, budgets: Sequence[float]) -> List[Dict[str, Any]]:
+    out = []
+    for rate in budgets:
+        redis = _fakeredis()
+        await _seed(redis, rows)
+        budget = PurgeBudget(rate, burst=chunk)
+        started = time.perf_counter()
+        deleted = await _engine(redis, chunk, budget)
+        elapsed = time.perf_counter() - started
+        out.append(
+            {
+                "budget_rows_per_sec": rate,
+                "rows": deleted,
+                "achieved_rows_per_sec": deleted / elapsed if elapsed else 0.0,
+                "throttled_s": budget.waited,
+            }
+        )
+    return out
+
+
+def _sql_rates(rows: int, chunk: int) -> Optional[Dict[str, Any]]:
+    try:
+        from sqlalchemy import and_, create_engine, delete, select
+
+        from app.services import decisions
+    except Exception:
+        return None
+
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    cutoff = base + timedelta(days=1)
+    out: Dict[str, Any] = {"rows": rows, "chunk": chunk}
+    table = decisions.decisions
+    saved = decisions._engine_instance
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("select_in", "range"):
+            engine = create_engine(f"sqlite:///{tmp}/{name}.db", future=True)
+            decisions._meta.create_all(engine)
+            with engine.begin() as cx:
+                cx.execute(
+                    table.insert(),
+                    [
+                        {
+                            "id": f"d{i:08d}",
+                            "ts": base + timedelta(seconds=i % 3600),
+                            "tenant": "bench",
+                            "bot": "bot",
+                            "outcome": "allow",
+                        }
+                        for i in range(rows)
+                    ],
+                )
+            decisions._engine_instance = engine
+            started = time.perf_counter()
+            if name == "select_in":
+                while True:
+                    with engine.begin() as cx:
+                        ids = [
+                            r.id
+                            for r in cx.execute(
+                                select(table.c.id)
+                                .where(and_(table.c.ts < cutoff))
+                                .order_by(table.c.ts.asc(), table.c.id.asc())
+                                .limit(chunk)
+                            )
+                        ]
+                        if not ids:
+                            break
+                        cx.execute(delete(table).where(table.c.id.in_(ids)))
+            else:
+                after = None
+                while True:
+                    _, after = decisions.delete_range(cutoff, after=after, limit=chunk)
+                    if after is None:
+                        break
+            elapsed = time.perf_counter() - started
+            out[f"{name}_rows_per_sec"] = rows / elapsed if elapsed else 0.0
+            engine.dispose()
+    decisions._engine_instance = saved
+    return out
+
+
+def run(
+    rows: int = 20_000,
+    chunk: int = 500,
+    budgets: Sequence[float] = (2_000.0, 10_000.0),
+    budget_rows: int = 4_000,
+) -> Dict[str, Any]:
+    """Execute the purge scenarios and persist a JSON artifact."""
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    result: Dict[str, Any] = {
+        "version": 1,
+        "ts": int(time.time()),
+        "host": os.uname().nodename if hasattr(os, "uname") else "",
+        "redis": asyncio.run(_redis_rates(rows, chunk)),
+        "budget": asyncio.run(_budget_rates(budget_rows, chunk, budgets)),
+        "sql": _sql_rates(rows, chunk),
+    }
+    path = RESULTS_DIR / f"purge_{result['ts']}.json"
+    path.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    r = result["redis"]
+    print(
+        f"redis {rows} rows: legacy={r['legacy_rows_per_sec']:.0f}/s "
+        f"chunked={r['chunked_rows_per_sec']:.0f}/s"
+    )
+    for row in result["budget"]:
+        print(
+            f"budget {row['budget_rows_per_sec']:.0f}/s: "
+            f"achieved={row['achieved_rows_per_sec']:.0f}/s throttled={row['throttled_s']:.2f}s"
+        )
+    if result["sql"]:
+        s = result["sql"]
+        print(
+            f"sql {rows} rows: select+IN={s['select_in_rows_per_sec']:.0f}/s "
+            f"range={s['range_rows_per_sec']:.0f}/s"
+        )
+    print(f"Wrote {path}")
+    return result
+
+
+if __name__ == "__main__":
+    run()
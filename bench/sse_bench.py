@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""SSE framing and per-stream timer cost.
+
+Two measurements:
+
+* frames/sec for the pre-encoder :meth:`EventStream.frame` (split, join and
+  re-encode of every field per call) against a cached
+  :class:`app.services.event_stream.FrameEncoder`, on chat-chunk dicts and
+  short token deltas;
+* CPU seconds (``time.process_time``) to drive N concurrent streams of token
+  deltas: the old shape (one frame per delta, one ``wait_for`` heartbeat
+  timeout per stream and read) against :func:`coalesce` + :func:`sse_stream`
+  on a shared :class:`TimerWheel`. The gain tracks how many deltas land in
+  one 20ms coalescing window; at one delta per window the two are even.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Sequence
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.services.event_stream import (  # noqa: E402
+    DeltaCoalescer,
+    FrameEncoder,
+    TimerWheel,
+    coalesce,
+    sse_stream,
+)
+
+RESULTS_DIR = Path("bench/results")
+
+_CHUNK = {
+    "id": "chatcmpl-bench",
+    "object": "chat.completion.chunk",
+    "model": "demo",
+    "choices": [{"index": 0, "delta": {"content": "hello"}, "finish_reason": None}],
+}
+
+
+def _legacy_frame(data: object, event: Any = None, id: Any = None) -> bytes:
+    # EventStream.frame as it was: every field re-formatted and re-encoded per call.
+    if isinstance(data, bytes):
+        text = data.decode("utf-8", "ignore")
+    elif isinstance(data, str):
+        text = data
+    else:
+        text = json.dumps(data, ensure_ascii=False)
+    lines = []
+    if id is not None:
+        lines.append(f"id: {id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    if text == "":
+        lines.append("data:")
+    else:
+        for part in text.splitlines():
+            lines.append(f"data: {part}")
+        if text.endswith("\n"):
+            lines.append("data:")
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+def _rate(fn: Any, payload: object, frames: int) -> float:
+    started = time.perf_counter()
+    for _ in range(frames):
+        fn(payload)
+    return frames / (time.perf_counter() - started)
+
+
+def _framing(frames: int) -> Dict[str, Dict[str, float]]:
+    enc = FrameEncoder("delta")
+    out: Dict[str, Dict[str, float]] = {}
+    for name, payload in (("chunk_dict", _CHUNK), ("token", " world")):
+        legacy = _rate(lambda p: _legacy_frame(p, "delta"), payload, frames)
+        encoder = _rate(enc.encode, payload, frames)
+        out[name] = {
+            "legacy_fps": round(legacy, 1),
+            "encoder_fps": round(encoder, 1),
+            "speedup": round(encoder / legacy, 2),
+        }
+    return out
+
+
+async def _deltas(n: int, gap_s: float) -> AsyncIterator[str]:
+    for i in range(n):
+        await asyncio.sleep(gap_s)
+        yield f"tok{i} "
+
+
+async def _legacy_stream(n: int, gap_s: float, heartbeat_s: float) -> int:
+    # Old shape: each read parks its own heartbeat timeout, one frame per delta.
+    it = _deltas(n, gap_s).__aiter__()
+    written = 0
+    while True:
+        try:
+            delta = await asyncio.wait_for(it.__anext__(), timeout=heartbeat_s)
+        except asyncio.TimeoutError:
+            written += 3
+            continue
+        except StopAsyncIteration:
+            return written
+        written += len(_legacy_frame({"delta": delta}, "delta"))
+
+
+async def _new_stream(n: int, gap_s: float, heartbeat_s: float, wheel: TimerWheel) -> int:
+    enc = FrameEncoder("delta")
+    coalescer = DeltaCoalescer(lambda text: enc.encode({"delta": text}), window_s=0.02)
+    written = 0
+    frames = coalesce(_deltas(n, gap_s), coalescer)
+    async for frame in sse_stream(frames, heartbeat_s=heartbeat_s, wheel=wheel):
+        written += len(frame)
+    return written
+
+
+async def _drive(streams: int, deltas: int, gap_s: float, heartbeat_s: float, new: bool) -> float:
+    wheel = TimerWheel(tick_s=min(heartbeat_s, 0.25))
+    started = time.process_time()
+    if new:
+        jobs = [_new_stream(deltas, gap_s, heartbeat_s, wheel) for _ in range(streams)]
+    else:
+        jobs = [_legacy_stream(deltas, gap_s, heartbeat_s) for _ in range(streams)]
+    await asyncio.gather(*jobs)
+    cpu = time.process_time() - started
+    wheel.close()
+    return cpu
+
+
+def run(
+    frames: int = 100_000,
+    streams: int = 1_000,
+    deltas: int = 50,
+    gap_s: float = 0.002,
+    heartbeat_s: float = 15.0,
+) -> Dict[str, Any]:
+    """Execute both measurements and persist a JSON artifact."""
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    framing = _framing(frames)
+    legacy_cpu = asyncio.run(_drive(streams, deltas, gap_s, heartbeat_s, new=False))
+    new_cpu = asyncio.run(_drive(streams, deltas, gap_s, heartbeat_s, new=True))
+    result: Dict[str, Any] = {
+        "version": 1,
+        "ts": int(time.time()),
+        "host": os.uname().nodename if hasattr(os, "uname") else "",
+        "framing": framing,
+        "streams": {
+            "count": streams,
+            "deltas_per_stream": deltas,
+            "gap_ms": gap_s * 1000.0,
+            "legacy_cpu_s": round(legacy_cpu, 4),
+            "coalesced_cpu_s": round(new_cpu, 4),
+            "legacy_cpu_ms_per_1k": round(legacy_cpu * 1e6 / streams, 2),
+            "coalesced_cpu_ms_per_1k": round(new_cpu * 1e6 / streams, 2),
+        },
+    }
+    path = RESULTS_DIR / f"sse_{result['ts']}.json"
+    path.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    for name, row in framing.items():
+        print(
+            f"{name}: legacy={row['legacy_fps']:.0f}/s encoder={row['encoder_fps']:.0f}/s "
+            f"(x{row['speedup']})"
+        )
+    s = result["streams"]
+    print(
+        f"{streams} streams x {deltas} deltas: legacy={s['legacy_cpu_s']}s "
+        f"coalesced+wheel={s['coalesced_cpu_s']}s CPU"
+    )
+    print(f"Wrote {path}")
+    return result
+
+
+def _arg(argv: Sequence[str], name: str, default: float) -> float:
+    return float(argv[argv.index(name) + 1]) if name in argv else default
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    run(
+        streams=int(_arg(args, "--streams", 1_000)),
+        deltas=int(_arg(args, "--deltas", 50)),
+        gap_s=_arg(args, "--gap-ms", 2.0) / 1000.0,
+    )
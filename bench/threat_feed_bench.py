@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Threat-feed redaction cost against feed size.
+
+For each rule count, a synthetic vendor-token feed is loaded from a temporary
+``file://`` URL. The bench times the pre-snapshot redaction (``finditer`` plus
+``sub`` per rule) against :func:`app.services.threat_feed.apply_dynamic_redactions`
+on the same text, and reports how long the reload took to compile.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.services import threat_feed  # noqa: E402
+
+RESULTS_DIR = Path("bench/results")
+
+
+def _feed(rules: int) -> List[Dict[str, str]]:
+    return [
+        {
+            "pattern": f"vnd{i:04d}_[A-Za-z0-9]{{16}}",
+            "tag": f"secrets:vendor{i}",
+            "replacement": f"[REDACTED:V{i}]",
+        }
+        for i in range(rules)
+    ]
+
+
+def _text(rules: int, kb: int) -> str:
+    filler = "the quick brown fox jumps over the lazy dog "
+    body = filler * max(1, (kb * 1024) // len(filler))
+    hits = " ".join(f"vnd{i:04d}_abcdefghijklmnop" for i in range(0, rules, max(1, rules // 5)))
+    return f"{body} {hits} {body}"
+
+
+def _sequential(compiled: Sequence[Any], text: str) -> str:
+    # The redaction as it was: every rule re-scans the growing output.
+    out = text
+    for rx, repl in compiled:
+        for _ in rx.finditer(out):
+            pass
+        out = rx.sub(repl, out)
+    return out
+
+
+def _time(fn: Any, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000.0
+
+
+def run(
+    rule_counts: Sequence[int] = (10, 500, 3000), kb: int = 8, repeat: int = 5
+) -> Dict[str, Any]:
+    """Execute the feed-size scenarios and persist a JSON artifact."""
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    rows = []
+    saved = (threat_feed._fetch_json, threat_feed._SOURCES, threat_feed._SNAPSHOT)
+    threat_feed._fetch_json = threat_feed.fetch_feed
+    threat_feed._SOURCES = {}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for count in rule_counts:
+                spec = _feed(count)
+                path = Path(tmp) / f"feed_{count}.json"
+                path.write_text(json.dumps({"version": str(count), "redactions": spec}))
+                started = time.perf_counter()
+                threat_feed.reload_from_urls([path.as_uri()])
+                compile_ms = (time.perf_counter() - started) * 1000.0
+                text = _text(count, kb)
+                compiled = [(re.compile(r["pattern"]), r["replacement"]) for r in spec]
+                expected = _sequential(compiled, text)
+                assert threat_feed.apply_dynamic_redactions(text)[0] == expected
+                rows.append(
+                    {
+                        "rules": count,
+                        "text_kb": kb,
+                        "compile_ms": compile_ms,
+                        "sequential_ms": _time(lambda: _sequential(compiled, text), repeat),
+                        "snapshot_ms": _time(
+                            lambda: threat_feed.apply_dynamic_redactions(text), repeat
+                        ),
+                    }
+                )
+    finally:
+        threat_feed._fetch_json, threat_feed._SOURCES, threat_feed._SNAPSHOT = saved
+    result: Dict[str, Any] = {
+        "version": 1,
+        "ts": int(time.time()),
+        "host": os.uname().nodename if hasattr(os, "uname") else "",
+        "feeds": rows,
+    }
+    path = RESULTS_DIR / f"threat_feed_{result['ts']}.json"
+    path.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    for row in rows:
+        print(
+            f"{row['rules']} rules / {kb}KB: sequential={row['sequential_ms']:.2f}ms "
+            f"snapshot={row['snapshot_ms']:.2f}ms compile={row['compile_ms']:.0f}ms"
+        )
+    print(f"Wrote {path}")
+    return result
+
+
+if __name__ == "__main__":
+    run()
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
+import os
 from pathlib import Path
-from typing import Dict
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
 
-import requests  # type: ignore
+from app.audit.exporter import verify_manifest
+
+_MANIFEST_LINE = b'{"manifest":'
+_CHUNK_BYTES = 64 * 1024
 
 
 def _build_params(args: argparse.Namespace) -> Dict[str, str]:
@@ -19,7 +24,125 @@ def _build_params(args: argparse.Namespace) -> Dict[str, str]:
     return params
 
 
-def main() -> int:
+def _lines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Complete ``\\n``-terminated lines; a torn last line is dropped."""
+    pending = b""
+    for chunk in chunks:
+        pending += chunk
+        *complete, pending = pending.split(b"\n")
+        for line in complete:
+            yield line + b"\n"
+
+
+def _scan_partial(part: Path) -> Tuple[Optional[str], int]:
+    """Cursor and record count of a partial NDJSON download; truncates a torn tail."""
+    cursor: Optional[str] = None
+    count = 0
+    good = 0
+    with part.open("rb") as fh:
+        for line in fh:
+            if not line.endswith(b"\n"):
+                break
+            cursor = json.loads(line)["cursor"]
+            count += 1
+            good += len(line)
+    with part.open("r+b") as fh:
+        fh.truncate(good)
+    return cursor, count
+
+
+def _fetch_page(
+    session: Any, url: str, query: Dict[str, str], fh: Any
+) -> Tuple[Optional[Dict[str, Any]], int, str]:
+    """Append one export response's records to ``fh``; return its manifest, count and digest."""
+    digest = hashlib.sha256()
+    count = 0
+    with session.get(url, params=query, stream=True) as response:
+        response.raise_for_status()
+        for line in _lines(response.iter_content(chunk_size=_CHUNK_BYTES)):
+            if line.startswith(_MANIFEST_LINE):
+                return json.loads(line)["manifest"], count, digest.hexdigest()
+            fh.write(line)
+            digest.update(line)
+            count += 1
+    return None, count, digest.hexdigest()
+
+
+def download_ndjson(
+    session: Any,
+    url: str,
+    params: Dict[str, str],
+    dest: Path,
+    *,
+    resume: bool = False,
+    secret: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Stream an NDJSON export into ``dest`` in constant memory.
+
+    Records land in ``<dest>.part`` first. With ``resume`` an existing part
+    file is continued from its last complete record's cursor. While the
+    server reports a capped read (``truncated``) the next page is requested
+    with ``after`` set to the manifest cursor and appended to the same part
+    file. Every page's manifest is checked against the records read in that
+    request before the part file is renamed into place.
+    """
+    part = dest.with_name(dest.name + ".part")
+    cursor: Optional[str] = None
+    before = 0
+    if resume and part.exists():
+        cursor, before = _scan_partial(part)
+    elif part.exists():
+        part.unlink()
+    resumed_from = cursor
+    received = 0
+    pages = 0
+    while True:
+        query = dict(params, fmt="ndjson")
+        if cursor:
+            query["after"] = cursor
+        with part.open("ab") as fh:
+            manifest, count, sha256 = _fetch_page(session, url, query, fh)
+        if manifest is None:
+            raise RuntimeError(
+                f"export truncated after {before + received + count} records; rerun with --resume"
+            )
+        if not verify_manifest(manifest, count=count, sha256=sha256, secret=secret):
+            raise RuntimeError("export manifest does not match the records received")
+        received += count
+        pages += 1
+        if not manifest.get("truncated"):
+            break
+        if count == 0:
+            raise RuntimeError("export reported a capped page without records")
+        cursor = manifest["cursor"]
+    part.replace(dest)
+    summary = dict(
+        manifest, count=received, total=before + received, resumed_from=resumed_from, pages=pages
+    )
+    dest.with_name(dest.name + ".manifest.json").write_text(
+        json.dumps(summary, indent=2), encoding="utf-8"
+    )
+    return summary
+
+
+def download_raw(
+    session: Any, url: str, params: Dict[str, str], dest: Path, *, fmt: str, gzip: bool
+) -> None:
+    """Stream a ``json`` / ``csv`` (optionally gzipped) export to ``dest`` chunk by chunk."""
+    part = dest.with_name(dest.name + ".part")
+    query = dict(params, fmt=fmt)
+    if gzip:
+        query["gzip"] = "true"
+    with session.get(url, params=query, stream=True) as response:
+        response.raise_for_status()
+        with part.open("wb") as fh:
+            for chunk in response.iter_content(chunk_size=_CHUNK_BYTES):
+                fh.write(chunk)
+    part.replace(dest)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument("--base-url", required=True)
     parser.add_argument("--tenant", required=True)
@@ -27,26 +150,44 @@ def main() -> int:
     parser.add_argument("--start")
     parser.add_argument("--end")
     parser.add_argument("--outdir", default="audit_exports")
-    args = parser.parse_args()
-
-    params = _build_params(args)
-    base = args.base_url.rstrip("/")
-
-    json_response = requests.get(f"{base}/admin/audit/export", params={**params, "fmt": "json"})
-    json_response.raise_for_status()
-    bundle = json_response.json()
+    parser.add_argument(
+        "--fmt",
+        action="append",
+        choices=["json", "csv", "ndjson"],
+        help="Repeatable; default json and csv",
+    )
+    parser.add_argument("--gzip", action="store_true", help="Download json/csv gzip-compressed")
+    parser.add_argument(
+        "--resume", action="store_true", help="Continue a partial ndjson download by cursor"
+    )
+    parser.add_argument(
+        "--secret",
+        default=os.getenv("AUDIT_EXPORT_SIGNING_SECRET", ""),
+        help="Verify the ndjson manifest signature (default: AUDIT_EXPORT_SIGNING_SECRET)",
+    )
+    args = parser.parse_args(argv)
 
-    csv_response = requests.get(f"{base}/admin/audit/export", params={**params, "fmt": "csv"})
-    csv_response.raise_for_status()
-    csv_text = csv_response.text
+    import requests  # type: ignore
 
+    params = _build_params(args)
+    url = f"{args.base_url.rstrip('/')}/admin/audit/export"
     outdir = Path(args.outdir)
     outdir.mkdir(parents=True, exist_ok=True)
-    json_path = outdir / "bundle.json"
-    csv_path = outdir / "bundle.csv"
-    json_path.write_text(json.dumps(bundle, indent=2), encoding="utf-8")
-    csv_path.write_text(csv_text, encoding="utf-8")
-    print(f"Wrote {json_path} and {csv_path}")
+
+    written = []
+    with requests.Session() as session:
+        for fmt in args.fmt or ["json", "csv"]:
+            if fmt == "ndjson":
+                dest = outdir / "bundle.ndjson"
+                summary = download_ndjson(
+                    session, url, params, dest, resume=args.resume, secret=args.secret or None
+                )
+                print(f"{dest}: {summary['total']} records in {summary['pages']} page(s)")
+            else:
+                dest = outdir / (f"bundle.{fmt}" + (".gz" if args.gzip else ""))
+                download_raw(session, url, params, dest, fmt=fmt, gzip=args.gzip)
+            written.append(str(dest))
+    print(f"Wrote {' and '.join(written)}")
     return 0
 
 
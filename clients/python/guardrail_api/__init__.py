@@ -1,11 +1,34 @@
 """Python SDK for the LLM Guardrail API."""
 
-from .client import GuardrailClient, Scope
-from .models import AdjudicationItem, AdjudicationPage, DecisionItem, DecisionPage
+from ._http import RetryPolicy
+from .async_client import AsyncGuardrailClient
+from .batching import AsyncMicroBatcher, MicroBatcher
+from .client import BatchInput, GuardrailClient, Scope
+from .models import (
+    AdjudicationItem,
+    AdjudicationPage,
+    BatchItem,
+    BatchResult,
+    ChatCompletionChunk,
+    DecisionItem,
+    DecisionPage,
+    EvaluateResult,
+)
+from .sse import ServerSentEvent
 
 __all__ = [
     "GuardrailClient",
+    "AsyncGuardrailClient",
+    "RetryPolicy",
+    "MicroBatcher",
+    "AsyncMicroBatcher",
+    "ServerSentEvent",
     "Scope",
+    "BatchInput",
+    "EvaluateResult",
+    "BatchItem",
+    "BatchResult",
+    "ChatCompletionChunk",
     "DecisionItem",
     "DecisionPage",
     "AdjudicationItem",
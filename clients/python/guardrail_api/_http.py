@@ -0,0 +1,119 @@
+"""Transport, retry and idempotency helpers shared by the sync and async clients."""
+
+from __future__ import annotations
+
+import importlib.util
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, FrozenSet, Optional
+
+import httpx
+
+IDEMPOTENCY_HEADER = "X-Idempotency-Key"
+RETRY_STATUSES: FrozenSet[int] = frozenset({408, 425, 429, 502, 503, 504})
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Retry budget for one logical call.
+
+    Delays use full jitter over ``backoff_base_s * 2**attempt`` (capped at
+    ``backoff_max_s``); a ``Retry-After`` header on the response wins, up to
+    ``retry_after_max_s``. Connection errors and ``statuses`` are retried.
+    """
+
+    max_attempts: int = 3
+    backoff_base_s: float = 0.1
+    backoff_max_s: float = 5.0
+    retry_after_max_s: float = 30.0
+    statuses: FrozenSet[int] = field(default=RETRY_STATUSES)
+
+    def retryable(self, response: Optional[httpx.Response], error: Optional[BaseException]) -> bool:
+        if error is not None:
+            return isinstance(error, httpx.TransportError)
+        return response is not None and response.status_code in self.statuses
+
+    def delay(
+        self,
+        attempt: int,
+        response: Optional[httpx.Response] = None,
+        rng: Optional[random.Random] = None,
+    ) -> float:
+        if response is not None:
+            hinted = parse_retry_after(response.headers.get("Retry-After"))
+            if hinted is not None:
+                return min(hinted, self.retry_after_max_s)
+        cap = min(self.backoff_max_s, self.backoff_base_s * (2**attempt))
+        return (rng or random).uniform(0.0, cap)
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a ``Retry-After`` header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def new_idempotency_key() -> str:
+    """A fresh key accepted by the API's idempotency middleware."""
+    return uuid.uuid4().hex
+
+
+def pool_limits(max_connections: int, max_keepalive: int, keepalive_s: float) -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive,
+        keepalive_expiry=keepalive_s,
+    )
+
+
+def http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+def base_headers(token: Optional[str], extra: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    headers: Dict[str, str] = {"Accept": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    headers.update(extra or {})
+    return headers
+
+
+def scoped_headers(
+    *,
+    tenant: Optional[str] = None,
+    bot: Optional[str] = None,
+    idempotency_key: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> Dict[str, str]:
+    out: Dict[str, str] = dict(headers or {})
+    if tenant:
+        out["X-Tenant-ID"] = tenant
+    if bot:
+        out["X-Bot-ID"] = bot
+    if idempotency_key:
+        out[IDEMPOTENCY_HEADER] = idempotency_key
+    return out
+
+
+def json_body(response: httpx.Response) -> Any:
+    response.raise_for_status()
+    return response.json()
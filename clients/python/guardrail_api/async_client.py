@@ -0,0 +1,255 @@
+"""Asynchronous client for the Guardrail API."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Mapping, Optional, Sequence, cast
+
+import httpx
+
+from ._http import RetryPolicy, http2_available, json_body, pool_limits
+from .batching import AsyncMicroBatcher
+from .client import (
+    BatchInput,
+    Scope,
+    _batch_call,
+    _Call,
+    _chat_stream_call,
+    _ClientBase,
+    _evaluate_call,
+    _export_params,
+    _page_params,
+)
+from .models import (
+    AdjudicationPage,
+    BatchResult,
+    ChatCompletionChunk,
+    DecisionPage,
+    EvaluateResult,
+)
+from .sse import ServerSentEvent, aiter_sse
+
+
+class AsyncGuardrailClient(_ClientBase):
+    """
+    ``asyncio`` counterpart of :class:`~guardrail_api.GuardrailClient` with the
+    same pooling, idempotency and retry behaviour. ``transport`` accepts any
+    ``httpx.AsyncBaseTransport``, e.g. ``httpx.ASGITransport(app=app)`` to
+    call an in-process app.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        token: Optional[str] = None,
+        timeout: float = 10.0,
+        *,
+        retry: Optional[RetryPolicy] = None,
+        http2: bool = False,
+        max_connections: int = 20,
+        max_keepalive: int = 10,
+        keepalive_s: float = 30.0,
+        auto_idempotency: bool = True,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+    ) -> None:
+        super().__init__(base_url, token, timeout, retry, auto_idempotency)
+        self._owns_http = http_client is None
+        self._http = http_client or httpx.AsyncClient(
+            timeout=timeout,
+            headers=self.headers,
+            http2=http2 and http2_available(),
+            limits=pool_limits(max_connections, max_keepalive, keepalive_s),
+            transport=transport,
+        )
+        if not self._owns_http:
+            self._http.headers.update(self.headers)
+        self._sleep: Callable[[float], Awaitable[None]] = asyncio.sleep
+
+    async def aclose(self) -> None:
+        if self._owns_http:
+            await self._http.aclose()
+
+    async def __aenter__(self) -> "AsyncGuardrailClient":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.aclose()
+
+    # Transport ---------------------------------------------------------------
+    async def _send(self, call: _Call, *, stream: bool = False) -> httpx.Response:
+        call = self._prepare(call, stream)
+        request = self._http.build_request(
+            call.method,
+            self._url(call.path),
+            params=call.params or None,
+            json=call.json,
+            headers=call.headers,
+            timeout=self.timeout,
+        )
+        attempt = 0
+        while True:
+            try:
+                response = await self._http.send(request, stream=stream)
+            except httpx.TransportError as exc:
+                delay = self._next_delay(attempt, None, exc)
+                if delay is None:
+                    raise
+            else:
+                delay = self._next_delay(attempt, response, None)
+                if delay is None:
+                    return response
+                await response.aclose()
+            await self._sleep(delay)
+            attempt += 1
+
+    async def _get(self, path: str, params: Dict[str, Any] | None = None) -> httpx.Response:
+        response = await self._send(_Call("GET", path, params=params or {}))
+        response.raise_for_status()
+        return response
+
+    # Health -----------------------------------------------------------------
+    async def healthz(self) -> Dict[str, Any]:
+        """Return the /healthz payload."""
+
+        return cast(Dict[str, Any], (await self._get("/healthz")).json())
+
+    async def readyz(self) -> Dict[str, Any]:
+        """Return the /readyz payload."""
+
+        return cast(Dict[str, Any], (await self._get("/readyz")).json())
+
+    # Evaluation -------------------------------------------------------------
+    async def evaluate(
+        self,
+        text: str,
+        *,
+        request_id: Optional[str] = None,
+        tenant: Optional[str] = None,
+        bot: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> EvaluateResult:
+        """Evaluate one ingress text via ``POST /guardrail/evaluate``."""
+
+        call = _evaluate_call(text, request_id, tenant, bot, idempotency_key)
+        return cast(EvaluateResult, json_body(await self._send(call)))
+
+    async def batch_evaluate(
+        self,
+        items: Sequence[BatchInput],
+        *,
+        tenant: Optional[str] = None,
+        bot: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> BatchResult:
+        """Evaluate texts (or ``{"text", "request_id"}`` items) in one request."""
+
+        call = _batch_call(items, tenant, bot, idempotency_key)
+        return cast(BatchResult, json_body(await self._send(call)))
+
+    def batcher(
+        self,
+        *,
+        max_items: int = 32,
+        max_delay_s: float = 0.005,
+        tenant: Optional[str] = None,
+        bot: Optional[str] = None,
+    ) -> AsyncMicroBatcher:
+        """An :class:`AsyncMicroBatcher` bound to this client."""
+
+        return AsyncMicroBatcher(
+            lambda items: self.batch_evaluate(items, tenant=tenant, bot=bot),
+            max_items=max_items,
+            max_delay_s=max_delay_s,
+        )
+
+    # Streaming --------------------------------------------------------------
+    async def stream_events(
+        self,
+        method: str,
+        path: str,
+        *,
+        json: Any = None,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> AsyncIterator[ServerSentEvent]:
+        """Iterate SSE events from any streaming endpoint as they arrive."""
+
+        hdrs = {"Accept": "text/event-stream", **(headers or {})}
+        response = await self._send(_Call(method, path, params or {}, json, hdrs), stream=True)
+        try:
+            response.raise_for_status()
+            async for event in aiter_sse(response.aiter_lines()):
+                yield event
+        finally:
+            await response.aclose()
+
+    async def stream_chat_completions(
+        self,
+        messages: Sequence[Mapping[str, Any]],
+        *,
+        model: str = "demo",
+        tenant: Optional[str] = None,
+        bot: Optional[str] = None,
+        **params: Any,
+    ) -> AsyncIterator[ChatCompletionChunk]:
+        """Egress-guarded ``/v1/chat/completions`` chunks, stopping at ``[DONE]``."""
+
+        call = _chat_stream_call(messages, model, tenant, bot, params)
+        events = self.stream_events(call.method, call.path, json=call.json, headers=call.headers)
+        async for event in events:
+            if event.done:
+                break
+            yield cast(ChatCompletionChunk, event.json())
+
+    # Decisions / adjudications ----------------------------------------------
+    async def list_decisions(
+        self,
+        *,
+        tenant: Scope = None,
+        bot: Scope = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        dir: str = "fwd",
+        **filters: Any,
+    ) -> DecisionPage:
+        """List decisions with cursor pagination."""
+
+        params = _page_params(tenant, bot, limit, cursor, dir, filters)
+        return cast(DecisionPage, (await self._get("/admin/api/decisions", params=params)).json())
+
+    async def export_decisions(
+        self, *, tenant: Optional[str] = None, bot: Optional[str] = None
+    ) -> str:
+        """Export decisions as an NDJSON stream (returned as text)."""
+
+        params = _export_params(tenant, bot)
+        params["format"] = "jsonl"
+        return (await self._get("/admin/api/decisions/export", params=params)).text
+
+    async def list_adjudications(
+        self,
+        *,
+        tenant: Scope = None,
+        bot: Scope = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        dir: str = "fwd",
+        **filters: Any,
+    ) -> AdjudicationPage:
+        """List adjudications with cursor pagination."""
+
+        params = _page_params(tenant, bot, limit, cursor, dir, filters)
+        response = await self._get("/admin/api/adjudications", params=params)
+        return cast(AdjudicationPage, response.json())
+
+    async def export_adjudications(
+        self, *, tenant: Optional[str] = None, bot: Optional[str] = None
+    ) -> str:
+        """Export adjudications as an NDJSON stream (returned as text)."""
+
+        params = _export_params(tenant, bot)
+        return (await self._get("/admin/api/adjudications/export.ndjson", params=params)).text
+
+
+__all__ = ["AsyncGuardrailClient"]
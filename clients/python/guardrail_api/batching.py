@@ -0,0 +1,173 @@
+"""Client-side micro-batching into ``POST /guardrail/batch_evaluate``."""
+
+from __future__ import annotations
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .models import BatchItem, BatchResult
+
+BatchItemIn = Dict[str, Any]
+_Pending = Tuple[BatchItemIn, "Future[BatchItem]"]
+
+
+def _resolve(results: BatchResult, futures: Sequence[Any], size: int) -> None:
+    items = list(results.get("items") or [])
+    if len(items) != size:
+        raise RuntimeError(f"batch returned {len(items)} items for {size} inputs")
+    for fut, item in zip(futures, items):
+        if not fut.done():
+            fut.set_result(item)
+
+
+def _item(text: str, request_id: Optional[str]) -> BatchItemIn:
+    item: BatchItemIn = {"text": text}
+    if request_id:
+        item["request_id"] = request_id
+    return item
+
+
+class MicroBatcher:
+    """
+    Coalesces :meth:`submit` calls from any thread into batch requests.
+
+    A batch is sent when ``max_items`` are queued or ``max_delay_s`` after its
+    first item, whichever comes first. Results come back in input order, so
+    each future resolves to its own item. Use as a context manager or call
+    :meth:`close` to flush and stop the worker.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[List[BatchItemIn]], BatchResult],
+        *,
+        max_items: int = 32,
+        max_delay_s: float = 0.005,
+    ) -> None:
+        self._send = send
+        self.max_items = max(1, int(max_items))
+        self.max_delay_s = max(0.0, float(max_delay_s))
+        self._queue: "queue.Queue[Optional[_Pending]]" = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="guardrail-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str, *, request_id: Optional[str] = None) -> "Future[BatchItem]":
+        if self._closed:
+            raise RuntimeError("batcher is closed")
+        fut: "Future[BatchItem]" = Future()
+        self._queue.put((_item(text, request_id), fut))
+        return fut
+
+    def evaluate(self, text: str, *, request_id: Optional[str] = None) -> BatchItem:
+        return self.submit(text, request_id=request_id).result()
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join(timeout)
+
+    def __enter__(self) -> "MicroBatcher":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.max_delay_s
+            while len(batch) < self.max_items:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    nxt = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    # close(): flush what we have, then stop.
+                    stopping = True
+                    break
+                batch.append(nxt)
+            self._flush(batch)
+
+    def _flush(self, batch: List[_Pending]) -> None:
+        futures = [fut for _, fut in batch]
+        try:
+            _resolve(self._send([item for item, _ in batch]), futures, len(batch))
+        except BaseException as exc:
+            for fut in futures:
+                if not fut.done():
+                    fut.set_exception(exc)
+
+
+class AsyncMicroBatcher:
+    """:class:`MicroBatcher` for asyncio callers; batches flush on the running loop."""
+
+    def __init__(
+        self,
+        send: Callable[[List[BatchItemIn]], Awaitable[BatchResult]],
+        *,
+        max_items: int = 32,
+        max_delay_s: float = 0.005,
+    ) -> None:
+        self._send = send
+        self.max_items = max(1, int(max_items))
+        self.max_delay_s = max(0.0, float(max_delay_s))
+        self._pending: List[Tuple[BatchItemIn, "asyncio.Future[BatchItem]"]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: "set[asyncio.Task[None]]" = set()
+
+    async def evaluate(self, text: str, *, request_id: Optional[str] = None) -> BatchItem:
+        loop = asyncio.get_running_loop()
+        fut: "asyncio.Future[BatchItem]" = loop.create_future()
+        self._pending.append((_item(text, request_id), fut))
+        if len(self._pending) >= self.max_items:
+            self._schedule_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay_s, self._schedule_flush)
+        return await fut
+
+    async def aclose(self) -> None:
+        if self._pending:
+            self._schedule_flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def __aenter__(self) -> "AsyncMicroBatcher":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.aclose()
+
+    def _schedule_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._flush(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, batch: List[Tuple[BatchItemIn, "asyncio.Future[BatchItem]"]]) -> None:
+        futures = [fut for _, fut in batch]
+        try:
+            _resolve(await self._send([item for item, _ in batch]), futures, len(batch))
+        except Exception as exc:
+            for fut in futures:
+                if not fut.done():
+                    fut.set_exception(exc)
+
+
+__all__ = ["MicroBatcher", "AsyncMicroBatcher"]
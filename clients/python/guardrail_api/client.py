@@ -1,29 +1,238 @@
-"""Thin synchronous client for the Guardrail API."""
+"""Synchronous client for the Guardrail API."""
 
 from __future__ import annotations
 
-from typing import Any, Dict, Iterable, Optional, Tuple, Union, cast
+import random
+import time
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    cast,
+)
 
 import httpx
 
-from .models import AdjudicationPage, DecisionPage
+from ._http import (
+    IDEMPOTENCY_HEADER,
+    RetryPolicy,
+    base_headers,
+    http2_available,
+    json_body,
+    new_idempotency_key,
+    pool_limits,
+    scoped_headers,
+)
+from .batching import BatchItemIn, MicroBatcher
+from .models import (
+    AdjudicationPage,
+    BatchResult,
+    ChatCompletionChunk,
+    DecisionPage,
+    EvaluateResult,
+)
+from .sse import ServerSentEvent, iter_sse
 
 Scope = Optional[Union[str, Iterable[str]]]
+BatchInput = Union[str, Mapping[str, Any]]
 
 
-class GuardrailClient:
-    """Lightweight helper for interacting with the Guardrail API."""
+@dataclass
+class _Call:
+    """One logical request, shared by the sync and async clients."""
 
-    def __init__(self, base_url: str, token: Optional[str] = None, timeout: float = 10.0) -> None:
+    method: str
+    path: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    json: Any = None
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+def _page_params(
+    tenant: Scope, bot: Scope, limit: int, cursor: Optional[str], dir: str, filters: Dict[str, Any]
+) -> Dict[str, Any]:
+    params: Dict[str, Any] = {"limit": limit, "dir": dir, **filters}
+    if cursor:
+        params["cursor"] = cursor
+    if tenant is not None:
+        params["tenant"] = _normalize_scope(tenant)
+    if bot is not None:
+        params["bot"] = _normalize_scope(bot)
+    return params
+
+
+def _export_params(tenant: Optional[str], bot: Optional[str]) -> Dict[str, Any]:
+    params: Dict[str, Any] = {}
+    if tenant is not None:
+        params["tenant"] = tenant
+    if bot is not None:
+        params["bot"] = bot
+    return params
+
+
+def _evaluate_call(
+    text: str,
+    request_id: Optional[str],
+    tenant: Optional[str],
+    bot: Optional[str],
+    idempotency_key: Optional[str],
+) -> _Call:
+    body: Dict[str, Any] = {"text": text}
+    if request_id:
+        body["request_id"] = request_id
+    headers = scoped_headers(tenant=tenant, bot=bot, idempotency_key=idempotency_key)
+    return _Call("POST", "/guardrail/evaluate", json=body, headers=headers)
+
+
+def _batch_call(
+    items: Sequence[BatchInput],
+    tenant: Optional[str],
+    bot: Optional[str],
+    idempotency_key: Optional[str],
+) -> _Call:
+    body: List[BatchItemIn] = [{"text": it} if isinstance(it, str) else dict(it) for it in items]
+    headers = scoped_headers(tenant=tenant, bot=bot, idempotency_key=idempotency_key)
+    return _Call("POST", "/guardrail/batch_evaluate", json={"items": body}, headers=headers)
+
+
+def _chat_stream_call(
+    messages: Sequence[Mapping[str, Any]],
+    model: str,
+    tenant: Optional[str],
+    bot: Optional[str],
+    extra: Dict[str, Any],
+) -> _Call:
+    body = {"model": model, "messages": [dict(m) for m in messages], "stream": True, **extra}
+    headers = scoped_headers(tenant=tenant, bot=bot, headers={"Accept": "text/event-stream"})
+    return _Call("POST", "/v1/chat/completions", json=body, headers=headers)
+
+
+class _ClientBase:
+    def __init__(
+        self,
+        base_url: str,
+        token: Optional[str],
+        timeout: float,
+        retry: Optional[RetryPolicy],
+        auto_idempotency: bool,
+    ) -> None:
         self.base_url = base_url.rstrip("/")
-        self.headers = {"Authorization": f"Bearer {token}"} if token else {}
+        self.headers = base_headers(token)
         self.timeout = timeout
+        self.retry = retry or RetryPolicy()
+        self.auto_idempotency = auto_idempotency
+        self._rng = random.Random()
+
+    def _prepare(self, call: _Call, stream: bool) -> _Call:
+        # POSTs carry one key across every retry so a replay is never re-executed.
+        # Streams are left alone: the idempotency middleware buffers keyed responses.
+        if call.method == "POST" and self.auto_idempotency and not stream:
+            call.headers.setdefault(IDEMPOTENCY_HEADER, new_idempotency_key())
+        return call
+
+    def _url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    def _next_delay(
+        self, attempt: int, response: Optional[httpx.Response], error: Optional[BaseException]
+    ) -> Optional[float]:
+        """Backoff before the next attempt, or ``None`` to stop retrying."""
+        if attempt + 1 >= self.retry.max_attempts or not self.retry.retryable(response, error):
+            return None
+        return self.retry.delay(attempt, response, self._rng)
+
+
+class GuardrailClient(_ClientBase):
+    """
+    Pooled, retrying client for the Guardrail API.
+
+    One keep-alive connection pool is reused for the client's lifetime (use it
+    as a context manager or call :meth:`close`). ``http2=True`` negotiates
+    HTTP/2 when the ``h2`` package is installed (``guardrail-api[http2]``)
+    and falls back to HTTP/1.1 otherwise. POSTs get an ``X-Idempotency-Key``
+    unless one is passed, so retries under :class:`RetryPolicy` are safe.
+    ``http_client`` injects a preconfigured ``httpx.Client`` (e.g. a
+    FastAPI ``TestClient`` for in-process use); the caller then owns it.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        token: Optional[str] = None,
+        timeout: float = 10.0,
+        *,
+        retry: Optional[RetryPolicy] = None,
+        http2: bool = False,
+        max_connections: int = 20,
+        max_keepalive: int = 10,
+        keepalive_s: float = 30.0,
+        auto_idempotency: bool = True,
+        transport: Optional[httpx.BaseTransport] = None,
+        http_client: Optional[httpx.Client] = None,
+    ) -> None:
+        super().__init__(base_url, token, timeout, retry, auto_idempotency)
+        self._owns_http = http_client is None
+        self._http = http_client or httpx.Client(
+            timeout=timeout,
+            headers=self.headers,
+            http2=http2 and http2_available(),
+            limits=pool_limits(max_connections, max_keepalive, keepalive_s),
+            transport=transport,
+        )
+        if not self._owns_http:
+            self._http.headers.update(self.headers)
+        self._sleep: Callable[[float], None] = time.sleep
+
+    def close(self) -> None:
+        if self._owns_http:
+            self._http.close()
+
+    def __enter__(self) -> "GuardrailClient":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # Transport ---------------------------------------------------------------
+    def _send(self, call: _Call, *, stream: bool = False) -> httpx.Response:
+        call = self._prepare(call, stream)
+        request = self._http.build_request(
+            call.method,
+            self._url(call.path),
+            params=call.params or None,
+            json=call.json,
+            headers=call.headers,
+            timeout=self.timeout,
+        )
+        attempt = 0
+        while True:
+            try:
+                response = self._http.send(request, stream=stream)
+            except httpx.TransportError as exc:
+                delay = self._next_delay(attempt, None, exc)
+                if delay is None:
+                    raise
+            else:
+                delay = self._next_delay(attempt, response, None)
+                if delay is None:
+                    return response
+                response.close()
+            self._sleep(delay)
+            attempt += 1
 
     def _get(self, path: str, params: Dict[str, Any] | None = None) -> httpx.Response:
-        with httpx.Client(timeout=self.timeout, headers=self.headers) as client:
-            response = client.get(f"{self.base_url}{path}", params=params)
-            response.raise_for_status()
-            return response
+        response = self._send(_Call("GET", path, params=params or {}))
+        response.raise_for_status()
+        return response
 
     # Health -----------------------------------------------------------------
     def healthz(self) -> Dict[str, Any]:
@@ -36,6 +245,93 @@ class GuardrailClient:
 
         return cast(Dict[str, Any], self._get("/readyz").json())
 
+    # Evaluation -------------------------------------------------------------
+    def evaluate(
+        self,
+        text: str,
+        *,
+        request_id: Optional[str] = None,
+        tenant: Optional[str] = None,
+        bot: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> EvaluateResult:
+        """Evaluate one ingress text via ``POST /guardrail/evaluate``."""
+
+        call = _evaluate_call(text, request_id, tenant, bot, idempotency_key)
+        return cast(EvaluateResult, json_body(self._send(call)))
+
+    def batch_evaluate(
+        self,
+        items: Sequence[BatchInput],
+        *,
+        tenant: Optional[str] = None,
+        bot: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> BatchResult:
+        """Evaluate texts (or ``{"text", "request_id"}`` items) in one request."""
+
+        call = _batch_call(items, tenant, bot, idempotency_key)
+        return cast(BatchResult, json_body(self._send(call)))
+
+    def batcher(
+        self,
+        *,
+        max_items: int = 32,
+        max_delay_s: float = 0.005,
+        tenant: Optional[str] = None,
+        bot: Optional[str] = None,
+    ) -> MicroBatcher:
+        """A :class:`MicroBatcher` that coalesces single evaluations into batches."""
+
+        return MicroBatcher(
+            lambda items: self.batch_evaluate(items, tenant=tenant, bot=bot),
+            max_items=max_items,
+            max_delay_s=max_delay_s,
+        )
+
+    # Streaming --------------------------------------------------------------
+    def stream_events(
+        self,
+        method: str,
+        path: str,
+        *,
+        json: Any = None,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Iterator[ServerSentEvent]:
+        """
+        Iterate SSE events from any streaming endpoint as they arrive.
+
+        Retries apply until the response starts; a stream broken midway raises.
+        """
+
+        hdrs = {"Accept": "text/event-stream", **(headers or {})}
+        response = self._send(_Call(method, path, params or {}, json, hdrs), stream=True)
+        try:
+            response.raise_for_status()
+            yield from iter_sse(response.iter_lines())
+        finally:
+            response.close()
+
+    def stream_chat_completions(
+        self,
+        messages: Sequence[Mapping[str, Any]],
+        *,
+        model: str = "demo",
+        tenant: Optional[str] = None,
+        bot: Optional[str] = None,
+        **params: Any,
+    ) -> Iterator[ChatCompletionChunk]:
+        """Egress-guarded ``/v1/chat/completions`` chunks, stopping at ``[DONE]``."""
+
+        call = _chat_stream_call(messages, model, tenant, bot, params)
+        for event in self.stream_events(
+            call.method, call.path, json=call.json, headers=call.headers
+        ):
+            if event.done:
+                return
+            yield cast(ChatCompletionChunk, event.json())
+
     # Decisions ---------------------------------------------------------------
     def list_decisions(
         self,
@@ -49,23 +345,13 @@ class GuardrailClient:
     ) -> DecisionPage:
         """List decisions with cursor pagination."""
 
-        params: Dict[str, Any] = {"limit": limit, "dir": dir, **filters}
-        if cursor:
-            params["cursor"] = cursor
-        if tenant is not None:
-            params["tenant"] = _normalize_scope(tenant)
-        if bot is not None:
-            params["bot"] = _normalize_scope(bot)
+        params = _page_params(tenant, bot, limit, cursor, dir, filters)
         return cast(DecisionPage, self._get("/admin/api/decisions", params=params).json())
 
     def export_decisions(self, *, tenant: Optional[str] = None, bot: Optional[str] = None) -> str:
         """Export decisions as an NDJSON stream (returned as text)."""
 
-        params: Dict[str, Any] = {}
-        if tenant is not None:
-            params["tenant"] = tenant
-        if bot is not None:
-            params["bot"] = bot
+        params = _export_params(tenant, bot)
         params["format"] = "jsonl"
         response = self._get("/admin/api/decisions/export", params=params)
         return response.text
@@ -83,13 +369,7 @@ class GuardrailClient:
     ) -> AdjudicationPage:
         """List adjudications with cursor pagination."""
 
-        params: Dict[str, Any] = {"limit": limit, "dir": dir, **filters}
-        if cursor:
-            params["cursor"] = cursor
-        if tenant is not None:
-            params["tenant"] = _normalize_scope(tenant)
-        if bot is not None:
-            params["bot"] = _normalize_scope(bot)
+        params = _page_params(tenant, bot, limit, cursor, dir, filters)
         return cast(
             AdjudicationPage,
             self._get("/admin/api/adjudications", params=params).json(),
@@ -103,11 +383,7 @@ class GuardrailClient:
     ) -> str:
         """Export adjudications as an NDJSON stream (returned as text)."""
 
-        params: Dict[str, Any] = {}
-        if tenant is not None:
-            params["tenant"] = tenant
-        if bot is not None:
-            params["bot"] = bot
+        params = _export_params(tenant, bot)
         response = self._get("/admin/api/adjudications/export.ndjson", params=params)
         return response.text
 
@@ -120,4 +396,4 @@ def _normalize_scope(scope: Scope) -> Union[str, Tuple[str, ...]]:
     return tuple(str(item) for item in scope)
 
 
-__all__ = ["GuardrailClient", "Scope"]
+__all__ = ["GuardrailClient", "Scope", "BatchInput"]
@@ -48,7 +48,58 @@ class AdjudicationPage(TypedDict, total=False):
     prev_cursor: Optional[str]
 
 
+class EvaluateResult(TypedDict, total=False):
+    request_id: str
+    action: str
+    text: str
+    transformed_text: str
+    risk_score: int
+    rule_hits: Optional[Sequence[str]]
+    decisions: Optional[Sequence[Mapping[str, object]]]
+
+
+class BatchItem(TypedDict, total=False):
+    request_id: str
+    action: str
+    text: str
+    transformed_text: str
+    risk_score: int
+    rule_hits: Optional[Sequence[str]]
+    redactions: Optional[int]
+    decisions: Optional[Sequence[Mapping[str, object]]]
+
+
+class BatchResult(TypedDict, total=False):
+    items: Sequence[BatchItem]
+    count: int
+
+
+class ChatCompletionDelta(TypedDict, total=False):
+    role: str
+    content: str
+
+
+class ChatCompletionChunkChoice(TypedDict, total=False):
+    index: int
+    delta: ChatCompletionDelta
+    finish_reason: Optional[str]
+
+
+class ChatCompletionChunk(TypedDict, total=False):
+    id: str
+    object: Literal["chat.completion.chunk"]
+    created: int
+    model: str
+    choices: Sequence[ChatCompletionChunkChoice]
+
+
 __all__ = [
+    "EvaluateResult",
+    "BatchItem",
+    "BatchResult",
+    "ChatCompletionDelta",
+    "ChatCompletionChunkChoice",
+    "ChatCompletionChunk",
     "DecisionItem",
     "DecisionPage",
     "AdjudicationItem",
@@ -0,0 +1,99 @@
+"""Incremental Server-Sent Events decoding for streaming endpoints."""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Iterable, Iterator, List, Optional
+
+
+@dataclass(frozen=True)
+class ServerSentEvent:
+    """One dispatched SSE event."""
+
+    data: str
+    event: str = "message"
+    id: Optional[str] = None
+    retry: Optional[int] = None
+
+    @property
+    def done(self) -> bool:
+        """True for the OpenAI-style ``data: [DONE]`` terminator."""
+        return self.data == "[DONE]"
+
+    def json(self) -> Any:
+        return json.loads(self.data)
+
+
+class SSEDecoder:
+    """
+    Line-oriented decoder following the WHATWG event-stream rules: ``data``
+    lines accumulate, a blank line dispatches, ``:`` lines are comments
+    (heartbeats) and unknown fields are ignored.
+    """
+
+    def __init__(self) -> None:
+        self._data: List[str] = []
+        self._event: Optional[str] = None
+        self._id: Optional[str] = None
+        self._retry: Optional[int] = None
+        self._last_id: Optional[str] = None
+
+    def feed(self, line: str) -> Optional[ServerSentEvent]:
+        line = line.rstrip("\r\n")
+        if not line:
+            return self._dispatch()
+        if line.startswith(":"):
+            return None
+        name, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if name == "data":
+            self._data.append(value)
+        elif name == "event":
+            self._event = value
+        elif name == "id" and "\0" not in value:
+            self._id = value
+        elif name == "retry" and value.isdigit():
+            self._retry = int(value)
+        return None
+
+    def _dispatch(self) -> Optional[ServerSentEvent]:
+        if self._id is not None:
+            self._last_id = self._id
+        if not self._data:
+            self._event, self._id, self._retry = None, None, None
+            return None
+        event = ServerSentEvent(
+            data="\n".join(self._data),
+            event=self._event or "message",
+            id=self._last_id,
+            retry=self._retry,
+        )
+        self._data, self._event, self._id, self._retry = [], None, None, None
+        return event
+
+
+def iter_sse(lines: Iterable[str]) -> Iterator[ServerSentEvent]:
+    decoder = SSEDecoder()
+    for line in lines:
+        event = decoder.feed(line)
+        if event is not None:
+            yield event
+    event = decoder.feed("")
+    if event is not None:
+        yield event
+
+
+async def aiter_sse(lines: AsyncIterator[str]) -> AsyncIterator[ServerSentEvent]:
+    decoder = SSEDecoder()
+    async for line in lines:
+        event = decoder.feed(line)
+        if event is not None:
+            yield event
+    event = decoder.feed("")
+    if event is not None:
+        yield event
+
+
+__all__ = ["ServerSentEvent", "SSEDecoder", "iter_sse", "aiter_sse"]
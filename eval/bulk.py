@@ -0,0 +1,271 @@
+"""Offline bulk evaluation: stream large JSONL corpora through a worker pool.
+
+Each worker imports :mod:`eval.predictors` once (loading policy packs and
+detector tables) and warms every detector before scoring, so shards reuse one
+snapshot instead of paying start-up per example. Corpora are read lazily and
+only a bounded number of shards are in flight, so memory stays flat however
+large the input is. Per-example results are appended to ``results.jsonl`` as
+shards complete; ``summary.json`` / ``REPORT.md`` hold per-category
+precision/recall with throughput and per-detector latency percentiles.
+
+    python -m eval.bulk eval/corpus/*.jsonl --workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from eval.metrics import LatencyHistogram, prf
+
+Shard = List[Dict[str, Any]]
+ShardResult = Tuple[List[Dict[str, Any]], Dict[str, LatencyHistogram]]
+
+DEFAULT_CORPUS = "eval/corpus/*.jsonl"
+
+_WARM: Dict[str, Any] = {}
+
+
+def expand_paths(patterns: Sequence[str]) -> List[str]:
+    paths: List[str] = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern))
+        paths.extend(matches or [pattern])
+    return paths
+
+
+def iter_shards(paths: Iterable[str], size: int) -> Iterator[Shard]:
+    """Raw JSON objects from every corpus file, ``size`` at a time."""
+    shard: Shard = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as handle:
+            for line in handle:
+                data = line.strip()
+                if not data:
+                    continue
+                shard.append(json.loads(data))
+                if len(shard) >= size:
+                    yield shard
+                    shard = []
+    if shard:
+        yield shard
+
+
+def _init_worker() -> None:
+    # Import (pack loading, regex compilation) and first-call costs land here,
+    # once per worker, instead of inside the timed loop.
+    from eval import predictors
+
+    for cat in predictors.DETECTORS:
+        predictors.predict(predictors.Example(id="warm", cat=cat, text="warm up", label=0))
+    _WARM["predictors"] = predictors
+
+
+def score_shard(shard: Shard) -> ShardResult:
+    if "predictors" not in _WARM:
+        _init_worker()
+    predictors = _WARM["predictors"]
+    rows: List[Dict[str, Any]] = []
+    latency: Dict[str, LatencyHistogram] = {}
+    clock = time.perf_counter_ns
+    for payload in shard:
+        example = predictors.example_from_json(payload)
+        detector = predictors.detector_for(example.cat)
+        started = clock()
+        pred = predictors.predict(example)
+        elapsed_us = (clock() - started) / 1000.0
+        latency.setdefault(detector, LatencyHistogram()).add(elapsed_us)
+        rows.append(
+            {
+                "id": example.id,
+                "cat": example.cat,
+                "label": example.label,
+                "pred": pred,
+                "detector": detector,
+                "latency_us": round(elapsed_us, 2),
+            }
+        )
+    return rows, latency
+
+
+class _Tally:
+    def __init__(self) -> None:
+        self.counts: Dict[str, List[int]] = {}  # cat -> [tp, fp, fn, tn]
+        self.latency: Dict[str, LatencyHistogram] = {}
+        self.errors: Dict[str, Dict[str, List[str]]] = {}
+        self.examples = 0
+
+    def add(self, result: ShardResult, max_error_ids: int = 50) -> None:
+        rows, latency = result
+        for row in rows:
+            counts = self.counts.setdefault(row["cat"], [0, 0, 0, 0])
+            label, pred = row["label"], row["pred"]
+            if label == 1 and pred == 1:
+                counts[0] += 1
+            elif label == 0 and pred == 1:
+                counts[1] += 1
+                self._error(row, "FP", max_error_ids)
+            elif label == 1 and pred == 0:
+                counts[2] += 1
+                self._error(row, "FN", max_error_ids)
+            else:
+                counts[3] += 1
+        self.examples += len(rows)
+        for detector, hist in latency.items():
+            self.latency.setdefault(detector, LatencyHistogram()).merge(hist)
+
+    def _error(self, row: Dict[str, Any], kind: str, cap: int) -> None:
+        ids = self.errors.setdefault(row["cat"], {}).setdefault(kind, [])
+        if len(ids) < cap:
+            ids.append(row["id"])
+
+    def summary(self, wall_s: float, workers: int) -> Dict[str, Any]:
+        per_category: Dict[str, Dict[str, Any]] = {}
+        for cat, (tp, fp, fn, tn) in sorted(self.counts.items()):
+            metric = prf(tp, fp, fn)
+            per_category[cat] = {
+                "tp": tp,
+                "fp": fp,
+                "fn": fn,
+                "tn": tn,
+                "precision": round(metric.prec, 4),
+                "recall": round(metric.rec, 4),
+                "f1": round(metric.f1, 4),
+            }
+        totals = {k: sum(row[k] for row in per_category.values()) for k in ("tp", "fp", "fn", "tn")}
+        return {
+            "per_category": per_category,
+            "totals": totals,
+            "throughput": {
+                "examples": self.examples,
+                "workers": workers,
+                "wall_s": round(wall_s, 3),
+                "examples_per_s": round(self.examples / wall_s, 1) if wall_s > 0 else 0.0,
+            },
+            "latency_by_detector": {
+                name: hist.summary() for name, hist in sorted(self.latency.items())
+            },
+        }
+
+
+def _report(summary: Dict[str, Any], errors: Dict[str, Dict[str, List[str]]]) -> str:
+    tput = summary["throughput"]
+    lines: List[str] = [
+        "# Offline Bulk Eval Report",
+        "",
+        f"{tput['examples']} examples in {tput['wall_s']}s on {tput['workers']} worker(s) "
+        f"({tput['examples_per_s']} examples/s)",
+        "",
+    ]
+    for cat, m in summary["per_category"].items():
+        lines.append(
+            f"- **{cat}** p={m['precision']:.2f} r={m['recall']:.2f} f1={m['f1']:.2f} "
+            f"(tp={m['tp']} fp={m['fp']} fn={m['fn']} tn={m['tn']})"
+        )
+    lines += [
+        "",
+        "| detector | n | p50 µs | p90 µs | p99 µs | max µs |",
+        "|---|---|---|---|---|---|",
+    ]
+    for name, lat in summary["latency_by_detector"].items():
+        lines.append(
+            f"| {name} | {lat['count']} | {lat['p50_us']} | {lat['p90_us']} | "
+            f"{lat['p99_us']} | {lat['max_us']} |"
+        )
+    lines.append("")
+    for cat, groups in errors.items():
+        fn_samples = ", ".join(groups.get("FN", [])[:5]) or "-"
+        fp_samples = ", ".join(groups.get("FP", [])[:5]) or "-"
+        lines.append(f"**{cat}** FN: {fn_samples} | FP: {fp_samples}")
+    return "\n".join(lines)
+
+
+def run(
+    paths: Sequence[str],
+    outdir: Path,
+    *,
+    workers: Optional[int] = None,
+    shard_size: int = 512,
+    write_results: bool = True,
+) -> Dict[str, Any]:
+    """
+    Score every example in ``paths`` and write artifacts under ``outdir``.
+
+    ``workers=0`` scores in-process (handy for debugging and small corpora).
+    """
+    n_workers = (os.cpu_count() or 1) if workers is None else max(0, int(workers))
+    outdir.mkdir(parents=True, exist_ok=True)
+    tally = _Tally()
+    shards = iter_shards(paths, max(1, int(shard_size)))
+    results_path = outdir / "results.jsonl"
+    sink = results_path.open("w", encoding="utf-8") if write_results else None
+
+    def consume(result: ShardResult) -> None:
+        tally.add(result)
+        if sink is not None:
+            sink.write("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in result[0]))
+            sink.flush()
+
+    started = time.perf_counter()
+    try:
+        if n_workers == 0:
+            for shard in shards:
+                consume(score_shard(shard))
+        else:
+            with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker) as pool:
+                # Bounded in-flight window: the corpus is never read ahead of the pool.
+                pending: Set["Future[ShardResult]"] = set()
+                for shard in shards:
+                    pending.add(pool.submit(score_shard, shard))
+                    if len(pending) >= n_workers * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for fut in done:
+                            consume(fut.result())
+                for fut in pending:
+                    consume(fut.result())
+    finally:
+        if sink is not None:
+            sink.close()
+    wall_s = time.perf_counter() - started
+
+    summary = tally.summary(wall_s, n_workers)
+    (outdir / "summary.json").write_text(
+        json.dumps({"summary": summary, "errors": tally.errors}, indent=2),
+        encoding="utf-8",
+    )
+    (outdir / "REPORT.md").write_text(_report(summary, tally.errors), encoding="utf-8")
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", default=[DEFAULT_CORPUS], help="JSONL files or globs")
+    parser.add_argument("--workers", type=int, default=None, help="Default: CPU count; 0 = inline")
+    parser.add_argument("--shard-size", type=int, default=512)
+    parser.add_argument("--out", default=None, help="Default: eval/out/<timestamp>-bulk")
+    parser.add_argument(
+        "--no-results", action="store_true", help="Skip the per-example results.jsonl"
+    )
+    args = parser.parse_args(argv)
+
+    outdir = Path(args.out or f"eval/out/{time.strftime('%Y%m%d-%H%M%S')}-bulk")
+    summary = run(
+        expand_paths(args.paths),
+        outdir,
+        workers=args.workers,
+        shard_size=args.shard_size,
+        write_results=not args.no_results,
+    )
+    tput = summary["throughput"]
+    print(f"{tput['examples']} examples, {tput['examples_per_s']}/s; wrote: {outdir}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import math
 from dataclasses import dataclass
 from typing import Dict, Iterable, Tuple
 
@@ -34,3 +35,59 @@ def aggregate_by_cat(rows: Iterable[Tuple[str, int, int]]) -> Dict[str, PRF]:
             fn += 1
         stats[cat] = (tp, fp, fn)
     return {k: prf(*v) for k, v in stats.items()}
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram with bounded memory.
+
+    Each bucket spans ``growth`` x its lower edge (5% by default), so
+    percentiles carry at most that relative error regardless of sample count.
+    Histograms from separate workers combine with :meth:`merge`.
+    """
+
+    def __init__(self, growth: float = 1.05) -> None:
+        self._log_growth = math.log(growth)
+        self.growth = growth
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total_us = 0.0
+        self.max_us = 0.0
+
+    def add(self, latency_us: float) -> None:
+        value = max(float(latency_us), 1.0)
+        index = int(math.log(value) / self._log_growth)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total_us += value
+        if value > self.max_us:
+            self.max_us = value
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for index, n in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + n
+        self.count += other.count
+        self.total_us += other.total_us
+        self.max_us = max(self.max_us, other.max_us)
+
+    def percentile(self, q: float) -> float:
+        """Upper edge of the bucket holding the ``q``-th percentile, in microseconds."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * q / 100.0))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self.growth ** (index + 1), self.max_us)
+        return self.max_us
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean_us": round(self.total_us / self.count, 2) if self.count else 0.0,
+            "p50_us": round(self.percentile(50), 2),
+            "p90_us": round(self.percentile(90), 2),
+            "p99_us": round(self.percentile(99), 2),
+            "max_us": round(self.max_us, 2),
+        }
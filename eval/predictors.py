@@ -3,7 +3,7 @@ from __future__ import annotations
 import json
 import re
 from dataclasses import dataclass
-from typing import Iterable, List
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
 
 from app.ingress.multimodal import detect_injection
 from app.policy.pack_engine import evaluate_text
@@ -29,23 +29,27 @@ class Example:
     label: int
 
 
-def _load_jsonl(path: str) -> List[Example]:
-    out: List[Example] = []
+def example_from_json(payload: Dict[str, Any]) -> Example:
+    return Example(
+        id=str(payload["id"]),
+        cat=str(payload["cat"]),
+        text=str(payload["text"]),
+        label=int(payload["label"]),
+    )
+
+
+def iter_jsonl(path: str) -> Iterator[Example]:
+    """Yield examples one line at a time, so corpus size does not bound memory."""
     with open(path, "r", encoding="utf-8") as handle:
         for line in handle:
             data = line.strip()
             if not data:
                 continue
-            payload = json.loads(data)
-            out.append(
-                Example(
-                    id=str(payload["id"]),
-                    cat=str(payload["cat"]),
-                    text=str(payload["text"]),
-                    label=int(payload["label"]),
-                )
-            )
-    return out
+            yield example_from_json(json.loads(data))
+
+
+def _load_jsonl(path: str) -> List[Example]:
+    return list(iter_jsonl(path))
 
 
 def load_corpus(paths: Iterable[str]) -> List[Example]:
@@ -79,18 +83,23 @@ def _predict_image(text: str) -> int:
     return 1 if hits > 0 else 0
 
 
+# category -> (detector name, predictor)
+DETECTORS: Dict[str, Tuple[str, Callable[[str], int]]] = {
+    "injection": ("injection_regex", _predict_injection),
+    "unicode": ("unicode_sanitizer", _predict_unicode),
+    "confusable": ("confusables", _predict_confusable),
+    "policy": ("policy_packs", _predict_policy),
+    "image": ("image_injection", _predict_image),
+}
+
+
+def detector_for(cat: str) -> str:
+    entry = DETECTORS.get(cat)
+    return entry[0] if entry else "none"
+
+
 def predict(example: Example) -> int:
-    cat = example.cat
-    text = example.text
-
-    if cat == "injection":
-        return _predict_injection(text)
-    if cat == "unicode":
-        return _predict_unicode(text)
-    if cat == "confusable":
-        return _predict_confusable(text)
-    if cat == "policy":
-        return _predict_policy(text)
-    if cat == "image":
-        return _predict_image(text)
-    return 0
+    entry = DETECTORS.get(example.cat)
+    if entry is None:
+        return 0
+    return entry[1](example.text)
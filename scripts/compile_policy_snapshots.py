@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Pre-compile policy snapshots so workers skip YAML parsing at startup.
+
+Run with the same environment as the service (POLICY_RULES_PATH,
+RULEPACKS_ACTIVE, bindings, ...) before starting or forking workers.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--dir",
+        default=os.getenv("POLICY_SNAPSHOT_DIR") or "var/policy_snapshots",
+        help="snapshot directory (default: $POLICY_SNAPSHOT_DIR or var/policy_snapshots)",
+    )
+    args = parser.parse_args(argv)
+    os.environ["POLICY_SNAPSHOT_DIR"] = args.dir
+    os.environ.setdefault("POLICY_AUTORELOAD", "false")
+
+    from app.services import policy_snapshot
+
+    summary = policy_snapshot.compile_all()
+    print(json.dumps(summary, indent=2))
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, List
+
+import httpx
+import pytest
+
+from app import config
+from app.security import oidc as OIDC
+
+pytestmark = pytest.mark.asyncio
+
+ISSUER = "https://idp.example"
+JWKS_URI = f"{ISSUER}/jwks"
+
+
+class _StubIssuer:
+    """In-process IdP serving discovery and a rotatable JWKS."""
+
+    def __init__(self) -> None:
+        self.kids: List[str] = ["k1"]
+        self.max_age = 600
+        self.down = False
+        self.requests: Dict[str, int] = {"discovery": 0, "jwks": 0}
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        if self.down:
+            raise httpx.ConnectError("idp unreachable", request=request)
+        headers = {"cache-control": f"public, max-age={self.max_age}"}
+        if request.url.path.endswith("/openid-configuration"):
+            self.requests["discovery"] += 1
+            body: Dict[str, Any] = {
+                "jwks_uri": JWKS_URI,
+                "authorization_endpoint": f"{ISSUER}/auth",
+                "token_endpoint": f"{ISSUER}/token",
+            }
+            return httpx.Response(200, json=body, headers=headers)
+        self.requests["jwks"] += 1
+        keys = [{"kty": "oct", "kid": kid, "k": "c2VjcmV0"} for kid in self.kids]
+        return httpx.Response(200, json={"keys": keys}, headers=headers)
+
+
+@pytest.fixture
+def idp(monkeypatch) -> Any:
+    stub = _StubIssuer()
+    monkeypatch.setattr(config, "OIDC_ISSUER", ISSUER, raising=False)
+    monkeypatch.setattr(config, "OIDC_JWKS_REFETCH_MIN_S", 30.0, raising=False)
+    monkeypatch.setattr(
+        OIDC, "_new_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(stub.handler))
+    )
+    OIDC.reset_cache()
+    yield stub
+    OIDC.reset_cache()
+
+
+def _kids(jwks: Dict[str, Any]) -> List[str]:
+    return [k["kid"] for k in jwks["keys"]]
+
+
+async def _drain() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def test_documents_are_cached_per_max_age(idp: _StubIssuer) -> None:
+    results = await asyncio.gather(*(OIDC.fetch_openid_config() for _ in range(10)))
+    assert all(r["jwks_uri"] == JWKS_URI for r in results)
+    for _ in range(10):
+        assert _kids(await OIDC.fetch_jwks(JWKS_URI)) == ["k1"]
+
+    assert idp.requests == {"discovery": 1, "jwks": 1}
+    doc = OIDC._documents[JWKS_URI]
+    assert doc.fresh_until - doc.fetched_at == pytest.approx(600)
+
+
+async def test_refresh_ahead_runs_in_background(idp: _StubIssuer) -> None:
+    await OIDC.fetch_jwks(JWKS_URI)
+    idp.kids = ["k2"]
+    OIDC._documents[JWKS_URI].refresh_at = 0.0
+
+    # Still served from cache while the refresh is in flight.
+    assert _kids(await OIDC.fetch_jwks(JWKS_URI)) == ["k1"]
+    await _drain()
+    assert _kids(await OIDC.fetch_jwks(JWKS_URI)) == ["k2"]
+    assert idp.requests["jwks"] == 2
+
+
+async def test_unknown_kid_triggers_one_coalesced_refetch(idp: _StubIssuer) -> None:
+    await OIDC.fetch_jwks(JWKS_URI)
+    OIDC._documents[JWKS_URI].last_attempt -= 60
+    idp.kids = ["k1", "k2"]
+
+    results = await asyncio.gather(*(OIDC.fetch_jwks(JWKS_URI, kid="k2") for _ in range(20)))
+    assert all("k2" in _kids(r) for r in results)
+    assert idp.requests["jwks"] == 2
+
+    # A further unknown kid inside the refetch window does not reach the IdP.
+    assert "bogus" not in _kids(await OIDC.fetch_jwks(JWKS_URI, kid="bogus"))
+    assert idp.requests["jwks"] == 2
+
+
+async def test_stale_keys_served_while_idp_unreachable(idp: _StubIssuer, monkeypatch) -> None:
+    await OIDC.fetch_openid_config()
+    await OIDC.fetch_jwks(JWKS_URI)
+    idp.down = True
+    for doc in OIDC._documents.values():
+        doc.fresh_until = doc.refresh_at = 0.0
+
+    assert (await OIDC.fetch_openid_config())["jwks_uri"] == JWKS_URI
+    assert _kids(await OIDC.fetch_jwks(JWKS_URI)) == ["k1"]
+    await _drain()
+    # Failed refreshes back off instead of retrying on every request.
+    before = dict(idp.requests)
+    await OIDC.fetch_jwks(JWKS_URI)
+    await _drain()
+    assert idp.requests == before
+
+    monkeypatch.setattr(config, "OIDC_CACHE_MAX_STALE_S", 0.0, raising=False)
+    with pytest.raises(OIDC.OIDCError):
+        await OIDC.fetch_jwks(JWKS_URI)
+
+    idp.down = False
+    monkeypatch.setattr(config, "OIDC_CACHE_MAX_STALE_S", 86400.0, raising=False)
+    OIDC._documents[JWKS_URI].retry_after = 0.0
+    idp.kids = ["k3"]
+    assert _kids(await OIDC.fetch_jwks(JWKS_URI)) == ["k1"]
+    await _drain()
+    assert _kids(await OIDC.fetch_jwks(JWKS_URI)) == ["k3"]
+
+
+async def test_cold_start_outage_raises_oidc_error(idp: _StubIssuer) -> None:
+    idp.down = True
+    with pytest.raises(OIDC.OIDCError):
+        await OIDC.fetch_openid_config()
+
+
+async def test_max_age_parsing() -> None:
+    assert OIDC._max_age(httpx.Headers({"cache-control": "public, max-age=120"})) == 120
+    assert OIDC._max_age(httpx.Headers({"cache-control": "no-store"})) == 0
+    assert OIDC._max_age(httpx.Headers({})) is None
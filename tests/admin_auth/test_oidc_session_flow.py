@@ -87,7 +87,7 @@ def test_oidc_login_callback_sets_session(monkeypatch: pytest.MonkeyPatch) -> No
             "token_endpoint": "https://example.com/token",
         }
 
-    async def fake_jwks(_url: str) -> dict[str, object]:
+    async def fake_jwks(_url: str, kid: str | None = None) -> dict[str, object]:
         return {"keys": []}
 
     def fake_verify(
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import contextlib
+import gzip
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.audit.exporter import MANIFEST_PREFIX, ExportStream, decode_cursor, verify_manifest
+from app.audit.models import AuditRecord, AuditStore
+from app.routes.admin_audit import get_audit_store, router as audit_router
+from app.security.rbac import require_admin
+from cli import audit_export
+
+
+class _Store(AuditStore):
+    def __init__(self, rows: List[AuditRecord]) -> None:
+        self.rows = rows
+        self.pulled = 0
+
+    def iter_records(
+        self, tenant, start_iso=None, end_iso=None, incident_id=None, after=None, limit=None
+    ):
+        for row in sorted(self.rows, key=lambda r: (r.ts, r.request_id)):
+            if after is None or (row.ts, row.request_id) > after:
+                self.pulled += 1
+                yield row
+
+
+def _rows(n: int) -> List[AuditRecord]:
+    return [
+        AuditRecord(
+            ts=f"2026-01-01T00:{i // 60:02d}:{i % 60:02d}Z",
+            tenant="acme",
+            request_id=f"req-{i:04d}",
+            incident_id="inc-1",
+            decision="block",
+            mode="block_input",
+            headers={"authorization": "Bearer x", "x-user": f"u{i}@example.com"},
+            payload={"note": "call 555-111-2222", "n": i},
+        )
+        for i in range(n)
+    ]
+
+
+@pytest.fixture()
+def client(monkeypatch):
+    monkeypatch.setenv("AUDIT_EXPORT_SIGNING_SECRET", "k1")
+    store = _Store(_rows(120))
+    app = FastAPI()
+    app.include_router(audit_router)
+    app.dependency_overrides[get_audit_store] = lambda: store
+    app.dependency_overrides[require_admin] = lambda: {"role": "admin"}
+    return TestClient(app)
+
+
+def test_stream_pulls_records_lazily_in_chunks() -> None:
+    store = _Store(_rows(50))
+    stream = iter(ExportStream("acme", store.iter_records("acme"), fmt="ndjson", chunk=10))
+    first = next(stream)
+    assert first.count(b"\n") == 10
+    assert store.pulled <= 11
+    lines = (first + b"".join(stream)).splitlines()
+    manifest = json.loads(lines[-1])["manifest"]
+    assert manifest["count"] == 50 and len(lines) == 51
+    assert decode_cursor(manifest["cursor"]) == ("2026-01-01T00:00:49Z", "req-0049")
+
+
+def test_ndjson_manifest_is_signed_and_matches_records(client) -> None:
+    r = client.get("/admin/audit/export", params={"tenant": "acme", "fmt": "ndjson"})
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    *records, trailer = r.content.splitlines(keepends=True)
+    manifest = json.loads(trailer)["manifest"]
+    digest = hashlib.sha256(b"".join(records)).hexdigest()
+    assert verify_manifest(manifest, count=120, sha256=digest, secret="k1")
+    assert not verify_manifest(manifest, count=120, sha256=digest, secret="other")
+    first = json.loads(records[0])
+    assert first["headers"]["authorization"] == "[REDACTED]"
+    assert "[REDACTED]" in first["payload"]["note"]
+
+    after = json.loads(records[99])["cursor"]
+    rest = client.get(
+        "/admin/audit/export", params={"tenant": "acme", "fmt": "ndjson", "after": after}
+    )
+    assert json.loads(rest.content.splitlines()[-1])["manifest"]["count"] == 20
+    bad = client.get("/admin/audit/export", params={"tenant": "acme", "after": "%%%"})
+    assert bad.status_code == 400
+
+
+def test_json_csv_and_gzip_keep_their_shapes(client) -> None:
+    body = client.get("/admin/audit/export", params={"tenant": "acme"}).json()
+    assert body["count"] == 120 == body["manifest"]["count"]
+    assert body["records"][0]["request_id"] == "req-0000"
+
+    r = client.get("/admin/audit/export", params={"tenant": "acme", "fmt": "csv", "gzip": "true"})
+    assert r.headers["content-type"] == "application/gzip"
+    text = gzip.decompress(r.content).decode("utf-8").splitlines()
+    assert text[0].startswith("ts,tenant,request_id,incident_id")
+    assert len(text) == 122 and text[-1].startswith(MANIFEST_PREFIX)
+
+
+class _Session:
+    """requests-like adapter over TestClient that can cut a response short."""
+
+    def __init__(self, client: TestClient, cut_at: Optional[int] = None) -> None:
+        self.client = client
+        self.cut_at = cut_at
+        self.params: List[Dict[str, Any]] = []
+
+    @contextlib.contextmanager
+    def get(self, url: str, params: Dict[str, Any], stream: bool = False) -> Iterator[Any]:
+        self.params.append(params)
+        response = self.client.get(url, params=params)
+        content = response.content[: self.cut_at] if self.cut_at else response.content
+
+        def iter_content(chunk_size: int) -> Iterator[bytes]:
+            for i in range(0, len(content), 37):
+                yield content[i : i + 37]
+
+        response.iter_content = iter_content  # type: ignore[attr-defined]
+        yield response
+
+
+def test_cli_resumes_partial_download_by_cursor(client, tmp_path: Path) -> None:
+    dest = tmp_path / "bundle.ndjson"
+    with pytest.raises(RuntimeError, match="--resume"):
+        audit_export.download_ndjson(
+            _Session(client, cut_at=5000), "/admin/audit/export", {"tenant": "acme"}, dest
+        )
+    part = tmp_path / "bundle.ndjson.part"
+    saved = part.read_bytes().count(b"\n")
+    assert 0 < saved < 120 and not dest.exists()
+
+    session = _Session(client)
+    summary = audit_export.download_ndjson(
+        session, "/admin/audit/export", {"tenant": "acme"}, dest, resume=True, secret="k1"
+    )
+    assert session.params[0]["after"] == summary["resumed_from"]
+    assert summary["total"] == 120 and summary["count"] == 120 - saved
+    ids = [json.loads(line)["request_id"] for line in dest.read_bytes().splitlines()]
+    assert ids == [f"req-{i:04d}" for i in range(120)]
+    assert json.loads((tmp_path / "bundle.ndjson.manifest.json").read_text())["total"] == 120
+
+
+class _CappedStore(AuditStore):
+    """Serves at most ``cap`` records per request through the default ``iter_records``."""
+
+    def __init__(self, rows: List[AuditRecord], cap: int) -> None:
+        self.rows = rows
+        self.cap = cap
+
+    def query(self, tenant, start_iso=None, end_iso=None, incident_id=None, limit=10_000):
+        return [r for r in self.rows if start_iso is None or r.ts >= start_iso][:limit]
+
+    def iter_records(
+        self, tenant, start_iso=None, end_iso=None, incident_id=None, after=None, limit=None
+    ):
+        return super().iter_records(
+            tenant, start_iso, end_iso, incident_id, after=after, limit=self.cap
+        )
+
+
+def test_cli_follows_truncated_pages_into_one_file(client, tmp_path: Path) -> None:
+    app = client.app
+    app.dependency_overrides[get_audit_store] = lambda: _CappedStore(_rows(120), cap=50)
+    dest = tmp_path / "bundle.ndjson"
+    session = _Session(client)
+    summary = audit_export.download_ndjson(
+        session, "/admin/audit/export", {"tenant": "acme"}, dest, secret="k1"
+    )
+    assert summary["pages"] == 3 and summary["total"] == 120
+    assert "after" not in session.params[0]
+    assert all(p["after"] for p in session.params[1:])
+    assert not summary["truncated"]
+    ids = [json.loads(line)["request_id"] for line in dest.read_bytes().splitlines()]
+    assert ids == [f"req-{i:04d}" for i in range(120)]
+    assert not (tmp_path / "bundle.ndjson.part").exists()
+
+
+class _QueryStore(AuditStore):
+    """Only implements ``query``: the default ``iter_records`` path."""
+
+    def __init__(self, rows: List[AuditRecord]) -> None:
+        self.rows = rows
+        self.starts: List[Optional[str]] = []
+
+    def query(self, tenant, start_iso=None, end_iso=None, incident_id=None, limit=10_000):
+        self.starts.append(start_iso)
+        return [r for r in self.rows if start_iso is None or r.ts >= start_iso][:limit]
+
+
+def test_default_iter_records_advances_window_and_flags_cap() -> None:
+    store = _QueryStore(_rows(120))
+    seen: List[str] = []
+    after = None
+    manifests = []
+    while True:
+        records = store.iter_records("acme", after=after, limit=50)
+        lines = b"".join(ExportStream("acme", records, fmt="ndjson")).splitlines()
+        manifest = json.loads(lines[-1])["manifest"]
+        manifests.append(manifest)
+        seen.extend(json.loads(line)["request_id"] for line in lines[:-1])
+        if not manifest["truncated"]:
+            break
+        after = decode_cursor(manifest["cursor"])
+    assert seen == [f"req-{i:04d}" for i in range(120)]
+    assert [m["truncated"] for m in manifests] == [True, True, False]
+    assert store.starts == [None, "2026-01-01T00:00:49Z", "2026-01-01T00:01:38Z"]
@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+from bench.compression_bench import run
+
+
+def test_compression_bench_reports_each_codec() -> None:
+    result = run(rows=500, events=10, event_bytes=60)
+    codecs = result["codecs"]
+    assert {"identity", "gzip"} <= set(codecs)
+    assert codecs["gzip"]["export_ratio"] > codecs["identity"]["export_ratio"] == 1.0
+    assert codecs["gzip"]["sse_ttfb_ms"] > 0
@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from bench.metrics_bench import run
+
+
+def test_metrics_bench_reports_calls_and_scrapes() -> None:
+    result = run(requests=3, number=1_000, series=(200,), families=4)
+    calls = result["per_request"]
+    assert calls["buffered_inc"] > 0 and calls["request_ms"] > 0
+    assert result["per_event"]["buffered_child_inc_ns"] > 0
+    (scrape,) = result["scrape"]
+    assert scrape["series"] == 200
+    assert scrape["render_buffered_unchanged_ms"] <= scrape["render_buffered_cold_ms"]
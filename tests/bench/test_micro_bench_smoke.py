@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+from bench import corpus, micro_bench
+
+ONLY = (
+    "detector.rule_hits/small_en",
+    "detector.redact.route/secrets",
+    "middleware.IngressRisk/adversarial",
+    "store.idem.*",
+)
+
+
+def test_corpus_is_seeded_and_shaped() -> None:
+    assert corpus.generate("secrets", seed=7) == corpus.generate("secrets", seed=7)
+    assert corpus.generate("secrets", seed=7) != corpus.generate("secrets", seed=8)
+    adversarial = "".join(corpus.generate("adversarial"))
+    assert any(ch in adversarial for ch in ("\u200b", "\u202e", "\u0301"))
+    assert all(len(t) <= 256 for t in corpus.generate("small_en"))
+    secrets = corpus.generate("secrets")
+    assert sum("sk-" in t or "AKIA" in t or "ghp_" in t for t in secrets) >= len(secrets) // 2
+
+
+def test_micro_bench_measures_each_kind_in_isolation() -> None:
+    result = micro_bench.run(ONLY, min_time=0.001, repeat=1, alloc_samples=2)
+    rows = {row["id"]: row for row in result["cases"]}
+    assert {"detector.rule_hits/small_en", "middleware.IngressRisk/adversarial"} <= set(rows)
+    assert "store.idem.memory/small_en" in rows
+    for row in rows.values():
+        assert row["ops_per_sec"] > 0 and row["peak_alloc_bytes"] >= 0
+    assert rows["middleware.IngressRisk/adversarial"]["status"] == 200
+
+
+def test_check_flags_throughput_and_allocation_regressions() -> None:
+    baseline = {
+        "tolerance": 0.2,
+        "cases": [
+            {"id": "a", "ops_per_sec": 1000.0, "peak_alloc_bytes": 10_000},
+            {"id": "b", "ops_per_sec": 1000.0, "peak_alloc_bytes": 10_000},
+            {"id": "c", "ops_per_sec": 1000.0, "peak_alloc_bytes": 100, "tolerance": 0.6},
+            {"id": "gone", "ops_per_sec": 1000.0, "peak_alloc_bytes": 100},
+        ],
+    }
+    result = {
+        "cases": [
+            {"id": "a", "ops_per_sec": 700.0, "peak_alloc_bytes": 10_000},
+            {"id": "b", "ops_per_sec": 950.0, "peak_alloc_bytes": 20_000},
+            {"id": "c", "ops_per_sec": 500.0, "peak_alloc_bytes": 600},
+        ]
+    }
+    ok, problems = micro_bench.check(result, baseline)
+    assert not ok
+    assert [p.split(":")[0] for p in problems] == ["a", "b"]
+    _, loose = micro_bench.check(result, baseline, tolerance=0.5)
+    assert [p.split(":")[0] for p in loose] == ["b"]
+
+
+def test_baseline_roundtrip_and_unlocked_fails(tmp_path: Path) -> None:
+    path = tmp_path / "micro.json"
+    assert not micro_bench.check_baseline({"cases": []}, path)[0]
+    path.write_text(json.dumps({"locked": False, "cases": []}), encoding="utf-8")
+    result = {
+        "seed": 1,
+        "host": "h",
+        "python": "3",
+        "cases": [{"id": "a", "ops_per_sec": 100.0, "peak_alloc_bytes": 10}],
+    }
+    ok, message = micro_bench.check_baseline(result, path)
+    assert not ok and "not locked" in message
+    path.write_text(json.dumps({"locked": True, "cases": []}), encoding="utf-8")
+    assert not micro_bench.check_baseline(result, path)[0]
+    micro_bench.write_baseline(result, path, tolerance=0.1)
+    assert json.loads(path.read_text(encoding="utf-8"))["locked"] is True
+    assert micro_bench.check_baseline(result, path)[0]
+    slower = {"cases": [{"id": "a", "ops_per_sec": 50.0, "peak_alloc_bytes": 10}]}
+    ok, message = micro_bench.check_baseline(slower, path)
+    assert not ok and "a: 50 ops/s" in message
+    other = {"cases": [{"id": "z", "ops_per_sec": 1.0, "peak_alloc_bytes": 0}]}
+    assert not micro_bench.check_baseline(other, path)[0]
+
+
+def test_compare_against_micro_baseline_if_locked() -> None:
+    if not os.environ.get("BENCH_COMPARE"):
+        return
+    result = micro_bench.run()
+    threshold = os.environ.get("BENCH_THRESHOLD")
+    ok, message = micro_bench.check_baseline(
+        result, tolerance=float(threshold) if threshold else None
+    )
+    if os.environ.get("BENCH_ENFORCE"):
+        assert ok, message
@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+from bench.pii_bench import run
+
+
+def test_pii_bench_reports_per_document_size() -> None:
+    result = run(match_counts=(10, 200), repeat=1, legacy_max=10)
+    small, large = result["documents"]
+    assert (small["matches"], large["matches"]) == (10, 200)
+    assert small["legacy_ms"] > 0 and large["legacy_ms"] is None
+    assert large["snapshot_ms"] > 0
@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from bench.policy_cold_start_bench import run
+
+
+def test_policy_cold_start_bench_reports_both_modes() -> None:
+    result = run(sizes=(20,), samples=1)
+    (scenario,) = result["scenarios"]
+    assert scenario["id"] == "rules=20"
+    assert scenario["same_decision"]
+    assert scenario["snapshot_hits"] >= 3
+    for mode in ("yaml", "snapshot"):
+        assert scenario[mode]["first_decision_ms"] > 0
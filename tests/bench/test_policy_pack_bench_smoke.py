@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from app.policy import pack_engine
+from bench.policy_pack_bench import run, synthetic_packs, texts_for
+
+
+def test_policy_pack_bench_reports_scaling() -> None:
+    result = run(sizes=(5, 50), iterations=2)
+    ids = {scenario["id"] for scenario in result["scenarios"]}
+    assert {"rules=5/clean", "rules=50/hit"} <= ids
+    for scenario in result["scenarios"]:
+        assert scenario["linear_us"] > 0 and scenario["compiled_us"] > 0
+
+
+def test_synthetic_packs_evaluate_identically() -> None:
+    packs, triggers = synthetic_packs(200)
+    texts = texts_for(triggers)
+    for text in texts.values():
+        assert pack_engine.evaluate_text(text, packs) == pack_engine._evaluate_linear(text, packs)
+    assert not pack_engine.evaluate_text(texts["clean"], packs)[0]
+    assert len(pack_engine.evaluate_text(texts["hit"], packs)[0]) == 4
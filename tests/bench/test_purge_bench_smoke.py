@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+import pytest
+
+from bench.purge_bench import run
+
+
+def test_purge_bench_reports_row_rates() -> None:
+    pytest.importorskip("fakeredis")
+    result = run(rows=600, chunk=100, budgets=(20_000.0,), budget_rows=300)
+    redis = result["redis"]
+    assert redis["legacy_rows_per_sec"] > 0 and redis["chunked_rows_per_sec"] > 0
+    (budget,) = result["budget"]
+    assert budget["rows"] == 300 and budget["achieved_rows_per_sec"] > 0
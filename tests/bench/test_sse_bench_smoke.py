@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+from bench.sse_bench import run
+
+
+def test_sse_bench_reports_framing_and_stream_cpu() -> None:
+    result = run(frames=500, streams=20, deltas=5, gap_s=0.0, heartbeat_s=1.0)
+    assert set(result["framing"]) == {"chunk_dict", "token"}
+    assert all(row["encoder_fps"] > 0 for row in result["framing"].values())
+    streams = result["streams"]
+    assert streams["count"] == 20
+    assert streams["legacy_cpu_s"] >= 0 and streams["coalesced_cpu_s"] >= 0
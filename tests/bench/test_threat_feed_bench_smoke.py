@@ -0,0 +1,10 @@
+from __future__ import annotations
+
+from bench.threat_feed_bench import run
+
+
+def test_threat_feed_bench_reports_per_feed_size() -> None:
+    result = run(rule_counts=(5, 50), kb=1, repeat=1)
+    assert [row["rules"] for row in result["feeds"]] == [5, 50]
+    for row in result["feeds"]:
+        assert row["sequential_ms"] > 0 and row["snapshot_ms"] > 0
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+import httpx
+import pytest
+
+SDK = Path(__file__).resolve().parents[2] / "clients" / "python"
+if str(SDK) not in sys.path:
+    sys.path.insert(0, str(SDK))
+
+from guardrail_api import AsyncGuardrailClient, GuardrailClient, RetryPolicy  # noqa: E402
+from guardrail_api._http import IDEMPOTENCY_HEADER, parse_retry_after  # noqa: E402
+from guardrail_api.sse import iter_sse  # noqa: E402
+
+
+class _FakeLLM:
+    def chat_stream(
+        self, messages: List[Dict[str, str]], model: str
+    ) -> Tuple[Iterable[str], Dict[str, Any]]:
+        return iter(["Hello ", "user@example.com", " bye"]), {"provider": "fake", "model": model}
+
+
+@pytest.fixture()
+def fake_llm(monkeypatch):
+    import app.routes.openai_compat as compat
+
+    monkeypatch.setattr(compat, "get_client", lambda: _FakeLLM())
+
+
+def test_sync_client_evaluates_batches_and_streams(client, fake_llm) -> None:
+    sdk = GuardrailClient("http://testserver", http_client=client)
+    assert sdk.healthz()["ok"] is True
+
+    res = sdk.evaluate("mail me at a@b.com", request_id="r-1")
+    assert res["request_id"] == "r-1" and "[REDACTED:EMAIL]" in res["text"]
+
+    batch = sdk.batch_evaluate(["hi", {"text": "x", "request_id": "q"}])
+    assert batch["count"] == 2 and batch["items"][1]["request_id"] == "q"
+
+    chunks = list(sdk.stream_chat_completions([{"role": "user", "content": "hi"}]))
+    text = "".join(c["choices"][0]["delta"].get("content", "") for c in chunks)
+    assert text == "Hello [REDACTED:EMAIL] bye"
+    assert chunks[-1]["choices"][0]["finish_reason"] == "stop"
+
+
+def test_micro_batcher_coalesces_into_batch_requests(client) -> None:
+    sdk = GuardrailClient("http://testserver", http_client=client)
+    sent: List[int] = []
+    original = sdk.batch_evaluate
+
+    def counting(items, **kw):
+        sent.append(len(items))
+        return original(items, **kw)
+
+    sdk.batch_evaluate = counting  # type: ignore[method-assign]
+    with sdk.batcher(max_items=4, max_delay_s=0.5) as batcher:
+        futures = [batcher.submit(f"text {i}", request_id=f"id-{i}") for i in range(10)]
+    assert [f.result()["request_id"] for f in futures] == [f"id-{i}" for i in range(10)]
+    assert sent == [4, 4, 2]
+
+
+def _scripted(responses: List[httpx.Response], seen: List[httpx.Request]) -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return responses.pop(0)
+
+    return httpx.MockTransport(handler)
+
+
+def test_retries_honour_retry_after_and_reuse_idempotency_key() -> None:
+    seen: List[httpx.Request] = []
+    responses = [
+        httpx.Response(503, headers={"Retry-After": "2"}),
+        httpx.Response(502),
+        httpx.Response(200, json={"items": [], "count": 0}),
+    ]
+    sdk = GuardrailClient(
+        "http://api",
+        transport=_scripted(responses, seen),
+        retry=RetryPolicy(max_attempts=3, backoff_base_s=0.1),
+    )
+    sleeps: List[float] = []
+    sdk._sleep = sleeps.append
+    assert sdk.batch_evaluate(["a"])["count"] == 0
+    keys = {r.headers[IDEMPOTENCY_HEADER] for r in seen}
+    assert len(seen) == 3 and len(keys) == 1
+    assert sleeps[0] == 2.0 and 0.0 <= sleeps[1] <= 0.2
+
+    seen.clear()
+    sdk = GuardrailClient(
+        "http://api", transport=_scripted([httpx.Response(429)] * 2, seen), retry=RetryPolicy(2)
+    )
+    sdk._sleep = lambda s: None
+    with pytest.raises(httpx.HTTPStatusError):
+        sdk.evaluate("x")
+    assert len(seen) == 2
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+
+
+def test_sse_decoder_handles_multiline_comments_and_ids() -> None:
+    lines = [
+        ": heartbeat",
+        "id: 7",
+        "event: delta",
+        "data: a",
+        "data: b",
+        "",
+        "retry: 50",
+        "data: c",
+    ]
+    first, second = list(iter_sse(lines))
+    assert (first.event, first.data, first.id) == ("delta", "a\nb", "7")
+    assert (second.event, second.data, second.id, second.retry) == ("message", "c", "7", 50)
+
+
+async def test_async_client_over_asgi_transport(app, fake_llm) -> None:
+    sdk = AsyncGuardrailClient("http://testserver", transport=httpx.ASGITransport(app=app))
+    sent: List[int] = []
+    original = sdk.batch_evaluate
+
+    async def counting(items, **kw):
+        sent.append(len(items))
+        return await original(items, **kw)
+
+    sdk.batch_evaluate = counting  # type: ignore[method-assign]
+    async with sdk:
+        res = await sdk.evaluate("hello", request_id="a-1")
+        assert res["request_id"] == "a-1"
+
+        async with sdk.batcher(max_items=8, max_delay_s=0.01) as batcher:
+            items = await asyncio.gather(*(batcher.evaluate(f"t{i}") for i in range(5)))
+        assert [it["text"] for it in items] == [f"t{i}" for i in range(5)] and sent == [5]
+
+        chunks = [c async for c in sdk.stream_chat_completions([{"role": "user", "content": "x"}])]
+        assert any(c["choices"][0]["delta"].get("content") == " bye" for c in chunks)
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import pytest
+
+from app.compliance import pii
+
+
+@pytest.fixture(autouse=True)
+def _fresh(monkeypatch):
+    for key in pii._SETTINGS_ENV:
+        monkeypatch.delenv(key, raising=False)
+    monkeypatch.setenv("PII_SALT", "s1")
+    pii.refresh_settings()
+    yield
+    monkeypatch.undo()
+    pii.refresh_settings()
+
+
+def _token(kind: str, value: str, salt: str = "s1") -> str:
+    return f"[{kind}:{pii._salted_hash(value, salt, 'sha256')[:12]}]"
+
+
+def test_single_pass_redacts_both_families() -> None:
+    text = "mail Ann@Example.com or call (415) 555-0101, then ann@example.com again"
+    out, counters = pii.redact_and_hash(text)
+    email = _token("EMAIL", "ann@example.com")
+    assert out == f"mail {email} or call {_token('PHONE', '(415) 555-0101')}, then {email} again"
+    assert counters == {"pii:email": 2, "pii:phone": 1}
+    assert pii.redact_and_hash("nothing here") == ("nothing here", {})
+
+
+def test_email_tokens_are_not_rescanned_as_phones() -> None:
+    # Find an address whose 12-char token prefix is ten digits or more in a row.
+    for i in range(5000):
+        value = f"u{i}@x.io"
+        if pii._PHONE_RE.search(_token("EMAIL", value)):
+            break
+    else:  # pragma: no cover - astronomically unlikely
+        pytest.skip("no digit-heavy token in range")
+    out, counters = pii.redact_and_hash(f"to {value}")
+    assert out == f"to {_token('EMAIL', value)}"
+    assert counters == {"pii:email": 1}
+
+
+def test_settings_are_pinned_until_env_changes(monkeypatch) -> None:
+    calls = []
+    real = pii.get_settings
+
+    def counting():
+        calls.append(1)
+        return real()
+
+    monkeypatch.setattr(pii, "get_settings", counting)
+    for _ in range(5):
+        pii.redact_and_hash("a@b.co 415-555-0101")
+    assert calls == []
+    snap = pii.pinned_settings()
+    assert snap.digests.hits >= 8 and len(snap.digests) == 2
+
+    monkeypatch.setenv("PII_PHONE_HASH_ENABLED", "false")
+    out, counters = pii.redact_and_hash("a@b.co 415-555-0101")
+    assert calls == [1] and counters == {"pii:email": 1}
+    assert pii.pinned_settings().digests is snap.digests  # same salt keeps the cache
+
+    monkeypatch.setenv("PII_SALT", "s2")
+    assert pii.hash_email("A@B.co") == pii._salted_hash("a@b.co", "s2", "sha256")
+    assert pii.pinned_settings().digests is not snap.digests
+
+
+def test_digest_cache_is_bounded(monkeypatch) -> None:
+    monkeypatch.setenv("PII_HASH_CACHE_MAX", "3")
+    snap = pii.refresh_settings()
+    for i in range(10):
+        pii.hash_email(f"user{i}@x.io")
+    assert len(snap.digests) == 3
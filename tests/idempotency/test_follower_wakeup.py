@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any, MutableMapping
+
+import pytest
+from starlette.types import Scope
+
+from app.idempotency.redis_store import RedisIdemStore
+from app.idempotency.store import StoredResponse
+from app.middleware.idempotency import IdempotencyMiddleware
+from tests.testlib.fake_idem_store import RecordingStore
+
+pytestmark = pytest.mark.asyncio
+
+
+def _fakeredis() -> Any:
+    fakeredis = pytest.importorskip("fakeredis.aioredis")
+    pytest.importorskip("lupa")
+    return fakeredis.FakeRedis(decode_responses=False)
+
+
+def _app(calls: dict[str, int], delay: float) -> Any:
+    async def app(scope: Scope, receive: Any, send: Any) -> None:
+        calls["n"] = calls.get("n", 0) + 1
+        await asyncio.sleep(delay)
+        body = json.dumps({"n": calls["n"]}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"application/json")],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    return app
+
+
+def _scope(key: str) -> Scope:
+    return {
+        "type": "http",
+        "method": "POST",
+        "path": "/do",
+        "headers": [(b"x-idempotency-key", key.encode())],
+    }  # type: ignore[return-value]
+
+
+async def _recv() -> dict[str, Any]:
+    return {"type": "http.request", "body": b"{}", "more_body": False}
+
+
+async def _run(mid: IdempotencyMiddleware, key: str) -> tuple[dict[str, str], float]:
+    sent: list[MutableMapping[str, Any]] = []
+
+    async def send(message: MutableMapping[str, Any]) -> None:
+        sent.append(message)
+
+    await mid(_scope(key), _recv, send)
+    start = next(m for m in sent if m["type"] == "http.response.start")
+    return {k.decode(): v.decode() for k, v in start["headers"]}, time.monotonic()
+
+
+class _CountingStore(RecordingStore):
+    def __init__(self) -> None:
+        super().__init__()
+        self.gets = 0
+
+    async def get(self, key: str) -> Any:
+        self.gets += 1
+        return await super().get(key)
+
+
+async def test_same_worker_followers_wake_on_leader_completion(monkeypatch) -> None:
+    monkeypatch.setenv("IDEMP_WAIT_RECHECK_MS", "5000")
+    store = _CountingStore()
+    calls: dict[str, int] = {}
+    mid = IdempotencyMiddleware(_app(calls, 0.2), store=store, methods=("POST",))
+
+    leader = asyncio.ensure_future(_run(mid, "same-worker"))
+    await asyncio.sleep(0.02)
+    followers = [asyncio.ensure_future(_run(mid, "same-worker")) for _ in range(5)]
+    (_, leader_done), *rest = await asyncio.gather(leader, *followers)
+
+    assert calls["n"] == 1
+    assert all(h["idempotency-replayed"] == "true" for h, _ in rest)
+    # Woken by the in-process event, not by the 5s safety re-check.
+    assert max(done for _, done in rest) - leader_done < 0.1
+    # One fast-path get, one pre-wait check and one post-wake check each.
+    assert store.gets <= 1 + 5 * 4
+    assert mid._done_events == {}
+
+
+async def test_cross_worker_follower_wakes_via_redis_pubsub(monkeypatch) -> None:
+    monkeypatch.setenv("IDEMP_WAIT_RECHECK_MS", "5000")
+    redis = _fakeredis()
+    calls: dict[str, int] = {}
+    worker_a = IdempotencyMiddleware(
+        _app(calls, 0.2), store=RedisIdemStore(redis, ns="wake"), methods=("POST",)
+    )
+    store_b = RedisIdemStore(redis, ns="wake")
+    worker_b = IdempotencyMiddleware(_app(calls, 0.2), store=store_b, methods=("POST",))
+    try:
+        leader = asyncio.ensure_future(_run(worker_a, "cross"))
+        await asyncio.sleep(0.02)
+        (_, leader_done), (headers, follower_done) = await asyncio.gather(
+            leader, _run(worker_b, "cross")
+        )
+    finally:
+        await store_b.close()
+
+    assert calls["n"] == 1
+    assert headers["idempotency-replayed"] == "true"
+    assert follower_done - leader_done < 0.5
+
+
+async def test_redis_store_keeps_raw_body_in_hash() -> None:
+    redis = _fakeredis()
+    store = RedisIdemStore(redis, ns="raw", tenant="t")
+    body = bytes(range(256))
+    fp = hashlib.sha256(body).hexdigest()
+    await store.acquire_leader("k", 30, fp)
+    await store.put(
+        "k",
+        StoredResponse(
+            status=201,
+            headers={"Content-Type": "application/octet-stream"},
+            body=body,
+            content_type="application/octet-stream",
+            body_sha256=fp,
+        ),
+        ttl_s=30,
+    )
+
+    assert await redis.hget("raw:t:k:value", "body") == body
+    got = await store.get("k")
+    assert got is not None
+    assert got.body == body and got.status == 201
+    assert got.headers == {"content-type": "application/octet-stream"}
+    assert await store.bump_replay("k") == 1
+    assert await store.bump_replay("k") == 2
+    assert await redis.ttl("raw:t:k:value") > 0
+    info = await store.inspect("k")
+    assert info["size_bytes"] == 256
+    assert info["replay_count"] == 2
+
+
+async def test_redis_store_reads_legacy_json_values() -> None:
+    redis = _fakeredis()
+    store = RedisIdemStore(redis, ns="legacy", tenant="t")
+    legacy = {"status": 200, "headers": {"X-A": "1"}, "body_b64": "aGk=", "replay_count": 3}
+    await redis.set("legacy:t:old:value", json.dumps(legacy))
+
+    got = await store.get("old")
+    assert got is not None
+    assert got.body == b"hi" and got.replay_count == 3
+    assert got.headers == {"x-a": "1"}
+
+
+async def test_wait_released_times_out_and_settles() -> None:
+    redis = _fakeredis()
+    store = RedisIdemStore(redis, ns="wait", tenant="t")
+    try:
+        assert await store.wait_released("free", 0.05) is True
+        await store.acquire_leader("busy", 30, "fp")
+        assert await store.wait_released("busy", 0.05) is False
+        assert store._waiters == {}
+    finally:
+        await store.close()
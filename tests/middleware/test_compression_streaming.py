@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import zlib
+from typing import Any, Dict, List
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.middleware import compression
+from app.middleware.compression import CompressionMiddleware, content_class, negotiate
+
+_ROWS = [{"id": i, "decision": "allow", "tenant": "acme"} for i in range(2000)]
+
+
+async def _json(request):
+    return JSONResponse(_ROWS)
+
+
+async def _small(request):
+    return Response(b"ok", media_type="text/plain")
+
+
+async def _png(request):
+    return Response(b"\x89PNG" * 500, media_type="image/png")
+
+
+async def _sse(request):
+    async def events():
+        for i in range(3):
+            yield f"data: {json.dumps({'n': i, 'text': 'hello ' * 20})}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def _app() -> CompressionMiddleware:
+    routes = [
+        Route("/json", _json),
+        Route("/small", _small),
+        Route("/png", _png),
+        Route("/sse", _sse),
+    ]
+    return CompressionMiddleware(Starlette(routes=routes))
+
+
+@pytest.fixture(autouse=True)
+def _enabled(monkeypatch):
+    monkeypatch.setenv("COMPRESSION_ENABLED", "1")
+    monkeypatch.delenv("COMPRESSION_MIN_SIZE_BYTES", raising=False)
+    monkeypatch.delenv("COMPRESSION_STREAMING", raising=False)
+
+
+def _call(app, path: str, accept: str = "gzip") -> List[Dict[str, Any]]:
+    sent: List[Dict[str, Any]] = []
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"accept-encoding", accept.encode())],
+        "client": ("test", 1),
+        "server": ("test", 80),
+    }
+
+    requested: List[bool] = []
+
+    async def receive():
+        if requested:
+            await asyncio.sleep(3600)  # no disconnect; cancelled when the response ends
+        requested.append(True)
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return sent
+
+
+def _headers(message: Dict[str, Any]) -> Dict[str, str]:
+    return {k.decode(): v.decode() for k, v in message["headers"]}
+
+
+def test_negotiation_honours_q_values() -> None:
+    all_codecs = ("zstd", "br", "gzip")
+    assert negotiate("gzip, deflate, br, zstd", all_codecs) == "zstd"
+    assert negotiate("gzip;q=1.0, br;q=0.5, zstd;q=0.2", all_codecs) == "gzip"
+    assert negotiate("*;q=0.3, gzip;q=0", all_codecs) == "zstd"
+    assert negotiate("br;q=0, zstd;q=0, *", all_codecs) == "gzip"
+    assert negotiate("identity", all_codecs) is None
+    assert negotiate("br", ("gzip",)) is None
+    assert content_class("text/event-stream; charset=utf-8") == "stream"
+    assert content_class("application/problem+json") == "text"
+    assert content_class("image/png") is None
+    assert content_class("image/svg+xml") == "text"
+
+
+def test_buffered_json_is_compressed_with_length(monkeypatch) -> None:
+    client = TestClient(_app())
+    r = client.get("/json", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.headers["vary"] == "Accept-Encoding"
+    assert int(r.headers["content-length"]) < len(json.dumps(_ROWS)) // 5
+    assert r.json() == _ROWS
+
+    # Settings are read per request.
+    monkeypatch.setenv("COMPRESSION_MIN_SIZE_BYTES", "10")
+    assert "content-encoding" not in client.get("/small").headers
+    assert "content-encoding" not in client.get("/png").headers
+    assert "content-encoding" not in client.get("/json", headers={"Accept-Encoding": "br"}).headers
+
+
+def test_large_bodies_are_compressed_off_the_loop(monkeypatch) -> None:
+    monkeypatch.setenv("COMPRESSION_THREAD_MIN_BYTES", "1024")
+    calls: List[Any] = []
+    real = asyncio.to_thread
+
+    async def spy(fn, *args):
+        calls.append(fn)
+        return await real(fn, *args)
+
+    monkeypatch.setattr(compression.asyncio, "to_thread", spy)
+    sent = _call(_app(), "/json")
+    assert len(calls) == 1
+    assert json.loads(gzip.decompress(sent[1]["body"])) == _ROWS
+
+
+def test_sse_events_are_flushed_one_by_one(monkeypatch) -> None:
+    sent = _call(_app(), "/sse")
+    headers = _headers(sent[0])
+    assert headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+
+    decoder = zlib.decompressobj(31)
+    events = []
+    for message in sent[1:]:
+        if message["body"]:
+            events.append(decoder.decompress(message["body"]))
+    # Every event decodes whole from its own message, before the stream ends.
+    assert [e.startswith(b"data: ") and e.endswith(b"\n\n") for e in events[:3]] == [True] * 3
+    assert decoder.eof
+
+    monkeypatch.setenv("COMPRESSION_STREAMING", "0")
+    assert "content-encoding" not in _headers(_call(_app(), "/sse")[0])
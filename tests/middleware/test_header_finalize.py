@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from app.middleware import header_finalize
+from app.middleware.header_finalize import (
+    HeaderFinalizeMiddleware,
+    build_header_plan,
+    finalize_headers,
+    install_header_finalize,
+)
+from app.services import config_store
+
+
+@pytest.fixture(autouse=True)
+def _restore_plan(monkeypatch):
+    yield
+    monkeypatch.undo()
+    header_finalize.refresh_header_plan()
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    install_header_finalize(app)
+
+    @app.get("/guardrail/legacy")
+    def legacy(request: Request) -> JSONResponse:
+        request.state.guardrail_decision = {"outcome": "deny", "incident_id": "inc-9"}
+        return JSONResponse(
+            {"ok": True},
+            headers={"Vary": "Accept-Encoding", "Permissions-Policy": "camera=*"},
+        )
+
+    @app.get("/own")
+    def own() -> JSONResponse:
+        return JSONResponse({"ok": True}, headers={"X-Frame-Options": "SAMEORIGIN"})
+
+    return app
+
+
+def test_plan_is_applied_in_one_pass(monkeypatch) -> None:
+    monkeypatch.setenv("SEC_HEADERS_PERMISSIONS_POLICY", "geolocation=()")
+    monkeypatch.setenv("CORS_ENABLED", "1")
+    monkeypatch.setenv("CORS_ALLOW_ORIGINS", "http://a.example, http://b.example")
+    monkeypatch.setenv("CSP_ENABLED", "1")
+    client = TestClient(_app())
+
+    r = client.get("/guardrail/legacy", headers={"Origin": "http://b.example"})
+    h = r.headers
+    assert h["x-content-type-options"] == "nosniff"
+    assert h["x-frame-options"] == "DENY"
+    assert h["referrer-policy"] == "no-referrer"
+    assert h["permissions-policy"] == "geolocation=()"
+    assert h["content-security-policy"].startswith("default-src 'none'")
+    assert h["deprecation"] == "true"
+    assert h["access-control-allow-origin"] == "http://b.example"
+    assert h["vary"] == "Accept-Encoding, Origin"
+    assert h["x-guardrail-decision"] == "deny"
+    assert h["x-guardrail-incident-id"] == "inc-9"
+    assert h["x-guardrail-mode"]
+
+    r = client.get("/own", headers={"Origin": "http://evil.example"})
+    assert r.headers["x-frame-options"] == "SAMEORIGIN"
+    assert "access-control-allow-origin" not in r.headers
+    assert "deprecation" not in r.headers
+
+
+def test_no_env_lookups_per_request(monkeypatch) -> None:
+    client = TestClient(_app())
+    client.get("/own")
+
+    def _boom(*_a, **_k):
+        raise AssertionError("os.getenv called on the request path")
+
+    monkeypatch.setattr(header_finalize.os, "getenv", _boom)
+    r = client.get("/own")
+    assert r.status_code == 200
+    assert r.headers["referrer-policy"] == "no-referrer"
+
+
+def test_refresh_picks_up_new_config_version(monkeypatch) -> None:
+    monkeypatch.setenv("SEC_HEADERS_REFERRER_POLICY", "same-origin")
+    before = header_finalize.get_header_plan().version
+    plan = header_finalize.refresh_header_plan()
+    assert plan.version == before + 1
+    assert (b"referrer-policy", b"same-origin") in plan.defaults
+    assert header_finalize.get_header_plan() is plan
+
+
+def test_config_change_rebuilds_plan(monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr(config_store, "_CONFIG_DIR", tmp_path)
+    monkeypatch.setattr(config_store, "_ADMIN_CONFIG_PATH", tmp_path / "admin_config.yaml")
+    config_store.reset_config()
+    client = TestClient(_app())
+    before = header_finalize.get_header_plan().version
+
+    monkeypatch.setenv("SEC_HEADERS_REFERRER_POLICY", "same-origin")
+    config_store.set_config({"webhook_max_retries": 2}, actor="test")
+    plan = header_finalize.get_header_plan()
+    assert plan.version > before
+    assert client.get("/own").headers["referrer-policy"] == "same-origin"
+
+    config_store.reset_config()
+    assert header_finalize.get_header_plan().version > plan.version
+
+
+@pytest.mark.parametrize(
+    "flag, header",
+    [
+        ("SEC_HEADERS_XFO_ENABLED", b"x-frame-options"),
+        ("SEC_HEADERS_NOSNIFF_ENABLED", b"x-content-type-options"),
+    ],
+)
+def test_flags_disable_static_headers(monkeypatch, flag: str, header: bytes) -> None:
+    monkeypatch.setenv(flag, "0")
+    names = {name for name, _ in build_header_plan().defaults}
+    assert header not in names
+    assert b"referrer-policy" in names
+
+
+def test_wildcard_origin_and_existing_acao_replaced(monkeypatch) -> None:
+    monkeypatch.setenv("CORS_ENABLED", "true")
+    monkeypatch.setenv("CORS_ALLOW_ORIGINS", "*")
+    plan = build_header_plan()
+    out = finalize_headers(
+        [(b"access-control-allow-origin", b"*"), (b"vary", b"origin")],
+        plan,
+        origin=b"http://x.example",
+    )
+    assert out.count((b"access-control-allow-origin", b"http://x.example")) == 1
+    assert (b"access-control-allow-origin", b"*") not in out
+    assert (b"vary", b"origin") in out
+
+
+def test_middleware_is_pure_asgi() -> None:
+    assert not hasattr(HeaderFinalizeMiddleware, "dispatch")
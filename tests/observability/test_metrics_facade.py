@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, generate_latest
+
+from app.observability import metrics_facade
+from app.observability.metrics_facade import BufferedCounter
+from app.runtime.arm import ArmRuntime
+from app.telemetry import metrics as telemetry
+
+
+def _registry() -> tuple[CollectorRegistry, BufferedCounter, Counter, Gauge]:
+    registry = CollectorRegistry()
+    buffered = BufferedCounter(
+        "t_buffered_total", "Buffered.", ("tenant", "bot"), registry=registry
+    )
+    native = Counter("t_native_total", "Native.", ("kind",), registry=registry)
+    gauge = Gauge("t_gauge", "Gauge.", registry=registry)
+    return registry, buffered, native, gauge
+
+
+def test_render_matches_generate_latest_as_families_change() -> None:
+    registry, buffered, native, gauge = _registry()
+    buffered.labels("acme", "bot-1").inc(2)
+    buffered.labels(tenant="acme", bot="bot-2").inc()
+    native.labels("x").inc()
+    assert metrics_facade.render(registry) == generate_latest(registry)
+    assert registry.get_sample_value("t_buffered_total", {"tenant": "acme", "bot": "bot-2"}) == 1
+
+    for change in (
+        lambda: buffered.labels("acme", "bot-1").inc(),
+        lambda: native.labels("y").inc(3),
+        lambda: gauge.set(7),
+        lambda: None,
+    ):
+        change()
+        assert metrics_facade.render(registry) == generate_latest(registry)
+
+
+def test_buffered_samples_match_native_counter_shape() -> None:
+    registry = CollectorRegistry()
+    buffered = BufferedCounter("t_shape_total", "Shape.", ("kind",), registry=registry)
+    native = Counter("t_shape_native_total", "Shape.", ("kind",), registry=CollectorRegistry())
+    buffered.labels("x").inc(2)
+    native.labels("x").inc(2)
+
+    def shape(metric) -> list[tuple[str, dict, float]]:
+        (family,) = list(metric.collect())
+        return [(s.name.replace("_native", ""), s.labels, s.value) for s in family.samples]
+
+    got = shape(buffered)
+    want = shape(native)
+    assert [(n, labels) for n, labels, _ in got] == [(n, labels) for n, labels, _ in want]
+    assert got[0][2] == want[0][2] == 2
+    created = registry.get_sample_value("t_shape_created", {"kind": "x"})
+    assert created is not None and created > 0
+    assert metrics_facade.render(registry) == generate_latest(registry)
+
+
+def test_multiprocess_mode_hands_out_native_counters(monkeypatch, tmp_path) -> None:
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    made = metrics_facade.counter(
+        "t_multiproc_total", "Multiprocess.", ("kind",), registry=CollectorRegistry()
+    )
+    monkeypatch.setitem(metrics_facade._counters, "t_multiproc_total", made)
+    assert isinstance(made, Counter)
+    assert not isinstance(made, BufferedCounter)
+
+
+def test_unchanged_buffered_family_is_not_recollected(monkeypatch) -> None:
+    registry, buffered, _, _ = _registry()
+    buffered.labels("acme", "bot").inc()
+    first = metrics_facade.render(registry)
+    monkeypatch.setattr(buffered, "collect", lambda: pytest.fail("re-collected"))
+    assert metrics_facade.render(registry) == first
+
+
+def test_thread_local_cells_sum_on_collect() -> None:
+    registry, buffered, _, _ = _registry()
+    child = buffered.labels("acme", "bot")
+
+    def work() -> None:
+        for _ in range(5_000):
+            child.inc()
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert child.get() == 40_000
+    assert registry.get_sample_value("t_buffered_total", {"tenant": "acme", "bot": "bot"}) == 40_000
+
+
+def test_series_cap_folds_new_label_sets_into_overflow() -> None:
+    registry = CollectorRegistry()
+    capped = BufferedCounter(
+        "t_capped_total", "Capped.", ("tenant",), registry=registry, max_series=2
+    )
+    for tenant in ("a", "b", "c", "d"):
+        capped.labels(tenant).inc()
+    assert capped.series() == 3
+    assert registry.get_sample_value("t_capped_total", {"tenant": "__overflow__"}) == 2
+    with pytest.raises(ValueError):
+        capped.labels("a", "extra")
+    with pytest.raises(ValueError):
+        capped.labels("a").inc(-1)
+
+
+def test_bound_caches_children_and_caps_series(monkeypatch) -> None:
+    monkeypatch.setenv("METRICS_FAMILY_SERIES_MAX", "2")
+    gauge = Gauge("t_bound_gauge", "Bound.", ("tenant",), registry=CollectorRegistry())
+    assert metrics_facade.bound(gauge, "a") is metrics_facade.bound(gauge, "a")
+    metrics_facade.bound(gauge, "b").set(1)
+    metrics_facade.bound(gauge, "c").set(5)
+    assert metrics_facade.bound(gauge, "c") is gauge.labels("__overflow__")
+
+
+def test_request_counters_are_buffered_and_exported() -> None:
+    assert isinstance(telemetry.guardrail_actor_decisions_total, BufferedCounter)
+    assert metrics_facade.counter("guardrail_requests_total", "") is (
+        telemetry.guardrail_requests_total
+    )
+    before = REGISTRY.get_sample_value("guardrail_requests_total", {"endpoint": "facade"}) or 0
+    telemetry.inc_requests_total("facade")
+    after = REGISTRY.get_sample_value("guardrail_requests_total", {"endpoint": "facade"})
+    assert after == before + 1
+
+
+def test_arm_gauges_published_only_on_change(monkeypatch) -> None:
+    runtime = ArmRuntime()
+    published: list[tuple[str, ...]] = []
+    real_labels = telemetry.guardrail_arm_status.labels
+
+    def spy(*values: str):
+        published.append(values)
+        return real_labels(*values)
+
+    monkeypatch.setattr(telemetry.guardrail_arm_status, "labels", spy)
+    for _ in range(3):
+        runtime.evaluate_mode()
+    assert published == []
+    runtime.force_ingress_degraded("lag")
+    runtime.evaluate_mode()
+    runtime.evaluate_mode()
+    assert len(published) == 6
+    runtime.clear_forced_ingress_state()
+    runtime.reset_for_tests()
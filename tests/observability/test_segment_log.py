@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from app.observability.segment_log import SegmentLog
+
+
+class _Clock:
+    def __init__(self, now: float = 1_000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _open(path: Path, clock: _Clock, **kw) -> SegmentLog:
+    kw.setdefault("segment_seconds", 60)
+    kw.setdefault("index_every", 4)
+    return SegmentLog(path, clock=clock, **kw)
+
+
+def _fill(log: SegmentLog, clock: _Clock, minutes: int, per_minute: int) -> None:
+    for minute in range(minutes):
+        for i in range(per_minute):
+            clock.now = 1_000.0 + minute * 60 + i
+            log.append(
+                {
+                    "ts_ms": int(clock.now * 1000),
+                    "tenant": "acme" if i % 2 else "globex",
+                    "bot": f"bot{minute}",
+                    "n": minute * per_minute + i,
+                }
+            )
+
+
+def _ns(records) -> List[int]:
+    return [r["n"] for r in records]
+
+
+def test_appends_roll_into_time_segments_and_scans_use_index(tmp_path: Path) -> None:
+    clock = _Clock()
+    log = _open(tmp_path, clock)
+    _fill(log, clock, minutes=3, per_minute=10)
+    assert log.stats()["segments"] == 3
+    assert sorted(p.suffix for p in tmp_path.iterdir()).count(".idx") == 2  # sealed ones
+
+    since = int((1_000 + 60 + 7) * 1000)
+    until = int((1_000 + 120 + 2) * 1000)
+    assert _ns(log.scan(since=since, until=until)) == [17, 18, 19, 20, 21, 22]
+    assert _ns(log.scan(tenant="acme", bot="bot2")) == [21, 23, 25, 27, 29]
+    assert _ns(log.tail(3)) == [27, 28, 29]
+
+    first = log._segments[0]
+    assert first.seek(int((1_000 + 9) * 1000)) == first.marks[1][0]
+    opened: List[Path] = []
+    real_read = SegmentLog._read
+
+    def spy(seg, start, size):
+        opened.append(seg.path)
+        return real_read(seg, start, size)
+
+    log._read = spy  # type: ignore[method-assign]
+    assert _ns(log.scan(bot="bot1")) == list(range(10, 20))
+    assert opened == [log._segments[1].path]
+
+
+def test_retention_drops_whole_segments_and_rewrites_the_boundary(tmp_path: Path) -> None:
+    clock = _Clock()
+    log = _open(tmp_path, clock)
+    _fill(log, clock, minutes=3, per_minute=10)
+    cutoff = int((1_000 + 60 + 5) * 1000)
+
+    assert log.delete_where(before_ms=cutoff) == 15
+    assert log.stats()["segments"] == 2
+    assert _ns(log.scan())[:3] == [15, 16, 17]
+
+    assert log.delete_where(tenant="globex", limit=3) == 3
+    assert _ns(log.scan(tenant="globex")) == [22, 24, 26, 28]
+
+    clock.now += 1
+    log.append({"ts_ms": int(clock.now * 1000), "tenant": "acme", "n": 99})
+    assert _ns(log.tail(1)) == [99]
+
+
+def test_recovery_truncates_a_torn_last_record(tmp_path: Path) -> None:
+    clock = _Clock()
+    log = _open(tmp_path, clock, fsync_every=1000)
+    _fill(log, clock, minutes=2, per_minute=5)
+    active = log._segments[-1].path
+    log._handle.write(b'{"ts_ms": 1, "tenant": "acme", "n": 1')  # crash mid-record
+    log._handle.flush()
+    size_before = active.stat().st_size
+
+    reopened = _open(tmp_path, clock)
+    assert reopened.truncated_bytes == size_before - active.stat().st_size > 0
+    assert _ns(reopened.scan()) == list(range(10))
+    assert active.read_bytes().endswith(b"\n")
+
+    clock.now += 1
+    reopened.append({"ts_ms": int(clock.now * 1000), "tenant": "acme", "n": 10})
+    reopened.close()
+    again = _open(tmp_path, clock)
+    assert again.truncated_bytes == 0
+    assert _ns(again.scan(tenant="acme"))[-1] == 10
+
+
+def test_stale_index_is_rebuilt(tmp_path: Path) -> None:
+    clock = _Clock()
+    log = _open(tmp_path, clock)
+    _fill(log, clock, minutes=2, per_minute=4)
+    log.close()
+    sealed = sorted(tmp_path.glob("*.idx"))[0]
+    data = json.loads(sealed.read_text())
+    data["size"] += 1
+    sealed.write_text(json.dumps(data))
+
+    reopened = _open(tmp_path, clock)
+    assert _ns(reopened.scan(bot="bot0")) == [0, 1, 2, 3]
+
+
+@pytest.fixture()
+def _segment_audit(tmp_path, monkeypatch):
+    from app import config
+    from app.observability import admin_audit, segment_log
+
+    monkeypatch.setattr(config, "AUDIT_BACKEND", "segments", raising=False)
+    monkeypatch.setattr(config, "AUDIT_SEGMENT_DIR", str(tmp_path / "audit"), raising=False)
+    with admin_audit._LOG_LOCK:
+        admin_audit._RING.clear()
+    yield admin_audit
+    segment_log.close_all()
+    with admin_audit._LOG_LOCK:
+        admin_audit._RING.clear()
+
+
+def test_admin_audit_segments_backend(_segment_audit) -> None:
+    audit = _segment_audit
+    for i in range(5):
+        audit.record(action=f"a{i}", actor_email="x@y", actor_role="admin", tenant="t", bot="b")
+    audit.record(action="other", actor_email="x@y", actor_role="admin", tenant="u", bot="b")
+    with audit._LOG_LOCK:
+        audit._RING.clear()
+
+    assert [e["action"] for e in audit.recent(2)] == ["a4", "other"]
+    assert len(list(audit.iter_events(tenant="t"))) == 5
+    assert audit.delete_where(tenant="t", bot=None, before_ts_ms=None) == 5
+    assert [e["action"] for e in audit.iter_events()] == ["other"]
+
+
+def test_adjudications_persist_across_restart(tmp_path, monkeypatch) -> None:
+    from app.observability import adjudication_log as AL, segment_log
+    from app.services import retention
+
+    monkeypatch.setattr(AL, "_SEGMENT_DIR", str(tmp_path / "adj"))
+    monkeypatch.setattr(AL, "_SEGMENTS", None)
+    monkeypatch.setattr(AL, "_SEGMENTS_READY", False)
+    AL.clear()
+
+    def rec(i: int) -> AL.AdjudicationRecord:
+        return AL.AdjudicationRecord(
+            ts=f"2026-01-01T00:00:0{i}.000Z",
+            request_id=f"r{i}",
+            tenant="acme",
+            bot="b",
+            provider="p",
+            decision="allow",
+            rule_hits=[],
+            score=None,
+            latency_ms=1,
+            policy_version=None,
+            rules_path=None,
+            sampled=False,
+            prompt_sha256=None,
+        )
+
+    for i in range(4):
+        AL.append(rec(i))
+    cutoff = AL._record_ts_ms(rec(2))
+    assert retention.delete_adjudications_before(cutoff, tenant=None, bot=None, limit=10) == 2
+
+    segment_log.close_all()
+    AL.clear()
+    monkeypatch.setattr(AL, "_SEGMENTS", None)
+    monkeypatch.setattr(AL, "_SEGMENTS_READY", False)
+    assert [r["request_id"] for r in AL.iter_all()] == ["r2", "r3"]
+    segment_log.close_all()
+    AL.clear()
+
+
+def test_app_shutdown_closes_open_logs(tmp_path: Path) -> None:
+    from fastapi.testclient import TestClient
+
+    from app.main import create_app
+    from app.observability import segment_log
+
+    with TestClient(create_app()):
+        log = segment_log.open_log(tmp_path / "shutdown")
+        log.append({"ts": 1, "n": 0})
+    assert segment_log.open_log(tmp_path / "shutdown") is not log
+    segment_log.close_all()
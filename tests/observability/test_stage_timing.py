@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import Dict
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.observability import profiler, stage_timing
+
+
+class SlowMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        time.sleep(0.03)
+        await self.app(scope, receive, send)
+
+
+class PassMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.app(scope, receive, send)
+
+
+def _burn(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(SlowMiddleware)
+    app.add_middleware(PassMiddleware)  # outermost: its time excludes SlowMiddleware
+
+    @app.get("/work")
+    async def work() -> Dict[str, bool]:
+        stage_timing.lap("test.parse")
+        with stage_timing.stage("test.burn"):
+            _burn(0.02)
+        return {"ok": True}
+
+    stage_timing.install_stage_timing(app)
+    return app
+
+
+def _server_timing(header: str) -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for part in header.split(","):
+        name, _, dur = part.strip().partition(";dur=")
+        out[name] = float(dur)
+    return out
+
+
+def _count(stage: str) -> float:
+    return REGISTRY.get_sample_value("guardrail_stage_seconds_count", {"stage": stage}) or 0.0
+
+
+def test_layers_report_self_time_in_header_and_histogram(monkeypatch) -> None:
+    monkeypatch.setenv("SERVER_TIMING_HEADER", "on")
+    before = _count("Slow")
+    resp = TestClient(_app()).get("/work")
+    assert resp.status_code == 200
+    timing = _server_timing(resp.headers["server-timing"])
+    assert timing["Slow"] >= 30.0
+    assert timing["test.burn"] >= 20.0
+    # Nested work is excluded from the enclosing stages' self time.
+    assert timing["Pass"] < 10.0
+    assert timing["app"] < 20.0
+    assert timing["total"] >= timing["Slow"] + timing["test.burn"]
+    assert _count("Slow") == before + 1
+    assert _count("test.parse") >= 1
+
+
+def test_lap_outside_a_request_is_a_no_op() -> None:
+    stage_timing.lap("nothing")
+    with stage_timing.stage("nothing"):
+        pass
+    assert stage_timing.current() is None
+
+
+def test_disabled_by_env(monkeypatch) -> None:
+    monkeypatch.setenv("STAGE_TIMING_ENABLED", "off")
+    resp = TestClient(_app()).get("/work")
+    assert resp.status_code == 200 and "server-timing" not in resp.headers
+
+
+def test_header_is_opt_in(monkeypatch) -> None:
+    monkeypatch.delenv("SERVER_TIMING_HEADER", raising=False)
+    before = _count("Slow")
+    resp = TestClient(_app()).get("/work")
+    assert resp.status_code == 200 and "server-timing" not in resp.headers
+    assert _count("Slow") == before + 1
+
+
+def test_header_limit_and_opt_out(monkeypatch) -> None:
+    monkeypatch.setenv("SERVER_TIMING_HEADER", "on")
+    monkeypatch.setenv("SERVER_TIMING_MAX_ENTRIES", "1")
+    timing = _server_timing(TestClient(_app()).get("/work").headers["server-timing"])
+    assert list(timing) == ["Slow", "total"]
+    monkeypatch.setenv("SERVER_TIMING_HEADER", "off")
+    before = _count("Slow")
+    resp = TestClient(_app()).get("/work")
+    assert "server-timing" not in resp.headers
+    assert _count("Slow") == before + 1
+
+
+def test_sampled_requests_write_collapsed_stacks(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("PROFILE_SAMPLE_EVERY", "2")
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    monkeypatch.setenv("PROFILE_INTERVAL_MS", "1")
+    client = TestClient(_app())
+    for _ in range(4):
+        assert client.get("/work").status_code == 200
+    files = sorted(tmp_path.glob("*-GET_work.folded"))
+    assert len(files) == 2
+    stacks = profiler.read_collapsed(files[0])
+    # The sampler needs the GIL, so CPU-bound frames are caught once per switch
+    # interval while frames blocked in sleep are caught every tick.
+    assert any(stack.split(";")[-1].startswith("_burn") for stack in stacks)
+    sleeping = sum(count for stack, count in stacks.items() if "SlowMiddleware.__call__" in stack)
+    assert sleeping >= 5
+
+
+def test_evaluate_pipeline_steps_are_timed(monkeypatch) -> None:
+    from app.main import create_app
+
+    monkeypatch.setenv("SERVER_TIMING_HEADER", "on")
+    before = {name: _count(name) for name in ("evaluate.parse", "evaluate.policy", "IngressRisk")}
+    resp = TestClient(create_app()).post("/guardrail/evaluate", json={"text": "hello there"})
+    assert resp.status_code == 200
+    assert "total;dur=" in resp.headers["server-timing"]
+    for name, count in before.items():
+        assert _count(name) == count + 1
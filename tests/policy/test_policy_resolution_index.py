@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, List
+
+import pytest
+
+from app.services import config_store, policy_loader, policy_packs, policy_watcher
+from app.services.policy_watcher import PolicyWatcher
+
+
+def _write(path: Path, version: str) -> None:
+    path.write_text(f'version: "{version}"\ndeny: []\n', encoding="utf-8")
+    later = time.time() + 1
+    os.utime(path, (later, later))
+
+
+def _wait_for(predicate, timeout: float = 3.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def watcher(monkeypatch) -> Iterator[PolicyWatcher]:
+    w = PolicyWatcher(interval_s=0.02)
+    monkeypatch.setattr(policy_watcher, "_WATCHER", w)
+    monkeypatch.setattr(policy_loader, "_index", None)
+    yield w
+    w.stop()
+
+
+@pytest.fixture
+def rules(tmp_path: Path, monkeypatch, watcher: PolicyWatcher) -> Path:
+    path = tmp_path / "rules.yaml"
+    _write(path, "1")
+    monkeypatch.setenv("POLICY_RULES_PATH", str(path))
+    monkeypatch.setenv("POLICY_AUTORELOAD", "true")
+    monkeypatch.setattr(config_store, "_CONFIG_PATH", tmp_path / "bindings.yaml")
+    policy_loader.build_index()
+    return path
+
+
+def test_hot_path_does_no_env_settings_or_disk_work(rules: Path, monkeypatch) -> None:
+    assert policy_loader.get_policy().version == "1"
+
+    def _boom(*_a, **_k):
+        raise AssertionError("resolution work on the hot path")
+
+    monkeypatch.setattr(policy_loader, "Settings", _boom)
+    monkeypatch.setattr(policy_loader, "_load_from_disk", _boom)
+    monkeypatch.setattr(config_store, "load_bindings", _boom)
+    monkeypatch.setattr(Path, "stat", _boom)
+    monkeypatch.setattr(os.environ, "get", _boom)
+    for _ in range(100):
+        assert policy_loader.get_policy().version == "1"
+
+
+def test_binding_changes_invalidate_routes(
+    tmp_path: Path, monkeypatch, watcher: PolicyWatcher
+) -> None:
+    monkeypatch.delenv("POLICY_RULES_PATH", raising=False)
+    monkeypatch.setattr(config_store, "_CONFIG_PATH", tmp_path / "bindings.yaml")
+    bound = tmp_path / "acme.yaml"
+    _write(bound, "acme-1")
+    policy_loader.build_index()
+
+    config_store.upsert_binding("acme", "*", str(bound))
+    policy_loader.set_binding_context("acme", "bot-a")
+    try:
+        calls = {"n": 0}
+        real = config_store.load_bindings
+
+        def counting():
+            calls["n"] += 1
+            return real()
+
+        monkeypatch.setattr(config_store, "load_bindings", counting)
+        for _ in range(20):
+            assert policy_loader.get_policy().version == "acme-1"
+        assert calls["n"] == 0
+    finally:
+        policy_loader.set_binding_context("default", "default")
+    assert policy_loader.get_policy().path != str(bound)
+
+
+def test_unbound_header_pairs_are_not_cached(
+    tmp_path: Path, monkeypatch, watcher: PolicyWatcher
+) -> None:
+    monkeypatch.delenv("POLICY_RULES_PATH", raising=False)
+    monkeypatch.setattr(config_store, "_CONFIG_PATH", tmp_path / "bindings.yaml")
+    acme = tmp_path / "acme.yaml"
+    shared = tmp_path / "shared.yaml"
+    _write(acme, "acme-1")
+    _write(shared, "shared-1")
+    config_store.upsert_binding("acme", "*", str(acme))
+    config_store.upsert_binding("*", "bot-x", str(shared))
+    policy_loader.build_index()
+
+    index = policy_loader._current_index()
+    bound = dict(index.routes)
+    for i in range(1000):
+        index.route(f"tenant-{i}", f"bot-{i}")
+        index.route("acme", f"bot-{i}")
+    assert index.routes == bound
+
+    assert index.route("acme", "bot-x") == str(acme)
+    assert index.route("other", "bot-x") == str(shared)
+    assert index.route("other", "bot-y") == index.default_path
+
+
+def test_edit_rename_delete_while_requests_in_flight(rules: Path) -> None:
+    seen: List[str] = []
+    errors: List[BaseException] = []
+    stop = threading.Event()
+
+    def reader() -> None:
+        while not stop.is_set():
+            try:
+                seen.append(policy_loader.get_policy().version)
+            except BaseException as exc:  # pragma: no cover - surfaced below
+                errors.append(exc)
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    try:
+        # Edit in place.
+        _write(rules, "2")
+        _wait_for(lambda: policy_loader.get_policy().version == "2")
+
+        # Rename away: the last good policy keeps being served.
+        moved = rules.with_name("moved.yaml")
+        rules.rename(moved)
+        time.sleep(0.1)
+        assert policy_loader.get_policy().version == "2"
+
+        # A new file appears at the watched path (atomic replace pattern).
+        _write(moved, "3")
+        moved.rename(rules)
+        _wait_for(lambda: policy_loader.get_policy().version == "3")
+
+        # Delete: still served from memory.
+        rules.unlink()
+        time.sleep(0.1)
+        assert policy_loader.get_policy().version == "3"
+    finally:
+        stop.set()
+        thread.join()
+
+    assert not errors
+    assert set(seen) <= {"1", "2", "3"}
+    order = [v for i, v in enumerate(seen) if i == 0 or seen[i - 1] != v]
+    assert order == sorted(order)
+
+
+def test_autoreload_off_ignores_edits_until_admin_reload(rules: Path, monkeypatch) -> None:
+    monkeypatch.setenv("POLICY_AUTORELOAD", "false")
+    policy_loader.build_index()
+    assert not policy_watcher.get_watcher().running()
+    _write(rules, "2")
+    policy_watcher.get_watcher().poll_once()
+    assert policy_loader.get_policy().version == "1"
+    assert policy_loader.reload_now().version == "2"
+    assert policy_loader.get_policy().version == "2"
+
+
+def test_pack_index_follows_directory_changes(
+    tmp_path: Path, monkeypatch, watcher: PolicyWatcher
+) -> None:
+    packs = tmp_path / "policies" / "packs"
+    packs.mkdir(parents=True)
+    (packs / "alpha.yaml").write_text("policy_version: a\n", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(policy_packs, "project_root", tmp_path / "nowhere")
+    policy_packs.invalidate_pack_index()
+
+    assert policy_packs.resolve_pack_path("alpha") == (packs / "alpha.yaml").resolve()
+
+    def _boom(*_a, **_k):
+        raise AssertionError("filesystem probe on pack lookup")
+
+    with monkeypatch.context() as m:
+        m.setattr(Path, "exists", _boom)
+        m.setattr(Path, "is_file", _boom)
+        assert policy_packs.resolve_pack_path("alpha.yaml") is not None
+        assert policy_packs.resolve_pack_path("missing") is None
+
+    (packs / "alpha.yaml").rename(packs / "beta.yaml")
+    assert watcher.poll_once() >= 1
+    assert policy_packs.resolve_pack_path("alpha") is None
+    assert policy_packs.resolve_pack_path("beta") == (packs / "beta.yaml").resolve()
+
+    (packs / "beta.yaml").unlink()
+    watcher.poll_once()
+    assert policy_packs.resolve_pack_path("beta") is None
+    assert policy_packs.list_available_packs() == []
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from app.policy import pack_engine
+from app.policy.packs import load_packs
+from app.services import policy_loader, policy_snapshot, rulepacks_engine
+
+
+@pytest.fixture
+def snap_dir(tmp_path: Path, monkeypatch) -> Path:
+    directory = tmp_path / "snapshots"
+    monkeypatch.setenv("POLICY_SNAPSHOT_DIR", str(directory))
+    return directory
+
+
+def _builder(calls: List[int], value: object):
+    def build() -> object:
+        calls.append(1)
+        return value
+
+    return build
+
+
+def test_snapshot_reused_until_sources_change(snap_dir: Path) -> None:
+    calls: List[int] = []
+    sources = [("a.yaml", b"deny: []\n")]
+    first = policy_snapshot.load_or_build("t", sources, _builder(calls, {"v": 1}))
+    before = policy_snapshot.stats()
+    second = policy_snapshot.load_or_build("t", sources, _builder(calls, {"v": 2}))
+    assert first == second == {"v": 1} and len(calls) == 1
+    assert policy_snapshot.stats()["hits"] == before["hits"] + 1
+
+    edited = [("a.yaml", b"deny: [x]\n")]
+    assert policy_snapshot.load_or_build("t", edited, _builder(calls, {"v": 3})) == {"v": 3}
+    assert len(calls) == 2
+    # Schema bumps and renamed sources are distinct artifacts too.
+    policy_snapshot.load_or_build("t", sources, _builder(calls, None), schema=2)
+    policy_snapshot.load_or_build("t", [("b.yaml", b"deny: []\n")], _builder(calls, None))
+    assert len(calls) == 4
+
+
+@pytest.mark.parametrize("damage", [b"", b"not a snapshot", None])
+def test_corrupt_snapshot_falls_back_and_is_rewritten(snap_dir: Path, damage) -> None:
+    sources = [("a.yaml", b"version: 1\n")]
+    policy_snapshot.load_or_build("t", sources, lambda: [1, 2, 3])
+    digest = policy_snapshot.source_digest("t", sources)
+    path = policy_snapshot.snapshot_path(snap_dir, "t", digest)
+    good = path.read_bytes()
+    # ``None``: header intact, pickle payload truncated.
+    path.write_bytes(good[: len(good) - 4] if damage is None else damage)
+
+    errors = policy_snapshot.stats()["errors"]
+    assert policy_snapshot.load_or_build("t", sources, lambda: [1, 2, 3]) == [1, 2, 3]
+    assert policy_snapshot.stats()["errors"] == errors + 1
+    assert path.read_bytes() == good
+
+
+def test_disabled_without_directory(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.delenv("POLICY_SNAPSHOT_DIR", raising=False)
+    calls: List[int] = []
+    for _ in range(2):
+        policy_snapshot.load_or_build("t", [("a", b"x")], _builder(calls, 1))
+    assert len(calls) == 2
+
+
+def test_old_artifacts_pruned(snap_dir: Path) -> None:
+    for i in range(10):
+        policy_snapshot.load_or_build("t", [("a", str(i).encode())], lambda: i)
+    policy_snapshot.load_or_build("other", [("a", b"x")], lambda: 0)
+    assert len(list(snap_dir.glob("t-*.snap"))) == policy_snapshot._KEEP_PER_KIND + 1
+    assert len(list(snap_dir.glob("other-*.snap"))) == 1
+
+
+def test_rules_file_loads_from_snapshot(snap_dir: Path, tmp_path: Path, monkeypatch) -> None:
+    rules = tmp_path / "rules.yaml"
+    rules.write_text(
+        'version: "7"\ndeny:\n  - id: r1\n    pattern: "secret\\\\s+plan"\n    flags: ["i"]\n',
+        encoding="utf-8",
+    )
+    cold = policy_loader._load_from_disk(str(rules))
+
+    def _no_yaml(*_a, **_k):
+        raise AssertionError("YAML parsed despite a matching snapshot")
+
+    with monkeypatch.context() as m:
+        m.setattr(policy_loader.yaml, "safe_load", _no_yaml)
+        warm = policy_loader._load_from_disk(str(rules))
+    assert (warm.version, warm.rules) == (cold.version, cold.rules)
+    assert [(rid, p.pattern, p.flags) for rid, p in warm.deny_compiled] == [
+        (rid, p.pattern, p.flags) for rid, p in cold.deny_compiled
+    ]
+    assert warm.deny_compiled[0][1].search("SECRET  plan")
+
+    rules.write_text('version: "8"\ndeny: []\n', encoding="utf-8")
+    assert policy_loader._load_from_disk(str(rules)).version == "8"
+
+
+def test_rulepacks_compile_from_snapshot(snap_dir: Path, tmp_path: Path, monkeypatch) -> None:
+    rp_dir = tmp_path / "rulepacks"
+    rp_dir.mkdir()
+    controls = [
+        {"phase": "ingress", "action": "block", "type": "substring", "pattern": "drop table"},
+        {"phase": "egress", "action": "redact", "type": "regex", "pattern": r"\d{4}"},
+    ]
+    (rp_dir / "demo.yaml").write_text(json.dumps({"controls": controls}), encoding="utf-8")
+    monkeypatch.setenv("RULEPACKS_DIR", str(rp_dir))
+    monkeypatch.setenv("RULEPACKS_ACTIVE", "demo")
+
+    cold = rulepacks_engine.compile_active_rulepacks(force=True)
+    hits = policy_snapshot.stats()["hits"]
+    warm = rulepacks_engine.compile_active_rulepacks(force=True)
+    assert policy_snapshot.stats()["hits"] == hits + 1
+    assert warm == cold and warm.names == ("demo",)
+    assert warm.ingress_block_regexes[0].search("DROP TABLE users")
+    monkeypatch.delenv("RULEPACKS_ACTIVE")
+    rulepacks_engine.compile_active_rulepacks(force=True)
+
+
+def test_compiled_packs_snapshot_keeps_plan(snap_dir: Path) -> None:
+    cold = pack_engine.load_compiled("policy/packs")
+    warm = pack_engine.load_compiled("policy/packs")
+    assert warm is not cold and "_evaluation_plan" in warm.__dict__
+    reference = load_packs("policy/packs")
+    for text in ["jailbreak now", "mail bob@example.org", "patient id 42", "hello"]:
+        assert pack_engine.evaluate_text(text, warm) == pack_engine._evaluate_linear(
+            text, reference
+        )
@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import pytest
+
+from app.services.purge_engine import (
+    InMemoryCursorStore,
+    LatencyBackpressure,
+    PurgeBudget,
+    PurgeEngine,
+    PurgeJob,
+    RedisCursorStore,
+)
+from app.services.purge_targets import PurgeChunk, PurgeTarget, RedisDLQMessages
+from app.services.retention import Resource
+
+DLQ = Resource.DLQ_MSG.value
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: List[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _redis():
+    fakeredis = pytest.importorskip("fakeredis.aioredis")
+    return fakeredis.FakeRedis(decode_responses=False)
+
+
+async def _seed(redis, tenant: str, count: int, score: float = 10.0) -> None:
+    members = {f"m{i:04d}": score + i for i in range(count)}
+    await redis.zadd(f"retention:index:dlq_msg:{tenant}", members)
+    for member in members:
+        await redis.set(f"dlq:msg:{member}", b"x")
+
+
+class _Crash(RuntimeError):
+    pass
+
+
+@pytest.mark.asyncio
+async def test_resume_after_crash_mid_purge() -> None:
+    redis = _redis()
+    await _seed(redis, "acme", 25)
+    await redis.zadd("retention:index:dlq_msg:acme", {"fresh": 10_000.0})
+    cursors = RedisCursorStore(redis)
+    seen: List[int] = []
+
+    async def crash_after_two(job: PurgeJob, chunk: PurgeChunk) -> None:
+        seen.append(chunk.deleted)
+        if len(seen) == 2:
+            raise _Crash("worker died")
+
+    target = RedisDLQMessages(redis)
+    engine = PurgeEngine({DLQ: target}, cursors, chunk_size=10, on_chunk=crash_after_two)
+    job = PurgeJob("acme", DLQ, cutoff=1_000.0)
+    with pytest.raises(_Crash):
+        await engine.drain(job)
+
+    saved = await cursors.load("acme", DLQ)
+    assert saved is not None and saved.deleted == 20 and saved.position is not None
+    assert await redis.zcard("retention:index:dlq_msg:acme") == 6
+
+    restarted = PurgeEngine({DLQ: target}, RedisCursorStore(redis), chunk_size=10)
+    result = await restarted.drain(job)
+    assert result.drained and result.deleted == 5
+    done = await cursors.load("acme", DLQ)
+    assert done is not None and done.position is None and done.deleted == 25 and done.passes == 1
+    assert await redis.zrange("retention:index:dlq_msg:acme", 0, -1) == [b"fresh"]
+    assert await redis.exists("dlq:msg:m0024") == 0
+
+
+@pytest.mark.asyncio
+async def test_row_cap_leaves_cursor_for_next_run() -> None:
+    redis = _redis()
+    await _seed(redis, "acme", 12)
+    cursors = InMemoryCursorStore()
+    engine = PurgeEngine({DLQ: RedisDLQMessages(redis)}, cursors, chunk_size=5)
+    job = PurgeJob("acme", DLQ, cutoff=1_000.0)
+
+    first = await engine.drain(job, max_rows=7)
+    assert (first.deleted, first.chunks, first.drained) == (7, 2, False)
+    second = await engine.drain(job, max_rows=7)
+    assert (second.deleted, second.drained) == (5, True)
+    cursor = await cursors.load("acme", DLQ)
+    assert cursor is not None and cursor.deleted == 12
+
+
+@pytest.mark.asyncio
+async def test_budget_throttles_rows_per_second() -> None:
+    clock = _FakeClock()
+    budget = PurgeBudget(100, burst=10, clock=clock, sleep=clock.sleep)
+    for _ in range(5):
+        await budget.acquire(10)
+    assert sum(clock.sleeps) == pytest.approx(0.4)
+    budget.refund(10)
+    await budget.acquire(10)
+    assert sum(clock.sleeps) == pytest.approx(0.4)
+    assert budget.waited == pytest.approx(0.4)
+
+
+@pytest.mark.asyncio
+async def test_backpressure_pauses_while_latency_high_and_is_bounded() -> None:
+    clock = _FakeClock()
+    readings = iter([0.9, 0.9, 0.9, 0.1])
+    bp = LatencyBackpressure(
+        0.25, signal=lambda: next(readings), initial_s=0.5, max_pause_s=30, sleep=clock.sleep
+    )
+    assert await bp.wait() == pytest.approx(3.5)
+    assert clock.sleeps == [0.5, 1.0, 2.0]
+
+    stuck = LatencyBackpressure(
+        0.25, signal=lambda: 5.0, initial_s=1.0, max_backoff_s=2.0, max_pause_s=5, sleep=clock.sleep
+    )
+    assert await stuck.wait() == pytest.approx(5.0)
+
+
+class _SlowTarget(PurgeTarget):
+    def __init__(self, rows: Dict[str, int]) -> None:
+        self.rows = dict(rows)
+        self.active = 0
+        self.peak = 0
+
+    async def list_expired(self, tenant: str, now: float, limit: int) -> List[str]:
+        return [f"{tenant}-{i}" for i in range(min(limit, self.rows[tenant]))]
+
+    async def purge_ids(self, tenant: str, ids: List[str]) -> int:
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        self.rows[tenant] -= len(ids)
+        return len(ids)
+
+
+@pytest.mark.asyncio
+async def test_tenants_run_concurrently_up_to_limit() -> None:
+    target = _SlowTarget({"a": 6, "b": 6, "c": 6})
+    engine = PurgeEngine({DLQ: target}, InMemoryCursorStore(), chunk_size=2, concurrency=2)
+    jobs = [PurgeJob(t, DLQ, cutoff=1.0) for t in ("a", "b", "c")]
+    jobs.append(PurgeJob("a", "missing", cutoff=1.0))
+    results = await engine.run(jobs)
+    assert target.peak == 2
+    assert sorted(r.deleted for r in results if r.error is None) == [6, 6, 6]
+    assert [r.error for r in results if r.job.resource == "missing"] == ["no target"]
+    assert target.rows == {"a": 0, "b": 0, "c": 0}
+
+
+@pytest.mark.asyncio
+async def test_zset_purge_is_variadic() -> None:
+    redis = _redis()
+    await _seed(redis, "acme", 3)
+    target = RedisDLQMessages(redis)
+    assert await target.purge_ids("acme", ["m0000", "m0001"]) == 2
+    assert await redis.zrange("retention:index:dlq_msg:acme", 0, -1) == [b"m0002"]
+    assert await redis.exists("dlq:msg:m0000", "dlq:msg:m0001", "dlq:msg:m0002") == 1
+
+
+def _decisions(tmp_path, monkeypatch):
+    pytest.importorskip("sqlalchemy")
+    from sqlalchemy import create_engine
+
+    from app.services import decisions
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'd.db'}", future=True)
+    decisions._meta.create_all(engine)
+    monkeypatch.setattr(decisions, "_engine_instance", engine)
+    monkeypatch.setattr(decisions, "_get_engine", lambda: engine)
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    with engine.begin() as cx:
+        cx.execute(
+            decisions.decisions.insert(),
+            [
+                {
+                    "id": f"d{i:03d}",
+                    "ts": base + timedelta(minutes=i // 2),
+                    "tenant": "acme" if i % 3 else "other",
+                    "bot": "bot",
+                    "outcome": "allow",
+                }
+                for i in range(30)
+            ],
+        )
+    return decisions, engine, base
+
+
+def _count(decisions, engine) -> int:
+    from sqlalchemy import func, select
+
+    with engine.connect() as cx:
+        return int(cx.execute(select(func.count()).select_from(decisions.decisions)).scalar_one())
+
+
+def test_delete_range_walks_ts_id_keyset(tmp_path, monkeypatch) -> None:
+    decisions, engine, base = _decisions(tmp_path, monkeypatch)
+    cutoff = base + timedelta(minutes=10)  # rows d000..d019 are older
+    after: Optional[tuple] = None
+    chunks = []
+    while True:
+        deleted, after = decisions.delete_range(cutoff, after=after, limit=6)
+        chunks.append(deleted)
+        if after is None:
+            break
+    assert chunks == [6, 6, 6, 2]
+    assert _count(decisions, engine) == 10
+
+    assert decisions.delete_range(base + timedelta(hours=1), tenant="other", limit=100)[0] == 3
+
+
+@pytest.mark.asyncio
+async def test_decisions_target_resumes_from_cursor(tmp_path, monkeypatch) -> None:
+    decisions, engine, base = _decisions(tmp_path, monkeypatch)
+    from app.services.purge_targets import DecisionsSQL
+
+    target = DecisionsSQL()
+    cursors = InMemoryCursorStore()
+    job = PurgeJob("*", Resource.DECISIONS.value, cutoff=(base + timedelta(minutes=10)).timestamp())
+    engine_ = PurgeEngine({job.resource: target}, cursors, chunk_size=4)
+    first = await engine_.drain(job, max_rows=8)
+    assert (first.deleted, first.drained) == (8, False)
+    cursor = await cursors.load("*", job.resource)
+    assert cursor is not None and cursor.position is not None
+    second = await engine_.drain(job)
+    assert (second.deleted, second.drained) == (12, True)
+    assert _count(decisions, engine) == 10
+
+
+@pytest.mark.asyncio
+async def test_decisions_prune_loop_goes_through_engine(tmp_path, monkeypatch) -> None:
+    decisions, engine, base = _decisions(tmp_path, monkeypatch)
+    from app import main
+    from app.services.purge_targets import DecisionsSQL
+
+    clock = _FakeClock()
+    budget = PurgeBudget(4, burst=4, clock=clock, sleep=clock.sleep)
+    purge = PurgeEngine(
+        {Resource.DECISIONS.value: DecisionsSQL()},
+        InMemoryCursorStore(),
+        budget=budget,
+        chunk_size=4,
+    )
+    monkeypatch.setattr(main, "_decisions_purge_engine", lambda: purge)
+    monkeypatch.setattr(decisions, "prune_cutoff", lambda: base + timedelta(minutes=10))
+
+    task = asyncio.create_task(main._prune_loop())
+    try:
+        for _ in range(200):
+            if _count(decisions, engine) == 10:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        task.cancel()
+    assert _count(decisions, engine) == 10
+    assert budget.waited > 0
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Iterator
+
+import pytest
+
+from app import config
+from app.security import service_tokens as ST
+from app.services.redis_manager import RedisManager
+from tests.testlib.redis_harness import FAKE_URL, installed_fake_manager
+
+SYNC_MS = 100
+
+
+@pytest.fixture(autouse=True)
+def _secret(monkeypatch) -> Iterator[None]:
+    monkeypatch.setattr(config, "SERVICE_TOKEN_SECRET", "s3cr3t", raising=False)
+    ST.reset_memory_store()
+    yield
+    ST.reset_memory_store()
+
+
+@pytest.fixture
+def redis_mode(monkeypatch) -> Iterator[RedisManager]:
+    monkeypatch.setenv("REDIS_URL", FAKE_URL)
+    monkeypatch.setattr(config, "SERVICE_TOKEN_USE_REDIS", True)
+    monkeypatch.setattr(config, "SERVICE_TOKEN_REVOCATION_SYNC_MS", SYNC_MS)
+    gen = installed_fake_manager()
+    mgr = next(gen)
+    yield mgr
+    ST.reset_memory_store()
+    gen.close()
+
+
+def _count_decodes(monkeypatch) -> dict[str, int]:
+    calls = {"n": 0}
+    original = ST.jwt.decode
+
+    def decode(*args, **kwargs):
+        calls["n"] += 1
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(ST.jwt, "decode", decode)
+    return calls
+
+
+def _wait_rejected(token: str, budget_s: float) -> float:
+    start = time.monotonic()
+    while time.monotonic() - start < budget_s:
+        try:
+            ST.verify(token)
+        except ST.TokenError:
+            return time.monotonic() - start
+        time.sleep(0.005)
+    raise AssertionError(f"token still accepted after {budget_s}s")
+
+
+def _wait_ready() -> None:
+    deadline = time.monotonic() + 2.0
+    while not (ST._SYNC and ST._SYNC.ready.is_set()):
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_repeat_verification_skips_jwt_decode(monkeypatch) -> None:
+    calls = _count_decodes(monkeypatch)
+    token = ST.mint(role="viewer")["token"]
+
+    first = ST.verify(token)
+    first["role"] = "mutated"
+    for _ in range(10):
+        assert ST.verify(token)["role"] == "viewer"
+    assert calls["n"] == 1
+
+
+def test_cache_entry_expires_at_token_exp(monkeypatch) -> None:
+    calls = _count_decodes(monkeypatch)
+    minted = ST.mint(role="viewer")
+    ST.verify(minted["token"])
+
+    real_time = time.time
+    monkeypatch.setattr(ST.time, "time", lambda: real_time() + (minted["exp"] - real_time()) + 1)
+    assert ST._VERIFIED.get(ST._VerifiedCache.digest(minted["token"])) is None
+    monkeypatch.setattr(ST.time, "time", real_time)
+    ST.verify(minted["token"])
+    assert calls["n"] == 2
+
+
+def test_secret_rotation_bypasses_cache(monkeypatch) -> None:
+    token = ST.mint(role="viewer")["token"]
+    ST.verify(token)
+    monkeypatch.setattr(config, "SERVICE_TOKEN_SECRET", "rotated")
+    with pytest.raises(ST.TokenError):
+        ST.verify(token)
+
+
+def test_cache_is_bounded(monkeypatch) -> None:
+    monkeypatch.setattr(ST, "_VERIFIED", ST._VerifiedCache(4))
+    for _ in range(10):
+        ST.verify(ST.mint(role="viewer")["token"])
+    assert len(ST._VERIFIED) == 4
+
+
+def test_memory_revocation_applies_to_cached_token() -> None:
+    minted = ST.mint(role="viewer")
+    ST.verify(minted["token"])
+    ST.revoke(minted["jti"])
+    with pytest.raises(ST.TokenError):
+        ST.verify(minted["token"])
+
+
+def test_hot_path_does_no_redis_calls(redis_mode: RedisManager, monkeypatch) -> None:
+    token = ST.mint(role="viewer")["token"]
+    ST.verify(token)
+    _wait_ready()
+
+    def _no_network():
+        raise AssertionError("direct Redis lookup on the hot path")
+
+    monkeypatch.setattr(ST, "_redis", _no_network)
+    for _ in range(100):
+        ST.verify(token)
+
+
+def test_pushed_revocation_propagation_window(redis_mode: RedisManager, monkeypatch) -> None:
+    # Poll far slower than the budget below, so only the push can deliver it.
+    monkeypatch.setattr(config, "SERVICE_TOKEN_REVOCATION_SYNC_MS", 60_000)
+    minted = ST.mint(role="viewer")
+    ST.verify(minted["token"])
+    _wait_ready()
+
+    # Another worker revokes: set, version bump and push event.
+    other = redis_mode.client(decode=True)
+    prefix = ST._revoked_key()
+
+    async def remote_revoke() -> None:
+        await other.sadd(prefix, minted["jti"])
+        await other.incr(f"{prefix}:ver")
+        await other.publish(f"{prefix}:events", minted["jti"])
+
+    asyncio.run(remote_revoke())
+    _wait_rejected(minted["token"], budget_s=5.0)
+
+
+def test_lost_push_bounded_by_sync_interval(redis_mode: RedisManager) -> None:
+    minted = ST.mint(role="viewer")
+    ST.verify(minted["token"])
+    _wait_ready()
+
+    other = redis_mode.client(decode=True)
+    prefix = ST._revoked_key()
+
+    async def remote_revoke_without_push() -> None:
+        await other.sadd(prefix, minted["jti"])
+        await other.incr(f"{prefix}:ver")
+
+    asyncio.run(remote_revoke_without_push())
+    # No push was sent, so only the SYNC_MS poll can pick it up; the budget
+    # is generous so a loaded runner does not flake.
+    _wait_rejected(minted["token"], budget_s=5.0)
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Iterator
+
+import pytest
+
+from app import config
+from app.security import service_tokens
+from app.services import mitigation_store, ratelimit_backends
+from app.services.redis_manager import RedisManager, get_manager
+from tests.testlib.redis_harness import FAKE_URL, installed_fake_manager
+
+
+@pytest.fixture
+def manager() -> Iterator[RedisManager]:
+    yield from installed_fake_manager()
+
+
+def test_concurrent_commands_are_pipelined(manager: RedisManager) -> None:
+    client = manager.client()
+
+    async def burst() -> list:
+        return await asyncio.gather(*(client.incr("hits") for _ in range(50)))
+
+    results = asyncio.run(burst())
+    assert sorted(results) == list(range(1, 51))
+    stats = manager.stats()
+    assert stats["commands"] == 50
+    assert stats["max_batch"] > 1
+    assert stats["pipelines"] < 50
+
+
+def test_errors_are_isolated_per_command(manager: RedisManager) -> None:
+    client = manager.client(decode=True)
+
+    async def mixed() -> list:
+        await client.hset("h", "f", "v")
+        return await asyncio.gather(
+            client.set("a", "1"),
+            client.incr("h"),
+            client.get("a"),
+            return_exceptions=True,
+        )
+
+    ok, err, value = asyncio.run(mixed())
+    assert ok is True
+    assert isinstance(err, Exception)
+    assert value == "1"
+
+
+def test_client_is_usable_from_any_event_loop(manager: RedisManager) -> None:
+    client = manager.client()
+
+    async def roundtrip(value: bytes) -> bytes:
+        await client.set("k", value)
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.get("k")
+            pipe.exists("k")
+            got, exists = await pipe.execute()
+        assert exists == 1
+        return got
+
+    assert asyncio.run(roundtrip(b"one")) == b"one"
+    assert asyncio.run(roundtrip(b"two")) == b"two"
+
+
+def test_sync_facade(manager: RedisManager) -> None:
+    sync = manager.sync()
+    sync.set("s:1", "x")
+    sync.set("s:2", "y")
+    assert sync.get("s:1") == "x"
+    with sync.pipeline() as pipe:
+        pipe.incr("n").incr("n")
+        assert pipe.execute() == [1, 2]
+    assert sorted(sync.scan_iter(match="s:*")) == ["s:1", "s:2"]
+    assert manager.sync(decode=False).get("s:1") == b"x"
+
+
+def test_subsystems_share_one_manager(manager: RedisManager, monkeypatch) -> None:
+    monkeypatch.setenv("REDIS_URL", FAKE_URL)
+    monkeypatch.setattr(config, "SERVICE_TOKEN_USE_REDIS", True)
+    service_tokens.revoke("jti-1")
+    assert service_tokens.is_revoked("jti-1") is True
+    assert service_tokens.is_revoked("jti-2") is False
+
+    monkeypatch.setenv("MITIGATION_STORE_BACKEND", "redis")
+    monkeypatch.setattr(mitigation_store, "_REDIS_CLIENT", None, raising=False)
+    mitigation_store.set_mode("t", "b", "block")
+    assert mitigation_store.get_mode("t", "b") == "block"
+
+    pytest.importorskip("lupa")
+    monkeypatch.setenv("RATE_LIMIT_BACKEND", "redis")
+    monkeypatch.setenv("RATE_LIMIT_REDIS_URL", FAKE_URL)
+    backend = ratelimit_backends.build_backend()
+    assert isinstance(backend, ratelimit_backends.RedisTokenBucket)
+    assert backend.allow("k", cost=1, rps=1, burst=1)[0] is True
+    assert backend.allow("k", cost=1, rps=1, burst=1)[0] is False
+
+    assert get_manager(FAKE_URL) is manager
+    assert manager.stats()["commands"] > 0
+
+
+def test_async_callers_never_block_on_the_sync_facade(manager: RedisManager, monkeypatch) -> None:
+    pytest.importorskip("lupa")
+    monkeypatch.setenv("MITIGATION_STORE_BACKEND", "redis")
+    monkeypatch.setenv("REDIS_URL", FAKE_URL)
+    monkeypatch.setattr(mitigation_store, "_REDIS_CLIENT", None, raising=False)
+    mitigation_store.set_mode("t", "b", "clarify")
+    monkeypatch.setenv("RATE_LIMIT_BACKEND", "redis")
+    monkeypatch.setenv("RATE_LIMIT_REDIS_URL", FAKE_URL)
+    monkeypatch.setenv("RATE_LIMIT_REDIS_TIMEOUT_MS", "2000")
+    backend = ratelimit_backends.build_backend()
+
+    def _blocking(*_a: Any, **_k: Any) -> Any:
+        raise AssertionError("blocking Redis round trip from an async caller")
+
+    monkeypatch.setattr(manager, "run_sync", _blocking)
+
+    async def flow() -> tuple:
+        first = await backend.allow_async("k", cost=1, rps=1, burst=1)
+        second = await backend.allow_async("k", cost=1, rps=1, burst=1)
+        stored = await manager.client().exists("guardrail:rl:k")
+        mode = await mitigation_store.get_mode_async("t", "b")
+        return first[0], second[0], stored, mode
+
+    assert asyncio.run(flow()) == (True, False, 1, "clarify")
+
+
+def test_pubsub_reuses_one_dedicated_pool(manager: RedisManager) -> None:
+    client = manager.client(decode=True)
+
+    async def first_message(sub: Any) -> Any:
+        for _ in range(20):
+            message = await sub.get_message(ignore_subscribe_messages=True, timeout=0.05)
+            if message is not None:
+                return message["data"]
+        return None
+
+    async def roundtrip() -> list:
+        subs = [client.pubsub() for _ in range(3)]
+        for sub in subs:
+            await sub.subscribe("chan")
+        await client.publish("chan", "hello")
+        got = [await first_message(sub) for sub in subs]
+        for sub in subs:
+            await sub.aclose()
+        return got
+
+    assert asyncio.run(roundtrip()) == ["hello"] * 3
+    assert asyncio.run(roundtrip()) == ["hello"] * 3
+    pool = manager.pubsub_pool(True)
+    assert manager.pubsub_pool(True) is pool
+    assert manager.pubsub_pool(False) is not pool
+
+    manager.close()
+    assert manager.pubsub_pool(True) is not pool
+
+
+def test_sync_facade_passes_non_command_helpers_through(manager: RedisManager) -> None:
+    sync = manager.sync()
+    encoder = sync.get_encoder()
+    assert encoder.encode("x") == b"x"
+    script = sync.register_script("return 1")
+    assert script.script == "return 1"
+    lock = sync.lock("l", timeout=1)
+    assert lock.name == "l"
+    assert sync.set("plain", "v") is True and sync.get("plain") == "v"
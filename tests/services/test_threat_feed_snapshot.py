@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from app.services import threat_feed as tf
+
+
+@pytest.fixture(autouse=True)
+def _clean_feed(monkeypatch):
+    monkeypatch.setattr(tf, "_fetch_json", tf.fetch_feed)
+    monkeypatch.setattr(tf, "_SOURCES", {})
+    monkeypatch.setattr(tf, "_SNAPSHOT", tf.FeedSnapshot())
+    yield
+
+
+def _write(path: Path, version: str, rules: List[Dict[str, Any]]) -> str:
+    path.write_text(json.dumps({"version": version, "redactions": rules}), encoding="utf-8")
+    return path.as_uri()
+
+
+def _rule(pattern: str, tag: str, replacement: str = "[X]") -> Dict[str, Any]:
+    return {"pattern": pattern, "tag": tag, "replacement": replacement}
+
+
+def test_file_feed_version_rollover_and_last_good(tmp_path: Path) -> None:
+    path = tmp_path / "feed.json"
+    url = _write(path, "v1", [_rule(r"tok_[0-9]{4}", "secrets:tok")])
+    assert tf.reload_from_urls([url]) == 1
+    first = tf.snapshot()
+    assert tf.apply_dynamic_redactions("a tok_1234 b")[0] == "a [X] b"
+
+    # Same version: nothing is recompiled or republished.
+    _write(path, "v1", [_rule(r"other", "secrets:other")])
+    tf.reload_from_urls([url])
+    assert tf.snapshot() is first
+
+    _write(path, "v2", [_rule(r"key_[a-z]{3}", "secrets:key", "[K]")])
+    assert tf.reload_from_urls([url]) == 1
+    assert tf.snapshot().generation == first.generation + 1
+    assert tf.snapshot().versions == {url: "v2"}
+    assert tf.apply_dynamic_redactions("tok_1234 key_abc")[0] == "tok_1234 [K]"
+
+    # Broken or all-invalid feeds keep the last good rules.
+    path.write_text("{not json", encoding="utf-8")
+    assert tf.reload_from_urls([url]) == 1
+    _write(path, "v3", [_rule(r"(", "bad")])
+    assert tf.reload_from_urls([url]) == 1
+    assert tf.status()["sources"][url]["version"] == "v2"
+    assert tf.status()["sources"][url]["error"] == "no valid rules"
+
+
+def test_http_feed_uses_etag(tmp_path: Path) -> None:
+    state = {"version": "v1", "requests": [], "not_modified": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            etag = f'"{state["version"]}"'
+            state["requests"].append(self.headers.get("If-None-Match"))
+            if self.headers.get("If-None-Match") == etag:
+                state["not_modified"] += 1
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = json.dumps(
+                {"version": state["version"], "redactions": [_rule(r"tok_\d+", "secrets:tok")]}
+            ).encode()
+            self.send_response(200)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/feed"
+        assert tf.reload_from_urls([url]) == 1
+        generation = tf.snapshot().generation
+        assert tf.reload_from_urls([url]) == 1
+        assert state["not_modified"] == 1
+        assert tf.snapshot().generation == generation
+
+        state["version"] = "v2"
+        tf.reload_from_urls([url])
+        assert tf.snapshot().versions == {url: "v2"}
+        assert state["requests"] == [None, '"v1"', '"v1"']
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_single_pass_attribution_and_families(tmp_path: Path) -> None:
+    url = _write(
+        tmp_path / "feed.json",
+        "v1",
+        [
+            _rule(r"tok_\d+", "secrets:tok", "[TOK]"),
+            _rule(r"tok_\w+", "secrets:word", "[WORD]"),
+            _rule(r"(?i)acme-[a-z]+", "vendor:acme", "[ACME]"),
+            _rule(r"(?P<user>\w+)@corp", "pii:email", r"\g<user>@[CORP]"),
+            _rule(r"x*", "empty"),  # matches the empty string: rejected
+        ],
+    )
+    assert tf.reload_from_urls([url]) == 4
+    text, families, total, debug = tf.apply_dynamic_redactions(
+        "tok_12 tok_ab ACME-Key bob@corp", debug=True
+    )
+    assert text == "[TOK] [WORD] [ACME] bob@[CORP]"
+    assert total == 4
+    assert families == {
+        "secrets:tok": 1,
+        "secrets:word": 1,
+        "secrets:*": 2,
+        "vendor:acme": 1,
+        "vendor:*": 1,
+        "pii:email": 1,
+        "pii:*": 1,
+    }
+    assert debug[0] == "secrets:tok:tok_12"
+
+
+def test_large_feed_matches_sequential_rules(tmp_path: Path) -> None:
+    rules = [_rule(f"vnd{i:04d}_[A-Za-z0-9]{{16}}", f"vendor:v{i}", f"[V{i}]") for i in range(2000)]
+    url = _write(tmp_path / "feed.json", "big", rules)
+    assert tf.reload_from_urls([url]) == 2000
+    assert tf.snapshot().standalone == ()
+    text = ("lorem ipsum " * 200) + " vnd0042_abcdefghijklmnop vnd1999_ABCDEFGHIJKLMNOP"
+
+    expected = text
+    for r in rules:
+        expected = re.sub(r["pattern"], r["replacement"], expected)
+    out, families, total, _ = tf.apply_dynamic_redactions(text)
+    assert out == expected
+    assert total == 2
+    assert families["vendor:*"] == 2
+
+
+def test_refresher_reloads_from_env(tmp_path: Path, monkeypatch) -> None:
+    url = _write(tmp_path / "feed.json", "v1", [_rule("tok", "secrets:tok")])
+    monkeypatch.setenv("THREAT_FEED_URLS", url)
+    refresher = tf.ThreatFeedRefresher(interval_s=0.05)
+    refresher.start()
+    try:
+        for _ in range(200):
+            if tf.snapshot().rules:
+                break
+            threading.Event().wait(0.01)
+        assert len(tf.snapshot().rules) == 1
+    finally:
+        refresher.stop()
+    assert not refresher.running()
+    delays = [tf.ThreatFeedRefresher(10.0).next_delay() for _ in range(50)]
+    assert all(9.0 <= d <= 11.0 for d in delays)
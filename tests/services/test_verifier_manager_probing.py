@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from typing import Callable, List
+
+from app.verifier.base import VerifierTimeout, VerifyInput, VerifyResult
+from app.verifier.manager import VerifierManager
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _Scripted:
+    """Provider whose latency (seconds) for call ``n`` comes from ``profile(n)``."""
+
+    def __init__(
+        self, name: str, clock: _Clock, profile: Callable[[int], float], healthy: bool = True
+    ) -> None:
+        self.name = name
+        self.clock = clock
+        self.profile = profile
+        self.healthy = healthy
+        self.calls = 0
+        self.health_calls = 0
+        self.timeouts = 0
+        self.failing = False
+
+    def health(self) -> bool:
+        self.health_calls += 1
+        return self.healthy
+
+    def verify(self, inp: VerifyInput, timeout_s: float) -> VerifyResult:
+        latency = self.profile(self.calls)
+        self.calls += 1
+        if latency > timeout_s:
+            self.clock.now += timeout_s
+            self.timeouts += 1
+            raise VerifierTimeout(self.name)
+        self.clock.now += latency
+        if self.failing:
+            raise RuntimeError("boom")
+        return VerifyResult(True, "ok", 0.9)
+
+
+def _manager(providers: List[_Scripted], clock: _Clock, **kw) -> VerifierManager:
+    # Probes are driven explicitly so the fake clock stays deterministic.
+    return VerifierManager(providers, clock=clock, rng=random.Random(7), auto_probe=False, **kw)
+
+
+def test_request_path_never_calls_health() -> None:
+    clock = _Clock()
+    a = _Scripted("a", clock, lambda n: 0.01)
+    b = _Scripted("b", clock, lambda n: 0.01, healthy=False)
+    vm = _manager([a, b], clock)
+    for _ in range(50):
+        clock.now += 20.0  # far past any cache TTL
+        vm.verify_with_failover(VerifyInput(text="hi"))
+    assert a.health_calls == b.health_calls == 0
+
+    vm.probe_once()
+    assert a.health_calls == b.health_calls == 1
+    before = b.calls
+    for _ in range(20):
+        _, _, prov = vm.verify_with_failover(VerifyInput(text="hi"))
+        assert prov == "a"
+    assert b.calls == before
+
+
+def test_traffic_drains_from_degrading_provider_before_timeouts() -> None:
+    clock = _Clock()
+    steady = _Scripted("steady", clock, lambda n: 0.02)
+    # Latency creeps from 20ms to 400ms; the request timeout is 500ms.
+    degrading = _Scripted("degrading", clock, lambda n: min(0.4, 0.02 + n * 0.01))
+    vm = _manager([steady, degrading], clock)
+    picks = []
+    for _ in range(400):
+        _, _, prov = vm.verify_with_failover(VerifyInput(text="hi"), timeout_s=0.5)
+        picks.append(prov)
+    assert degrading.timeouts == 0
+    assert picks[-200:].count("degrading") < 10
+    assert vm.snapshot()["1:degrading"]["latency_ms"] < 400
+
+
+def test_outlier_ejection_and_slow_start() -> None:
+    clock = _Clock()
+    flaky = _Scripted("flaky", clock, lambda n: 0.01)
+    peer = _Scripted("peer", clock, lambda n: 0.01)
+    vm = _manager([flaky, peer], clock, eject_s=30.0, slow_start_s=60.0)
+    flaky.failing = True
+    for _ in range(3):
+        vm._observe(flaky, 0.01, ok=False)
+    assert vm.weight(flaky) == 0.0
+    assert vm.snapshot()["0:flaky"]["ejected"] is True
+    for _ in range(10):
+        _, _, prov = vm.verify_with_failover(VerifyInput(text="hi"))
+        assert prov == "peer"
+
+    back = clock.now + 30.0
+    early, later, full = (vm.weight(flaky, back + s) for s in (1.0, 30.0, 60.0))
+    assert 0 < early < later < full
+
+
+def test_last_provider_is_never_ejected() -> None:
+    clock = _Clock()
+    only = _Scripted("only", clock, lambda n: 0.01)
+    only.failing = True
+    vm = _manager([only], clock)
+    for _ in range(10):
+        res, _, prov = vm.verify_with_failover(VerifyInput(text="hi"))
+        assert prov == "failover" and res.allowed is False
+    assert only.calls == 10
+    assert vm.snapshot()["0:only"]["ejected"] is False
+
+
+def test_probe_recovery_ramps_weight() -> None:
+    clock = _Clock()
+    a = _Scripted("a", clock, lambda n: 0.01, healthy=False)
+    b = _Scripted("b", clock, lambda n: 0.01)
+    vm = _manager([a, b], clock, slow_start_s=10.0)
+    vm.probe_once()
+    assert vm.weight(a) == 0.0
+    a.healthy = True
+    vm.probe_once()
+    assert 0 < vm.weight(a) < vm.weight(b)
+    clock.now += 10.0
+    vm.probe_once()
+    assert vm.weight(a) > 0.5 * vm.weight(b)
+
+
+def test_prober_thread_runs_in_background() -> None:
+    clock = _Clock()
+    a = _Scripted("a", clock, lambda n: 0.01)
+    vm = VerifierManager([a], health_ttl_s=0.01)
+    vm.start_prober()
+    try:
+        deadline = time.monotonic() + 2.0
+        while a.health_calls < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        vm.stop_prober()
+    assert a.health_calls >= 3
+
+
+def test_first_request_starts_the_prober() -> None:
+    clock = _Clock()
+    a = _Scripted("a", clock, lambda n: 0.01)
+    b = _Scripted("b", clock, lambda n: 0.01, healthy=False)
+    vm = VerifierManager([a, b], health_ttl_s=0.01, rng=random.Random(7))
+    try:
+        assert vm._thread is None
+        vm.verify_with_failover(VerifyInput(text="hi"))
+        deadline = time.monotonic() + 2.0
+        while vm.weight(b) > 0.0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert b.health_calls >= 1
+        assert vm.weight(b) == 0.0
+        for _ in range(20):
+            assert vm.verify_with_failover(VerifyInput(text="hi"))[2] == "a"
+    finally:
+        vm.stop_prober()
+    assert vm._thread is None
+    vm.verify_with_failover(VerifyInput(text="hi"))
+    assert vm._thread is None
+
+
+class _Blocking:
+    def __init__(self, name: str, sleep_s: float) -> None:
+        self.name = name
+        self.sleep_s = sleep_s
+
+    def health(self) -> bool:
+        return True
+
+    def verify(self, inp: VerifyInput, timeout_s: float) -> VerifyResult:
+        time.sleep(self.sleep_s)
+        return VerifyResult(True, "ok", 0.9)
+
+
+class _Async(_Blocking):
+    async def averify(self, inp: VerifyInput, timeout_s: float) -> VerifyResult:
+        await asyncio.sleep(self.sleep_s)
+        return VerifyResult(False, "policy", 0.8)
+
+
+def test_async_failover_bounds_each_attempt() -> None:
+    slow = _Blocking("slow", 0.3)
+    fast = _Async("fast", 0.0)
+    vm = VerifierManager([slow, fast], rng=random.Random(0), auto_probe=False)
+    vm._observe(fast, 0.5, ok=True)  # make "slow" the preferred first pick
+
+    async def run():
+        started = time.monotonic()
+        out = await vm.averify_with_failover(VerifyInput(text="hi"), timeout_s=0.05)
+        return out, time.monotonic() - started
+
+    (res, hdr, prov), elapsed = asyncio.run(run())
+    assert prov == "fast" and res.allowed is False
+    assert hdr["X-Guardrail-Decision"] == "block-input"
+    assert elapsed < 0.25
+
+    empty = VerifierManager([])
+    _, _, prov = asyncio.run(empty.averify_with_failover(VerifyInput(text="hi")))
+    assert prov == "none"
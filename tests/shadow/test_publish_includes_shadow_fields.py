@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import json
+
 from starlette.testclient import TestClient
 
 from app.services import decisions_bus
@@ -45,3 +47,69 @@ def test_decision_event_contains_shadow_fields(tmp_path, monkeypatch):
             # Presence checks; values depend on live vs shadow actions.
             assert "shadow_action" in evt
             assert "shadow_rule_ids" in evt
+
+
+def test_shadow_verdict_is_a_follow_up_event(tmp_path, monkeypatch):
+    from app.services import shadow_policy
+
+    audit_path = tmp_path / "decisions.jsonl"
+    decisions_bus.configure(path=str(audit_path), reset=True)
+    shadow_path = tmp_path / "shadow_policy.json"
+    shadow_path.write_text('{"default_action": "deny", "rule_ids": ["s-1"]}', encoding="utf-8")
+    set_config(
+        {
+            "shadow_enable": True,
+            "shadow_policy_path": str(shadow_path),
+            "shadow_timeout_ms": 100,
+            "shadow_sample_rate": 1.0,
+        }
+    )
+
+    from app.main import create_app
+
+    q = decisions_bus.subscribe()
+    try:
+        c = TestClient(create_app())
+        c.post("/guardrail/evaluate", json={"text": "hello"}, headers={"X-Request-ID": "req-s1"})
+        assert shadow_policy.drain(2.0)
+    finally:
+        decisions_bus.unsubscribe(q)
+        set_config({"shadow_enable": False})
+
+    rows = [e for e in decisions_bus.snapshot() if e.get("request_id") == "req-s1"]
+    decision = [e for e in rows if e.get("type") != decisions_bus.SHADOW_VERDICT_EVENT]
+    verdict = [e for e in rows if e.get("type") == decisions_bus.SHADOW_VERDICT_EVENT]
+    assert len(decision) == 1 and len(verdict) == 1
+    # The published decision is never edited after the fact.
+    assert decision[0]["shadow_action"] is None
+    assert verdict[0]["shadow_action"] == "deny"
+    assert verdict[0]["shadow_rule_ids"] == ["s-1"]
+
+    logged = [json.loads(line) for line in audit_path.read_text(encoding="utf-8").splitlines()]
+    assert [e.get("shadow_action") for e in logged if e.get("request_id") == "req-s1"] == [
+        None,
+        "deny",
+    ]
+    streamed = []
+    while not q.empty():
+        streamed.append(q.get_nowait())
+    assert any(e.get("type") == decisions_bus.SHADOW_VERDICT_EVENT for e in streamed)
+
+
+def test_publish_hands_each_consumer_its_own_copy(tmp_path):
+    decisions_bus.configure(path=str(tmp_path / "decisions.jsonl"), reset=True)
+    q1 = decisions_bus.subscribe()
+    q2 = decisions_bus.subscribe()
+    try:
+        evt = {"request_id": "r-1", "shadow_action": None}
+        decisions_bus.publish(evt)
+        got1, got2 = q1.get_nowait(), q2.get_nowait()
+    finally:
+        decisions_bus.unsubscribe(q1)
+        decisions_bus.unsubscribe(q2)
+
+    evt["shadow_action"] = "deny"
+    got1["mutated"] = True
+    assert got2 == decisions_bus.snapshot()[-1]
+    assert got2["shadow_action"] is None and "mutated" not in got2
+    assert got1 is not got2 and got1 is not evt
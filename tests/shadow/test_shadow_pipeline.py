@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any, Mapping
+
+import pytest
+
+from app.services import shadow_policy
+from app.services.config_store import set_config
+
+
+@pytest.fixture(autouse=True)
+def _reset_pipeline():
+    shadow_policy.configure(reset=True)
+    yield
+    shadow_policy.configure(reset=True)
+
+
+def _enable(path: str, sample_rate: float = 1.0) -> None:
+    set_config(
+        {
+            "shadow_enable": True,
+            "shadow_policy_path": path,
+            "shadow_timeout_ms": 100,
+            "shadow_sample_rate": sample_rate,
+        }
+    )
+
+
+def _action_evaluator(payload: Mapping[str, Any], *, policy: Mapping[str, Any]):
+    return {"action": policy.get("default_action", "allow")}
+
+
+def test_policy_blob_parsed_once_until_mtime_changes(tmp_path, monkeypatch):
+    path = tmp_path / "shadow.json"
+    path.write_text('{"default_action": "deny"}', encoding="utf-8")
+
+    calls = {"n": 0}
+    real_load = shadow_policy._load_policy_blob
+
+    def counting_load(p: str):
+        calls["n"] += 1
+        return real_load(p)
+
+    monkeypatch.setattr(shadow_policy, "_load_policy_blob", counting_load)
+
+    first = shadow_policy.load_policy_cached(str(path))
+    second = shadow_policy.load_policy_cached(str(path))
+    assert first is second
+    assert first is not None and first["default_action"] == "deny"
+    assert calls["n"] == 1
+
+    path.write_text('{"default_action": "allow", "x": 1}', encoding="utf-8")
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    third = shadow_policy.load_policy_cached(str(path))
+    assert third is not None and third["default_action"] == "allow"
+    assert calls["n"] == 2
+
+
+def test_submit_does_not_run_evaluator_inline(tmp_path):
+    path = tmp_path / "shadow.json"
+    path.write_text('{"default_action": "deny"}', encoding="utf-8")
+    _enable(str(path))
+
+    gate = threading.Event()
+    caller = threading.get_ident()
+    seen: dict[str, int] = {}
+
+    def slow_evaluator(payload: Mapping[str, Any], *, policy: Mapping[str, Any]):
+        seen["thread"] = threading.get_ident()
+        gate.wait(1.0)
+        return {"action": "deny"}
+
+    assert shadow_policy.submit_shadow_eval({"text": "hi"}, "allow", "/r", slow_evaluator)
+    gate.set()
+    assert shadow_policy.drain(2.0)
+    assert seen["thread"] != caller
+
+    stats = shadow_policy.stats()
+    assert stats["submitted"] == 1
+    assert stats["disagree"] == 1
+    assert stats["queue_depth"] == 0
+
+
+def test_divergence_counters_aggregate(tmp_path):
+    path = tmp_path / "shadow.json"
+    path.write_text('{"default_action": "deny"}', encoding="utf-8")
+    _enable(str(path))
+
+    for live in ("allow", "deny", "deny", "allow", "allow"):
+        shadow_policy.submit_shadow_eval({}, live, "/guardrail/evaluate", _action_evaluator)
+    assert shadow_policy.drain(2.0)
+
+    stats = shadow_policy.stats()
+    assert stats["evaluated"] == 5
+    assert stats["agree"] == 2
+    assert stats["disagree"] == 3
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path, monkeypatch):
+    path = tmp_path / "shadow.json"
+    path.write_text('{"default_action": "deny"}', encoding="utf-8")
+    _enable(str(path))
+    monkeypatch.setenv("SHADOW_QUEUE_MAX", "1")
+    shadow_policy.configure(reset=True)
+
+    gate = threading.Event()
+
+    def blocking_evaluator(payload: Mapping[str, Any], *, policy: Mapping[str, Any]):
+        gate.wait(2.0)
+        return {"action": "deny"}
+
+    accepted = [
+        shadow_policy.submit_shadow_eval({}, "allow", "/r", blocking_evaluator) for _ in range(10)
+    ]
+    gate.set()
+    assert shadow_policy.drain(3.0)
+    assert accepted.count(True) <= 2
+    assert shadow_policy.stats()["dropped"] >= 8
+
+
+def test_disabled_or_missing_path_is_noop(tmp_path):
+    set_config({"shadow_enable": False, "shadow_policy_path": str(tmp_path / "x.json")})
+    assert not shadow_policy.submit_shadow_eval({}, "allow", "/r", _action_evaluator)
+    _enable("")
+    assert not shadow_policy.submit_shadow_eval({}, "allow", "/r", _action_evaluator)
+    assert shadow_policy.stats()["submitted"] == 0
+
+
+def test_result_hook_receives_verdict_on_worker(tmp_path):
+    path = tmp_path / "shadow.json"
+    path.write_text('{"default_action": "deny"}', encoding="utf-8")
+    _enable(str(path))
+
+    got: list[tuple[str, list[str]]] = []
+
+    def evaluator(payload: Mapping[str, Any], *, policy: Mapping[str, Any]):
+        return {"action": "Deny", "rule_ids": ["r1", " ", "r2"]}
+
+    def hook(action: str, rule_ids: list[str]) -> None:
+        got.append((action, rule_ids))
+
+    assert shadow_policy.submit_shadow_eval({}, "allow", "/r", evaluator, on_result=hook)
+    assert shadow_policy.drain(2.0)
+    assert got == [("deny", ["r1", "r2"])]
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import AsyncIterator, List
+
+import pytest
+
+from app.services.event_stream import (
+    DeltaCoalescer,
+    EventStream,
+    FrameEncoder,
+    TimerWheel,
+    coalesce,
+    sse_stream,
+)
+
+
+def _legacy_frame(data: object, event=None, id=None) -> bytes:
+    if isinstance(data, bytes):
+        text = data.decode("utf-8", "ignore")
+    elif isinstance(data, str):
+        text = data
+    else:
+        text = json.dumps(data, ensure_ascii=False)
+    lines: List[str] = []
+    if id is not None:
+        lines.append(f"id: {id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    if text == "":
+        lines.append("data:")
+    else:
+        lines.extend(f"data: {part}" for part in text.splitlines())
+        if text.endswith("\n"):
+            lines.append("data:")
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+def test_frames_match_legacy_encoding_byte_for_byte() -> None:
+    cases = ["", "tok", "a\nb", "end\n", "x\r\ny", "sep arated", {"d": "é"}, b"raw"]
+    for data in cases:
+        for event in (None, "delta"):
+            for id in (None, "42"):
+                assert EventStream.frame(data, event=event, id=id) == _legacy_frame(data, event, id)
+    enc = FrameEncoder("delta")
+    assert enc.encode_many(["a", {"b": 1}]) == _legacy_frame("a", "delta") + _legacy_frame(
+        {"b": 1}, "delta"
+    )
+
+
+def test_coalescer_merges_within_window_and_size() -> None:
+    now = [0.0]
+    co = DeltaCoalescer(
+        lambda t: EventStream.frame(t), window_s=0.05, max_chars=8, clock=lambda: now[0]
+    )
+    assert co.push("he") is None and co.push("llo") is None
+    now[0] += 0.06
+    assert co.push(" w") == EventStream.frame("hello w")
+    assert co.push("0123456789") == EventStream.frame("0123456789")
+    assert co.push("x") is None and co.flush() == EventStream.frame("x")
+    assert co.flush() is None
+
+
+async def test_coalesce_flushes_idle_batches() -> None:
+    async def deltas() -> AsyncIterator[str]:
+        for piece in ("a", "b", "c"):
+            yield piece
+        await asyncio.sleep(0.15)
+        yield "d"
+
+    co = DeltaCoalescer(lambda t: t.encode(), window_s=0.05)
+    frames = [f async for f in coalesce(deltas(), co)]
+    assert frames == [b"abc", b"d"]
+
+
+async def test_timer_wheel_fires_periodic_and_long_timers() -> None:
+    wheel = TimerWheel(tick_s=10.0, slots=4)  # driver never ticks during the test
+    fired: List[str] = []
+    every = wheel.call_every(20.0, lambda: fired.append("every"))
+    wheel.call_later(60.0, lambda: fired.append("later"))  # 6 ticks > 4 slots
+    cancelled = wheel.call_later(10.0, lambda: fired.append("cancelled"))
+    cancelled.cancel()
+    assert len(wheel) == 2
+    for _ in range(5):
+        wheel.advance()
+    assert fired == ["every", "every"]
+    wheel.advance()
+    assert sorted(fired) == ["every", "every", "every", "later"]
+    every.cancel()
+    assert len(wheel) == 0
+
+    selfish = wheel.call_every(10.0, lambda: selfish.cancel())
+    wheel.advance()
+    assert len(wheel) == 0
+    wheel.close()
+
+
+async def test_sse_stream_heartbeats_only_when_idle() -> None:
+    wheel = TimerWheel(tick_s=0.02)
+
+    async def frames(gaps: List[float]) -> AsyncIterator[bytes]:
+        for i, gap in enumerate(gaps):
+            await asyncio.sleep(gap)
+            yield EventStream.frame(str(i))
+
+    idle = [
+        f async for f in sse_stream(frames([0, 0.3]), heartbeat_s=0.06, retry_ms=500, wheel=wheel)
+    ]
+    assert idle[0] == EventStream.retry(500) and idle[1] == EventStream.frame("0")
+    assert idle[-1] == EventStream.frame("1")
+    assert EventStream.heartbeat() in idle[2:-1]
+
+    busy = [f async for f in sse_stream(frames([0.01] * 20), heartbeat_s=0.1, wheel=wheel)]
+    assert EventStream.heartbeat() not in busy and len(busy) == 20
+    assert len(wheel) == 0
+    wheel.close()
+
+
+async def test_source_errors_propagate_and_early_close_releases_timers() -> None:
+    wheel = TimerWheel(tick_s=0.02)
+
+    async def broken() -> AsyncIterator[str]:
+        yield "a"
+        raise RuntimeError("upstream reset")
+
+    co = DeltaCoalescer(lambda t: t.encode(), window_s=10.0)
+    with pytest.raises(RuntimeError, match="upstream reset"):
+        async for _ in sse_stream(coalesce(broken(), co), heartbeat_s=1.0, wheel=wheel):
+            pass
+
+    async def endless() -> AsyncIterator[bytes]:
+        while True:
+            await asyncio.sleep(0.005)
+            yield b"x"
+
+    stream = sse_stream(endless(), heartbeat_s=1.0, wheel=wheel)
+    assert await stream.__anext__() == b"x"
+    await stream.aclose()
+    assert len(wheel) == 0
+    wheel.close()
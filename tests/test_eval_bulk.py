@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import glob
+import json
+import random
+from pathlib import Path
+
+from eval.bulk import run
+from eval.metrics import LatencyHistogram, aggregate_by_cat
+from eval.predictors import load_corpus, predict
+
+CORPUS = sorted(glob.glob("eval/corpus/*.jsonl"))
+
+
+def test_inline_run_matches_serial_metrics(tmp_path: Path) -> None:
+    summary = run(CORPUS, tmp_path, workers=0, shard_size=3)
+    examples = load_corpus(CORPUS)
+    serial = aggregate_by_cat((ex.cat, ex.label, predict(ex)) for ex in examples)
+    for cat, metric in serial.items():
+        row = summary["per_category"][cat]
+        assert (row["tp"], row["fp"], row["fn"]) == (metric.tp, metric.fp, metric.fn)
+    assert summary["throughput"]["examples"] == len(examples)
+    assert set(summary["latency_by_detector"]) >= {"injection_regex", "policy_packs"}
+    assert "examples/s" in (tmp_path / "REPORT.md").read_text(encoding="utf-8")
+
+
+def test_worker_pool_streams_every_example_once(tmp_path: Path) -> None:
+    base = [json.loads(line) for path in CORPUS for line in open(path, encoding="utf-8")]
+    rng = random.Random(3)
+    corpus = tmp_path / "big.jsonl"
+    with corpus.open("w", encoding="utf-8") as fh:
+        for i in range(600):
+            fh.write(json.dumps(dict(rng.choice(base), id=f"x{i}")) + "\n")
+            if i % 97 == 0:
+                fh.write("\n")
+
+    pooled = run([str(corpus)], tmp_path / "pooled", workers=2, shard_size=50)
+    inline = run([str(corpus)], tmp_path / "inline", workers=0, shard_size=50)
+    assert pooled["per_category"] == inline["per_category"]
+    assert pooled["throughput"]["workers"] == 2
+
+    lines = (tmp_path / "pooled" / "results.jsonl").read_text(encoding="utf-8").splitlines()
+    ids = sorted(json.loads(line)["id"] for line in lines)
+    assert ids == sorted(f"x{i}" for i in range(600))
+    counts = {n: h["count"] for n, h in pooled["latency_by_detector"].items()}
+    assert sum(counts.values()) == 600
+
+
+def test_latency_histogram_percentiles_are_bounded() -> None:
+    hist, other = LatencyHistogram(), LatencyHistogram()
+    for v in range(1, 1001):
+        (hist if v % 2 else other).add(float(v))
+    hist.merge(other)
+    assert hist.count == 1000 and hist.max_us == 1000.0
+    for q, exact in ((50, 500), (90, 900), (99, 990)):
+        assert exact <= hist.percentile(q) <= exact * 1.05 + 1
+    assert LatencyHistogram().summary()["p99_us"] == 0.0
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import importlib
-from typing import Any, Dict, Iterable, List, Tuple
+import json
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
 
 from fastapi.testclient import TestClient
 
@@ -15,10 +17,29 @@ class FakeClient:
         return iter(parts), {"provider": "fake", "model": model}
 
 
-def _client(monkeypatch):
+class PacedClient:
+    """Many small pieces; ``pause`` seconds of upstream silence before the last one."""
+
+    def __init__(self, pause: float = 0.0) -> None:
+        self.pause = pause
+
+    def chat_stream(
+        self, messages: List[Dict[str, str]], model: str
+    ) -> Tuple[Iterable[str], Dict[str, Any]]:
+        def pieces() -> Iterator[str]:
+            for i in range(20):
+                yield f"w{i} "
+            if self.pause:
+                time.sleep(self.pause)
+            yield "end"
+
+        return pieces(), {"provider": "fake", "model": model}
+
+
+def _client(monkeypatch, fake: Any = None):
     import app.routes.openai_compat as compat
 
-    monkeypatch.setattr(compat, "get_client", lambda: FakeClient())
+    monkeypatch.setattr(compat, "get_client", lambda: fake or FakeClient())
 
     import app.telemetry.metrics as metrics
 
@@ -63,3 +84,52 @@ def test_openai_streaming_sse(monkeypatch):
         assert r.headers.get("X-Guardrail-Egress-Action") == "allow"
         assert r.headers.get("X-Guardrail-Egress-Redactions") == "0"
         assert r.headers.get("X-Guardrail-Reason-Hints") == ""
+
+
+def _stream_body(c: TestClient) -> str:
+    with c.stream(
+        "POST",
+        "/v1/chat/completions",
+        headers={"X-API-Key": "k", "X-Tenant-ID": "acme", "X-Bot-ID": "assistant-1"},
+        json={"model": "demo", "stream": True, "messages": [{"role": "user", "content": "hi"}]},
+        timeout=5.0,
+    ) as r:
+        assert r.status_code == 200
+        return "".join(r.iter_text())
+
+
+def _chunks(body: str) -> List[Dict[str, Any]]:
+    return [
+        json.loads(line[len("data: ") :]) for line in body.split("\n") if line.startswith("data: {")
+    ]
+
+
+def test_streaming_coalesces_deltas_within_flush_window(monkeypatch):
+    monkeypatch.setenv("OAI_COMPAT_STREAM_COALESCE_MS", "5000")
+    body = _stream_body(_client(monkeypatch, PacedClient()))
+
+    chunks = _chunks(body)
+    assert chunks[0]["choices"][0]["delta"] == {"role": "assistant"}
+    assert chunks[-1]["choices"][0]["finish_reason"] == "stop"
+    contents = [c["choices"][0]["delta"]["content"] for c in chunks[1:-1]]
+    assert len(contents) == 1
+    assert "".join(contents) == "".join(f"w{i} " for i in range(20)) + "end"
+    assert body.endswith("data: [DONE]\n\n")
+
+
+def test_streaming_sends_one_chunk_per_piece_by_default(monkeypatch):
+    monkeypatch.delenv("OAI_COMPAT_STREAM_COALESCE_MS", raising=False)
+    monkeypatch.delenv("OAI_COMPAT_STREAM_HEARTBEAT_S", raising=False)
+    body = _stream_body(_client(monkeypatch, PacedClient()))
+    assert len(_chunks(body)) == 2 + 21
+    assert ":\n\n" not in body
+
+
+def test_streaming_heartbeats_idle_upstream_from_shared_wheel(monkeypatch):
+    monkeypatch.setenv("OAI_COMPAT_STREAM_HEARTBEAT_S", "0.25")
+    body = _stream_body(_client(monkeypatch, PacedClient(pause=1.0)))
+
+    assert body.count(":\n\n") >= 1
+    assert body.index(":\n\n") < body.index("end")
+    assert len(_chunks(body)) == 2 + 21
+    assert body.endswith("data: [DONE]\n\n")
@@ -45,16 +45,21 @@ def test_autoreload_picks_up_changes():
         assert r1.status_code == 200
         assert r1.json()["policy_version"] == "9"
 
-        # Modify file to version 10; autoreload should pick it up automatically
+        # Modify file to version 10; the policy watcher should pick it up automatically
         time.sleep(0.01)  # help ensure distinct mtime on some FS
         _write_rules(rules_path, "10")
 
-        r2 = client.post(
-            "/guardrail",
-            json={"prompt": "hello again"},
-            headers={"X-API-Key": "unit-test-key"},
-        )
-        assert r2.status_code == 200
+        deadline = time.monotonic() + 5.0
+        while True:
+            r2 = client.post(
+                "/guardrail",
+                json={"prompt": "hello again"},
+                headers={"X-API-Key": "unit-test-key"},
+            )
+            assert r2.status_code == 200
+            if r2.json()["policy_version"] == "10" or time.monotonic() > deadline:
+                break
+            time.sleep(0.05)
         assert r2.json()["policy_version"] == "10"
 
 
@@ -0,0 +1,33 @@
+"""fakeredis-backed :class:`RedisManager` for tests."""
+
+from __future__ import annotations
+
+from typing import Any, Iterator, Optional
+
+import pytest
+
+from app.services import redis_manager
+from app.services.redis_manager import RedisManager
+
+FAKE_URL = "redis://fake-redis:6379/0"
+
+
+def fake_manager(url: str = FAKE_URL, server: Optional[Any] = None, **kwargs: Any) -> RedisManager:
+    fakeredis = pytest.importorskip("fakeredis")
+    aioredis = pytest.importorskip("fakeredis.aioredis")
+    shared = server or fakeredis.FakeServer()
+    return RedisManager(
+        url,
+        pool_factory=lambda: aioredis.FakeRedis(server=shared).connection_pool,
+        **kwargs,
+    )
+
+
+def installed_fake_manager(url: str = FAKE_URL, **kwargs: Any) -> Iterator[RedisManager]:
+    """Register a fake manager for ``url`` for the duration of a test."""
+    mgr = fake_manager(url, **kwargs)
+    redis_manager.install(mgr, url)
+    try:
+        yield mgr
+    finally:
+        redis_manager.reset()
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Dict, List
+
+import httpx
+import pytest
+
+from app.services import webhook_engine, webhooks
+from app.services.config_store import reset_config, set_config
+from app.services.webhooks_cb import get_cb_registry
+
+
+@pytest.fixture(autouse=True)
+def _webhook_config(tmp_path, monkeypatch):
+    monkeypatch.setattr(webhooks, "_DLQ_PATH", str(tmp_path / "dlq.jsonl"))
+    set_config(
+        {
+            "webhook_enable": True,
+            "webhook_url": "https://fast.example/hook",
+            "webhook_secret": "s3cr3t",
+            "webhook_timeout_ms": 2000,
+            "webhook_max_retries": 3,
+            "webhook_backoff_ms": 1,
+            "webhook_allowlist_host": "",
+        }
+    )
+    webhooks.configure(reset=True)
+    yield
+    webhook_engine.shutdown()
+    reset_config()
+    webhooks.configure(reset=True)
+
+
+def test_slow_host_does_not_block_other_hosts() -> None:
+    done: Dict[str, float] = {}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "slow.example":
+            await asyncio.sleep(0.5)
+        done.setdefault(request.url.host, time.monotonic())
+        return httpx.Response(200)
+
+    engine = webhook_engine.AsyncDeliveryEngine(
+        concurrency=2, transport=httpx.MockTransport(handler)
+    )
+    try:
+        start = time.monotonic()
+        for i in range(4):
+            engine.submit({"request_id": f"s{i}"}, url="https://slow.example/hook")
+        engine.submit({"request_id": "f"}, url="https://fast.example/hook")
+        assert engine.drain(5.0)
+    finally:
+        engine.stop()
+
+    assert done["fast.example"] - start < 0.3
+    assert webhooks.stats()["processed"] >= 5
+
+
+def test_per_host_concurrency_is_bounded() -> None:
+    inflight = {"now": 0, "peak": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        inflight["now"] += 1
+        inflight["peak"] = max(inflight["peak"], inflight["now"])
+        await asyncio.sleep(0.02)
+        inflight["now"] -= 1
+        return httpx.Response(204)
+
+    engine = webhook_engine.AsyncDeliveryEngine(
+        concurrency=3, transport=httpx.MockTransport(handler)
+    )
+    try:
+        for i in range(12):
+            engine.submit({"request_id": str(i)}, url="https://bounded.example/hook")
+        assert engine.drain(5.0)
+    finally:
+        engine.stop()
+
+    assert inflight["peak"] == 3
+
+
+def test_retries_are_scheduled_not_slept() -> None:
+    attempts: List[float] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.headers.get("X-Guardrail-Idempotency-Key") == "flaky":
+            attempts.append(time.monotonic())
+            if len(attempts) < 3:
+                return httpx.Response(503)
+        return httpx.Response(200)
+
+    engine = webhook_engine.AsyncDeliveryEngine(
+        concurrency=1, transport=httpx.MockTransport(handler)
+    )
+    try:
+        engine.submit({"request_id": "flaky"}, url="https://retry.example/hook")
+        # With concurrency=1 this event can only go out while the flaky one is
+        # parked in the timer heap between retries.
+        engine.submit({"request_id": "other"}, url="https://retry.example/hook")
+        assert engine.drain(5.0)
+        snapshot = engine.destinations()["retry.example"]
+    finally:
+        engine.stop()
+
+    assert len(attempts) == 3
+    assert snapshot == {"ready": 0, "inflight": 0, "scheduled": 0}
+    assert webhooks.dlq_count() == 0
+
+
+def test_exhausted_retries_land_in_dlq() -> None:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(500)
+
+    engine = webhook_engine.AsyncDeliveryEngine(
+        concurrency=1, transport=httpx.MockTransport(handler)
+    )
+    try:
+        engine.submit({"request_id": "doomed"}, url="https://broken.example/hook")
+        assert engine.drain(5.0)
+    finally:
+        engine.stop()
+
+    assert webhooks.dlq_count() == 1
+    assert webhooks.stats()["last_status"] == "5xx"
+
+
+def test_open_circuit_short_circuits_to_dlq() -> None:
+    calls = {"n": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls["n"] += 1
+        return httpx.Response(200)
+
+    reg = get_cb_registry()
+    for _ in range(20):
+        reg.on_failure("https://tripped.example/hook")
+
+    engine = webhook_engine.AsyncDeliveryEngine(
+        concurrency=1, transport=httpx.MockTransport(handler)
+    )
+    try:
+        engine.submit({"request_id": "cb"}, url="https://tripped.example/hook")
+        assert engine.drain(5.0)
+    finally:
+        engine.stop()
+
+    assert calls["n"] == 0
+    assert webhooks.dlq_count() == 1
+
+
+def test_enqueue_routes_to_engine_when_enabled(monkeypatch) -> None:
+    monkeypatch.setenv("WEBHOOK_ENGINE", "async")
+    seen: List[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers.get("X-Guardrail-Signature", ""))
+        return httpx.Response(200)
+
+    engine = webhook_engine.AsyncDeliveryEngine(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(webhook_engine, "_engine", engine)
+
+    webhooks.enqueue({"incident_id": "evt-1"})
+    assert engine.drain(5.0)
+
+    assert len(seen) == 1 and seen[0].startswith("sha256=")
+    assert webhooks.stats()["worker_running"] is False
+
+
+def test_stop_dead_letters_parked_and_inflight_jobs() -> None:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        key = request.headers.get("X-Guardrail-Idempotency-Key")
+        if key == "hung":
+            await asyncio.sleep(5.0)
+        if key == "quick":
+            return httpx.Response(200)
+        return httpx.Response(503)
+
+    set_config({"webhook_backoff_ms": 5000, "webhook_max_retries": 5})
+    engine = webhook_engine.AsyncDeliveryEngine(
+        concurrency=4, transport=httpx.MockTransport(handler)
+    )
+    engine.submit({"request_id": "parked"}, url="https://a.example/hook")
+    engine.submit({"request_id": "hung"}, url="https://b.example/hook")
+    engine.submit({"request_id": "quick"}, url="https://c.example/hook")
+    deadline = time.monotonic() + 2.0
+    while engine.destinations().get("a.example", {}).get("scheduled") != 1:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    engine.stop(timeout=0.2)
+
+    assert engine.pending() == 0
+    assert not engine.running
+    assert webhooks.dlq_count() == 2
+
+
+def test_concurrent_first_submits_start_one_loop() -> None:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200)
+
+    engine = webhook_engine.AsyncDeliveryEngine(transport=httpx.MockTransport(handler))
+    threads_before = {t.ident for t in threading.enumerate()}
+    barrier = threading.Barrier(8)
+
+    def submit(i: int) -> None:
+        barrier.wait()
+        engine.submit({"request_id": f"r{i}"}, url="https://one.example/hook")
+
+    workers = [threading.Thread(target=submit, args=(i,)) for i in range(8)]
+    try:
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        assert engine.drain(5.0)
+        loops = [
+            t
+            for t in threading.enumerate()
+            if t.name == "webhook-engine" and t.ident not in threads_before
+        ]
+        assert len(loops) == 1
+    finally:
+        engine.stop()
+    assert webhooks.stats()["processed"] >= 8
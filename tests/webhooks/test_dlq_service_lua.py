@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+from app.services.dlq import DLQService
+
+pytestmark = pytest.mark.asyncio
+
+
+def _redis() -> Any:
+    fakeredis = pytest.importorskip("fakeredis.aioredis")
+    pytest.importorskip("lupa")
+    return fakeredis.FakeRedis(decode_responses=False)
+
+
+def _counting(redis: Any) -> list[str]:
+    calls: list[str] = []
+    original = redis.execute_command
+
+    async def execute_command(*args: Any, **kwargs: Any) -> Any:
+        calls.append(str(args[0]).upper())
+        return await original(*args, **kwargs)
+
+    redis.execute_command = execute_command
+    return calls
+
+
+async def test_enqueue_is_single_round_trip() -> None:
+    redis = _redis()
+    dlq = DLQService(redis)
+    await dlq.enqueue("t", "hook", {"a": 1})  # warm script cache
+
+    calls = _counting(redis)
+    msg = await dlq.enqueue("t", "hook", {"b": 2}, error="boom")
+    assert calls == ["EVALSHA"]
+
+    pending = await dlq.list_pending("t", "hook")
+    assert {m.id for m in pending} >= {msg.id}
+    stored = next(m for m in pending if m.id == msg.id)
+    assert stored.payload == {"b": 2}
+    assert stored.last_error == "boom"
+    assert stored.tries == 0
+
+
+async def test_nack_backs_off_then_quarantines(monkeypatch) -> None:
+    monkeypatch.setenv("DLQ_MAX_TRIES", "3")
+    monkeypatch.setenv("DLQ_JITTER_FRAC", "0")
+    monkeypatch.setenv("DLQ_BASE_DELAY_SEC", "10")
+    monkeypatch.setenv("DLQ_BACKOFF_MULT", "2")
+    redis = _redis()
+    dlq = DLQService(redis)
+    msg = await dlq.enqueue("t", "hook", {"x": 1})
+
+    first = await dlq.nack(msg.id, "e1")
+    assert first is not None
+    assert first.tries == 1
+    assert first.last_error == "e1"
+    assert first.next_attempt_ts == pytest.approx(first.last_attempt_ts + 10, abs=0.01)
+
+    second = await dlq.nack(msg.id, "e2")
+    assert second is not None and second.tries == 2
+    assert second.next_attempt_ts == pytest.approx(second.last_attempt_ts + 20, abs=0.01)
+
+    assert await dlq.nack(msg.id, "e3") is None
+    assert await dlq.list_quarantine("t", "hook") == [msg.id]
+    assert await dlq.list_pending("t", "hook") == []
+
+    replayed = await dlq.replay_now(msg.id)
+    assert replayed is not None and replayed.tries == 3
+    assert await dlq.list_quarantine("t", "hook") == []
+    assert [m.id for m in await dlq.next_due("t", "hook")] == [msg.id]
+
+
+async def test_bulk_operations_use_one_round_trip_per_batch(monkeypatch) -> None:
+    monkeypatch.setenv("DLQ_BATCH_SIZE", "50")
+    redis = _redis()
+    dlq = DLQService(redis)
+    ids = [(await dlq.enqueue("t", "hook", {"i": i})).id for i in range(120)]
+
+    calls = _counting(redis)
+    results = await dlq.nack_many([(msg_id, "down") for msg_id in ids])
+    assert all(r is not None and r.tries == 1 for r in results)
+    assert calls.count("EVALSHA") == 3
+
+    calls.clear()
+    replayed = await dlq.replay_many(ids[:60] + ["missing"])
+    assert [r is None for r in replayed].count(True) == 1
+    assert calls.count("EVALSHA") == 2
+
+    calls.clear()
+    assert await dlq.ack_many(ids + ["missing"]) == 120
+    assert calls.count("EVALSHA") == 3
+    assert await dlq.list_pending("t", "hook", limit=500) == []
+
+
+async def test_quarantine_and_missing_ids() -> None:
+    redis = _redis()
+    dlq = DLQService(redis)
+    msg = await dlq.enqueue("t", "hook", {"x": 1})
+
+    assert await dlq.quarantine(msg.id) is True
+    assert await dlq.list_quarantine("t", "hook") == [msg.id]
+    assert await dlq.quarantine("nope") is False
+    assert await dlq.nack("nope", "err") is None
+    assert await dlq.replay_now("nope") is None
+    assert await dlq.ack(msg.id) is True
+    assert await dlq.ack(msg.id) is False
+    assert await dlq.list_quarantine("t", "hook") == []
+
+
+async def test_noscript_falls_back_to_eval() -> None:
+    redis = _redis()
+    dlq = DLQService(redis)
+    await dlq.enqueue("t", "hook", {"x": 1})
+    await redis.script_flush()
+
+    msg = await dlq.enqueue("t", "hook", {"y": 2})
+    assert msg.id in {m.id for m in await dlq.list_pending("t", "hook")}
+
+
+async def test_batch_scripts_declare_every_key() -> None:
+    redis = _redis()
+    dlq = DLQService(redis)
+    a = await dlq.enqueue("t1", "hook", {"x": 1})
+    b = await dlq.enqueue("t2", "other", {"x": 2})
+
+    seen: list[tuple[Any, ...]] = []
+    original = redis.execute_command
+
+    async def execute_command(*args: Any, **kwargs: Any) -> Any:
+        if str(args[0]).upper() in {"EVALSHA", "EVAL"}:
+            seen.append(args)
+        return await original(*args, **kwargs)
+
+    redis.execute_command = execute_command
+    assert await dlq.quarantine_many([a.id, "missing", b.id]) == 2
+
+    (call,) = seen
+    numkeys = int(call[2])
+    assert list(call[3 : 3 + numkeys]) == [
+        f"dlq:msg:{a.id}",
+        "dlq:t1:hook:z",
+        "dlq:t1:hook:quarantine",
+        f"dlq:msg:{b.id}",
+        "dlq:t2:other:z",
+        "dlq:t2:other:quarantine",
+    ]
+    assert list(call[3 + numkeys :]) == [a.id, b.id]
+    assert await dlq.list_quarantine("t2", "other") == [b.id]